@@ -9,6 +9,8 @@ from typing import Dict, Any, Optional, Tuple, List
 from dataclasses import dataclass
 from enum import Enum
 
+from .screen_capture import Frame
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -120,7 +122,7 @@ class ActionExecutor:
                                            any(keyword in target.lower() for keyword in ['按钮', 'button', '图标', 'icon'])):
                 # 尝试AI定位
                 if self.visual_analyzer:
-                    screenshot = await self.computer_adapter.take_screenshot()
+                    screenshot = await self._capture(parameters)
                     location = await self.visual_analyzer.locate_element(target, screenshot)
                     if location:
                         x, y = location
@@ -166,6 +168,29 @@ class ActionExecutor:
                 error=str(e)
             )
     
+    async def _capture(self, parameters: Dict[str, Any]):
+        """采集当前画面：支持采集管线的适配器返回帧（可用 region 参数只采集目标区域），否则返回PNG字节"""
+        if hasattr(self.computer_adapter, "capture_frame"):
+            return await self.computer_adapter.capture_frame(self._parse_region(parameters.get("region")))
+        return await self.computer_adapter.take_screenshot()
+    
+    def _parse_region(self, region) -> Optional[Tuple[int, int, int, int]]:
+        """解析采集区域，支持 {"x","y","width","height"} 字典（与元素bbox相同）和 (x, y, width, height) 序列；
+        无法解析时返回None（整屏采集）"""
+        if not region:
+            return None
+        try:
+            if isinstance(region, dict):
+                region = (region["x"], region["y"], region["width"], region["height"])
+            elif isinstance(region, str):
+                region = region.split(",")
+            if len(region) != 4:
+                raise ValueError(f"需要4个值: {region}")
+            return tuple(int(round(float(v))) for v in region)
+        except Exception as e:
+            logger.warning(f"采集区域解析失败，改为整屏采集: {e}")
+            return None
+
     def _parse_coordinates(self, x, y) -> Tuple[int, int]:
         """解析坐标，支持多种格式"""
         try:
@@ -372,8 +397,8 @@ class ActionExecutor:
                     error="适配器未初始化"
                 )
             
-            # 先截图
-            screenshot = await self.computer_adapter.take_screenshot()
+            # 先截图（未变化区域的识别结果由采集管线复用）
+            screenshot = await self._capture(parameters)
             if not screenshot:
                 return ActionResult(
                     success=False,
@@ -421,8 +446,8 @@ class ActionExecutor:
                     error="适配器未初始化"
                 )
             
-            # 先截图
-            screenshot = await self.computer_adapter.take_screenshot()
+            # 先截图（未变化区域的识别结果由采集管线复用）
+            screenshot = await self._capture(parameters)
             if not screenshot:
                 return ActionResult(
                     success=False,
@@ -431,7 +456,11 @@ class ActionExecutor:
                 )
             
             # 分析屏幕
-            analysis = await self.visual_analyzer.analyze_screen(screenshot)
+            if isinstance(screenshot, Frame):
+                analysis = await self.visual_analyzer.analyze_frame(screenshot)
+            else:
+                analysis = await self.visual_analyzer.analyze_screenshot(screenshot)
+                analysis.setdefault("success", "error" not in analysis)
             
             if analysis.get("success"):
                 return ActionResult(
@@ -3,7 +3,6 @@
 提供鼠标键盘控制、屏幕截图、视觉分析等核心功能
 """
 
-import io
 import time
 import platform
 import logging
@@ -14,6 +13,8 @@ if 'nagaagent_core.vendors.pil' in sys.modules:
 from PIL import Image
 import asyncio
 
+from .screen_capture import CapturePipeline, Frame, FrameSource, PyAutoGUIFrameSource, Region
+
 # 尝试导入依赖包
 try:
     import nagaagent_core.vendors.pyautogui as pyautogui
@@ -34,11 +35,17 @@ except ImportError:
 # 配置日志
 logger = logging.getLogger(__name__)
 
+CAPTURE_TILE_SIZE = 64  # 变化检测与分析缓存的图块边长（逻辑像素）
+
 class ComputerUseAdapter:
     """电脑控制适配器，基于博弈论的实现"""
     
-    def __init__(self):
-        """初始化电脑控制适配器"""
+    def __init__(self, frame_source: Optional[FrameSource] = None):
+        """初始化电脑控制适配器
+
+        Args:
+            frame_source: 截屏来源，默认使用pyautogui；无界面测试时可传入合成帧源
+        """
         self.last_error: Optional[str] = None
         self.agent = None
         self.grounding_agent = None
@@ -55,10 +62,13 @@ class ComputerUseAdapter:
         self.scale_x = 1.0
         self.scale_y = 1.0
         
-        if PYAUTOGUI_AVAILABLE:
+        if frame_source is None and PYAUTOGUI_AVAILABLE:
+            frame_source = PyAutoGUIFrameSource(pyautogui)
+        
+        if frame_source is not None:
             try:
                 # 动态获取实际屏幕尺寸
-                self.screen_width, self.screen_height = pyautogui.size()
+                self.screen_width, self.screen_height = frame_source.size()
                 logger.info(f"实际屏幕尺寸: {self.screen_width}x{self.screen_height}")
                 
                 # 计算缩放尺寸（参考博弈论的scale_screen_dimensions函数）
@@ -74,6 +84,12 @@ class ComputerUseAdapter:
                 logger.warning(f"获取屏幕尺寸失败: {e}")
                 # 使用默认值
         
+        # 屏幕采集管线：原始帧常驻内存，截图只在需要时编码为PNG
+        self.capture = None
+        if frame_source is not None:
+            self.capture = CapturePipeline(frame_source, (self.scaled_width, self.scaled_height),
+                                           tile_size=CAPTURE_TILE_SIZE)
+        
         # 初始化组件
         self._init_components()
     
@@ -159,22 +175,33 @@ class ComputerUseAdapter:
             "platform": platform.system()
         }
     
-    async def take_screenshot(self) -> Optional[bytes]:
-        """截取屏幕截图"""
-        if not PYAUTOGUI_AVAILABLE:
+    async def capture_frame(self, region: Optional[Region] = None) -> Optional[Frame]:
+        """采集屏幕帧（逻辑尺寸的原始像素，不做PNG编码）
+        
+        Args:
+            region: 只采集的区域 (x, y, width, height)，逻辑坐标；None为整屏
+        """
+        if self.capture is None:
             return None
         
         try:
-            screenshot = pyautogui.screenshot()
-            # 基于博弈论的实现：将截图缩放到逻辑尺寸
-            screenshot = screenshot.resize((self.scaled_width, self.scaled_height), Image.LANCZOS)
-            buf = io.BytesIO()
-            screenshot.save(buf, format="PNG")
-            return buf.getvalue()
+            return self.capture.capture(region)
         except Exception as e:
             logger.error(f"截取屏幕截图失败: {e}")
             return None
     
+    async def take_screenshot(self, region: Optional[Region] = None) -> Optional[bytes]:
+        """截取屏幕截图，返回PNG字节（发给模型或调用方时使用）"""
+        frame = await self.capture_frame(region)
+        if frame is None:
+            return None
+        
+        try:
+            return frame.png()
+        except Exception as e:
+            logger.error(f"截图编码失败: {e}")
+            return None
+    
     def _scale_coordinates(self, x: int, y: int) -> Tuple[int, int]:
         """缩放坐标，将逻辑坐标转换为物理坐标"""
         scaled_x = int(round(x * self.scale_x))
@@ -0,0 +1,189 @@
+"""
+模板匹配定位器 - 在AI定位之前的本地定位层
+
+- 每次定位成功后，把元素（连同少量周边像素）裁剪为模板，按目标描述保存
+- 再次定位同一描述时，先在上次命中的位置附近验证，再在当前帧的图像金字塔上做多尺度模板匹配
+- 粗搜在1/2分辨率上进行，命中后回到原分辨率的小窗口内精确定位；金字塔按帧缓存，多个模板共用
+- 置信度达到阈值才返回，否则交给下一层（OCR / AI模型）
+"""
+
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Template:
+    """一个已确认的元素外观"""
+    __slots__ = ("gray", "hotspot", "last_location", "hits", "created_at")
+
+    def __init__(self, gray, hotspot: Tuple[int, int], location: Tuple[int, int]):
+        self.gray = gray  # 灰度模板
+        self.hotspot = hotspot  # 点击点在模板内的位置
+        self.last_location = location  # 上次命中时模板左上角在帧内的位置
+        self.hits = 0
+        self.created_at = time.monotonic()
+
+
+class TemplateLocator:
+    """按目标描述缓存元素模板的本地定位器
+
+    Args:
+        cv2, np: OpenCV 与 numpy 模块
+        threshold: 归一化相关系数阈值（TM_CCOEFF_NORMED）
+        scales: 相对保存时的缩放比例，应对缩放/DPI变化
+        margin: 裁剪模板时在元素外保留的像素，纯色按钮也能带上可区分的边缘
+    """
+
+    def __init__(self, cv2, np, threshold: float = 0.9, scales=(1.0, 0.9, 1.1, 0.8, 1.25),
+                 margin: int = 8, max_targets: int = 256, templates_per_target: int = 3, pyramid_cache: int = 4):
+        self.cv2 = cv2
+        self.np = np
+        self.threshold = threshold
+        self.scales = tuple(scales)
+        self.margin = margin
+        self.max_targets = max_targets
+        self.templates_per_target = templates_per_target
+        self.pyramid_cache = pyramid_cache
+        self._templates: "OrderedDict[str, List[_Template]]" = OrderedDict()
+        self._pyramids: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(target: str) -> str:
+        return re.sub(r"\s+", " ", target.strip().lower())
+
+    # ---------- 金字塔 ----------
+
+    def _pyramid(self, pixels, cache_key: Optional[Hashable]) -> Dict[str, Any]:
+        """当前帧的灰度图与1/2分辨率层，按帧缓存"""
+        if cache_key is not None and cache_key in self._pyramids:
+            self._pyramids.move_to_end(cache_key)
+            return self._pyramids[cache_key]
+        gray = self.cv2.cvtColor(pixels, self.cv2.COLOR_RGB2GRAY) if pixels.ndim == 3 else pixels
+        pyramid = {"full": gray, "half": self.cv2.pyrDown(gray)}
+        if cache_key is not None:
+            self._pyramids[cache_key] = pyramid
+            while len(self._pyramids) > self.pyramid_cache:
+                self._pyramids.popitem(last=False)
+        return pyramid
+
+    # ---------- 保存 ----------
+
+    def remember(self, target: str, pixels, location: Tuple[int, int],
+                 bbox: Optional[Tuple[int, int, int, int]] = None, cache_key: Optional[Hashable] = None,
+                 default_size: Tuple[int, int] = (96, 40)):
+        """保存已定位元素的模板
+
+        Args:
+            location: 点击点（帧内坐标）
+            bbox: 元素边界 (x, y, width, height)，未知时以点击点为中心取 default_size
+        """
+        gray = self._pyramid(pixels, cache_key)["full"]
+        height, width = gray.shape[:2]
+        if bbox is None:
+            w, h = default_size
+            bbox = (location[0] - w // 2, location[1] - h // 2, w, h)
+        x, y, w, h = bbox
+        x0, y0 = max(0, x - self.margin), max(0, y - self.margin)
+        x1, y1 = min(width, x + w + self.margin), min(height, y + h + self.margin)
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return
+        crop = gray[y0:y1, x0:x1].copy()
+        if float(crop.std()) < 2.0:
+            # 没有纹理的模板会与任何同色区域匹配
+            logger.debug(f"模板纹理不足，不保存: {target}")
+            return
+        key = self._key(target)
+        templates = self._templates.setdefault(key, [])
+        templates.insert(0, _Template(crop, (location[0] - x0, location[1] - y0), (x0, y0)))
+        del templates[self.templates_per_target:]
+        self._templates.move_to_end(key)
+        while len(self._templates) > self.max_targets:
+            self._templates.popitem(last=False)
+
+    def forget(self, target: str):
+        """丢弃目标的模板（例如点击后发现定位错误）"""
+        self._templates.pop(self._key(target), None)
+
+    # ---------- 匹配 ----------
+
+    def _match(self, image, template, origin=(0, 0)) -> Tuple[float, Tuple[int, int]]:
+        if image.shape[0] < template.shape[0] or image.shape[1] < template.shape[1]:
+            return -1.0, (0, 0)
+        result = self.cv2.matchTemplate(image, template, self.cv2.TM_CCOEFF_NORMED)
+        _, score, _, loc = self.cv2.minMaxLoc(result)
+        return float(score), (loc[0] + origin[0], loc[1] + origin[1])
+
+    def _refine(self, gray, template, around: Tuple[int, int], slack: int) -> Tuple[float, Tuple[int, int]]:
+        """在原分辨率的小窗口内精确匹配"""
+        x, y = around
+        th, tw = template.shape[:2]
+        x0, y0 = max(0, x - slack), max(0, y - slack)
+        x1, y1 = min(gray.shape[1], x + tw + slack), min(gray.shape[0], y + th + slack)
+        return self._match(gray[y0:y1, x0:x1], template, (x0, y0))
+
+    def _resize(self, image, scale: float):
+        if scale == 1.0:
+            return image
+        h, w = image.shape[:2]
+        return self.cv2.resize(image, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))),
+                               interpolation=self.cv2.INTER_AREA if scale < 1 else self.cv2.INTER_LINEAR)
+
+    def _locate_template(self, pyramid, template: _Template) -> Optional[Tuple[float, Tuple[int, int], float]]:
+        gray = pyramid["full"]
+        # 1. 上次命中的位置附近（界面未移动时最常见）
+        score, loc = self._refine(gray, template.gray, template.last_location, 4)
+        if score >= self.threshold:
+            return score, loc, 1.0
+        # 2. 在1/2分辨率层上做多尺度粗搜，再回到原分辨率精确定位
+        best = None
+        for scale in self.scales:
+            scaled = self._resize(template.gray, scale)
+            half = self._resize(scaled, 0.5)
+            if min(half.shape[:2]) >= 8:
+                coarse_score, coarse = self._match(pyramid["half"], half)
+                if coarse_score < self.threshold - 0.15:
+                    continue
+                score, loc = self._refine(gray, scaled, (coarse[0] * 2, coarse[1] * 2), 4)
+            else:
+                score, loc = self._match(gray, scaled)
+            if best is None or score > best[0]:
+                best = (score, loc, scale)
+            if score >= self.threshold:
+                break
+        if best is not None and best[0] >= self.threshold:
+            return best
+        return None
+
+    def locate(self, target: str, pixels, cache_key: Optional[Hashable] = None) -> Optional[Tuple[int, int, float]]:
+        """用已保存的模板定位目标，返回 (x, y, 置信度)（帧内坐标），未命中返回None"""
+        templates = self._templates.get(self._key(target))
+        if not templates:
+            self.misses += 1
+            return None
+        pyramid = self._pyramid(pixels, cache_key)
+        for template in templates:
+            found = self._locate_template(pyramid, template)
+            if found is None:
+                continue
+            score, (x, y), scale = found
+            template.last_location = (x, y)
+            template.hits += 1
+            self.hits += 1
+            return (x + int(round(template.hotspot[0] * scale)),
+                    y + int(round(template.hotspot[1] * scale)), score)
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "targets": len(self._templates),
+            "templates": sum(len(t) for t in self._templates.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
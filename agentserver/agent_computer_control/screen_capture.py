@@ -0,0 +1,358 @@
+"""
+屏幕采集管线 - 原始帧以numpy数组常驻内存，按图块哈希发现变化，OCR/元素检测结果按图块缓存
+
+- 帧只在API边界（发给模型、返回给调用方）才编码为PNG，且每帧最多编码一次
+- 每帧按固定大小图块计算内容哈希，与上一帧对比得到变化图块
+- OCR、元素检测只在变化区域上重新运行，未变化图块沿用上次结果；同样内容的区域再次出现时直接复用
+- 支持只采集目标区域；帧来源可替换为合成帧源，便于在无界面环境测试
+"""
+
+import hashlib
+import io
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+Tile = Tuple[int, int]  # (行, 列)
+Detector = Callable[[np.ndarray], List[Dict[str, Any]]]  # 输入RGB数组，输出带bbox的元素列表
+
+
+class FrameSource:
+    """帧来源：以物理像素返回RGB数组 (H, W, 3) uint8"""
+
+    def size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def grab(self, region: Optional[Region] = None) -> np.ndarray:
+        raise NotImplementedError
+
+
+class PyAutoGUIFrameSource(FrameSource):
+    """通过pyautogui截屏"""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def size(self) -> Tuple[int, int]:
+        width, height = self._backend.size()
+        return int(width), int(height)
+
+    def grab(self, region: Optional[Region] = None) -> np.ndarray:
+        image = self._backend.screenshot(region=region) if region else self._backend.screenshot()
+        return np.asarray(image.convert("RGB"))
+
+
+class SyntheticFrameSource(FrameSource):
+    """合成帧源：返回内存中的画面，供无界面测试和基准使用"""
+
+    def __init__(self, width: int = 1920, height: int = 1080, background=(236, 236, 236)):
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+        self.frame[:] = background
+        self.grab_count = 0
+
+    def size(self) -> Tuple[int, int]:
+        return self.frame.shape[1], self.frame.shape[0]
+
+    def fill(self, region: Region, color):
+        """把区域涂成纯色（模拟窗口、按钮等画面变化）"""
+        x, y, w, h = region
+        self.frame[y:y + h, x:x + w] = color
+
+    def grab(self, region: Optional[Region] = None) -> np.ndarray:
+        self.grab_count += 1
+        if region is None:
+            return self.frame.copy()
+        x, y, w, h = region
+        return self.frame[y:y + h, x:x + w].copy()
+
+
+class _RegionState:
+    """同一采集区域在相邻帧之间保留的状态"""
+
+    def __init__(self):
+        self.shape = None
+        self.hashes: Dict[Tile, bytes] = {}
+        self.latest_frame_id = 0
+        self.results: Dict[str, List[Dict[str, Any]]] = {}  # 分析类型 -> 上次结果（帧内坐标）
+        self.pending: Dict[str, Set[Tile]] = {}  # 分析类型 -> 上次分析后变化过的图块
+
+
+class Frame:
+    """一次采集得到的帧（逻辑坐标）"""
+
+    def __init__(self, pixels: np.ndarray, origin: Tuple[int, int], frame_id: int,
+                 dirty_tiles: Set[Tile], tile_size: int, state: _RegionState, pipeline: "CapturePipeline"):
+        self.pixels = pixels  # (H, W, 3) RGB uint8，调用方不得修改
+        self.origin = origin  # 帧左上角在逻辑屏幕上的位置
+        self.frame_id = frame_id
+        self.dirty_tiles = dirty_tiles  # 相对上一帧变化的图块
+        self.tile_size = tile_size
+        self.captured_at = time.monotonic()
+        self._state = state
+        self._pipeline = pipeline
+        self._png: Optional[bytes] = None
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.dirty_tiles)
+
+    def image(self):
+        """PIL图像视图"""
+        from PIL import Image
+        return Image.fromarray(self.pixels)
+
+    def png(self) -> bytes:
+        """PNG编码（仅在API边界调用，结果随帧缓存）"""
+        if self._png is None:
+            buf = io.BytesIO()
+            self.image().save(buf, format="PNG")
+            self._png = buf.getvalue()
+            self._pipeline.png_encodes += 1
+        return self._png
+
+    def analyze(self, kind: str, detector: Detector) -> List[Dict[str, Any]]:
+        """运行检测器，未变化区域复用缓存结果（见 CapturePipeline.analyze）"""
+        return self._pipeline.analyze(self, kind, detector)
+
+    def to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """帧内坐标转换为逻辑屏幕坐标"""
+        return x + self.origin[0], y + self.origin[1]
+
+
+class CapturePipeline:
+    """屏幕采集管线
+
+    Args:
+        source: 帧来源
+        logical_size: 逻辑屏幕尺寸，与物理尺寸不同时对采集结果缩放
+        tile_size: 变化检测与结果缓存的图块边长（逻辑像素）
+        cache_size: 按内容复用分析结果的区域条目数
+    """
+
+    def __init__(self, source: FrameSource, logical_size: Optional[Tuple[int, int]] = None,
+                 tile_size: int = 64, cache_size: int = 256, max_regions: int = 8):
+        self.source = source
+        self.physical_size = source.size()
+        self.logical_size = tuple(logical_size or self.physical_size)
+        self.tile_size = max(8, tile_size)
+        self.cache_size = cache_size
+        self.max_regions = max(1, max_regions)
+        self._states: "OrderedDict[Optional[Region], _RegionState]" = OrderedDict()
+        self._region_cache: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._frame_counter = 0
+        # 统计
+        self.captures = 0
+        self.dirty_tile_count = 0
+        self.total_tile_count = 0
+        self.detector_calls = 0
+        self.detector_pixels = 0
+        self.cache_hits = 0
+        self.png_encodes = 0
+
+    # ---------- 采集 ----------
+
+    def _to_physical(self, region: Region) -> Region:
+        sx = self.physical_size[0] / max(1, self.logical_size[0])
+        sy = self.physical_size[1] / max(1, self.logical_size[1])
+        x, y, w, h = region
+        return int(round(x * sx)), int(round(y * sy)), max(1, int(round(w * sx))), max(1, int(round(h * sy)))
+
+    def _resize(self, raw: np.ndarray, width: int, height: int) -> np.ndarray:
+        if raw.shape[1] == width and raw.shape[0] == height:
+            return raw
+        try:
+            import nagaagent_core.vendors.cv2 as cv2
+            return cv2.resize(raw, (width, height), interpolation=cv2.INTER_AREA)
+        except ImportError:
+            from PIL import Image
+            return np.asarray(Image.fromarray(raw).resize((width, height), Image.LANCZOS))
+
+    def _state(self, key: Optional[Region]) -> _RegionState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _RegionState()
+            while len(self._states) > self.max_regions:
+                self._states.popitem(last=False)
+        self._states.move_to_end(key)
+        return state
+
+    def _tile_hashes(self, pixels: np.ndarray) -> Dict[Tile, bytes]:
+        ts = self.tile_size
+        height, width = pixels.shape[:2]
+        return {
+            (r // ts, c // ts): hashlib.blake2b(pixels[r:r + ts, c:c + ts].tobytes(), digest_size=8).digest()
+            for r in range(0, height, ts) for c in range(0, width, ts)
+        }
+
+    def capture(self, region: Optional[Region] = None) -> Frame:
+        """采集整屏或指定区域（逻辑坐标），返回带变化图块信息的帧"""
+        if region is not None:
+            x, y, w, h = (int(v) for v in region)
+            x, y = max(0, x), max(0, y)
+            w, h = min(w, self.logical_size[0] - x), min(h, self.logical_size[1] - y)
+            if w <= 0 or h <= 0:
+                raise ValueError(f"采集区域超出屏幕范围: {region}")
+            region = (x, y, w, h)
+            raw = self.source.grab(self._to_physical(region))
+            pixels = self._resize(raw, w, h)
+            origin = (x, y)
+        else:
+            raw = self.source.grab(None)
+            pixels = self._resize(raw, *self.logical_size)
+            origin = (0, 0)
+        pixels.flags.writeable = False
+
+        state = self._state(region)
+        hashes = self._tile_hashes(pixels)
+        if state.shape != pixels.shape:
+            dirty = set(hashes)
+            state.results.clear()
+            state.pending.clear()
+        else:
+            dirty = {tile for tile, digest in hashes.items() if state.hashes.get(tile) != digest}
+        state.shape = pixels.shape
+        state.hashes = hashes
+        for pending in state.pending.values():
+            pending |= dirty
+
+        self._frame_counter += 1
+        state.latest_frame_id = self._frame_counter
+        self.captures += 1
+        self.dirty_tile_count += len(dirty)
+        self.total_tile_count += len(hashes)
+        return Frame(pixels, origin, self._frame_counter, dirty, self.tile_size, state, self)
+
+    # ---------- 分析 ----------
+
+    def _dirty_rects(self, dirty: Set[Tile], frame: Frame) -> List[Region]:
+        """把图块向外扩一圈后按连通块合并为矩形（帧内坐标）"""
+        rows = -(-frame.height // self.tile_size)
+        cols = -(-frame.width // self.tile_size)
+        grown = {(r + dr, c + dc) for r, c in dirty for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                 if 0 <= r + dr < rows and 0 <= c + dc < cols}
+        rects, seen = [], set()
+        for start in grown:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack, r0, c0, r1, c1 = [start], start[0], start[1], start[0], start[1]
+            while stack:
+                r, c = stack.pop()
+                r0, c0, r1, c1 = min(r0, r), min(c0, c), max(r1, r), max(c1, c)
+                for neighbor in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                    if neighbor in grown and neighbor not in seen:
+                        seen.add(neighbor)
+                        stack.append(neighbor)
+            x, y = c0 * self.tile_size, r0 * self.tile_size
+            rects.append((x, y, min((c1 + 1) * self.tile_size, frame.width) - x,
+                          min((r1 + 1) * self.tile_size, frame.height) - y))
+        # 变化面积过大时整帧分析一次，比多次分析小块更省
+        if sum(w * h for _, _, w, h in rects) > 0.6 * frame.width * frame.height:
+            return [(0, 0, frame.width, frame.height)]
+        return rects
+
+    def _tiles_of(self, element: Dict[str, Any]) -> Set[Tile]:
+        bbox = element["bbox"]
+        ts = self.tile_size
+        r0, r1 = bbox["y"] // ts, (bbox["y"] + max(1, bbox["height"]) - 1) // ts
+        c0, c1 = bbox["x"] // ts, (bbox["x"] + max(1, bbox["width"]) - 1) // ts
+        return {(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)}
+
+    def _touches(self, element: Dict[str, Any], tiles: Set[Tile]) -> bool:
+        return not tiles.isdisjoint(self._tiles_of(element))
+
+    def _detect(self, kind: str, pixels: np.ndarray, rect: Region, detector: Detector) -> List[Dict[str, Any]]:
+        """在区域上运行检测器；同样内容的区域直接复用上次结果"""
+        x, y, w, h = rect
+        crop = pixels[y:y + h, x:x + w]
+        key = (kind, w, h, hashlib.blake2b(crop.tobytes(), digest_size=16).digest())
+        found = self._region_cache.get(key)
+        if found is not None:
+            self._region_cache.move_to_end(key)
+            self.cache_hits += 1
+        else:
+            found = detector(np.ascontiguousarray(crop))
+            self.detector_calls += 1
+            self.detector_pixels += w * h
+            if self.cache_size > 0:
+                self._region_cache[key] = found
+                while len(self._region_cache) > self.cache_size:
+                    self._region_cache.popitem(last=False)
+        shifted = []
+        for element in found:
+            element = dict(element)
+            bbox = element["bbox"]
+            element["bbox"] = dict(bbox, x=bbox["x"] + x, y=bbox["y"] + y)
+            shifted.append(element)
+        return shifted
+
+    def analyze(self, frame: Frame, kind: str, detector: Detector) -> List[Dict[str, Any]]:
+        """对帧运行检测器（如 "ocr"、"elements"），只重新分析上次分析后变化的区域
+
+        返回的元素bbox为帧内坐标。
+        """
+        state = frame._state
+        full = (0, 0, frame.width, frame.height)
+        if frame.frame_id != state.latest_frame_id:
+            # 不是该区域最新的帧，缓存与其不对应
+            return self._detect(kind, frame.pixels, full, detector)
+
+        cached = state.results.get(kind)
+        dirty = state.pending.get(kind)
+        if cached is not None and not dirty:
+            return [dict(element) for element in cached]
+
+        if cached is None:
+            kept, covered, rects = [], None, [full]
+        else:
+            kept, covered = [], set(dirty)
+            for element in cached:
+                if self._touches(element, dirty):
+                    # 受影响的旧元素整体重新识别，避免被区域边界截断
+                    covered |= self._tiles_of(element)
+                else:
+                    kept.append(element)
+            rects = self._dirty_rects(covered, frame)
+
+        results, seen = kept, set()
+        for element in kept:
+            seen.add((tuple(sorted(element["bbox"].items())), element.get("text")))
+        for rect in rects:
+            for element in self._detect(kind, frame.pixels, rect, detector):
+                # 扩边区域里的未变化元素已在保留结果中；
+                # 落在重新识别范围内的都要保留（旧元素缩小后可能不再碰到变化图块）
+                if covered is not None and not self._touches(element, covered):
+                    continue
+                identity = (tuple(sorted(element["bbox"].items())), element.get("text"))
+                if identity not in seen:
+                    seen.add(identity)
+                    results.append(element)
+
+        results.sort(key=lambda e: (e["bbox"]["y"], e["bbox"]["x"]))
+        state.results[kind] = results
+        state.pending[kind] = set()
+        return [dict(element) for element in results]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "captures": self.captures,
+            "dirty_tile_ratio": round(self.dirty_tile_count / self.total_tile_count, 4) if self.total_tile_count else 0.0,
+            "detector_calls": self.detector_calls,
+            "detector_pixels": self.detector_pixels,
+            "cache_hits": self.cache_hits,
+            "png_encodes": self.png_encodes,
+        }
@@ -15,9 +15,14 @@ import base64
 import re
 import json
 
+from .screen_capture import Frame
+from .element_locator import TemplateLocator
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
+TEMPLATE_MATCH_THRESHOLD = 0.9  # 本地模板匹配的置信度阈值，低于该值才交给AI模型
+
 class VisualAnalyzer:
     """视觉分析器"""
     
@@ -26,6 +31,7 @@ class VisualAnalyzer:
         self.ocr_available = False
         self.image_matching_available = False
         self.ai_coordinate_available = False
+        self.locator: Optional[TemplateLocator] = None
         
         # 尝试导入OCR库
         try:
@@ -42,6 +48,7 @@ class VisualAnalyzer:
             self.cv2 = cv2
             self.np = np
             self.image_matching_available = True
+            self.locator = TemplateLocator(cv2, np, threshold=TEMPLATE_MATCH_THRESHOLD)
             logger.info("图像匹配功能已启用")
         except ImportError:
             logger.warning("opencv-python未安装，图像匹配功能不可用")
@@ -95,79 +102,130 @@ class VisualAnalyzer:
             return []
         
         try:
-            import nagaagent_core.vendors.pytesseract as pytesseract
-            
-            # 使用OCR提取文本和位置信息
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-            
-            text_elements = []
-            for i in range(len(data['text'])):
-                text = data['text'][i].strip()
-                if text:  # 只处理非空文本
-                    text_elements.append({
-                        "text": text,
-                        "confidence": data['conf'][i],
-                        "bbox": {
-                            "x": data['left'][i],
-                            "y": data['top'][i],
-                            "width": data['width'][i],
-                            "height": data['height'][i]
-                        }
-                    })
-            
-            return text_elements
-            
+            return self._ocr_image(image)
         except Exception as e:
             logger.error(f"OCR文本提取失败: {e}")
             return []
     
+    def _ocr_image(self, image: Image.Image) -> List[Dict[str, Any]]:
+        """对PIL图像运行OCR，返回带位置的文本元素"""
+        import nagaagent_core.vendors.pytesseract as pytesseract
+        
+        # 使用OCR提取文本和位置信息
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        
+        text_elements = []
+        for i in range(len(data['text'])):
+            text = data['text'][i].strip()
+            if text:  # 只处理非空文本
+                text_elements.append({
+                    "text": text,
+                    "confidence": data['conf'][i],
+                    "bbox": {
+                        "x": data['left'][i],
+                        "y": data['top'][i],
+                        "width": data['width'][i],
+                        "height": data['height'][i]
+                    }
+                })
+        
+        return text_elements
+    
+    def _ocr_pixels(self, pixels) -> List[Dict[str, Any]]:
+        """对RGB数组运行OCR（供采集管线按区域调用）"""
+        return self._ocr_image(Image.fromarray(pixels))
+    
     async def _detect_elements(self, image: Image.Image) -> List[Dict[str, Any]]:
         """检测图像中的元素"""
         if not self.image_matching_available:
             return []
         
         try:
-            # 转换为OpenCV格式
-            cv_image = self.cv2.cvtColor(self.np.array(image), self.cv2.COLOR_RGB2BGR)
-            
-            # 检测边缘
-            gray = self.cv2.cvtColor(cv_image, self.cv2.COLOR_BGR2GRAY)
-            edges = self.cv2.Canny(gray, 50, 150)
-            
-            # 查找轮廓
-            contours, _ = self.cv2.findContours(edges, self.cv2.RETR_EXTERNAL, self.cv2.CHAIN_APPROX_SIMPLE)
+            return self._detect_pixels(self.np.array(image.convert("RGB")))
+        except Exception as e:
+            logger.error(f"元素检测失败: {e}")
+            return []
+    
+    def _detect_pixels(self, pixels) -> List[Dict[str, Any]]:
+        """对RGB数组检测轮廓元素（供采集管线按区域调用）"""
+        # 检测边缘
+        gray = self.cv2.cvtColor(pixels, self.cv2.COLOR_RGB2GRAY)
+        edges = self.cv2.Canny(gray, 50, 150)
+        
+        # 查找轮廓
+        contours, _ = self.cv2.findContours(edges, self.cv2.RETR_EXTERNAL, self.cv2.CHAIN_APPROX_SIMPLE)
+        
+        elements = []
+        for contour in contours:
+            # 计算边界框
+            x, y, w, h = self.cv2.boundingRect(contour)
+            
+            # 过滤太小的元素
+            if w > 10 and h > 10:
+                elements.append({
+                    "type": "contour",
+                    "bbox": {"x": x, "y": y, "width": w, "height": h},
+                    "area": w * h
+                })
+        
+        return elements
+    
+    async def analyze_frame(self, frame: Frame) -> Dict[str, Any]:
+        """分析采集管线的帧：只对上次分析后变化的区域重新运行OCR和元素检测
+        
+        返回的bbox为帧内坐标，frame.to_screen 可换算为屏幕坐标。
+        """
+        try:
+            analysis_result = {
+                "success": True,
+                "image_size": (frame.width, frame.height),
+                "origin": frame.origin,
+                "dirty_tiles": len(frame.dirty_tiles),
+                "ocr_text": [],
+                "elements": []
+            }
             
-            elements = []
-            for contour in contours:
-                # 计算边界框
-                x, y, w, h = self.cv2.boundingRect(contour)
-                
-                # 过滤太小的元素
-                if w > 10 and h > 10:
-                    elements.append({
-                        "type": "contour",
-                        "bbox": {"x": x, "y": y, "width": w, "height": h},
-                        "area": w * h
-                    })
+            if self.ocr_available:
+                analysis_result["ocr_text"] = frame.analyze("ocr", self._ocr_pixels)
+            if self.image_matching_available:
+                analysis_result["elements"] = frame.analyze("elements", self._detect_pixels)
             
-            return elements
+            logger.info(f"屏幕分析完成: 识别到 {len(analysis_result['ocr_text'])} 个文本, "
+                        f"{len(analysis_result['elements'])} 个元素, 变化图块 {len(frame.dirty_tiles)} 个")
+            return analysis_result
             
         except Exception as e:
-            logger.error(f"元素检测失败: {e}")
-            return []
+            logger.error(f"屏幕分析失败: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "image_size": None,
+                "ocr_text": [],
+                "elements": []
+            }
     
-    async def find_text_element(self, screenshot: bytes, target_text: str) -> Optional[Tuple[int, int]]:
-        """查找包含指定文本的元素位置"""
+    async def find_text_element(self, screenshot, target_text: str) -> Optional[Tuple[int, int]]:
+        """查找包含指定文本的元素位置（screenshot 可以是PNG字节或采集管线的帧）"""
+        found = await self._find_text_bbox(screenshot, target_text)
+        return found[0] if found else None
+    
+    async def _find_text_bbox(self, screenshot, target_text: str):
+        """查找文本元素，返回 (屏幕坐标中心点, 帧内bbox)"""
         try:
-            analysis = await self.analyze_screenshot(screenshot)
+            if isinstance(screenshot, Frame):
+                analysis = await self.analyze_frame(screenshot)
+                origin = screenshot.origin
+            else:
+                analysis = await self.analyze_screenshot(screenshot)
+                origin = (0, 0)
             
             for text_element in analysis.get("ocr_text", []):
                 if target_text.lower() in text_element["text"].lower():
                     bbox = text_element["bbox"]
                     # 返回中心坐标
-                    center_x = bbox["x"] + bbox["width"] // 2
-                    center_y = bbox["y"] + bbox["height"] // 2
-                    return (center_x, center_y)
+                    center_x = bbox["x"] + bbox["width"] // 2 + origin[0]
+                    center_y = bbox["y"] + bbox["height"] // 2 + origin[1]
+                    return (center_x, center_y), (bbox["x"], bbox["y"], bbox["width"], bbox["height"])
             
             return None
             
@@ -175,7 +233,7 @@ class VisualAnalyzer:
             logger.error(f"查找文本元素失败: {e}")
             return None
     
-    async def find_image_element(self, screenshot: bytes, template_path: str) -> Optional[Tuple[int, int]]:
+    async def find_image_element(self, screenshot, template_path: str) -> Optional[Tuple[int, int]]:
         """查找图像模板匹配的元素位置"""
         if not self.image_matching_available:
             return None
@@ -187,9 +245,14 @@ class VisualAnalyzer:
                 logger.error(f"无法加载模板图像: {template_path}")
                 return None
             
-            # 加载屏幕截图
-            screen_image = Image.open(io.BytesIO(screenshot))
-            screen_cv = self.cv2.cvtColor(self.np.array(screen_image), self.cv2.COLOR_RGB2BGR)
+            # 加载屏幕截图（帧直接使用内存中的像素）
+            if isinstance(screenshot, Frame):
+                screen_cv = self.cv2.cvtColor(screenshot.pixels, self.cv2.COLOR_RGB2BGR)
+                origin = screenshot.origin
+            else:
+                screen_image = Image.open(io.BytesIO(screenshot))
+                screen_cv = self.cv2.cvtColor(self.np.array(screen_image), self.cv2.COLOR_RGB2BGR)
+                origin = (0, 0)
             
             # 模板匹配
             result = self.cv2.matchTemplate(screen_cv, template, self.cv2.TM_CCOEFF_NORMED)
@@ -198,8 +261,8 @@ class VisualAnalyzer:
             # 如果匹配度足够高
             if max_val > 0.8:
                 # 返回模板中心位置
-                center_x = max_loc[0] + template.shape[1] // 2
-                center_y = max_loc[1] + template.shape[0] // 2
+                center_x = max_loc[0] + template.shape[1] // 2 + origin[0]
+                center_y = max_loc[1] + template.shape[0] // 2 + origin[1]
                 return (center_x, center_y)
             
             return None
@@ -235,30 +298,17 @@ class VisualAnalyzer:
         使用AI定位屏幕元素
         支持自然语言描述定位界面元素
         """
+        located = await self._locate_with_ai(target_description, screenshot, screen_width, screen_height)
+        return located[0] if located else None
+    
+    async def _locate_with_ai(self, target_description: str, screenshot: bytes,
+                              screen_width: int = 1920, screen_height: int = 1080):
+        """AI定位，返回 (坐标, 边界框或None)"""
         if not self.ai_coordinate_available:
             logger.warning("AI坐标定位功能不可用")
             return None
         
         try:
-            from langchain_openai import ChatOpenAI
-            # 统一从系统配置读取视觉LLM参数
-            from system.config import config
-            cc = getattr(config, 'computer_control', None)
-            model = getattr(cc, 'model', None) or config.api.model
-            base_url = getattr(cc, 'model_url', None) or config.api.base_url
-            api_key = getattr(cc, 'api_key', None) or config.api.api_key
-            
-            # 初始化LLM
-            llm = ChatOpenAI(
-                model=model,
-                base_url=base_url,
-                api_key=api_key,
-                temperature=0
-            )
-            
-            # 将截图转换为base64
-            screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
-            
             # 构建AI定位提示词
             prompt = f"""
             请分析屏幕截图并定位目标元素: "{target_description}"
@@ -272,22 +322,14 @@ class VisualAnalyzer:
             """
             
             # 调用AI模型进行坐标定位
-            response = llm.invoke([
-                {
-                    "role": "user", 
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{screenshot_b64}"}}
-                    ]
-                }
-            ])
+            content = await self._query_vision_model(prompt, screenshot)
             
             # 解析AI返回的坐标
-            coordinates = self._parse_ai_coordinates(response.content, screen_width, screen_height)
+            coordinates = self._parse_ai_coordinates(content, screen_width, screen_height)
             
             if coordinates:
                 logger.info(f"AI定位成功: {target_description} -> {coordinates}")
-                return coordinates
+                return coordinates, self._parse_ai_bbox(content, screen_width, screen_height)
             else:
                 logger.warning(f"AI定位失败: {target_description}")
                 return None
@@ -296,6 +338,53 @@ class VisualAnalyzer:
             logger.error(f"AI坐标定位失败: {e}")
             return None
     
+    async def _query_vision_model(self, prompt: str, screenshot: bytes) -> str:
+        """把提示词和PNG截图发给视觉模型，返回回复文本"""
+        from langchain_openai import ChatOpenAI
+        # 统一从系统配置读取视觉LLM参数
+        from system.config import config
+        cc = getattr(config, 'computer_control', None)
+        model = getattr(cc, 'model', None) or config.api.model
+        base_url = getattr(cc, 'model_url', None) or config.api.base_url
+        api_key = getattr(cc, 'api_key', None) or config.api.api_key
+        
+        # 初始化LLM
+        llm = ChatOpenAI(
+            model=model,
+            base_url=base_url,
+            api_key=api_key,
+            temperature=0
+        )
+        
+        # 将截图转换为base64
+        screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
+        
+        response = llm.invoke([
+            {
+                "role": "user", 
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{screenshot_b64}"}}
+                ]
+            }
+        ])
+        return response.content
+    
+    def _parse_ai_bbox(self, response: str, screen_width: int, screen_height: int) -> Optional[Tuple[int, int, int, int]]:
+        """解析AI返回的边界框 [x1, y1, x2, y2]，换算为像素 (x, y, width, height)；没有边界框时返回None"""
+        bbox_match = re.search(r'\[([0-9.,\s]+)\]', response or "")
+        if not bbox_match:
+            return None
+        numbers = re.findall(r'-?\d+\.?\d*', bbox_match.group(1))
+        if len(numbers) < 4:
+            return None
+        x1, y1, x2, y2 = [float(n) for n in numbers[:4]]
+        if max(x1, y1, x2, y2) <= 1000:
+            x1, x2 = x1 / 1000.0 * screen_width, x2 / 1000.0 * screen_width
+            y1, y2 = y1 / 1000.0 * screen_height, y2 / 1000.0 * screen_height
+        x, y = int(round(min(x1, x2))), int(round(min(y1, y2)))
+        return x, y, max(1, int(round(abs(x2 - x1)))), max(1, int(round(abs(y2 - y1))))
+    
     def _parse_ai_coordinates(self, response: str, screen_width: int, screen_height: int) -> Optional[Tuple[int, int]]:
         """
         解析AI返回的坐标
@@ -356,23 +445,62 @@ class VisualAnalyzer:
             logger.error(f"坐标解析失败: {e}")
             return None
     
-    async def locate_element(self, target: str, screenshot: bytes) -> Optional[Tuple[int, int]]:
+    def _frame_pixels(self, screenshot):
+        """取得定位用的像素、金字塔缓存键和帧原点"""
+        if isinstance(screenshot, Frame):
+            return screenshot.pixels, ("frame", screenshot.frame_id), screenshot.origin
+        image = Image.open(io.BytesIO(screenshot)).convert("RGB")
+        return self.np.asarray(image), ("png", hash(screenshot)), (0, 0)
+    
+    def _remember_template(self, target: str, pixels, cache_key, origin, location, bbox=None):
+        """把刚定位到的元素保存为模板（坐标换算为帧内坐标）"""
+        x, y = location[0] - origin[0], location[1] - origin[1]
+        height, width = pixels.shape[:2]
+        if 0 <= x < width and 0 <= y < height:
+            try:
+                self.locator.remember(target, pixels, (x, y), bbox, cache_key)
+            except Exception as e:
+                logger.debug(f"保存元素模板失败: {e}")
+    
+    async def locate_element(self, target: str, screenshot) -> Optional[Tuple[int, int]]:
         """
-        智能元素定位，优先使用AI定位，回退到传统方法
-        多层次定位策略
+        智能元素定位：先用本地模板匹配之前定位过的同一目标，未命中再用AI定位，回退到传统方法
+        多层次定位策略；screenshot 可以是PNG字节或采集管线的帧
         """
         try:
-            # 首先尝试AI定位
+            pixels = None
+            if self.locator is not None:
+                pixels, cache_key, origin = self._frame_pixels(screenshot)
+                hit = self.locator.locate(target, pixels, cache_key)
+                if hit:
+                    x, y, score = hit
+                    logger.info(f"模板匹配定位成功: {target} -> ({x + origin[0]}, {y + origin[1]}), 置信度 {score:.3f}")
+                    return (x + origin[0], y + origin[1])
+            
+            # 其次尝试AI定位
             if self.ai_coordinate_available:
-                ai_result = await self.locate_element_with_ai(target, screenshot)
-                if ai_result:
-                    return ai_result
+                if isinstance(screenshot, Frame):
+                    # 只有发给模型时才编码为PNG
+                    located = await self._locate_with_ai(target, screenshot.png(),
+                                                         screenshot.width, screenshot.height)
+                    if located:
+                        located = (screenshot.to_screen(*located[0]), located[1])
+                else:
+                    located = await self._locate_with_ai(target, screenshot)
+                if located:
+                    location, bbox = located
+                    if pixels is not None:
+                        self._remember_template(target, pixels, cache_key, origin, location, bbox)
+                    return location
             
             # 回退到文本定位
             if self.ocr_available:
-                text_result = await self.find_text_element(screenshot, target)
-                if text_result:
-                    return text_result
+                found = await self._find_text_bbox(screenshot, target)
+                if found:
+                    location, bbox = found
+                    if pixels is not None:
+                        self._remember_template(target, pixels, cache_key, origin, location, bbox)
+                    return location
             
             # 回退到图像匹配（如果target是图像路径）
             if self.image_matching_available and target.endswith(('.png', '.jpg', '.jpeg')):
@@ -393,5 +521,6 @@ class VisualAnalyzer:
             "ocr_available": self.ocr_available,
             "image_matching_available": self.image_matching_available,
             "ai_coordinate_available": self.ai_coordinate_available,
+            "template_locator": self.locator.stats() if self.locator else None,
             "ready": self.ocr_available or self.image_matching_available or self.ai_coordinate_available
         }
\ No newline at end of file
@@ -6,6 +6,7 @@ NagaAgent独立服务 - 基于博弈论的电脑控制智能体
 """
 
 import asyncio
+import time
 import uuid
 import logging
 from typing import Dict, Any, Optional, List
@@ -16,9 +17,10 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from system.config import config
+from system.metrics import install_metrics, trace_headers
 from system.background_analyzer import get_background_analyzer
 from agentserver.agent_computer_control import ComputerControlAgent
-from agentserver.task_scheduler import get_task_scheduler, TaskStep
+from agentserver.task_scheduler import get_task_scheduler, run_task_graph, TaskStep, _TaskGraphError
 from agentserver.toolkit_manager import toolkit_manager
 
 # 配置日志
@@ -66,6 +68,7 @@ async def lifespan(app: FastAPI):
         logger.error(f"服务关闭失败: {e}")
 
 app = FastAPI(title="NagaAgent Computer Control Server", version="1.0.0", lifespan=lifespan)
+install_metrics(app, service="agent")
 
 class Modules:
     """全局模块管理器"""
@@ -108,60 +111,84 @@ async def _process_computer_control_task(instruction: str, session_id: Optional[
 
 async def _execute_agent_tasks_async(agent_calls: List[Dict[str, Any]], session_id: str, 
                                    analysis_session_id: str, request_id: str, callback_url: Optional[str] = None):
-    """异步执行Agent任务 - 应用与MCP服务器相同的会话管理逻辑"""
+    """异步执行Agent任务 - 应用与MCP服务器相同的会话管理逻辑
+
+    电脑控制任务共用同一套鼠标键盘，默认按顺序逐个执行（如先"打开应用"再"输入文字"）；
+    只有LLM输出显式给出 "id"/"depends_on"（依赖的agent_call id列表）时才按依赖图并发执行，
+    依赖图无效（id重复、依赖未知任务或循环依赖）时回退为顺序执行。
+    """
     try:
         logger.info(f"[异步执行] 开始执行 {len(agent_calls)} 个Agent任务")
         
-        # 处理每个Agent任务
-        results = []
-        for i, agent_call in enumerate(agent_calls):
+        graph_tasks = [
+            {
+                "id": str(agent_call.get("id") or f"step_{i+1}"),
+                "depends_on": agent_call.get("depends_on") or [],
+                "index": i,
+                "agent_call": agent_call
+            }
+            for i, agent_call in enumerate(agent_calls)
+        ]
+        explicit_graph = any("depends_on" in agent_call for agent_call in agent_calls)
+
+        async def _run_agent_call(task: Dict[str, Any], dep_results: Dict[str, Any]) -> Dict[str, Any]:
+            i = task["index"]
+            agent_call = task["agent_call"]
+            instruction = agent_call.get("instruction", "")
+            tool_name = agent_call.get("tool_name", "未知工具")
+            service_name = agent_call.get("service_name", "未知服务")
+            
+            logger.info(f"[异步执行] 执行任务 {i+1}/{len(agent_calls)}: {tool_name} - {instruction}")
+            
+            # 添加任务步骤到调度器
+            await Modules.task_scheduler.add_task_step(request_id, TaskStep(
+                step_id=f"step_{i+1}",
+                task_id=request_id,
+                purpose=f"执行Agent任务: {tool_name}",
+                content=instruction,
+                output="",
+                analysis=None,
+                success=True
+            ))
+            
+            # 执行电脑控制任务
+            result = await _process_computer_control_task(instruction, session_id)
+            
+            # 更新任务步骤结果
+            await Modules.task_scheduler.add_task_step(request_id, TaskStep(
+                step_id=f"step_{i+1}_result",
+                task_id=request_id,
+                purpose=f"任务结果: {tool_name}",
+                content=f"执行结果: {result.get('success', False)}",
+                output=str(result.get('result', '')),
+                analysis={"analysis": f"任务类型: {result.get('task_type', 'unknown')}, 工具: {tool_name}, 服务: {service_name}"},
+                success=result.get('success', False),
+                error=result.get('error')
+            ))
+            
+            logger.info(f"[异步执行] 任务 {i+1} 完成: {result.get('success', False)}")
+            return result
+
+        outcomes = None
+        if explicit_graph:
             try:
-                instruction = agent_call.get("instruction", "")
-                tool_name = agent_call.get("tool_name", "未知工具")
-                service_name = agent_call.get("service_name", "未知服务")
-                
-                logger.info(f"[异步执行] 执行任务 {i+1}/{len(agent_calls)}: {tool_name} - {instruction}")
-                
-                # 添加任务步骤到调度器
-                await Modules.task_scheduler.add_task_step(request_id, TaskStep(
-                    step_id=f"step_{i+1}",
-                    task_id=request_id,
-                    purpose=f"执行Agent任务: {tool_name}",
-                    content=instruction,
-                    output="",
-                    analysis=None,
-                    success=True
-                ))
-                
-                # 执行电脑控制任务
-                result = await _process_computer_control_task(instruction, session_id)
-                results.append({
-                    "agent_call": agent_call,
-                    "result": result,
-                    "step_index": i
-                })
-                
-                # 更新任务步骤结果
-                await Modules.task_scheduler.add_task_step(request_id, TaskStep(
-                    step_id=f"step_{i+1}_result",
-                    task_id=request_id,
-                    purpose=f"任务结果: {tool_name}",
-                    content=f"执行结果: {result.get('success', False)}",
-                    output=str(result.get('result', '')),
-                    analysis={"analysis": f"任务类型: {result.get('task_type', 'unknown')}, 工具: {tool_name}, 服务: {service_name}"},
-                    success=result.get('success', False),
-                    error=result.get('error')
-                ))
-                
-                logger.info(f"[异步执行] 任务 {i+1} 完成: {result.get('success', False)}")
-                
-            except Exception as e:
-                logger.error(f"[异步执行] 任务 {i+1} 执行失败: {e}")
-                results.append({
-                    "agent_call": agent_call,
-                    "result": {"success": False, "error": str(e)},
-                    "step_index": i
-                })
+                outcomes = await run_task_graph(
+                    graph_tasks, _run_agent_call, Modules.task_scheduler.config.max_parallel_tasks
+                )
+            except _TaskGraphError as e:
+                logger.warning(f"[异步执行] 任务依赖图无效，改为顺序执行: {e}")
+        if outcomes is None:
+            outcomes = await _run_agent_calls_in_order(graph_tasks, _run_agent_call)
+
+        results = []
+        for task, outcome in zip(graph_tasks, outcomes):
+            if not outcome["success"]:
+                logger.error(f"[异步执行] 任务 {task['index']+1} 执行失败: {outcome['error']}")
+            results.append({
+                "agent_call": task["agent_call"],
+                "result": outcome["result"] if outcome["success"] else {"success": False, "error": outcome["error"]},
+                "step_index": task["index"]
+            })
         
         # 发送回调通知（如果提供了回调URL）
         if callback_url:
@@ -175,6 +202,20 @@ async def _execute_agent_tasks_async(agent_calls: List[Dict[str, Any]], session_
         if callback_url:
             await _send_callback_notification(callback_url, request_id, session_id, analysis_session_id, [], str(e))
 
+async def _run_agent_calls_in_order(graph_tasks: List[Dict[str, Any]], executor) -> List[Dict[str, Any]]:
+    """按原顺序逐个执行，前一个失败不影响后续任务；结果格式与 run_task_graph 一致"""
+    outcomes = []
+    for task in graph_tasks:
+        started_at = time.time()
+        try:
+            outcome = {"id": task["id"], "success": True, "result": await executor(task, {})}
+        except Exception as e:
+            outcome = {"id": task["id"], "success": False, "error": str(e)}
+        outcome["started_at"] = started_at
+        outcome["finished_at"] = time.time()
+        outcomes.append(outcome)
+    return outcomes
+
 async def _send_callback_notification(callback_url: str, request_id: str, session_id: str, 
                                     analysis_session_id: str, results: List[Dict[str, Any]], error: Optional[str] = None):
     """发送回调通知 - 应用与MCP服务器相同的回调机制"""
@@ -191,7 +232,7 @@ async def _send_callback_notification(callback_url: str, request_id: str, sessio
             "completed_at": _now_iso()
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with httpx.AsyncClient(timeout=10.0, headers=trace_headers()) as client:
             response = await client.post(callback_url, json=callback_payload)
             if response.status_code == 200:
                 logger.info(f"[回调通知] Agent任务结果回调成功: {request_id}")
@@ -43,6 +43,21 @@ class TaskSchedulerConfig:
     enable_auto_compression: bool = True    # 是否启用自动压缩
     compression_timeout: int = 30           # 压缩超时时间（秒）
     max_compression_retries: int = 3        # 最大压缩重试次数
+    
+    # 并行执行
+    max_parallel_tasks: int = 4             # 无依赖任务的最大并发数
+    
+    # 记忆容量上限（超出后按最近最少使用淘汰）
+    max_sessions: int = 1000                # 最多保留的会话数
+    max_session_memory_bytes: int = 32 * 1024 * 1024  # 所有会话记忆内容的总大小上限
+    max_tasks: int = 5000                   # 任务注册表最多保留的任务数
+    max_tasks_per_session: int = 100        # 每个会话最多关联的任务数
+    max_key_facts: int = 500                # 全局关键事实上限
+    max_session_key_facts: int = 100        # 每个会话的关键事实上限
+    max_compressed_memories: int = 100      # 全局压缩记忆上限
+    max_session_compressed_memories: int = 20  # 每个会话的压缩记忆上限
+    max_failed_attempts: int = 500          # 全局失败尝试记录上限
+    max_session_failed_attempts: int = 100  # 每个会话的失败尝试记录上限
 
 # 默认任务调度器配置实例
 DEFAULT_TASK_SCHEDULER_CONFIG = TaskSchedulerConfig()
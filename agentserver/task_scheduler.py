@@ -7,7 +7,9 @@ import uuid  # 任务ID #
 import json  # JSON处理 #
 import logging  # 日志 #
 import time  # 时间处理 #
-from typing import Any, Dict, List, Optional, Union  # 类型标注 #
+import weakref  # 会话锁弱引用 #
+from collections import OrderedDict, deque  # 有界容器 #
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union  # 类型标注 #
 from dataclasses import dataclass, field  # 数据类 #
 from datetime import datetime, timedelta  # 时间处理 #
 
@@ -38,6 +40,168 @@ class CompressedMemory:
     source_steps: int  # 来源步骤数
     timestamp: float = field(default_factory=time.time)
 
+def _memory_size(value: Any) -> int:
+    """估算记忆内容大小（字符数）"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, CompressedMemory):
+        texts = value.key_findings + value.failed_attempts + value.next_steps + [value.current_status]
+        return sum(len(t) for t in texts)
+    return 0
+
+
+class _BoundedDict(OrderedDict):
+    """有界字典 - 超出容量时淘汰最早写入的项，并统计键值内容大小"""
+
+    def __init__(self, maxlen: int):
+        super().__init__()
+        self.maxlen = maxlen
+        self.size = 0
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.size -= _memory_size(key) + _memory_size(OrderedDict.__getitem__(self, key))
+        OrderedDict.__setitem__(self, key, value)
+        self.move_to_end(key)
+        self.size += _memory_size(key) + _memory_size(value)
+        while len(self) > self.maxlen:
+            self.popitem(last=False)
+
+    def __delitem__(self, key):
+        self.size -= _memory_size(key) + _memory_size(OrderedDict.__getitem__(self, key))
+        OrderedDict.__delitem__(self, key)
+
+    def popitem(self, last: bool = True):
+        key, value = OrderedDict.popitem(self, last)
+        self.size -= _memory_size(key) + _memory_size(value)
+        return key, value
+
+    def pop(self, key, *default):
+        if key in self:
+            value = OrderedDict.__getitem__(self, key)
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def clear(self):
+        OrderedDict.clear(self)
+        self.size = 0
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self)
+
+
+class _MemoryTier:
+    """有界压缩记忆列表 - 超出容量时丢弃最旧的记忆，并统计内容大小"""
+
+    def __init__(self, maxlen: int):
+        self._items: deque = deque()
+        self.maxlen = maxlen
+        self.size = 0
+
+    def append(self, memory: CompressedMemory) -> None:
+        self._items.append(memory)
+        self.size += _memory_size(memory)
+        while len(self._items) > self.maxlen:
+            self.size -= _memory_size(self._items.popleft())
+
+    def recent(self, count: int) -> List[CompressedMemory]:
+        """最近的count条记忆（按时间顺序）"""
+        if count <= 0:
+            return []
+        return list(self._items)[-count:]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+
+class _TaskGraphError(ValueError):
+    """任务依赖图错误（未知依赖或循环依赖）"""
+
+
+async def run_task_graph(tasks: List[Dict[str, Any]],
+                         executor: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]],
+                         max_parallel: int = 4) -> List[Dict[str, Any]]:
+    """按依赖关系并发执行任务（DAG），无依赖的任务最多max_parallel个同时运行
+
+    每个任务是一个字典，"id" 为任务标识，"depends_on" 为依赖的任务id列表。
+    executor(task, dep_results) 执行单个任务，dep_results 为 {依赖id: 结果}。
+    依赖失败的任务不会执行。返回与输入顺序一致的结果列表：
+    {"id", "success", "result" | "error", "started_at", "finished_at"}
+    """
+    if not tasks:
+        return []
+
+    ids = [str(t.get("id") or uuid.uuid4()) for t in tasks]
+    if len(set(ids)) != len(ids):
+        raise _TaskGraphError("任务id重复")
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    deps = []
+    for task_id, task in zip(ids, tasks):
+        task_deps = [str(d) for d in (task.get("depends_on") or [])]
+        unknown = [d for d in task_deps if d not in index]
+        if unknown:
+            raise _TaskGraphError(f"任务 {task_id} 依赖未知任务: {unknown}")
+        deps.append(task_deps)
+
+    # 检查循环依赖（Kahn拓扑排序）
+    indegree = [len(d) for d in deps]
+    dependents: Dict[str, List[int]] = {task_id: [] for task_id in ids}
+    for i, task_deps in enumerate(deps):
+        for d in task_deps:
+            dependents[d].append(i)
+    ready = [i for i, n in enumerate(indegree) if n == 0]
+    visited = 0
+    while ready:
+        i = ready.pop()
+        visited += 1
+        for j in dependents[ids[i]]:
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                ready.append(j)
+    if visited != len(ids):
+        raise _TaskGraphError("任务存在循环依赖")
+
+    loop = asyncio.get_running_loop()
+    done: Dict[str, asyncio.Future] = {task_id: loop.create_future() for task_id in ids}
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def _run(i: int) -> Dict[str, Any]:
+        task_id = ids[i]
+        dep_outcomes = [await done[d] for d in deps[i]]
+        failed = [o["id"] for o in dep_outcomes if not o["success"]]
+        if failed:
+            outcome = {"id": task_id, "success": False, "error": f"依赖任务失败: {failed}"}
+        else:
+            dep_results = {o["id"]: o.get("result") for o in dep_outcomes}
+            async with semaphore:
+                started_at = time.time()
+                try:
+                    result = await executor(tasks[i], dep_results)
+                    outcome = {"id": task_id, "success": True, "result": result}
+                except Exception as e:
+                    logger.error(f"[任务图] 任务 {task_id} 执行失败: {e}")
+                    outcome = {"id": task_id, "success": False, "error": str(e)}
+                outcome["started_at"] = started_at
+                outcome["finished_at"] = time.time()
+        done[task_id].set_result(outcome)
+        return outcome
+
+    return list(await asyncio.gather(*(_run(i) for i in range(len(ids)))))
+
+
 class _TaskScheduler:
     """通用任务调度器 - 融合智能记忆管理"""
 
@@ -50,23 +214,113 @@ class _TaskScheduler:
         self.config = config
         
         # 基础任务管理
-        self.task_registry: Dict[str, Dict[str, Any]] = {}  # 任务注册表
-        self._lock = asyncio.Lock()  # 并发锁
+        self.task_registry: Dict[str, Dict[str, Any]] = OrderedDict()  # 任务注册表（按创建顺序，超限淘汰最旧的已结束任务）
+        self._lock = asyncio.Lock()  # 全局结构锁（注册表/会话表，临界区内不等待外部调用）
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()  # 会话锁
         
         # 智能记忆管理
         self.max_steps = config.max_steps  # 最大保存步骤数
         self.compression_threshold = config.compression_threshold  # 压缩阈值
         self.keep_last_steps = config.keep_last_steps  # 压缩后保留步骤数
         self.task_steps: Dict[str, List[TaskStep]] = {}  # 任务步骤历史
-        self.compressed_memories: List[CompressedMemory] = []  # 压缩记忆
-        self.key_facts: Dict[str, str] = {}  # 关键事实存储
-        self.failed_attempts: Dict[str, int] = {}  # 失败尝试计数
+        self.compressed_memories = _MemoryTier(config.max_compressed_memories)  # 压缩记忆
+        self.key_facts = _BoundedDict(config.max_key_facts)  # 关键事实存储
+        self.failed_attempts = _BoundedDict(config.max_failed_attempts)  # 失败尝试计数
         self.llm_config: Optional[Dict[str, Any]] = None  # LLM配置
         
-        # 会话级别的记忆管理 - 新增功能
-        self.session_memories: Dict[str, Dict[str, Any]] = {}  # 会话记忆：session_id -> {tasks, compressed_memories, key_facts}
+        # 会话级别的记忆管理 - 按最近活动排序，超出数量或总大小时淘汰最久未活动的会话
+        self.session_memories: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # 会话记忆：session_id -> {tasks, compressed_memories, key_facts}
         self.session_task_mapping: Dict[str, str] = {}  # 任务ID到会话ID的映射
-        self.analysis_session_mapping: Dict[str, str] = {}  # 分析会话ID到原始会话ID的映射
+        self.analysis_session_mapping = _BoundedDict(config.max_sessions)  # 分析会话ID到原始会话ID的映射
+
+    # ============ 锁与容量管理 ============
+
+    def _lock_for(self, task_id: str) -> asyncio.Lock:
+        """获取任务所属会话的锁（无会话的任务按任务加锁），不同会话互不阻塞"""
+        key = self.session_task_mapping.get(task_id) or f"task:{task_id}"
+        lock = self._session_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[key] = lock
+        return lock
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        """获取会话锁"""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+
+    @staticmethod
+    def _session_size(session_memory: Dict[str, Any]) -> int:
+        return (session_memory["key_facts"].size
+                + session_memory["compressed_memories"].size
+                + session_memory["failed_attempts"].size)
+
+    def _new_session_memory(self) -> Dict[str, Any]:
+        return {
+            "tasks": [],
+            "compressed_memories": _MemoryTier(self.config.max_session_compressed_memories),
+            "key_facts": _BoundedDict(self.config.max_session_key_facts),
+            "failed_attempts": _BoundedDict(self.config.max_session_failed_attempts),
+            "created_at": time.time(),
+            "last_activity": time.time()
+        }
+
+    def _touch_session(self, session_id: str) -> None:
+        """更新会话活动时间并移到LRU末尾"""
+        self.session_memories[session_id]["last_activity"] = time.time()
+        self.session_memories.move_to_end(session_id)
+
+    def _drop_task(self, task_id: str) -> None:
+        """移除任务的注册信息和步骤"""
+        self.task_registry.pop(task_id, None)
+        self.task_steps.pop(task_id, None)
+        self.session_task_mapping.pop(task_id, None)
+
+    def _drop_session(self, session_id: str) -> None:
+        """移除会话及其任务"""
+        session_memory = self.session_memories.pop(session_id, None)
+        if session_memory is None:
+            return
+        for task_id in session_memory["tasks"]:
+            self._drop_task(task_id)
+        for analysis_id in [a for a, s in self.analysis_session_mapping.items() if s == session_id]:
+            del self.analysis_session_mapping[analysis_id]
+
+    def _enforce_limits(self) -> None:
+        """按LRU淘汰超出数量或大小上限的会话和任务"""
+        total_size = sum(self._session_size(m) for m in self.session_memories.values())
+        while self.session_memories and (
+            len(self.session_memories) > self.config.max_sessions
+            or total_size > self.config.max_session_memory_bytes
+        ):
+            session_id, session_memory = next(iter(self.session_memories.items()))
+            total_size -= self._session_size(session_memory)
+            self._drop_session(session_id)
+            logger.debug(f"[会话记忆] 淘汰最久未活动的会话: {session_id}")
+
+        if len(self.task_registry) > self.config.max_tasks:
+            for task_id in list(self.task_registry.keys()):
+                if len(self.task_registry) <= self.config.max_tasks:
+                    break
+                if self.task_registry[task_id].get("status") != "running":
+                    self._drop_task(task_id)
+
+    def get_memory_usage(self) -> Dict[str, Any]:
+        """获取记忆占用统计"""
+        return {
+            "sessions": len(self.session_memories),
+            "session_memory_size": sum(self._session_size(m) for m in self.session_memories.values()),
+            "tasks": len(self.task_registry),
+            "task_steps": sum(len(steps) for steps in self.task_steps.values()),
+            "key_facts": len(self.key_facts),
+            "key_facts_size": self.key_facts.size,
+            "compressed_memories": len(self.compressed_memories),
+            "compressed_memories_size": self.compressed_memories.size,
+            "failed_attempts": len(self.failed_attempts),
+        }
 
     def set_llm_config(self, config: Dict[str, Any]) -> None:
         """设置LLM配置用于智能压缩"""
@@ -101,25 +355,23 @@ class _TaskScheduler:
                 
                 # 初始化会话记忆（如果不存在）
                 if session_id not in self.session_memories:
-                    self.session_memories[session_id] = {
-                        "tasks": [],
-                        "compressed_memories": [],
-                        "key_facts": {},
-                        "failed_attempts": {},
-                        "created_at": time.time(),
-                        "last_activity": time.time()
-                    }
+                    self.session_memories[session_id] = self._new_session_memory()
                 
-                # 将会话记忆与任务关联
-                self.session_memories[session_id]["tasks"].append(task_id)
-                self.session_memories[session_id]["last_activity"] = time.time()
-            
+                # 将会话记忆与任务关联，超出每会话上限时移除最旧的任务
+                session_tasks = self.session_memories[session_id]["tasks"]
+                if task_id not in session_tasks:
+                    session_tasks.append(task_id)
+                while len(session_tasks) > self.config.max_tasks_per_session:
+                    self._drop_task(session_tasks.pop(0))
+                self._touch_session(session_id)
+            
+            self._enforce_limits()
             logger.info(f"[任务创建] 创建任务: {task_id}, 目的: {purpose}, 会话: {session_id}, 分析会话: {analysis_session_id}")
             return task_id
 
     async def add_task_step(self, task_id: str, step: TaskStep) -> None:
         """添加任务步骤到历史记录，并更新会话级别的记忆管理"""
-        async with self._lock:
+        async with self._lock_for(task_id):
             if task_id not in self.task_steps:
                 self.task_steps[task_id] = []
             
@@ -146,7 +398,7 @@ class _TaskScheduler:
                     session_failed[step.content] = session_failed.get(step.content, 0) + 1
                 
                 # 更新会话活动时间
-                self.session_memories[session_id]["last_activity"] = time.time()
+                self._touch_session(session_id)
             
             # 检查是否需要压缩记忆
             if len(self.task_steps[task_id]) >= self.compression_threshold:
@@ -218,6 +470,10 @@ class _TaskScheduler:
             )
             self.compressed_memories.append(error_memory)
         
+        if task_id not in self.task_steps:
+            # 压缩期间任务已被淘汰
+            return
+        
         # 清空历史记录，保留最后几步
         keep_last = min(self.keep_last_steps, len(self.task_steps[task_id]))
         self.task_steps[task_id] = self.task_steps[task_id][-keep_last:]
@@ -269,7 +525,9 @@ class _TaskScheduler:
             import litellm
             litellm.enable_json_schema_validation = True
             
-            response = litellm.completion(
+            # 在线程中执行同步调用，避免阻塞事件循环
+            response = await asyncio.to_thread(
+                litellm.completion,
                 model=self.llm_config["model"],
                 api_key=self.llm_config["api_key"],
                 api_base=self.llm_config["api_base"],
@@ -289,13 +547,26 @@ class _TaskScheduler:
                 "next_steps": ["检查LLM配置"]
             }
 
-    async def schedule_parallel_execution(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """并行调度执行给定任务列表，返回结果列表"""
+    async def schedule_parallel_execution(self, tasks: List[Dict[str, Any]],
+                                          executor: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]] = None,
+                                          max_parallel: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按依赖关系并行调度执行任务列表，返回与输入顺序一致的结果列表
+
+        任务字典可包含 "id"、"depends_on"（依赖的任务id列表）、"type"、"params"、"purpose"；
+        executor(task, dep_results) 为实际执行器，未提供时只登记任务不做实际执行。
+        """
         if not tasks:
             return []
 
-        async def _run_task(task: Dict[str, Any]) -> Dict[str, Any]:
-            task_id = task.get("id") or str(uuid.uuid4())
+        tasks = [dict(t, id=t.get("id") or str(uuid.uuid4())) for t in tasks]
+
+        async def _noop_executor(task: Dict[str, Any], dep_results: Dict[str, Any]) -> Any:
+            return None
+
+        run = executor or _noop_executor
+
+        async def _run_task(task: Dict[str, Any], dep_results: Dict[str, Any]) -> Dict[str, Any]:
+            task_id = task["id"]
             async with self._lock:
                 self.task_registry[task_id] = {
                     "id": task_id,
@@ -303,53 +574,44 @@ class _TaskScheduler:
                     "status": "running",
                     "params": task.get("params") or {},
                     "context": task.get("context"),
+                    "depends_on": list(task.get("depends_on") or []),
                     "created_at": time.time()
                 }
+                self._enforce_limits()
 
+            step = TaskStep(
+                step_id=str(uuid.uuid4()),
+                task_id=task_id,
+                purpose=task.get("purpose", "执行任务"),
+                content=str(task.get("params", {}))
+            )
             try:
-                # 创建任务步骤记录
-                step = TaskStep(
-                    step_id=str(uuid.uuid4()),
-                    task_id=task_id,
-                    purpose=task.get("purpose", "执行任务"),
-                    content=str(task.get("params", {})),
-                    success=True
-                )
-                
-                # 占位执行：此处可接入真实执行器
-                await asyncio.sleep(0)
-                result = {
-                    "success": True,
-                    "result": None,
-                    "task_type": self.task_registry[task_id]["type"],
-                }
-                
+                result = await run(task, dep_results)
                 step.output = str(result)
                 await self.add_task_step(task_id, step)
-                
-                return result
+                return {
+                    "success": True,
+                    "result": result,
+                    "task_type": task.get("type") or "processor",
+                }
             except Exception as e:
                 # 记录失败的步骤
-                step = TaskStep(
-                    step_id=str(uuid.uuid4()),
-                    task_id=task_id,
-                    purpose=task.get("purpose", "执行任务"),
-                    content=str(task.get("params", {})),
-                    success=False,
-                    error=str(e)
-                )
+                step.success = False
+                step.error = str(e)
                 await self.add_task_step(task_id, step)
-                
-                return {"success": False, "error": str(e)}
+                raise
             finally:
-                async with self._lock:
-                    entry = self.task_registry.get(task_id)
-                    if entry is not None:
-                        entry["status"] = "completed"
-                        entry["completed_at"] = time.time()
-
-        coros = [_run_task(t) for t in tasks]
-        return await asyncio.gather(*coros, return_exceptions=False)
+                entry = self.task_registry.get(task_id)
+                if entry is not None:
+                    entry["status"] = "completed"
+                    entry["completed_at"] = time.time()
+
+        width = max_parallel or self.config.max_parallel_tasks
+        outcomes = await run_task_graph(tasks, _run_task, width)
+        return [
+            outcome["result"] if outcome["success"] else {"success": False, "error": outcome["error"]}
+            for outcome in outcomes
+        ]
 
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """查询指定任务状态"""
@@ -363,7 +625,7 @@ class _TaskScheduler:
 
     async def get_task_memory_summary(self, task_id: str, include_key_facts: bool = True) -> str:
         """获取任务记忆摘要"""
-        async with self._lock:
+        async with self._lock_for(task_id):
             summary = ""
             
             # 1. 关键事实摘要
@@ -377,7 +639,7 @@ class _TaskScheduler:
             # 2. 压缩记忆摘要
             if self.compressed_memories:
                 summary += "压缩记忆块:\n"
-                for i, mem in enumerate(self.compressed_memories[-self.config.compressed_memory_summary_limit:]):  # 显示最近压缩块
+                for i, mem in enumerate(self.compressed_memories.recent(self.config.compressed_memory_summary_limit)):  # 显示最近压缩块
                     summary += f"记忆块 #{len(self.compressed_memories)-i}:\n"
                     summary += f"- 状态: {mem.current_status}\n"
                     summary += f"- 关键发现: {', '.join(mem.key_findings[:self.config.key_findings_display_limit])}"
@@ -454,7 +716,7 @@ class _TaskScheduler:
             # 最近活动
             if self.compressed_memories:
                 summary += "最近压缩记忆:\n"
-                for mem in self.compressed_memories[-self.config.compressed_memory_global_limit:]:  # 最近压缩记忆
+                for mem in self.compressed_memories.recent(self.config.compressed_memory_global_limit):  # 最近压缩记忆
                     summary += f"- {mem.current_status} (基于{mem.source_steps}步骤)\n"
                     if mem.key_findings:
                         summary += f"  关键发现: {mem.key_findings[0]}\n"
@@ -493,7 +755,7 @@ class _TaskScheduler:
     
     async def get_session_memory_summary(self, session_id: str) -> Dict[str, Any]:
         """获取会话记忆摘要"""
-        async with self._lock:
+        async with self._session_lock(session_id):
             if session_id not in self.session_memories:
                 return {"error": f"会话 {session_id} 不存在"}
             
@@ -517,7 +779,7 @@ class _TaskScheduler:
                         "current_status": mem.current_status,
                         "source_steps": mem.source_steps
                     }
-                    for mem in session_memory["compressed_memories"][-3:]  # 最近3个压缩记忆
+                    for mem in session_memory["compressed_memories"].recent(3)  # 最近3个压缩记忆
                 ],
                 "failed_attempts": dict(list(session_memory["failed_attempts"].items())[-5:])  # 最近5个失败尝试
             }
@@ -526,7 +788,7 @@ class _TaskScheduler:
     
     async def get_session_compressed_memories(self, session_id: str) -> List[Dict[str, Any]]:
         """获取会话的压缩记忆"""
-        async with self._lock:
+        async with self._session_lock(session_id):
             if session_id not in self.session_memories:
                 return []
             
@@ -545,7 +807,7 @@ class _TaskScheduler:
     
     async def get_session_key_facts(self, session_id: str) -> Dict[str, str]:
         """获取会话的关键事实"""
-        async with self._lock:
+        async with self._session_lock(session_id):
             if session_id not in self.session_memories:
                 return {}
             
@@ -553,7 +815,7 @@ class _TaskScheduler:
     
     async def get_session_failed_attempts(self, session_id: str) -> Dict[str, int]:
         """获取会话的失败尝试"""
-        async with self._lock:
+        async with self._session_lock(session_id):
             if session_id not in self.session_memories:
                 return {}
             
@@ -580,25 +842,8 @@ class _TaskScheduler:
             if session_id not in self.session_memories:
                 return False
             
-            # 清除会话相关的任务
-            for task_id in self.session_memories[session_id]["tasks"]:
-                if task_id in self.task_steps:
-                    del self.task_steps[task_id]
-                if task_id in self.task_registry:
-                    del self.task_registry[task_id]
-                if task_id in self.session_task_mapping:
-                    del self.session_task_mapping[task_id]
-            
-            # 清除会话记忆
-            del self.session_memories[session_id]
-            
-            # 清除分析会话映射
-            analysis_sessions_to_remove = [
-                analysis_id for analysis_id, orig_session_id in self.analysis_session_mapping.items()
-                if orig_session_id == session_id
-            ]
-            for analysis_id in analysis_sessions_to_remove:
-                del self.analysis_session_mapping[analysis_id]
+            # 清除会话相关的任务、会话记忆和分析会话映射
+            self._drop_session(session_id)
             
             logger.info(f"已清除会话 {session_id} 的所有记忆")
             return True
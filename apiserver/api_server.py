@@ -53,6 +53,7 @@ except ImportError:
     from system.config import config, AI_NAME  # 使用新的配置系统
     from system.config import get_prompt  # 导入提示词仓库
 from ui.utils.response_util import extract_message  # 导入消息提取工具
+from system.metrics import install_metrics, trace_headers  # 指标与链路追踪
 
 # 对话核心功能已集成到apiserver
 
@@ -100,8 +101,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# 挂载指标中间件与 /metrics 接口
+install_metrics(app, service="api")
+
 # 挂载静态文件
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
@@ -792,7 +797,7 @@ async def _trigger_chat_stream_no_intent(session_id: str, response_text: str):
         from system.config import get_server_port
         api_url = f"http://localhost:{get_server_port('api_server')}/chat/stream"
 
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(headers=trace_headers()) as client:
             async with client.stream("POST", api_url, json=chat_request) as response:
                 if response.status_code == 200:
                     # 处理流式响应，包括TTS切割
@@ -826,7 +831,7 @@ async def _notify_ui_refresh(session_id: str, response_text: str):
         from system.config import get_server_port
         api_url = f"http://localhost:{get_server_port('api_server')}/ui_notification"
 
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with httpx.AsyncClient(timeout=5.0, headers=trace_headers()) as client:
             response = await client.post(api_url, json=ui_notification_payload)
             if response.status_code == 200:
                 logger.info(f"[UI通知] AI回复显示通知发送成功: {session_id}")
@@ -858,7 +863,7 @@ async def _send_ai_response_directly(session_id: str, response_text: str):
         from system.config import get_server_port
         api_url = f"http://localhost:{get_server_port('api_server')}/chat"
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with httpx.AsyncClient(timeout=10.0, headers=trace_headers()) as client:
             response = await client.post(api_url, json=chat_request)
             if response.status_code == 200:
                 logger.info(f"[直接发送] AI回复已通过非流式接口发送到UI: {session_id}")
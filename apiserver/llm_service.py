@@ -7,6 +7,7 @@ LLM服务模块
 import logging
 import sys
 import os
+import time
 from typing import Optional, Dict, Any, List
 
 # 添加项目根目录到Python路径
@@ -15,10 +16,20 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from nagaagent_core.core import AsyncOpenAI
 from nagaagent_core.api import FastAPI, HTTPException
 from system.config import config
+from system.metrics import LLM_LATENCY, LLM_TTFT, LLM_TOKENS, LLM_ERRORS
 
 # 配置日志
 logger = logging.getLogger("LLMService")
 
+
+def _record_usage(response, mode: str):
+    """记录非流式调用返回的token用量"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, mode=mode, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, mode=mode, kind="completion")
+
 class LLMService:
     """LLM服务类 - 提供统一的LLM调用接口"""
     
@@ -45,6 +56,7 @@ class LLMService:
             if not self.async_client:
                 return f"LLM服务不可用: 客户端初始化失败"
         
+        start = time.perf_counter()
         try:
             response = await self.async_client.chat.completions.create(
                 model=config.api.model,
@@ -52,6 +64,8 @@ class LLMService:
                 temperature=temperature,
                 max_tokens=config.api.max_tokens
             )
+            LLM_LATENCY.observe(time.perf_counter() - start, mode="prompt")
+            _record_usage(response, "prompt")
             return response.choices[0].message.content
         except RuntimeError as e:
             if "handler is closed" in str(e):
@@ -69,9 +83,11 @@ class LLMService:
                 else:
                     return f"LLM服务不可用: 重连失败"
             else:
+                LLM_ERRORS.inc(mode="prompt")
                 logger.error(f"API调用失败: {e}")
                 return f"API调用出错: {str(e)}"
         except Exception as e:
+            LLM_ERRORS.inc(mode="prompt")
             logger.error(f"API调用失败: {e}")
             return f"API调用出错: {str(e)}"
     
@@ -86,6 +102,7 @@ class LLMService:
             if not self.async_client:
                 return f"LLM服务不可用: 客户端初始化失败"
         
+        start = time.perf_counter()
         try:
             response = await self.async_client.chat.completions.create(
                 model=config.api.model,
@@ -93,8 +110,11 @@ class LLMService:
                 temperature=temperature,
                 max_tokens=config.api.max_tokens
             )
+            LLM_LATENCY.observe(time.perf_counter() - start, mode="chat")
+            _record_usage(response, "chat")
             return response.choices[0].message.content
         except Exception as e:
+            LLM_ERRORS.inc(mode="chat")
             logger.error(f"上下文聊天调用失败: {e}")
             return f"聊天调用出错: {str(e)}"
     
@@ -106,6 +126,9 @@ class LLMService:
                 yield f"LLM服务不可用: 客户端初始化失败"
                 return
         
+        start = time.perf_counter()
+        first_token_at = None
+        completion_chunks = 0
         try:
             import aiohttp
             timeout = aiohttp.ClientTimeout(total=180, connect=60, sock_read=120)
@@ -127,6 +150,7 @@ class LLMService:
                     }
                 ) as resp:
                     if resp.status != 200:
+                        LLM_ERRORS.inc(mode="stream")
                         yield f"LLM API调用失败 (状态码: {resp.status})"
                         return
                     
@@ -149,6 +173,10 @@ class LLMService:
                                             delta = data['choices'][0].get('delta', {})
                                             if 'content' in delta:
                                                 import base64
+                                                if first_token_at is None:
+                                                    first_token_at = time.perf_counter()
+                                                    LLM_TTFT.observe(first_token_at - start)
+                                                completion_chunks += 1
                                                 content = delta['content']
                                                 b64 = base64.b64encode(content.encode('utf-8')).decode('ascii')
                                                 yield f"data: {b64}\n\n"
@@ -157,8 +185,13 @@ class LLMService:
                         except UnicodeDecodeError:
                             continue
         except Exception as e:
+            LLM_ERRORS.inc(mode="stream")
             logger.error(f"流式聊天调用失败: {e}")
             yield f"data: 流式调用出错: {str(e)}\n\n"
+        finally:
+            if first_token_at is not None:
+                LLM_LATENCY.observe(time.perf_counter() - start, mode="stream")
+                LLM_TOKENS.inc(completion_chunks, mode="stream", kind="completion")
 
 # 全局LLM服务实例
 _llm_service: Optional[LLMService] = None
@@ -9,8 +9,10 @@ import re
 import json
 import logging
 import asyncio
+import queue
 import sys
 import os
+import threading
 from typing import Callable, Optional, Dict, Any, Union, List
 
 # 添加项目根目录到Python路径
@@ -27,6 +29,80 @@ except ImportError:
 
 logger = logging.getLogger("StreamingToolCallExtractor")
 
+# 断句标点（预编译，单次扫描定位句末）
+SENTENCE_ENDINGS = "。？！；.?!;"
+_SENTENCE_END_RE = re.compile("[" + re.escape(SENTENCE_ENDINGS) + "]")
+
+
+class _VoiceDispatcher:
+    """语音分发器 - 单个常驻线程 + 有界队列，按顺序把句子交给语音集成"""
+
+    def __init__(self, maxsize: int = 256):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # 队列满时等待的次数（反压），句子不会被丢弃
+        self.backpressure_waits = 0
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="VoiceDispatcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, voice_integration, text: str):
+        """提交句子，队列满时阻塞等待（反压），不丢弃句子"""
+        self._ensure_started()
+        item = (voice_integration, text)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._note_backpressure()
+            self._queue.put(item)
+
+    async def submit_async(self, voice_integration, text: str):
+        """异步提交句子，队列满时在线程中等待空位，只挂起当前文本流而不阻塞事件循环"""
+        self._ensure_started()
+        item = (voice_integration, text)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._note_backpressure()
+            await asyncio.to_thread(self._queue.put, item)
+
+    def _note_backpressure(self):
+        self.backpressure_waits += 1
+        if self.backpressure_waits == 1 or self.backpressure_waits % 100 == 0:
+            logger.warning(f"语音分发队列已满，文本流等待TTS消费（累计 {self.backpressure_waits} 次）")
+
+    def _run(self):
+        while True:
+            voice_integration, text = self._queue.get()
+            try:
+                voice_integration.receive_text_chunk(text)
+            except Exception as e:
+                logger.error(f"发送到语音集成失败: {e}")
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """等待已提交的句子全部处理完成"""
+        self._queue.join()
+
+
+_voice_dispatcher: Optional[_VoiceDispatcher] = None
+
+
+def get_voice_dispatcher() -> _VoiceDispatcher:
+    """获取全局语音分发器"""
+    global _voice_dispatcher
+    if _voice_dispatcher is None:
+        _voice_dispatcher = _VoiceDispatcher()
+    return _voice_dispatcher
+
 class CallbackManager:
     """回调函数管理器 - 统一处理同步/异步回调"""
     
@@ -67,7 +143,7 @@ class StreamingToolCallExtractor:
         self.mcp_manager = mcp_manager
         self.text_buffer = ""  # 普通文本缓冲区
         self.complete_text = ""  # 完整文本内容
-        self.sentence_endings = r"[。？！；\.\?\!\;]"  # 断句标点
+        self.sentence_endings = _SENTENCE_END_RE  # 断句标点（预编译）
         
         # 使用回调管理器
         self.callback_manager = CallbackManager()
@@ -92,9 +168,9 @@ class StreamingToolCallExtractor:
         
         处理流程：
         1. 累积完整文本（用于最终保存）
-        2. 逐字符检查句子结束符
-        3. 遇到结束符时立即切割并发送完整句子到TTS
-        4. 保留未完成的句子部分继续累积
+        2. 只扫描新到达的文本块，定位句子结束符
+        3. 遇到结束符时把缓冲区与本段拼成完整句子发送到TTS
+        4. 结束符之后的未完成部分留在缓冲区，下一个文本块继续
         """
         if not text_chunk:
             return None
@@ -109,46 +185,33 @@ class StreamingToolCallExtractor:
         # 累积完整文本（用于最终保存到数据库）
         self.complete_text += text_chunk
             
-        # 实时按句切割并发送到TTS
-        for char in text_chunk:
-            self.text_buffer += char
-            # 检查是否遇到句子结束符（。？！；等）
-            if re.search(self.sentence_endings, char):
-                # 立即切割并发送完整句子到TTS
-                sentences = re.split(self.sentence_endings, self.text_buffer)
-                if len(sentences) > 1:
-                    complete_sentence = sentences[0] + char
-                    if complete_sentence.strip():
-                        # 立即发送到语音集成进行TTS合成（不阻塞文本流）
-                        self._send_to_voice_integration(complete_sentence)
-                    # 保留未完成的句子部分，继续累积
-                    remaining_sentences = [s for s in sentences[1:] if s.strip()]
-                    self.text_buffer = "".join(remaining_sentences)
+        # 实时按句切割并发送到TTS，已消费的文本不再重复扫描
+        start = 0
+        for match in self.sentence_endings.finditer(text_chunk):
+            end = match.end()
+            complete_sentence = self.text_buffer + text_chunk[start:end]
+            self.text_buffer = ""
+            await self._send_to_voice_integration(complete_sentence)
+            start = end
+        if start < len(text_chunk):
+            self.text_buffer += text_chunk[start:]
         return results if results else None
     
     async def _flush_text_buffer(self):
         """刷新文本缓冲区 - 处理流式结束时的剩余文本"""
         if self.text_buffer:
-            # 立即发送剩余的未完成句子到语音集成（不阻塞）
-            self._send_to_voice_integration(self.text_buffer)
+            # 发送剩余的未完成句子到语音集成
+            await self._send_to_voice_integration(self.text_buffer)
             
             self.text_buffer = ""
             return None
         return None
     
-    def _send_to_voice_integration(self, text: str):
-        """发送文本到语音集成（不阻塞文本流）"""
+    async def _send_to_voice_integration(self, text: str):
+        """发送文本到语音集成（分发队列满时本文本流等待，不丢句）"""
         if self.voice_integration:
-            try:
-                # 在独立线程中处理TTS，不阻塞文本流
-                import threading
-                threading.Thread(
-                    target=self.voice_integration.receive_text_chunk,
-                    args=(text,),
-                    daemon=True
-                ).start()
-            except Exception as e:
-                logger.error(f"发送到语音集成失败: {e}")
+            # 交给常驻分发线程处理TTS，保持句子顺序
+            await get_voice_dispatcher().submit_async(self.voice_integration, text)
     
     # 工具调用相关方法已移除，功能已迁移到background_analyzer
     
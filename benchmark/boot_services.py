@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压测环境启动脚本
+启动桩LLM以及API、Agent、MCP三个服务（各自独立进程，便于分别统计内存），
+三个服务通过 NAGA_CONFIG_PATH 读取指向桩LLM的临时配置，不会改动项目的 config.json。
+
+用法:
+    python benchmark/boot_services.py                 # 启动后保持运行，Ctrl+C 退出
+    python benchmark/boot_services.py --grag          # 同时开启GRAG记忆提取
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+LOG_DIR = PROJECT_ROOT / "logs" / "benchmark"
+
+# 与 system.config.ServerPortsConfig 的默认值一致，服务之间按这些端口互相调用
+SERVICE_PORTS = {
+    "api_server": 8000,
+    "agent_server": 8001,
+    "mcp_server": 8003,
+}
+SERVICE_APPS = {
+    "api_server": "apiserver.api_server:app",
+    "agent_server": "agentserver.agent_server:app",
+    "mcp_server": "mcpserver.mcp_server:app",
+}
+
+
+def is_port_ready(port: int, host: str = "127.0.0.1") -> bool:
+    """端口是否已可连接"""
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def write_bench_config(stub_url: str, grag: bool = False, path: Optional[Path] = None) -> Path:
+    """生成压测配置：LLM指向桩服务，关闭语音，其余使用默认值"""
+    data = {
+        "system": {"voice_enabled": False, "debug": False, "log_level": "WARNING"},
+        "api": {
+            "api_key": "sk-benchmark-stub",
+            "base_url": stub_url,
+            "model": "stub-model",
+            "applied_proxy": False,
+            "persistent_context": False,
+            "context_parse_logs": False,
+        },
+        "grag": {"enabled": grag, "auto_extract": grag},
+    }
+    if path is None:
+        fd, name = tempfile.mkstemp(prefix="naga_bench_", suffix=".json")
+        os.close(fd)
+        path = Path(name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def read_peak_rss_mb(pid: int) -> Optional[float]:
+    """进程峰值常驻内存（MB）：Linux读取VmHWM，其他平台退回当前RSS"""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process(pid).memory_info().rss / 1024 / 1024, 1)
+    except Exception:
+        return None
+
+
+class BenchEnvironment:
+    """桩LLM + 三个服务的进程组"""
+
+    def __init__(self, stub_port: int = 18080, stub_args: Optional[List[str]] = None,
+                 grag: bool = False, services: Optional[List[str]] = None):
+        self.stub_port = stub_port
+        self.stub_args = stub_args or []
+        self.grag = grag
+        self.services = services or list(SERVICE_APPS)
+        self.processes: Dict[str, subprocess.Popen] = {}
+        self.config_path: Optional[Path] = None
+        self._log_files = []
+
+    @property
+    def stub_url(self) -> str:
+        return f"http://127.0.0.1:{self.stub_port}/v1"
+
+    def _spawn(self, name: str, args: List[str], env: Dict[str, str]):
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        log_file = open(LOG_DIR / f"{name}.log", "w", encoding="utf-8")
+        self._log_files.append(log_file)
+        self.processes[name] = subprocess.Popen(
+            [sys.executable] + args, cwd=str(PROJECT_ROOT), env=env,
+            stdout=log_file, stderr=subprocess.STDOUT,
+        )
+
+    def start(self, timeout: float = 120.0):
+        ports = {"stub_llm": self.stub_port}
+        ports.update({name: SERVICE_PORTS[name] for name in self.services})
+        busy = [f"{name}({port})" for name, port in ports.items() if is_port_ready(port)]
+        if busy:
+            raise RuntimeError(f"以下端口已被占用，请先关闭正在运行的实例: {', '.join(busy)}")
+
+        self.config_path = write_bench_config(self.stub_url, grag=self.grag)
+        env = dict(os.environ, PYTHONUNBUFFERED="1", NAGA_CONFIG_PATH=str(self.config_path))
+
+        self._spawn("stub_llm", [str(Path(__file__).parent / "stub_llm.py"),
+                                 "--port", str(self.stub_port)] + self.stub_args, env)
+        for name in self.services:
+            self._spawn(name, ["-m", "uvicorn", SERVICE_APPS[name], "--host", "127.0.0.1",
+                               "--port", str(SERVICE_PORTS[name]), "--log-level", "warning"], env)
+
+        start = time.perf_counter()
+        pending = dict(ports)
+        while pending and time.perf_counter() - start < timeout:
+            for name, port in list(pending.items()):
+                if is_port_ready(port):
+                    print(f"✅ {name}: {time.perf_counter() - start:.2f}s 就绪 (端口 {port})")
+                    del pending[name]
+                elif self.processes[name].poll() is not None:
+                    self.stop()
+                    raise RuntimeError(f"{name} 启动失败，详见 {LOG_DIR / (name + '.log')}")
+            time.sleep(0.1)
+        if pending:
+            self.stop()
+            raise RuntimeError(f"{timeout:.0f}s 内未就绪: {', '.join(pending)}")
+
+    def peak_rss_mb(self) -> Dict[str, Optional[float]]:
+        return {name: read_peak_rss_mb(process.pid) for name, process in self.processes.items()
+                if process.poll() is None}
+
+    def stop(self):
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        for log_file in self._log_files:
+            log_file.close()
+        self._log_files = []
+        if self.config_path and self.config_path.exists():
+            self.config_path.unlink()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="启动压测环境（桩LLM + API/Agent/MCP服务）")
+    parser.add_argument("--stub-port", type=int, default=18080)
+    parser.add_argument("--grag", action="store_true", help="开启GRAG记忆提取（需要Neo4j）")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args, stub_args = parser.parse_known_args()  # 其余参数原样传给 stub_llm.py
+
+    env = BenchEnvironment(stub_port=args.stub_port, stub_args=stub_args, grag=args.grag)
+    try:
+        env.start(timeout=args.timeout)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    print(f"🚀 压测环境已启动，日志目录: {LOG_DIR}，Ctrl+C 退出")
+    try:
+        while all(process.poll() is None for process in env.processes.values()):
+            time.sleep(1)
+        print("⚠️ 有进程提前退出")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.stop()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器池基准
+本地静态HTTP服务器提供搜索结果页（可用 --pages 指定抓取保存的页面目录，
+默认生成带图片、字体和视频的Bing格式合成页面），对比：
+- 每次查询启动浏览器（改造前的 search_web）
+- 浏览器池租用页面并拦截图片/字体/媒体
+统计各并发级别下的 queries/sec 与 p95 延迟，并校验两种方式提取的搜索结果一致。
+另外校验归还页面后的隔离：复用的上下文中不残留cookie、localStorage/sessionStorage、IndexedDB 和已授予的权限，
+租用期间跨过多个源的上下文不再复用。
+
+用法:
+    python benchmark/browser_pool_bench.py --queries 40 --levels 1,4
+    python benchmark/browser_pool_bench.py --pages captured/ --engine bing
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import functools
+import statistics
+from pathlib import Path
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from playwright.async_api import async_playwright  # noqa: E402
+from mcpserver.agent_playwright_master.browser_pool import BrowserPool  # noqa: E402
+from mcpserver.agent_playwright_master.playwright_search import scrape_search_page  # noqa: E402
+
+
+def generate_pages(directory: Path, count: int = 8, asset_kb: int = 200):
+    """生成Bing格式的合成搜索结果页，每页引用若干图片、一个字体和一个视频"""
+    assets = directory / "assets"
+    assets.mkdir(parents=True, exist_ok=True)
+    for name in ("font.woff2", "clip.mp4"):
+        (assets / name).write_bytes(os.urandom(asset_kb * 1024))
+    for i in range(10):
+        (assets / f"thumb_{i}.png").write_bytes(os.urandom(asset_kb * 1024 // 4))
+    for page in range(count):
+        items = "\n".join(
+            f'<li class="b_algo"><h2><a href="https://example.com/{page}/{i}">结果 {page}-{i}</a></h2>'
+            f'<img src="assets/thumb_{i}.png"><div class="b_caption"><p>第{page}页第{i}条结果的摘要</p></div></li>'
+            for i in range(10)
+        )
+        (directory / f"search_{page}.html").write_text(
+            "<!doctype html><html><head><meta charset='utf-8'><title>合成搜索结果</title>"
+            "<style>@font-face{font-family:F;src:url(assets/font.woff2)} body{font-family:F}</style></head>"
+            f"<body><video src='assets/clip.mp4' autoplay muted></video><ol>{items}</ol></body></html>",
+            encoding="utf-8",
+        )
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_static_server(directory: Path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def launch_per_query(url: str, engine: str) -> dict:
+    """改造前：每次查询启动并关闭一个完整浏览器"""
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=True)
+    try:
+        page = await browser.new_page()
+        return await scrape_search_page(page, url, engine)
+    finally:
+        await browser.close()
+        await playwright.stop()
+
+
+_WRITE_SITE_DATA_JS = """async () => {
+    localStorage.setItem('bench', '1');
+    sessionStorage.setItem('bench', '1');
+    document.cookie = 'bench=1';
+    await new Promise((resolve) => {
+        const request = indexedDB.open('bench-db');
+        request.onsuccess = () => { request.result.close(); resolve(); };
+    });
+}"""
+
+_READ_SITE_DATA_JS = """async () => ({
+    local: localStorage.length,
+    session: sessionStorage.length,
+    cookie: document.cookie,
+    databases: (await indexedDB.databases()).map((db) => db.name),
+    geolocation: (await navigator.permissions.query({name: 'geolocation'})).state,
+})"""
+
+
+async def isolation_check(base: str, page_name: str):
+    """单页面池：第一次租用写入站点数据并授予权限，归还后复用同一上下文时应全部清空"""
+    url = f"{base}/{page_name}"
+    pool = BrowserPool(size=1, headless=True)
+    try:
+        async with pool.lease() as page:
+            context = page.context
+            await page.goto(url)
+            clean = await page.evaluate(_READ_SITE_DATA_JS)
+            await context.grant_permissions(["geolocation"], origin=base)
+            await page.evaluate(_WRITE_SITE_DATA_JS)
+            assert await page.evaluate(_READ_SITE_DATA_JS) != clean, "站点数据未写入"
+        async with pool.lease() as page:
+            assert page.context is context, "单页面池应复用同一上下文"
+            await page.goto(url)
+            leftover = await page.evaluate(_READ_SITE_DATA_JS)
+            assert leftover == clean, f"归还后残留站点数据: {leftover}"
+            # 同一次租用跨过两个源，只能清理当前源，归还后应销毁上下文
+            await page.goto(url.replace("127.0.0.1", "localhost"))
+        async with pool.lease() as page:
+            assert page.context is not context, "跨源租用后的上下文不应被复用"
+    finally:
+        await pool.close()
+    print("✅ 归还后cookie、本地/会话存储、IndexedDB 与权限均已清空，跨源租用的上下文已销毁")
+
+
+async def run_level(search, urls: List[str], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(url):
+        async with semaphore:
+            start = time.perf_counter()
+            await search(url)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "qps": len(urls) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+    }
+
+
+async def main(pages_dir: Path, engine: str, queries: int, levels: List[int]):
+    server = start_static_server(pages_dir)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    pages = sorted(p.name for p in pages_dir.glob("*.html"))
+    urls = [f"{base}/{pages[i % len(pages)]}" for i in range(queries)]
+
+    pool = BrowserPool(size=max(levels), headless=True)
+    try:
+        # 一致性校验：拦截资源不影响提取结果
+        for url in urls[:len(pages)]:
+            legacy = await launch_per_query(url, engine)
+            async with pool.lease(block_resources=True) as page:
+                pooled = await scrape_search_page(page, url, engine)
+            assert pooled["results"] == legacy["results"], f"{url} 的搜索结果与每次启动浏览器不一致"
+        print(f"✅ {len(pages)} 个页面上浏览器池与每次启动浏览器提取的结果一致")
+        await isolation_check(base, pages[0])
+
+        async def pooled_search(url):
+            async with pool.lease(block_resources=True) as page:
+                return await scrape_search_page(page, url, engine)
+
+        print(f"{'模式':<10} {'并发':>4} {'QPS':>8} {'p50(ms)':>10} {'p95(ms)':>10}")
+        for level in levels:
+            for label, search in (("每次启动", lambda url: launch_per_query(url, engine)), ("浏览器池", pooled_search)):
+                stats = await run_level(search, urls, level)
+                print(f"{label:<10} {level:>4} {stats['qps']:>8.2f} {stats['p50']:>10.0f} {stats['p95']:>10.0f}")
+        print(f"浏览器池共启动浏览器 {pool.launch_count} 次")
+    finally:
+        await pool.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="浏览器池基准")
+    parser.add_argument("--pages", help="搜索结果页目录（*.html），默认生成合成页面")
+    parser.add_argument("--engine", default="bing", help="页面对应的搜索引擎格式")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--levels", default="1,4")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        pages_dir = Path(args.pages) if args.pages else Path(tmp)
+        if not args.pages:
+            generate_pages(pages_dir)
+        asyncio.run(main(pages_dir, args.engine, args.queries, [int(v) for v in args.levels.split(",")]))
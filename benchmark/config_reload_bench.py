@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置热更新基准
+通过 NAGA_CONFIG_PATH 指向临时 config.json（不改动项目配置），走实际的热更新路径：
+文件监视器（inotify / 轮询）→ ConfigManager._on_config_file_changed → reload_config_if_changed
+→ 发布新快照。每次写入后统计读取方通过 get_config_snapshot() 看到新值所需的时间，并校验：
+- 每次写入只重新加载一次（快照版本号逐次+1），system.config.config 与快照一致
+- 后台读线程持续无锁读取快照，读到的快照内部一致（解析后的配置与原始内容对应同一次写入）
+另外对比提示词缓存命中与每次读取文件的 get_prompt 吞吐。
+
+用法:
+    python benchmark/config_reload_bench.py [--writes 20] [--debounce 0.2] [--prompt-iterations 200000]
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 必须在导入 system.config 之前设置
+_BENCH_DIR = tempfile.mkdtemp(prefix="naga_config_bench_")
+_CONFIG_FILE = Path(_BENCH_DIR) / "config.json"
+_CONFIG_FILE.write_text(json.dumps({"system": {"version": "bench-0"}}), encoding="utf-8")
+os.environ["NAGA_CONFIG_PATH"] = str(_CONFIG_FILE)
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import system.config as config_module  # noqa: E402
+    from system.config import get_config_snapshot, PromptManager  # noqa: E402
+    from system.config_manager import config_manager  # noqa: E402
+from system.file_watcher import FileWatcher  # noqa: E402
+
+
+class SnapshotReader(threading.Thread):
+    """持续读取当前快照，校验快照内部一致"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.reads = 0
+        self.inconsistent = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            snapshot = get_config_snapshot()
+            if snapshot.config.system.version != snapshot.data["system"]["version"]:
+                self.inconsistent += 1
+            self.reads += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def measure(writes: int, debounce: float, use_inotify: bool):
+    """返回(监视方式, 各次可见延迟, 读线程)"""
+    watcher = FileWatcher(debounce=debounce, use_inotify=use_inotify)
+    watcher.watch(_CONFIG_FILE, config_manager._on_config_file_changed)
+    reader = SnapshotReader()
+    reader.start()
+    delays = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(writes):
+                before = get_config_snapshot()
+                expected = f"bench-{before.version + 1}"
+                _CONFIG_FILE.write_text(json.dumps({"system": {"version": expected}}), encoding="utf-8")
+                start = time.perf_counter()
+                while get_config_snapshot().config.system.version != expected:
+                    if time.perf_counter() - start > 10:
+                        raise TimeoutError(f"写入 {expected} 在10秒内未对读取方可见")
+                    time.sleep(0.001)
+                delays.append(time.perf_counter() - start)
+                # 等过去抖窗口，确认同一次写入没有被重复加载
+                time.sleep(debounce * 2)
+                after = get_config_snapshot()
+                assert after.version == before.version + 1, f"一次写入重新加载了 {after.version - before.version} 次"
+                assert config_module.config is after.config, "system.config.config 未指向最新快照"
+    finally:
+        reader.stop()
+        watcher.stop()
+        if watcher._inotify:
+            watcher._inotify.close()
+    return watcher.backend, delays, reader
+
+
+def benchmark_get_prompt(iterations: int):
+    """对比提示词缓存命中与每次读取文件的get_prompt吞吐（次/秒）"""
+    directory = tempfile.mkdtemp(prefix="naga_prompts_")
+    (Path(directory) / "bench.txt").write_text("你好，{user}", encoding="utf-8")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        watched = PromptManager(directory)
+        unwatched = PromptManager(directory, watch=False)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        watched.get_prompt("bench", user="naga")
+    cached_rate = iterations / (time.perf_counter() - start)
+
+    uncached_iterations = max(1, iterations // 10)
+    start = time.perf_counter()
+    for _ in range(uncached_iterations):
+        unwatched.invalidate("bench")
+        unwatched.get_prompt("bench", user="naga")
+    uncached_rate = uncached_iterations / (time.perf_counter() - start)
+    return cached_rate, uncached_rate
+
+
+def main(args):
+    print(f"临时配置文件 {_CONFIG_FILE}，{args.writes} 次写入，去抖 {args.debounce * 1000:.0f}ms")
+    print(f"{'监视方式':<10} {'平均(ms)':>9} {'最大(ms)':>9} {'快照读取次数':>12} {'不一致':>6}")
+    for use_inotify in (True, False):
+        backend, delays, reader = measure(args.writes, args.debounce, use_inotify)
+        print(f"{backend:<10} {sum(delays) / len(delays) * 1000:>9.0f} {max(delays) * 1000:>9.0f} "
+              f"{reader.reads:>12} {reader.inconsistent:>6}")
+        assert reader.inconsistent == 0, "读到了内部不一致的快照"
+
+    cached, file_read = benchmark_get_prompt(args.prompt_iterations)
+    print(f"get_prompt：缓存命中 {cached:.0f} 次/秒，每次读文件 {file_read:.0f} 次/秒")
+    print("✅ 每次写入恰好重新加载一次，读取方看到的快照始终一致")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="配置热更新基准")
+    parser.add_argument("--writes", type=int, default=20)
+    parser.add_argument("--debounce", type=float, default=0.2, help="文件监视器去抖时间（秒）")
+    parser.add_argument("--prompt-iterations", type=int, default=200000)
+    main(parser.parse_args())
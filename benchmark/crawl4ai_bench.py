@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawl4AI 共享爬虫与页面缓存基准
+本地夹具服务器提供200个页面（支持ETag/Last-Modified条件请求），对比：
+- 每个URL新建 AsyncWebCrawler（改造前的 crawl_page）
+- 常驻爬虫批量抓取（Crawl4aiAgent.crawl_many）
+并测量缓存命中与过期后304确认的延迟，校验缓存返回的内容与首次抓取一致。
+另用桩爬虫（不启动浏览器）校验：页面级错误不重启共享爬虫、不影响并发中的其他爬取；
+浏览器退出时并发失败的请求只触发一次重启；javascript_enabled 不同的请求不共用缓存。
+
+用法:
+    python benchmark/crawl4ai_bench.py --pages 200 --concurrency 4 --legacy-pages 20
+"""
+
+import sys
+import time
+import asyncio
+import hashlib
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from types import SimpleNamespace
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig  # noqa: E402
+from mcpserver.agent_crawl4ai import crawl4ai_agent as agent_module  # noqa: E402
+from mcpserver.agent_crawl4ai.crawl4ai_agent import Crawl4aiAgent  # noqa: E402
+
+LAST_MODIFIED = formatdate(time.time() - 3600, usegmt=True)
+
+
+def fixture_page(index: int) -> bytes:
+    paragraphs = "".join(f"<p>第{index}页第{i}段：用于爬虫基准测试的正文内容。</p>" for i in range(30))
+    links = "".join(f'<a href="/page/{(index + i) % 200}">相关页面{i}</a> ' for i in range(1, 6))
+    return (f"<!doctype html><html><head><meta charset='utf-8'><title>夹具页面{index}</title>"
+            f"<meta name='description' content='第{index}个夹具页面'></head>"
+            f"<body><h1>夹具页面{index}</h1>{paragraphs}<nav>{links}</nav></body></html>").encode("utf-8")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    pages = {}
+    conditional_hits = 0
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            type(self).conditional_hits += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture_server(count: int):
+    FixtureHandler.pages = {f"/page/{i}": fixture_page(i) for i in range(count)}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def legacy_crawl(agent: Crawl4aiAgent, url: str):
+    """改造前：每个URL新建爬虫（即新建浏览器）"""
+    browser_config = BrowserConfig(headless=True, user_agent=agent.user_agent,
+                                   viewport_width=agent.viewport_width, viewport_height=agent.viewport_height)
+    run_config = CrawlerRunConfig(word_count_threshold=1, cache_mode="bypass")
+    async with AsyncWebCrawler(config=browser_config) as crawler:
+        result = await crawler.arun(url=url, config=run_config)
+    return agent._format_markdown(result) if result.success else None
+
+
+async def timed_each(func, urls):
+    latencies = []
+    for url in urls:
+        start = time.perf_counter()
+        await func(url)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies)
+
+
+class StubBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+
+class StubCrawler:
+    """桩爬虫：/bad 抛页面级错误，/crash 第一次访问时让浏览器退出"""
+    instances = []
+    crashed = set()
+
+    def __init__(self, config=None):
+        self.browser = StubBrowser()
+        self.crawler_strategy = SimpleNamespace(browser_manager=SimpleNamespace(browser=self.browser))
+        self.calls = 0
+        type(self).instances.append(self)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self.browser.connected = False
+
+    async def arun(self, url, config=None):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if url.endswith("/crash") and url not in self.crashed:
+            self.crashed.add(url)
+            self.browser.connected = False
+        if not self.browser.connected:
+            raise RuntimeError("Target page, context or browser has been closed")
+        if url.endswith("/bad"):
+            raise ValueError("net::ERR_NAME_NOT_RESOLVED")
+        return SimpleNamespace(success=True, url=url, title="", description="", media=[], links=[],
+                               markdown=f"内容 {url}",
+                               response_headers={})
+
+
+async def restart_check():
+    """页面级错误不重启共享爬虫；浏览器退出时只重启一次；javascript_enabled 参与缓存键"""
+    patched = {name: getattr(agent_module, name) for name in ("AsyncWebCrawler", "BrowserConfig", "CrawlerRunConfig")}
+    agent_module.AsyncWebCrawler = StubCrawler
+    agent_module.BrowserConfig = lambda **kwargs: None
+    agent_module.CrawlerRunConfig = lambda **kwargs: SimpleNamespace(**kwargs)
+    StubCrawler.instances, StubCrawler.crashed = [], set()
+    agent = Crawl4aiAgent()
+    try:
+        urls = [f"http://stub/{i}" for i in range(12)]
+        results = await agent.crawl_many(urls[:6] + ["http://stub/bad"] + urls[6:], use_cache=False)
+        assert len(StubCrawler.instances) == 1, f"页面级错误重启了共享爬虫 {len(StubCrawler.instances) - 1} 次"
+        assert [r["success"] for r in results] == [True] * 6 + [False] + [True] * 6, "页面级错误影响了其他爬取"
+
+        results = await agent.crawl_many(["http://stub/crash"] + urls, use_cache=False)
+        assert all(r["success"] for r in results), "浏览器退出后重试失败"
+        assert len(StubCrawler.instances) == 2 and agent.crawler_restarts == 1, \
+            f"浏览器退出一次却启动了 {len(StubCrawler.instances) - 1} 个新爬虫"
+
+        await agent.crawl_page(urls[0])
+        calls = agent._crawler.calls
+        await agent.crawl_page(urls[0], javascript_enabled=False)
+        assert agent._crawler.calls == calls + 1, "javascript_enabled 不同的请求命中了同一缓存条目"
+    finally:
+        await agent.close()
+        for name, value in patched.items():
+            setattr(agent_module, name, value)
+    print(f"✅ 页面级错误不重启共享爬虫，浏览器退出时并发请求只重启 {agent.crawler_restarts} 次，"
+          f"javascript_enabled 参与缓存键")
+
+
+async def main(pages: int, concurrency: int, legacy_pages: int):
+    await restart_check()
+    server = start_fixture_server(pages)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page/{i}" for i in range(pages)]
+
+    agent = Crawl4aiAgent()
+    agent.headless = True
+    agent.max_concurrency = concurrency
+    agent._semaphore = asyncio.Semaphore(concurrency)
+    try:
+        # 改造前：每个URL新建爬虫
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded_legacy(url):
+            async with semaphore:
+                return await legacy_crawl(agent, url)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded_legacy(url) for url in urls[:legacy_pages]))
+        legacy_rate = legacy_pages / (time.perf_counter() - start)
+
+        # 共享爬虫批量抓取（冷缓存）
+        start = time.perf_counter()
+        first = await agent.crawl_many(urls, max_chars=0)
+        shared_rate = pages / (time.perf_counter() - start)
+        failed = [url for url, r in zip(urls, first) if not r["success"]]
+        assert not failed, f"{len(failed)} 个页面抓取失败，例如 {failed[0]}"
+
+        # 缓存命中
+        hit = await timed_each(lambda url: agent.crawl_page(url, max_chars=0), urls)
+        second = [await agent.crawl_page(url, max_chars=0) for url in urls]
+        assert [r["data"] for r in second] == [r["data"] for r in first], "缓存返回的内容与首次抓取不一致"
+
+        # 过期后携带验证信息确认（304）
+        agent.cache.ttl = 0
+        revalidate = await timed_each(lambda url: agent.crawl_page(url, max_chars=0), urls[:50])
+        assert agent.cache.revalidated >= 50, f"过期条目未经304确认复用: {agent.cache.stats()}"
+
+        print(f"{'方式':<22} {'页面数':>6} {'pages/sec':>10}")
+        print(f"{'每个URL新建爬虫':<22} {legacy_pages:>6} {legacy_rate:>10.2f}")
+        print(f"{'常驻爬虫批量抓取':<22} {pages:>6} {shared_rate:>10.2f}")
+        print(f"缓存命中延迟中位数: {hit * 1e6:.0f}µs；过期后304确认延迟中位数: {revalidate * 1000:.1f}ms")
+        print(f"缓存统计: {agent.cache.stats()}，源站返回304次数: {FixtureHandler.conditional_hits}")
+        print("✅ 缓存返回的内容与首次抓取一致")
+    finally:
+        await agent.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl4AI 共享爬虫与页面缓存基准")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--legacy-pages", type=int, default=20, help="改造前方式抓取的页面数（每页启动一个浏览器，耗时较长）")
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.concurrency, min(args.legacy_pages, args.pages)))
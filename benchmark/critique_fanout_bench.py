@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自博弈批判阶段扇出基准（进程内桩LLM，延迟可配置）
+8个智能体 × 3个分支，共24个Actor输出，连续多轮；每轮只有一部分输出内容发生变化。对比：
+- 改造前：每个 (输出, 批判者) 一次LLM调用，asyncio.gather 一次性发出；评估阶段等批判全部完成后才开始
+- 批判调度器：并发窗口 + 同一批判者多输出合并为一次调用 + 内容未变的输出复用历史批判，
+  每条批判完成即开始对应输出的评估
+分别测量引擎单轮（每个输出一个批判者）与 batch_critique（每个输出由其余全部批判者批判）。
+桩LLM按批判内容的哈希给分，校验两种方式对每个输出的批判分和摘要完全一致，且复用的历史批判同样计入批判统计。
+另外校验故障情形：合并调用全部失败、部分单条调用失败时，调度器逐条重试后得到与逐对批判相同的结果；
+创新性评估失败的输出使用默认评估，每个输出仍各有一条评估。
+
+用法:
+    python benchmark/critique_fanout_bench.py --latency-ms 800 --per-item-ms 150 --rounds 5 --changed 0.5
+"""
+
+import os
+import re
+import sys
+import zlib
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from game.core.models.config import GameConfig  # noqa: E402
+from game.core.models.data_models import Agent, Task  # noqa: E402
+from game.core.self_game.actor import ActorOutput  # noqa: E402
+from game.core.self_game.game_engine import GameEngine  # noqa: E402
+from game.core.utils.api_pool import ApiRateLimiter, set_api_limiter  # noqa: E402
+
+_ITEM_RE = re.compile(r"### 条目(\d+)\n[\s\S]*?执行者最新输出\n([\s\S]*?)\n(?=\n### 条目|\n请仅输出)")
+_SINGLE_RE = re.compile(r"以下是执行者最新输出\n([\s\S]*?)\n请仅输出")
+
+
+def verdict(content: str) -> dict:
+    """批判结果只取决于被批判内容"""
+    digest = zlib.crc32(content.encode("utf-8"))
+    score = (digest % 1000) / 1000
+    return {"critique_score": score, "response_score": score, "summary": f"摘要{digest:08x}",
+            "suggestions": [f"建议{digest % 97}", f"建议{digest % 89}"]}
+
+
+class StubLLM:
+    """桩LLM：固定基础延迟 + 每个批判条目的输出耗时，记录调用数与峰值并发"""
+
+    def __init__(self, latency: float, per_item: float):
+        self.latency = latency
+        self.per_item = per_item
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_response(self, prompt: str, temperature: float = 0.7) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            items = _ITEM_RE.findall(prompt)
+            await asyncio.sleep(self.latency + self.per_item * max(1, len(items)))
+            if items:
+                return json.dumps({"items": [dict(index=int(i), **verdict(c)) for i, c in items]}, ensure_ascii=False)
+            return json.dumps(verdict(_SINGLE_RE.search(prompt).group(1)), ensure_ascii=False)
+        finally:
+            self.in_flight -= 1
+
+
+class FlakyLLM(StubLLM):
+    """合并调用一律失败；单条调用按内容哈希确定性地失败一部分"""
+
+    def __init__(self, latency: float, per_item: float, fail_mod: int):
+        super().__init__(latency, per_item)
+        self.fail_mod = fail_mod
+
+    async def get_response(self, prompt: str, temperature: float = 0.7) -> str:
+        if _ITEM_RE.findall(prompt):
+            self.calls += 1
+            raise ConnectionError("合并调用网络错误")
+        content = _SINGLE_RE.search(prompt).group(1)
+        if zlib.crc32(content.encode("utf-8")) % self.fail_mod == 0:
+            self.calls += 1
+            raise ConnectionError("单条调用网络错误")
+        return await super().get_response(prompt, temperature)
+
+
+# ---------- 改造前的实现 ----------
+
+async def legacy_critique_phase(engine, actor_outputs, agents, task, previous_rounds):
+    previous_critiques = []
+    for round_data in previous_rounds[-1:]:
+        previous_critiques.extend(round_data.critic_outputs)
+    critique_tasks = []
+    for actor_output in actor_outputs:
+        for critic_agent in agents:
+            if actor_output.agent_id != critic_agent.agent_id:
+                critique_tasks.append(engine.criticizer.critique_output(actor_output, critic_agent, task, previous_critiques))
+                break
+    results = await asyncio.gather(*critique_tasks, return_exceptions=True)
+    return [r for r in results if not isinstance(r, Exception)]
+
+
+async def legacy_batch_critique(criticizer, actor_outputs, critic_agents, task):
+    critique_tasks = [criticizer.critique_output(a, c, task) for a in actor_outputs for c in critic_agents
+                      if a.agent_id != c.agent_id]
+    results = await asyncio.gather(*critique_tasks, return_exceptions=True)
+    return [r for r in results if not isinstance(r, Exception)]
+
+
+# ---------- 夹具 ----------
+
+def make_agents(count: int):
+    return [Agent(name=f"角色{i}", role=f"专家{i}", responsibilities=["分析"], skills=["写作"], thinking_vector="",
+                  system_prompt=f"你是专家{i}", connection_permissions=[], agent_id=f"agent_{i}")
+            for i in range(count)]
+
+
+def make_rounds(agents, branches: int, rounds: int, changed: float, seed: int = 5):
+    """每轮的Actor输出：首轮全部为新内容，之后每轮按比例改写部分输出"""
+    rng = random.Random(seed)
+    contents = {(a.agent_id, b): f"{a.name} 分支{b} 方案 v0 " + "细节" * 200 for a in agents for b in range(1, branches + 1)}
+    result = []
+    for round_number in range(1, rounds + 1):
+        if round_number > 1:
+            for key in rng.sample(sorted(contents), int(len(contents) * changed)):
+                contents[key] = f"{key[0]} 分支{key[1]} 方案 v{round_number} " + "改进" * 200
+        result.append([ActorOutput(agent_id=agent_id, branch_id=branch, content=content, generation_time=0.0,
+                                   iteration=round_number, metadata={"agent_name": agent_id, "previous_context": ""})
+                       for (agent_id, branch), content in contents.items()])
+    return result
+
+
+class _Round:
+    def __init__(self, critic_outputs):
+        self.critic_outputs = critic_outputs
+
+
+def make_engine(llm: StubLLM) -> GameEngine:
+    config = GameConfig()
+    set_api_limiter(ApiRateLimiter(max_concurrent=config.system.max_concurrent_api))
+    return GameEngine(config, naga_conversation=llm)
+
+
+def scores(critiques):
+    return sorted((c.target_output_id, c.critic_agent_id, c.overall_score, c.summary_critique) for c in critiques)
+
+
+async def run_engine(rounds_outputs, agents, task, latency, per_item, legacy: bool):
+    llm = StubLLM(latency, per_item)
+    engine = make_engine(llm)
+    history, calls, latencies, results = [], [], [], []
+    for actor_outputs in rounds_outputs:
+        before = llm.calls
+        start = time.perf_counter()
+        if legacy:
+            critiques = await legacy_critique_phase(engine, actor_outputs, agents, task, history)
+            evaluations = await engine._evaluation_phase(actor_outputs, history)
+        else:
+            critiques, evaluations = await engine._critique_and_evaluation_phase(actor_outputs, agents, task, history)
+        latencies.append(time.perf_counter() - start)
+        assert len(evaluations) == len(actor_outputs)
+        calls.append(llm.calls - before)
+        results.append(scores(critiques))
+        history.append(_Round(critiques))
+    return calls, latencies, results, llm.peak, engine.criticizer.overall_stats.count
+
+
+async def run_batch(rounds_outputs, agents, task, latency, per_item, legacy: bool):
+    llm = StubLLM(latency, per_item)
+    criticizer = make_engine(llm).criticizer
+    calls, latencies, results = [], [], []
+    for actor_outputs in rounds_outputs:
+        before = llm.calls
+        start = time.perf_counter()
+        if legacy:
+            critiques = await legacy_batch_critique(criticizer, actor_outputs, agents, task)
+        else:
+            critiques = await criticizer.batch_critique(actor_outputs, agents, task)
+        latencies.append(time.perf_counter() - start)
+        calls.append(llm.calls - before)
+        results.append(scores(critiques))
+    return calls, latencies, results, llm.peak, criticizer.overall_stats.count
+
+
+async def failure_check(agents, task, outputs, fail_mod: int = 4):
+    """合并调用失败时逐条重试，只丢掉单条也失败的输出；评估失败的输出使用默认评估"""
+    legacy_engine = make_engine(FlakyLLM(0.0, 0.0, fail_mod))
+    expected = scores(await legacy_critique_phase(legacy_engine, outputs, agents, task, []))
+
+    engine = make_engine(FlakyLLM(0.0, 0.0, fail_mod))
+    evaluate = engine.philoss_checker.evaluate_novelty
+    failing = {o.target_output_id for o in outputs[::3]}
+
+    async def flaky_evaluate(content, content_id, context=None):
+        if content_id in failing:
+            raise RuntimeError("评估模型不可用")
+        return await evaluate(content, content_id, context)
+
+    engine.philoss_checker.evaluate_novelty = flaky_evaluate
+    critiques, evaluations = await engine._critique_and_evaluation_phase(outputs, agents, task, [])
+    assert scores(critiques) == expected, "合并调用失败后的批判结果与逐对批判不一致"
+    assert 0 < len(critiques) < len(outputs), "故障夹具应让部分单条调用失败"
+    assert [e.target_content_id for e in evaluations] == [o.target_output_id for o in outputs], "每个输出应各有一条评估"
+    defaults = sum(1 for e in evaluations if e.metadata.get("error"))
+    assert defaults >= len(failing), "评估失败的输出应使用默认评估"
+    print(f"故障：合并调用全部失败，逐条重试得到 {len(critiques)}/{len(outputs)} 条批判（与逐对批判一致），"
+          f"{engine.criticizer.planner.failed_batches} 个失败批次；{len(failing)} 个评估失败的输出使用默认评估")
+
+
+async def main(args):
+    latency, per_item = args.latency_ms / 1000, args.per_item_ms / 1000
+    agents = make_agents(args.agents)
+    task = Task(task_id="bench", description="设计一个缓存系统", domain="技术", requirements=["高可用"])
+    rounds_outputs = make_rounds(agents, args.branches, args.rounds, args.changed)
+    print(f"{args.agents} 个智能体 × {args.branches} 个分支 = {len(rounds_outputs[0])} 个输出/轮，{args.rounds} 轮，"
+          f"每轮改写 {args.changed:.0%}；桩LLM 基础延迟 {args.latency_ms:.0f}ms + 每条目 {args.per_item_ms:.0f}ms")
+    print(f"{'场景':<16} {'方式':<8} {'LLM调用/轮':>18} {'轮延迟均值(s)':>14} {'峰值并发':>8}")
+    for name, runner in (("引擎单轮", run_engine), ("batch_critique", run_batch)):
+        legacy = await runner(rounds_outputs, agents, task, latency, per_item, True)
+        planned = await runner(rounds_outputs, agents, task, latency, per_item, False)
+        assert legacy[2] == planned[2], f"{name}: 批判结果不一致"
+        assert legacy[4] == planned[4], f"{name}: 批判统计数不一致（复用的批判应计入统计）"
+        for label, (calls, latencies, _, peak, _) in (("改造前", legacy), ("调度器", planned)):
+            per_round = "/".join(str(c) for c in calls)
+            print(f"{name:<16} {label:<8} {per_round:>18} {sum(latencies) / len(latencies):>14.2f} {peak:>8}")
+    await failure_check(agents, task, rounds_outputs[0])
+    print("✅ 每个输出的批判分与摘要和改造前一致，故障时逐条回退且每个输出都有评估")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="自博弈批判阶段扇出基准")
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--changed", type=float, default=0.5, help="第2轮起每轮改写的输出比例")
+    parser.add_argument("--latency-ms", type=float, default=800, help="桩LLM单次调用的基础延迟")
+    parser.add_argument("--per-item-ms", type=float, default=150, help="每个批判条目额外的输出耗时")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)  # 故障校验中的预期错误日志
+    # GameConfig 会在当前目录创建结果与模板目录，放到临时目录中
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        asyncio.run(main(args))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DynamicDispatcher 打分基准
+- 回归校验：固定语料上，向量化打分的首选智能体与逐个打分的结果一致
+- 名册替换：先后传入同规模、同agent_id的新名册或原地替换其中的智能体时，能力矩阵随名册重建
+- 耗时对比：名册规模 10~5000 时，逐个打分与向量化打分（冷启动/缓存命中）的耗时
+
+用法:
+    python benchmark/dispatcher_bench.py --sizes 10,100,1000,5000
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from game.core.interaction_graph.dynamic_dispatcher import (  # noqa: E402
+    DynamicDispatcher, ROLE_COMPATIBILITY, SKILL_MAPPINGS,
+)
+from game.core.models.config import GameConfig  # noqa: E402
+from game.core.models.data_models import Agent, InteractionGraph  # noqa: E402
+
+ROLES = list(ROLE_COMPATIBILITY) + ["项目经理", "运营"]
+SKILL_WORDS = [word for words in SKILL_MAPPINGS.values() for word in words] + ["沟通", "文档", "部署", "Python", "ui设计"]
+
+# 与 _analyze_next_phase_requirements 产生的需求组合一致
+REQUIREMENTS: List[Dict[str, Any]] = [
+    {"required_skills": ["技术实现", "设计创作"], "output_type": "implementation"},
+    {"required_skills": ["质量验证", "测试分析", "测试验证", "质量保证"], "output_type": "validation"},
+    {"required_skills": ["产品评审", "技术集成", "创新改进"], "output_type": "integration"},
+    {"required_skills": ["数据分析", "文献验证", "实现能力", "技术评估"], "output_type": "analysis"},
+    {"required_skills": ["问题修复", "优化改进"], "output_type": "analysis"},
+    {"required_skills": [], "output_type": "analysis"},
+]
+
+
+def synthetic_graph(size: int, seed: int) -> InteractionGraph:
+    rng = random.Random(seed)
+    agents = [
+        Agent(name=f"角色{i}", role=rng.choice(ROLES), responsibilities=[],
+              skills=[rng.choice(SKILL_WORDS) + rng.choice(["", "能力", "经验"]) for _ in range(rng.randint(1, 5))],
+              thinking_vector="", system_prompt="", connection_permissions=[], agent_id=f"agent_{i}")
+        for i in range(size)
+    ]
+    return InteractionGraph(agents=agents, allowed_paths=[], forbidden_paths=[],
+                            collaboration_matrix={}, domain="通用", task_description="benchmark")
+
+
+def seed_state(dispatcher: DynamicDispatcher, graph: InteractionGraph, seed: int):
+    """制造一些历史记录与迭代计数，让历史分与负载系数参与打分"""
+    rng = random.Random(seed)
+    ids = [a.agent_id for a in graph.agents]
+    for _ in range(min(50, len(ids))):
+        targets = rng.sample(ids, min(2, len(ids)))
+        dispatcher.dispatch_history.append({
+            "source_agent_id": rng.choice(ids),
+            "decisions": [(target, {}, "bench") for target in targets],
+            "success": rng.random() < 0.7,
+        })
+        dispatcher.iteration_counts[rng.choice(ids)] = rng.randint(0, 5)
+
+
+def legacy_rank(dispatcher: DynamicDispatcher, agents: List[Agent], requirements, graph):
+    """改造前的逐个打分 + 排序"""
+    scores = [(agent, dispatcher._calculate_agent_match_score(agent, requirements, graph)) for agent in agents]
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return scores
+
+
+def check_regression(seed: int, sizes=(5, 20, 100, 500)):
+    for size in sizes:
+        graph = synthetic_graph(size, seed + size)
+        dispatcher = DynamicDispatcher(GameConfig())
+        seed_state(dispatcher, graph, seed)
+        for requirements in REQUIREMENTS:
+            expected = legacy_rank(dispatcher, graph.agents, requirements, graph)
+            actual = dispatcher._rank_agents(graph.agents, requirements, graph, top_k=3)
+            assert actual[0][0].agent_id == expected[0][0].agent_id, \
+                f"{size}个智能体、需求{requirements}时首选不一致"
+            for (agent, score), (old_agent, old_score) in zip(actual, expected):
+                assert agent.agent_id == old_agent.agent_id and abs(score - old_score) < 1e-9, \
+                    f"{size}个智能体、需求{requirements}时前3名不一致"
+    print("✅ 固定语料上前3名及分数与逐个打分一致")
+
+
+def check_roster_replacement(seed: int, rounds: int = 50, size: int = 20):
+    """同一调度器先后处理多个同规模、同agent_id的新名册（旧名册随即释放），能力矩阵必须对应当前名册"""
+    dispatcher = DynamicDispatcher(GameConfig())
+    requirements = REQUIREMENTS[0]
+    for i in range(rounds):
+        graph = synthetic_graph(size, seed + i)
+        actual = dispatcher._rank_agents(graph.agents, requirements, graph, top_k=3)
+        matrix_agents = dispatcher._capability_matrix.agents
+        assert all(a is b for a, b in zip(matrix_agents, graph.agents)), f"第{i}个名册复用了旧的能力矩阵"
+        expected = legacy_rank(dispatcher, graph.agents, requirements, graph)
+        assert [a.agent_id for a, _ in actual] == [a.agent_id for a, _ in expected[:3]], f"第{i}个名册前3名不一致"
+
+        # 原地替换一个智能体（列表对象与长度都不变）
+        replaced = synthetic_graph(size, seed + rounds + i).agents[i % size]
+        graph.agents[i % size] = replaced
+        dispatcher._rank_agents(graph.agents, requirements, graph, top_k=3)
+        assert dispatcher._capability_matrix.agents[i % size] is replaced, f"第{i}个名册原地替换后未重建能力矩阵"
+        del graph, matrix_agents
+    print(f"✅ {rounds} 个先后替换（含原地替换智能体）的同规模名册均重建能力矩阵")
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(sizes: List[int], seed: int, repeat: int):
+    check_regression(seed)
+    check_roster_replacement(seed)
+    print(f"{'名册规模':>8} {'逐个打分(ms)':>14} {'向量化冷启动(ms)':>18} {'向量化缓存(ms)':>16} {'加速':>8}")
+    for size in sizes:
+        graph = synthetic_graph(size, seed + size)
+        dispatcher = DynamicDispatcher(GameConfig())
+        seed_state(dispatcher, graph, seed)
+        requirements = REQUIREMENTS[1]
+
+        legacy = timed(lambda: legacy_rank(dispatcher, graph.agents, requirements, graph), repeat)
+        cold = timed(lambda: (dispatcher.invalidate_roster(),
+                              dispatcher._rank_agents(graph.agents, requirements, graph, top_k=3)), repeat)
+        warm = timed(lambda: dispatcher._rank_agents(graph.agents, requirements, graph, top_k=3), repeat)
+        print(f"{size:>8} {legacy * 1000:>14.2f} {cold * 1000:>18.2f} {warm * 1000:>16.3f} {legacy / warm:>7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DynamicDispatcher 打分基准")
+    parser.add_argument("--sizes", default="10,100,500,1000,5000")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main([int(v) for v in args.sizes.split(",")], args.seed, args.repeat)
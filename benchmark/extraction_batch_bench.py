@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+五元组提取微批处理基准
+进程内启动桩LLM服务（stub_llm.py，结构化输出按 [序号] 段数返回条目），向 QuintupleTaskManager 提交1000段文本，对比：
+- 逐条提取（extract_batch_size=1，改造前行为）
+- 微批提取（默认 extract_batch_size/extract_batch_max_chars）
+输出总耗时、吞吐、每段文本的平均等待时间、服务器实际收到的请求数与任务管理器统计的 llm_calls，
+以及任务管理器锁（TimedLock）的获取次数、累计持有时长与最长单次持有时长，并校验：
+- 全部任务完成，没有任务停留在 PENDING
+- llm_calls 与服务器收到的请求数一致（批量响应缺条目时的逐条回退也计入，见 --drop-every）
+- 锁不会跨LLM请求持有（最长单次持有远小于桩LLM延迟）
+- 单工作协程 + 小队列（生产者阻塞等待、队列被反复填满）+ 超长文本频繁放不下时，完成顺序与提交顺序一致
+- 处理中途停止时，本批未完成与放不下留给下一批的任务被标记取消并计入 task_done（队列可 join）
+
+用法:
+    python benchmark/extraction_batch_bench.py [--texts 1000] [--workers 3] [--latency-ms 50] [--drop-every 10]
+"""
+
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import logging
+import argparse
+import threading
+import statistics
+from pathlib import Path
+
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from stub_llm import StubLLM, DEFAULT_SCRIPT, create_app  # noqa: E402
+from nagaagent_core.core import AsyncOpenAI  # noqa: E402
+from summer_memory import quintuple_extractor  # noqa: E402
+from summer_memory.task_manager import QuintupleTaskManager  # noqa: E402
+
+SUBJECTS = ["小明", "小红", "娜迦", "张老师", "李经理", "用户"]
+VERBS = ["喜欢", "去了", "参加", "学习", "推荐", "讨论"]
+OBJECTS = ["北京", "图书馆", "音乐会", "Python", "咖啡店", "机器学习", "周末旅行", "新项目"]
+
+
+class PartialBatchStub(StubLLM):
+    """每隔N个批量请求少返回最后一段的条目，触发提取函数的逐条回退"""
+
+    def __init__(self, drop_every: int, **kwargs):
+        super().__init__(**kwargs)
+        self.drop_every = drop_every
+        self.batch_requests = 0
+        self.dropped = 0
+
+    def _structured(self, body, prompt):
+        content = super()._structured(body, prompt)
+        if content is None or '"items"' not in content:
+            return content
+        self.batch_requests += 1
+        if self.drop_every and self.batch_requests % self.drop_every == 0:
+            data = json.loads(content)
+            data["items"] = data["items"][:-1]
+            self.dropped += 1
+            return json.dumps(data, ensure_ascii=False)
+        return content
+
+
+def start_stub(stub: StubLLM) -> str:
+    """在后台线程中运行桩LLM服务，返回 base_url"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(stub), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    assert server.started, "桩LLM服务启动失败"
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def make_texts(count: int, long_every: int, seed: int = 28):
+    """生成互不相同的聊天片段，每隔 long_every 段插入一段长文本"""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        sentence = f"{rng.choice(SUBJECTS)}{rng.choice(VERBS)}{rng.choice(OBJECTS)}（第{i}条）。"
+        if long_every and i % long_every == long_every - 1:
+            sentence += "补充说明：" + "这是一段比较长的对话记录，" * rng.randint(20, 60)
+        texts.append(sentence)
+    return texts
+
+
+async def run_manager(texts, stub: StubLLM, workers: int, queue_size: int, batch_size: int, max_chars=None):
+    """提交全部文本并等待完成，返回(耗时, 完成顺序, 各任务等待时间, 管理器)"""
+    manager = QuintupleTaskManager(max_workers=workers, max_queue_size=queue_size)
+    manager.batch_size = batch_size
+    if max_chars is not None:
+        manager.batch_max_chars = max_chars
+    finished = []
+    manager.on_task_completed = lambda task_id, result: finished.append(task_id)
+    manager.on_task_failed = lambda task_id, error: finished.append(task_id)
+
+    requests_before = stub.stats["requests"]
+    await manager.start()
+    start = time.perf_counter()
+    task_ids = []
+    for text in texts:
+        task_ids.append(await manager.add_task(text))
+    results = await asyncio.gather(*(manager.get_task_result(task_id, timeout=120) for task_id in task_ids))
+    elapsed = time.perf_counter() - start
+    waits = [manager.tasks[t].completed_at - manager.tasks[t].created_at for t in task_ids if t in manager.tasks]
+    await manager.shutdown()
+
+    assert all(error is None for _, error in results), f"有任务失败: {[e for _, e in results if e][:3]}"
+    assert manager.completed_tasks == len(texts), f"只完成 {manager.completed_tasks}/{len(texts)} 个任务"
+    requests = stub.stats["requests"] - requests_before
+    assert manager.llm_calls == requests, f"llm_calls={manager.llm_calls} 与服务器请求数 {requests} 不一致"
+    return elapsed, task_ids, finished, waits, manager, requests
+
+
+async def compare(args, stub: StubLLM):
+    texts = make_texts(args.texts, args.long_every)
+    print(f"{len(texts)} 段文本，{args.workers} 个工作协程，队列 {args.queue}，"
+          f"桩LLM延迟 {args.latency_ms}ms，每 {args.drop_every} 个批量请求少返回一个条目")
+    print(f"{'方式':<14} {'耗时(s)':>8} {'段/秒':>8} {'平均等待(ms)':>12} {'服务器请求':>10} {'llm_calls':>10} "
+          f"{'合批任务':>8} {'加锁次数':>8} {'持锁(ms)':>9} {'最长持锁(ms)':>12}")
+    for label, batch_size in (("逐条(batch=1)", 1), (f"微批(batch={args.batch_size})", args.batch_size)):
+        elapsed, _, _, waits, manager, requests = await run_manager(
+            texts, stub, args.workers, args.queue, batch_size)
+        lock = manager.lock
+        print(f"{label:<14} {elapsed:>8.2f} {len(texts) / elapsed:>8.1f} {statistics.mean(waits) * 1000:>12.1f} "
+              f"{requests:>10} {manager.llm_calls:>10} {manager.batched_tasks:>8} "
+              f"{lock.acquisitions:>8} {lock.hold_total * 1000:>9.2f} {lock.hold_max * 1000:>12.3f}")
+        assert lock.hold_max * 1000 < args.latency_ms / 2, f"最长持锁 {lock.hold_max * 1000:.1f}ms，锁被跨LLM请求持有"
+
+
+async def fifo_check(args, stub: StubLLM):
+    """单工作协程、小队列、低字符上限：放不下的任务留到下一批，完成顺序必须等于提交顺序"""
+    texts = make_texts(args.fifo_texts, 3, seed=1)
+    _, task_ids, finished, _, manager, requests = await run_manager(
+        texts, stub, 1, 8, args.batch_size, max_chars=200)
+    assert finished == task_ids, "完成顺序与提交顺序不一致"
+    print(f"顺序：{len(texts)} 段（每3段一段超长，队列8，字符上限200）全部按提交顺序完成，"
+          f"{requests} 次请求与 llm_calls 一致")
+
+
+async def stop_check(args, stub: StubLLM):
+    """单工作协程处理中途停止：已取出但未处理完的任务（含放不下留给下一批的）标记取消并计入 task_done"""
+    texts = make_texts(args.fifo_texts, 3, seed=2)
+    manager = QuintupleTaskManager(max_workers=1, max_queue_size=len(texts))
+    manager.batch_size = args.batch_size
+    manager.batch_max_chars = 200
+    await manager.start()
+    task_ids = [await manager.add_task(text) for text in texts]
+    while manager.completed_tasks < 3:
+        await asyncio.sleep(0.005)
+    await manager.shutdown()
+
+    statuses = [manager.tasks[t].status.value for t in task_ids]
+    assert "running" not in statuses, "停止后仍有任务停留在 RUNNING"
+    cancelled = [manager.tasks[t] for t in task_ids if manager.tasks[t].status.value == "cancelled"]
+    assert cancelled and all(t.future.done() for t in cancelled), "停止时取出的任务未标记取消"
+    queued = 0
+    while not manager.task_queue.empty():
+        manager.task_queue.get_nowait()
+        manager.task_queue.task_done()
+        queued += 1
+    await asyncio.wait_for(manager.task_queue.join(), timeout=1)
+    assert statuses.count("pending") == queued, "停止后未在队列中的任务仍停留在 PENDING"
+    for task in cancelled:
+        task.future.exception()
+    print(f"停止：已完成 {statuses.count('completed')} 段，取出未处理的 {len(cancelled)} 段标记取消，"
+          f"{queued} 段留在队列，task_done 计数一致")
+
+
+async def main(args):
+    stub = PartialBatchStub(drop_every=args.drop_every, script=DEFAULT_SCRIPT, token_rate=0,
+                            latency_ms=args.latency_ms, latency_dist="fixed", latency_jitter=0.0, seed=42)
+    base_url = start_stub(stub)
+    quintuple_extractor.async_client = AsyncOpenAI(api_key="stub", base_url=base_url)
+
+    await compare(args, stub)
+    await fifo_check(args, stub)
+    await stop_check(args, stub)
+    print(f"批量响应缺条目 {stub.dropped} 次，逐条回退均计入 llm_calls")
+    print("✅ 全部任务完成，llm_calls 与服务器请求数一致，锁不跨LLM请求持有，放不下的任务保持先进先出，停止时取出的任务被取消")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="五元组提取微批处理基准")
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--queue", type=int, default=100, help="任务队列容量")
+    parser.add_argument("--batch-size", type=int, default=4, help="微批方式的 extract_batch_size")
+    parser.add_argument("--long-every", type=int, default=25, help="每隔多少段插入一段长文本")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="桩LLM每次请求的延迟")
+    parser.add_argument("--drop-every", type=int, default=10, help="每隔多少个批量请求少返回一个条目，0为不丢")
+    parser.add_argument("--fifo-texts", type=int, default=200, help="顺序校验的文本数")
+    logging.disable(logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
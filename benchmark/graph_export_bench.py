@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+心智云图导出基准
+生成度数呈幂律分布的合成五元组（默认1万和10万条），对比：
+- 改造前：读取全部五元组，用 pyvis 逐个加节点/边并重写整个 graph.html
+- 增量存储：首次构建（全集重建+导出）、热启动（加载增量文件与坐标缓存+导出）、
+  增量加入新五元组后导出；导出分为默认窗口（度数前N个节点）、焦点邻域窗口和整图
+输出各阶段耗时与写出字节数，并校验：
+- 整图窗口的节点数与实体数一致（运行了改造前路径时与 pyvis 节点数一致）
+- 增量加入后已放置节点的坐标不变，热启动加载的坐标与内存中一致
+- 查看页只引用复制到 graph.html 旁边的 vis-network，不依赖CDN
+- 五元组文件在进程外被修改后 sync() 与其对齐：只新增时增量补齐，文件缺失、变小或改写了已有五元组时重建
+
+pyvis 对无向图每加一条边都要扫描全部已有边（O(E²)），超过 --legacy-max 条时跳过改造前路径。
+
+用法:
+    python benchmark/graph_export_bench.py [--sizes 10000 100000] [--window 500] [--legacy-max 20000]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from summer_memory.quintuple_graph_store import QuintupleGraphStore, TYPE_COLORS, VIS_NETWORK_JS  # noqa: E402
+
+try:
+    from pyvis.network import Network
+    PYVIS_AVAILABLE = True
+except ImportError:
+    PYVIS_AVAILABLE = False
+
+ENTITY_TYPES = list(TYPE_COLORS)
+
+
+def synth_quintuples(count: int, seed: int = 0):
+    """实体按Zipf分布被引用（少数实体度数很高），每个实体类型固定"""
+    rng = np.random.default_rng(seed)
+    entities = max(100, count // 2)
+    types = rng.integers(0, len(ENTITY_TYPES), size=entities)
+    relations = [f"关系{i}" for i in range(60)]
+    quintuples = set()
+    while len(quintuples) < count:
+        n = count - len(quintuples)
+        heads = (rng.zipf(1.6, size=n) - 1) % entities
+        tails = rng.integers(0, entities, size=n)
+        rels = rng.integers(0, len(relations), size=n)
+        for h, t, r in zip(heads, tails, rels):
+            if h != t:
+                quintuples.add((f"实体{h}", ENTITY_TYPES[types[h]], relations[r], f"实体{t}", ENTITY_TYPES[types[t]]))
+    return quintuples
+
+
+def legacy_export(quintuples, out_dir: str):
+    """改造前 visualize_quintuples 的构图与写出（不打开浏览器）"""
+    valid = [t for t in quintuples if isinstance(t, tuple) and len(t) == 5 and all(isinstance(x, str) and x.strip() for x in t)]
+    net = Network(height='1600px', width='100%', notebook=False)
+    net.use_template = False
+    net.barnes_hut()
+    added_nodes = set()
+    for head, head_type, rel, tail, tail_type in valid:
+        if head not in added_nodes:
+            net.add_node(head, label=f"{head}\n({head_type})", color=TYPE_COLORS.get(head_type, '#CCCCCC'), font={'size': 20})
+            added_nodes.add(head)
+        if tail not in added_nodes:
+            net.add_node(tail, label=f"{tail}\n({tail_type})", color=TYPE_COLORS.get(tail_type, '#CCCCCC'), font={'size': 20})
+            added_nodes.add(tail)
+        net.add_edge(head, tail, label=rel, length=120, font={'size': 18})
+    html_file = os.path.join(out_dir, "graph.html")
+    net.write_html(html_file)
+    return len(net.nodes), len(net.edges), os.path.getsize(html_file)
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_size(count: int, args):
+    quintuples = synth_quintuples(count)
+    entities = {q[0] for q in quintuples} | {q[3] for q in quintuples}
+    print(f"\n=== {count} 条五元组，{len(entities)} 个实体 ===")
+    print(f"{'阶段':<28} {'耗时(ms)':>10} {'写出(KB)':>10} {'节点/边':>16}")
+
+    def row(label, ms, size, nodes, edges):
+        print(f"{label:<28} {ms:>10.1f} {size / 1024:>10.1f} {f'{nodes}/{edges}':>16}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_nodes = None
+        if not PYVIS_AVAILABLE:
+            print("未安装 pyvis，跳过改造前路径")
+        elif count > args.legacy_max:
+            print(f"跳过改造前路径（{count} > --legacy-max {args.legacy_max}）")
+        else:
+            legacy_dir = Path(tmp, "legacy")
+            legacy_dir.mkdir()
+            (legacy_nodes, legacy_edges, size), ms = timed(lambda: legacy_export(quintuples, str(legacy_dir)))
+            row("改造前 pyvis 整图", ms, size, legacy_nodes, legacy_edges)
+
+        store_dir = Path(tmp, "store")
+        out_dir = Path(tmp, "view")
+        store = QuintupleGraphStore(str(store_dir))
+        _, ms = timed(lambda: store.rebuild(quintuples))
+        row("首次构建（重建+坐标）", ms, dir_size(store_dir), store.node_count, len(store))
+
+        view, ms = timed(lambda: store.export_view(str(out_dir), max_nodes=args.window))
+        row(f"导出 度数前{args.window}", ms, view["bytes_written"], view["nodes"], view["edges"])
+        focus = store._names[store.top_nodes(1)[0]]
+        view, ms = timed(lambda: store.export_view(str(out_dir), focus=focus, hops=2, max_nodes=args.window))
+        row(f"导出 焦点{args.window}（2跳）", ms, view["bytes_written"], view["nodes"], view["edges"])
+        full, ms = timed(lambda: store.export_view(str(out_dir)))
+        row("导出 整图", ms, full["bytes_written"], full["nodes"], full["edges"])
+        assert full["nodes"] == len(entities), "整图窗口节点数与实体数不一致"
+        if legacy_nodes is not None:
+            assert full["nodes"] == legacy_nodes, "整图窗口节点数与 pyvis 不一致"
+        assert full["edges"] == len(quintuples), "整图窗口边数与五元组数不一致"
+        scripts = re.findall(r'<script src="([^"]+)"', Path(full["html_file"]).read_text(encoding="utf-8"))
+        assert scripts == [VIS_NETWORK_JS] and (out_dir / VIS_NETWORK_JS).is_file(), \
+            f"查看页应只引用本地 vis-network: {scripts}"
+
+        warm = QuintupleGraphStore(str(store_dir))
+        loaded, ms_load = timed(warm.load)
+        assert loaded
+        view, ms = timed(lambda: warm.export_view(str(out_dir), max_nodes=args.window))
+        row(f"热启动 加载+导出前{args.window}", ms_load + ms, view["bytes_written"], view["nodes"], view["edges"])
+        assert np.array_equal(warm._positions[:warm.node_count], store._positions[:store.node_count]), \
+            "热启动加载的坐标与构建时不一致"
+
+        before = warm._positions[:warm.node_count].copy()
+        extra = synth_quintuples(count + args.add, seed=1) - quintuples
+        extra = set(list(extra)[:args.add])
+        added, ms_add = timed(lambda: warm.add(extra))
+        view, ms = timed(lambda: warm.export_view(str(out_dir), max_nodes=args.window))
+        row(f"增量 +{added} 条并导出", ms_add + ms, view["bytes_written"], view["nodes"], view["edges"])
+        assert np.array_equal(warm._positions[:len(before)], before), "增量加入后已放置节点的坐标发生变化"
+
+        reloaded = QuintupleGraphStore(str(store_dir))
+        assert reloaded.load() and len(reloaded) == len(quintuples) + added
+        assert np.array_equal(reloaded._positions[:reloaded.node_count], warm._positions[:warm.node_count]), \
+            "增量写入的坐标缓存与内存不一致"
+
+
+def sync_check(count: int = 2000):
+    """五元组文件在进程外被修改：追加→增量补齐；删除、改写、清空、文件缺失→重建为文件内容"""
+    quintuples = sorted(synth_quintuples(count, seed=2))
+    extra = sorted(synth_quintuples(count + 100, seed=3) - set(quintuples))[:100]
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp, "quintuples.json")
+
+        def save(items):
+            source.write_text(json.dumps([list(q) for q in items], ensure_ascii=False), encoding="utf-8")
+            # 同一时间戳内的两次写入也要被识别为变化
+            os.utime(source, ns=(time.time_ns(), time.time_ns() + len(items)))
+
+        def loader():
+            return [tuple(q) for q in json.loads(source.read_text(encoding="utf-8"))] if source.exists() else []
+
+        store = QuintupleGraphStore(tmp)
+        save(quintuples)
+        store.rebuild(loader())
+        store.mark_synced(str(source))
+        before = store._positions[:store.node_count].copy()
+
+        cases = [
+            ("追加", quintuples + extra),
+            ("删除", quintuples[: count // 2] + extra),
+            ("改写", [(h + "改", ht, r, t, tt) for h, ht, r, t, tt in quintuples[:10]] + quintuples[10:]),
+            ("清空", []),
+        ]
+        for label, items in cases:
+            save(items)
+            store.sync(str(source), loader)
+            assert set(store._items) == set(items), f"{label}后存储与五元组文件不一致"
+            if label == "追加":
+                assert np.array_equal(store._positions[:len(before)], before), "追加后已放置节点的坐标发生变化"
+            reloaded = QuintupleGraphStore(tmp)
+            assert reloaded.load() and set(reloaded._items) == set(items), f"{label}后增量文件未同步重写"
+
+        save(quintuples)
+        store.sync(str(source), loader)
+        source.unlink()
+        store.sync(str(source), loader)
+        assert len(store) == 0, "五元组文件缺失后存储应清空"
+    print(f"✅ sync：{count} 条五元组的追加/删除/改写/清空/文件缺失后存储均与文件一致，追加时坐标不变")
+
+
+def main(args):
+    for count in args.sizes:
+        run_size(count, args)
+    sync_check()
+    print("\n✅ 节点/边数一致，增量加入后已放置节点坐标不变，坐标缓存可完整恢复，查看页不依赖CDN")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="心智云图导出基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--window", type=int, default=500, help="窗口节点数上限")
+    parser.add_argument("--add", type=int, default=200, help="增量加入的五元组数")
+    parser.add_argument("--legacy-max", type=int, default=20000, help="超过该条数时跳过 pyvis 路径")
+    main(parser.parse_args())
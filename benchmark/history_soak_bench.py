@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自博弈历史统计长稳测试（不调用LLM）
+连续模拟10万轮博弈：每轮记录若干条批判与创新性评估，构造轮次结果并做收敛判断，
+每10轮结束一个会话；每轮都调用 get_critique_statistics / get_evaluation_statistics /
+get_session_statistics。检查：
+- 常驻内存（RSS）在预热后保持平稳
+- 统计调用耗时不随历史增长
+- 流式统计（均值/标准差/极值/会话指标）与用同一随机序列批量计算的结果一致
+历史保留条数取 SystemConfig.history_limit，超出部分溢出到临时目录的JSONL文件。
+
+用法:
+    python benchmark/history_soak_bench.py --rounds 100000 --critiques 3 --rss-slack-mb 8
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from game.core.models.config import GameConfig  # noqa: E402
+from game.core.models.data_models import Agent, Task, GameResult  # noqa: E402
+from game.core.self_game.actor import ActorOutput  # noqa: E402
+from game.core.self_game.checker.philoss_checker import PhilossOutput  # noqa: E402
+from game.core.self_game.game_engine import GameEngine, GameRound, GameSession  # noqa: E402
+from game.core.utils.running_stats import RunningStats  # noqa: E402
+
+SESSION_ROUNDS = 10
+
+
+def rss_mb() -> float:
+    """当前常驻内存（MB）"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def scores(seed: int, rounds: int, per_round: int):
+    """可重放的分数序列：(批判分, 响应分, 创新分, 评估耗时)"""
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        yield [(rng.random(), rng.random(), rng.uniform(0, 10), rng.uniform(0.01, 0.5)) for _ in range(per_round)]
+
+
+def soak(engine: GameEngine, rounds: int, per_round: int, sample_every: int):
+    agents = [Agent(name=f"角色{i}", role="专家", responsibilities=[], skills=[], thinking_vector="",
+                    system_prompt="", connection_permissions=[], agent_id=f"agent_{i}") for i in range(2)]
+    task = Task(task_id="soak", description="长稳测试", domain="技术", requirements=[])
+    criticizer, checker = engine.criticizer, engine.philoss_checker
+    session_rounds, session_start = [], time.perf_counter()
+    rss, stat_latency = [], []
+
+    for round_number, values in enumerate(scores(1, rounds, per_round), 1):
+        actor_outputs, critic_outputs, philoss_outputs = [], [], []
+        for branch, (critical, satisfaction, novelty, analysis_time) in enumerate(values, 1):
+            actor_output = ActorOutput(agent_id=agents[0].agent_id, branch_id=branch, content="方案",
+                                       generation_time=0.0, iteration=round_number, metadata={"agent_name": agents[0].name})
+            critic_outputs.append(criticizer._record_critique(
+                actor_output, agents[1], task, (critical, satisfaction, "摘要", ["建议"], []), 0.0, round_number))
+            output = PhilossOutput(target_content_id=actor_output.target_output_id, novelty_score=novelty,
+                                   text_blocks=[], hidden_states=[], prediction_errors=[novelty / 10],
+                                   analysis_time=analysis_time, metadata={})
+            checker._record_evaluation(output)
+            actor_outputs.append(actor_output)
+            philoss_outputs.append(output)
+
+        metadata = {}
+        for key, stats in (("critical_score_stats", [c.overall_score for c in critic_outputs]),
+                           ("satisfaction_score_stats", [c.satisfaction_score for c in critic_outputs]),
+                           ("novelty_score_stats", [p.novelty_score for p in philoss_outputs])):
+            metadata[key] = RunningStats.of(stats).to_dict()
+        session_rounds.append(GameRound(round_number, actor_outputs, critic_outputs, philoss_outputs,
+                                        "决策阶段", 0.0, "继续", metadata))
+        engine._check_convergence(session_rounds[-2:])
+
+        if round_number % SESSION_ROUNDS == 0:
+            metrics = engine._calculate_quality_metrics(session_rounds)
+            session = GameSession(session_id=f"session_{round_number}", task=task, agents=agents, rounds=session_rounds,
+                                  final_result=GameResult(actor_output=None, critic_scores={}, novel_score=None,
+                                                          iteration_count=len(session_rounds), final_consensus="",
+                                                          success=metrics["average_critical_score"] >= 0.5),
+                                  total_time=time.perf_counter() - session_start, status="完成", metadata={})
+            engine._record_session(session)
+            session_rounds, session_start = [], time.perf_counter()
+
+        start = time.perf_counter()
+        critique_stats = criticizer.get_critique_statistics()
+        evaluation_stats = checker.get_evaluation_statistics()
+        session_stats = engine.get_session_statistics()
+        stat_latency.append(time.perf_counter() - start)
+
+        if round_number % sample_every == 0:
+            rss.append((round_number, rss_mb(), statistics.median(stat_latency) * 1e6))
+            stat_latency.clear()
+    return critique_stats, evaluation_stats, session_stats, rss
+
+
+def batch_reference(rounds: int, per_round: int):
+    """用同一随机序列批量计算（不保留历史，逐轮求和）"""
+    critical, satisfaction, novelty, analysis = [], [], [], []
+    for values in scores(1, rounds, per_round):
+        for c, s, n, a in values:
+            critical.append(c)
+            satisfaction.append(s)
+            novelty.append(n)
+            analysis.append(a)
+    return {
+        "average_overall_score": math.fsum(critical) / len(critical),
+        "overall_score_std": statistics.pstdev(critical),
+        "average_satisfaction_score": math.fsum(satisfaction) / len(satisfaction),
+        "average_novelty_score": math.fsum(novelty) / len(novelty),
+        "novelty_score_std": statistics.pstdev(novelty),
+        "average_analysis_time": math.fsum(analysis) / len(analysis),
+        "count": len(critical),
+    }
+
+
+def main(rounds: int, per_round: int, rss_slack_mb: float, history_limit: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        # GameConfig 会在当前目录创建结果与模板目录
+        os.chdir(tmp)
+        config = GameConfig()
+        config.system.history_limit = history_limit
+        config.system.history_spill_dir = str(Path(tmp) / "history")
+        engine = GameEngine(config, naga_conversation=object())
+
+        start = time.perf_counter()
+        critique_stats, evaluation_stats, session_stats, rss = soak(engine, rounds, per_round, max(1, rounds // 10))
+        elapsed = time.perf_counter() - start
+        for history in (engine.criticizer.critique_history, engine.philoss_checker.evaluation_history, engine.sessions):
+            history.close()
+        spill_files = sorted((Path(tmp) / "history").glob("*.jsonl"))
+        spill_lines = {f.name: sum(1 for _ in open(f, encoding="utf-8")) for f in spill_files}
+
+    print(f"{rounds} 轮 × {per_round} 条批判/评估，历史保留 {history_limit} 条，耗时 {elapsed:.1f}s")
+    print(f"{'轮次':>8} {'RSS(MB)':>10} {'统计调用p50(µs)':>16}")
+    for round_number, mb, latency in rss:
+        print(f"{round_number:>8} {mb:>10.1f} {latency:>16.1f}")
+
+    # 预热（首个采样点）之后RSS保持平稳
+    growth = max(mb for _, mb, _ in rss[1:]) - rss[1][1] if len(rss) > 1 else 0.0
+    assert growth <= rss_slack_mb, f"RSS持续增长 {growth:.1f}MB"
+
+    reference = batch_reference(rounds, per_round)
+    assert critique_stats["total_critiques"] == evaluation_stats["total_evaluations"] == reference["count"]
+    for key in ("average_overall_score", "overall_score_std", "average_satisfaction_score"):
+        assert math.isclose(critique_stats[key], reference[key], rel_tol=1e-9), f"{key} 不一致"
+    for key in ("average_novelty_score", "novelty_score_std", "average_analysis_time"):
+        assert math.isclose(evaluation_stats[key], reference[key], rel_tol=1e-9), f"{key} 不一致"
+    assert session_stats["total_sessions"] == rounds // SESSION_ROUNDS
+    assert math.isclose(session_stats["average_rounds"], SESSION_ROUNDS)
+    expected_spill = reference["count"] - history_limit
+    assert spill_lines.get("critiques.jsonl") == expected_spill, f"溢出条数不一致: {spill_lines}"
+
+    print(f"预热后RSS增长 {growth:.1f}MB（允许 {rss_slack_mb:.0f}MB），溢出文件行数 {spill_lines}")
+    print(f"会话统计: {session_stats['total_sessions']} 个会话，成功率 {session_stats['success_rate']:.1f}%")
+    print("✅ RSS平稳，流式统计与批量计算一致")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="自博弈历史统计长稳测试")
+    parser.add_argument("--rounds", type=int, default=100000)
+    parser.add_argument("--critiques", type=int, default=3, help="每轮批判/评估条数")
+    parser.add_argument("--history-limit", type=int, default=1000)
+    parser.add_argument("--rss-slack-mb", type=float, default=8.0, help="预热后允许的RSS增长")
+    args = parser.parse_args()
+    main(args.rounds, args.critiques, args.rss_slack_mb, args.history_limit)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端压测
+在逐级提升的并发下驱动真实的 /chat 与 /chat/stream（后台意图分析 -> MCP调度 -> 工具回调，
+可选GRAG记忆提取），统计 p50/p95/p99 延迟、首token耗时、吞吐量以及各服务峰值内存。
+结果写入 benchmark/results/*.json，可与之前的结果对比。
+
+用法:
+    python benchmark/load_test.py                          # 自动启动桩LLM与三个服务
+    python benchmark/load_test.py --levels 1,8,32 --requests 200 --tool-ratio 0.3
+    python benchmark/load_test.py --no-boot                # 使用已启动的环境（boot_services.py）
+    python benchmark/load_test.py --compare benchmark/results/e2e_xxx.json
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark.boot_services import BenchEnvironment, SERVICE_PORTS  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+API_URL = f"http://127.0.0.1:{SERVICE_PORTS['api_server']}"
+
+CHAT_MESSAGES = [
+    "你好，今天过得怎么样？",
+    "给我讲讲Python的生成器是怎么工作的",
+    "帮我总结一下刚才聊的内容",
+    "推荐几本适合入门机器学习的书",
+    "周末去爬山需要准备些什么",
+]
+# 桩LLM默认脚本中，意图分析遇到"现在几点"会返回工具调用
+TOOL_MESSAGES = ["现在几点了？", "帮我看看现在几点"]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """线性插值百分位"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """毫秒统计"""
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+    return {
+        "p50": ms(percentile(values, 50)),
+        "p95": ms(percentile(values, 95)),
+        "p99": ms(percentile(values, 99)),
+        "mean": ms(sum(values) / len(values)) if values else None,
+    }
+
+
+async def send_chat(client: httpx.AsyncClient, message: str, session_id: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    response = await client.post("/chat", json={"message": message, "session_id": session_id})
+    return {"latency": time.perf_counter() - start, "ttft": None, "ok": response.status_code == 200}
+
+
+async def send_stream(client: httpx.AsyncClient, message: str, session_id: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    ttft = None
+    ok = True
+    async with client.stream("POST", "/chat/stream",
+                             json={"message": message, "session_id": session_id}) as response:
+        ok = response.status_code == 200
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[6:]
+            if data.startswith("session_id:") or data == "[DONE]":
+                continue
+            if data.startswith("错误:") or data.startswith("流式调用出错"):
+                ok = False
+            if ttft is None:
+                ttft = time.perf_counter() - start
+    return {"latency": time.perf_counter() - start, "ttft": ttft, "ok": ok}
+
+
+async def fetch_stub_stats(client: httpx.AsyncClient, stub_url: str) -> Dict[str, int]:
+    try:
+        response = await client.get(stub_url.rsplit("/v1", 1)[0] + "/stats")
+        return response.json()
+    except Exception:
+        return {}
+
+
+async def run_level(concurrency: int, requests: int, stream_ratio: float, tool_ratio: float,
+                    seed: int, settle: float, env: Optional[BenchEnvironment], stub_url: str) -> Dict[str, Any]:
+    """以固定并发跑完一级：每个虚拟用户使用独立会话，依次发送请求"""
+    rng = random.Random(seed * 1000 + concurrency)
+    plan = []
+    for index in range(requests):
+        message = rng.choice(TOOL_MESSAGES) if rng.random() < tool_ratio else rng.choice(CHAT_MESSAGES)
+        plan.append((index, message, rng.random() < stream_ratio))
+
+    results: List[Dict[str, Any]] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=API_URL, timeout=300, limits=limits) as client:
+        stats_before = await fetch_stub_stats(client, stub_url)
+
+        async def user(user_index: int):
+            session_id = f"bench-c{concurrency}-u{user_index}"
+            while not queue.empty():
+                _, message, stream = queue.get_nowait()
+                try:
+                    sender = send_stream if stream else send_chat
+                    result = await sender(client, message, session_id)
+                except Exception as e:
+                    result = {"latency": None, "ttft": None, "ok": False, "error": str(e)}
+                result["stream"] = stream
+                results.append(result)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        wall = time.perf_counter() - start
+
+        # 等待后台意图分析、工具调用与记忆提取完成，计入桩LLM的调用统计
+        await asyncio.sleep(settle)
+        stats_after = await fetch_stub_stats(client, stub_url)
+
+    ok = [r for r in results if r["ok"]]
+    stub_calls = {key: value - stats_before.get(key, 0) for key, value in stats_after.items()}
+    level = {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 2) if wall > 0 else None,
+        "latency_ms": summarize([r["latency"] for r in ok]),
+        "chat_latency_ms": summarize([r["latency"] for r in ok if not r["stream"]]),
+        "stream_latency_ms": summarize([r["latency"] for r in ok if r["stream"]]),
+        "ttft_ms": summarize([r["ttft"] for r in ok if r["stream"] and r["ttft"] is not None]),
+        "stub_calls": stub_calls,
+        "peak_rss_mb": env.peak_rss_mb() if env else {},
+    }
+    print(f"并发 {concurrency:>3}: {level['throughput_rps']} req/s, "
+          f"p50 {level['latency_ms']['p50']} ms, p95 {level['latency_ms']['p95']} ms, "
+          f"p99 {level['latency_ms']['p99']} ms, TTFT p50 {level['ttft_ms']['p50']} ms, "
+          f"错误 {level['errors']}")
+    return level
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=str(Path(__file__).parent.parent), text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]):
+    """按并发级别对比 p95 延迟、TTFT 与吞吐量"""
+    before = {level["concurrency"]: level for level in previous.get("levels", [])}
+    print(f"与 {previous.get('commit')} ({previous.get('timestamp')}) 对比:")
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if not old:
+            continue
+        parts = []
+        for label, now, then in (
+            ("p95", level["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            ("TTFT p50", level["ttft_ms"]["p50"], old["ttft_ms"]["p50"]),
+            ("吞吐", level["throughput_rps"], old["throughput_rps"]),
+        ):
+            if now is not None and then:
+                parts.append(f"{label} {then} -> {now} ({(now / then - 1) * 100:+.1f}%)")
+        print(f"   并发 {level['concurrency']:>3}: " + ", ".join(parts))
+
+
+async def main(args) -> Dict[str, Any]:
+    levels = [int(value) for value in args.levels.split(",") if value.strip()]
+    stub_url = f"http://127.0.0.1:{args.stub_port}/v1"
+    stub_args = ["--token-rate", str(args.token_rate), "--latency-ms", str(args.latency_ms),
+                 "--latency-dist", args.latency_dist, "--seed", str(args.seed)]
+
+    env = None
+    if not args.no_boot:
+        env = BenchEnvironment(stub_port=args.stub_port, stub_args=stub_args, grag=args.grag)
+        env.start()
+    try:
+        results = []
+        for concurrency in levels:
+            results.append(await run_level(concurrency, args.requests, args.stream_ratio, args.tool_ratio,
+                                           args.seed, args.settle, env, stub_url))
+    finally:
+        if env:
+            env.stop()
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "levels": levels, "requests": args.requests, "stream_ratio": args.stream_ratio,
+            "tool_ratio": args.tool_ratio, "grag": args.grag, "token_rate": args.token_rate,
+            "latency_ms": args.latency_ms, "latency_dist": args.latency_dist, "seed": args.seed,
+            "booted": not args.no_boot,
+        },
+        "levels": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NagaAgent 端到端压测")
+    parser.add_argument("--levels", default="1,4,16,32", help="并发级别，逗号分隔")
+    parser.add_argument("--requests", type=int, default=100, help="每个并发级别的请求数")
+    parser.add_argument("--stream-ratio", type=float, default=0.5, help="流式请求占比")
+    parser.add_argument("--tool-ratio", type=float, default=0.2, help="会触发工具调用的消息占比")
+    parser.add_argument("--settle", type=float, default=3.0, help="每级结束后等待后台任务的时间（秒）")
+    parser.add_argument("--grag", action="store_true", help="开启GRAG记忆提取（需要Neo4j）")
+    parser.add_argument("--no-boot", action="store_true", help="不自动启动环境，使用已运行的服务")
+    parser.add_argument("--stub-port", type=int, default=18080)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果文件路径，默认写入 benchmark/results/")
+    parser.add_argument("--compare", help="与指定的历史结果文件对比")
+    args = parser.parse_args()
+
+    try:
+        record = asyncio.run(main(args))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"e2e_{record['commit'] or 'unknown'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    print(f"📄 结果已写入 {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(record, json.load(f))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP清单快照基准
+注册50个合成服务，校验快照输出与逐次重算一致，并对比：
+- 意图分析提示词构建（ConversationAnalyzer._build_prompt）：逐服务拼接工具摘要 vs 读取预渲染摘要
+- /services 与服务统计：逐服务重算工具列表 vs 读取清单快照
+
+用法:
+    python benchmark/manifest_bench.py --agents 50 --repeat 2000
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcpserver import mcp_registry  # noqa: E402
+from mcpserver.mcp_registry import (  # noqa: E402
+    MANIFEST_CACHE, MCP_REGISTRY, get_manifest_snapshot, register_agent, unregister_agent,
+)
+
+
+def synthetic_manifest(index: int, tools: int = 4) -> dict:
+    return {
+        "displayName": f"合成服务{index}",
+        "version": "1.0.0",
+        "description": f"第{index}个合成服务，用于清单快照基准测试。" * 3,
+        "agentType": "mcp",
+        "capabilities": {
+            "invocationCommands": [
+                {"command": f"tool_{index}_{t}", "description": f"工具{t}的说明" * 10,
+                 "example": f"{{\"tool_name\": \"tool_{index}_{t}\"}}"}
+                for t in range(tools)
+            ],
+            # 意图分析提示词列出的是 capabilities[*].tools（如Word服务的写法），奇数号服务留空
+            "document": {"description": "文档操作",
+                         "tools": [f"doc_{index}_{t}" for t in range(tools)] if index % 2 == 0 else []},
+        },
+    }
+
+
+def legacy_tools_prompt() -> str:
+    """改造前：每次分析都逐服务查询清单，从 capabilities[*].tools 收集工具名并拼接"""
+    lines = []
+    for name in list(MCP_REGISTRY.keys()):
+        info = mcp_registry.get_service_info(name)["manifest"]
+        tools = []
+        for cap_info in info.get("capabilities", {}).values():
+            if isinstance(cap_info, dict) and "tools" in cap_info:
+                tools.extend(cap_info["tools"])
+        display_name = info.get("displayName", name)
+        if tools:
+            lines.append(f"- {display_name}: {info.get('description', '')} (工具: {', '.join(tools)})")
+        else:
+            lines.append(f"- {display_name}: {info.get('description', '')}")
+    return "\n".join(lines)
+
+
+def legacy_services() -> dict:
+    """改造前：每次请求都逐服务重算工具列表与统计"""
+    services = []
+    for name in MCP_REGISTRY.keys():
+        manifest = MANIFEST_CACHE.get(name, {})
+        tools = [{"name": cmd.get("command", ""), "description": cmd.get("description", ""),
+                  "example": cmd.get("example", "")}
+                 for cmd in manifest.get("capabilities", {}).get("invocationCommands", [])]
+        services.append({"name": name, "description": manifest.get("description", ""),
+                         "display_name": manifest.get("displayName", name),
+                         "version": manifest.get("version", "1.0.0"), "available_tools": tools, "id": name})
+    return {"statistics": {"total_services": len(services),
+                           "total_tools": sum(len(s["available_tools"]) for s in services),
+                           "registered_services": list(MCP_REGISTRY.keys())},
+            "services": services}
+
+
+def timed_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(agents: int, repeat: int):
+    names = [f"bench_service_{i}" for i in range(agents)]
+    for i, name in enumerate(names):
+        register_agent(name, object(), synthetic_manifest(i))
+    try:
+        version = get_manifest_snapshot().version
+        print(f"已注册 {len(MCP_REGISTRY)} 个服务，清单版本 {version}")
+        snapshot = get_manifest_snapshot()
+        assert snapshot.tools_prompt == legacy_tools_prompt(), "预渲染工具摘要与逐次拼接不一致"
+        legacy = legacy_services()
+        assert list(snapshot.services_info) == legacy["services"], "快照服务列表与逐次重算不一致"
+        assert all(snapshot.statistics[k] == v for k, v in legacy["statistics"].items()), "快照统计与逐次重算不一致"
+        print("✅ 快照输出与逐次重算一致")
+
+        from mcpserver.mcp_server import get_services
+        from system.background_analyzer import ConversationAnalyzer
+        analyzer = object.__new__(ConversationAnalyzer)  # 只用到提示词构建，不初始化LLM客户端
+        messages = [{"role": "user", "content": "帮我查一下明天的天气"}, {"role": "assistant", "content": "好的"}]
+        loop = asyncio.new_event_loop()
+
+        rows = [
+            ("工具摘要拼接", timed_us(legacy_tools_prompt, repeat),
+             timed_us(lambda: get_manifest_snapshot().tools_prompt, repeat)),
+            ("/services", timed_us(legacy_services, repeat),
+             timed_us(lambda: loop.run_until_complete(get_services()), repeat)),
+            ("意图分析提示词构建", None, timed_us(lambda: analyzer._build_prompt(messages), repeat)),
+        ]
+        loop.close()
+        print(f"{'项目':<16} {'逐次重算(µs)':>14} {'清单快照(µs)':>14}")
+        for label, legacy, cached in rows:
+            legacy_text = f"{legacy:>14.1f}" if legacy is not None else f"{'-':>14}"
+            print(f"{label:<16} {legacy_text} {cached:>14.1f}")
+
+        unregister_agent(names[-1])
+        assert get_manifest_snapshot().version > version, "注销服务后清单版本应递增"
+        print("✅ 注销服务后清单版本已递增")
+    finally:
+        for name in names:
+            unregister_agent(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP清单快照基准")
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.agents, args.repeat)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP服务启动基准
+在独立子进程中分别以全量导入（nagaagent_core扫描注册）和懒加载（清单+代理）两种方式
+完成MCP服务器的启动注册，对比耗时、峰值内存与已导入模块数；
+并校验经代理的首次调用与全量导入的智能体返回相同结果。
+
+用法:
+    python benchmark/mcp_startup_bench.py --repeat 3
+    python benchmark/mcp_startup_bench.py --service 应用启动服务 --task '{"tool_name": "获取应用列表"}'
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmark.boot_services import read_peak_rss_mb  # noqa: E402
+
+
+def child_startup(lazy: bool):
+    """子进程：导入MCP服务器并完成注册，输出一行JSON"""
+    start = time.perf_counter()
+    modules_before = len(sys.modules)
+    import mcpserver.mcp_server  # noqa: F401  服务器模块本身的导入开销两种模式相同
+    from mcpserver.mcp_registry import auto_register_mcp, MCP_REGISTRY
+    auto_register_mcp(lazy=lazy)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "elapsed": elapsed,
+        "peak_rss_mb": read_peak_rss_mb(os.getpid()),
+        "modules": len(sys.modules) - modules_before,
+        "services": len(MCP_REGISTRY),
+    }))
+
+
+def child_call(lazy: bool, service: str, task: dict):
+    """子进程：注册后调用一次指定服务，输出一行JSON"""
+    from mcpserver.mcp_registry import auto_register_mcp, MCP_REGISTRY
+    auto_register_mcp(lazy=lazy)
+    agent = MCP_REGISTRY.get(service)
+    if agent is None:
+        print(json.dumps({"error": f"未注册服务: {service}"}, ensure_ascii=False))
+        return
+    start = time.perf_counter()
+    result = asyncio.run(agent.handle_handoff(dict(task)))
+    print(json.dumps({"result": result, "first_call": time.perf_counter() - start}, ensure_ascii=False))
+
+
+def run_child(*args) -> dict:
+    output = subprocess.run([sys.executable, __file__, *args], cwd=ROOT, capture_output=True,
+                            text=True, encoding="utf-8", timeout=600)
+    lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+    if output.returncode != 0 or not lines:
+        raise RuntimeError(f"子进程失败({' '.join(args)}):\n{output.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def main(repeat: int, service: str, task: dict):
+    print(f"{'模式':<8} {'启动耗时(ms)':>14} {'峰值内存(MB)':>14} {'新导入模块':>10} {'服务数':>6}")
+    for mode in ("eager", "lazy"):
+        runs = [run_child("--child", mode) for _ in range(repeat)]
+        elapsed = statistics.median(run["elapsed"] for run in runs) * 1000
+        rss = statistics.median(run["peak_rss_mb"] or 0 for run in runs)
+        print(f"{mode:<8} {elapsed:>14.0f} {rss:>14.1f} {runs[-1]['modules']:>10} {runs[-1]['services']:>6}")
+
+    eager = run_child("--child-call", "eager", "--service", service, "--task", json.dumps(task, ensure_ascii=False))
+    lazy = run_child("--child-call", "lazy", "--service", service, "--task", json.dumps(task, ensure_ascii=False))
+    assert "error" not in eager and "error" not in lazy, f"调用失败: {eager} / {lazy}"
+    assert eager["result"] == lazy["result"], f"代理首次调用结果与全量导入不一致:\n{eager['result']}\n{lazy['result']}"
+    print(f"✅ {service} 经代理首次调用结果与全量导入一致"
+          f"（首次调用 {lazy['first_call'] * 1000:.0f}ms，全量导入 {eager['first_call'] * 1000:.0f}ms）")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP服务启动基准")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--service", default="应用启动服务", help="用于一致性校验的服务名（清单displayName）")
+    parser.add_argument("--task", default='{"tool_name": "获取应用列表"}', help="一致性校验的调用参数(JSON)")
+    parser.add_argument("--child", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    parser.add_argument("--child-call", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child_startup(args.child == "lazy")
+    elif args.child_call:
+        child_call(args.child_call == "lazy", args.service, json.loads(args.task))
+    else:
+        main(args.repeat, args.service, json.loads(args.task))
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆召回基准
+生成10万条合成五元组（中英文人名 × 工作/居住/喜欢/认识/毕业等关系），按模板生成中英文问题，对比：
+- 向量召回：QuintupleVectorIndex（默认哈希向量化器）一次本地检索，按相似度阈值过滤
+- 关键词路径：模拟 query_graph_by_keywords 的 CONTAINS 匹配（每个关键词 LIMIT 5），
+  关键词取问题中的实体名与关系词，相当于LLM关键词提取完全正确时的上限
+- 向量优先、未命中时回退关键词（query_knowledge 的实际路由）
+输出建索引耗时、每次查询的p50/p95延迟、命中率（返回结果含目标五元组）与回退比例。
+另校验五元组文件被追加、删减、改写或删除后，索引与文件对齐（sync）。
+关键词路径的延迟只含本地匹配，实际还要加一次LLM往返和一次Neo4j查询。
+
+用法:
+    python benchmark/memory_recall_bench.py [--quintuples 100000] [--questions 1000] [--thresholds 0.3 0.0]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from summer_memory.quintuple_vector_index import QuintupleVectorIndex  # noqa: E402
+
+SURNAMES = list("王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗")
+GIVEN = list("伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚")
+EN_NAMES = ["Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry", "Ivy", "Jack"]
+PLACES = ["北京", "上海", "深圳", "杭州", "成都", "London", "Paris", "Tokyo", "Berlin", "Seattle"]
+ORGS = ["腾讯", "阿里巴巴", "华为", "字节跳动", "Google", "Microsoft", "OpenAI", "Amazon", "清华大学", "MIT"]
+THINGS = ["咖啡", "篮球", "钢琴", "摄影", "Python", "jazz", "hiking", "围棋", "electric cars", "科幻小说"]
+
+# 关系 -> (客体池, 客体类型, 问题模板, 关键词路径中LLM会提取的关系词)
+RELATIONS = {
+    "工作于": (ORGS, "组织", ["{h}在哪里工作", "where does {h} work"], "工作"),
+    "居住在": (PLACES, "地点", ["{h}住在哪里", "where does {h} live"], "居住"),
+    "喜欢": (THINGS, "概念", ["{h}喜欢什么", "what does {h} like"], "喜欢"),
+    "毕业于": (ORGS, "组织", ["{h}是哪个学校毕业的", "which school did {h} graduate from"], "毕业"),
+    "认识": (None, "人物", ["{h}认识谁", "who does {h} know"], "认识"),
+}
+
+
+def person_names(count: int, rng: random.Random):
+    names = set()
+    while len(names) < count:
+        if rng.random() < 0.5:
+            names.add(rng.choice(SURNAMES) + rng.choice(GIVEN) + rng.choice(GIVEN) + str(rng.randint(1, 999)))
+        else:
+            names.add(f"{rng.choice(EN_NAMES)}{rng.randint(1, 99999)}")
+    return sorted(names)
+
+
+def synth(count: int, seed: int = 29):
+    """生成五元组，每人约5条关系"""
+    rng = random.Random(seed)
+    people = person_names(max(100, count // 5), rng)
+    quintuples = set()
+    while len(quintuples) < count:
+        head = rng.choice(people)
+        rel = rng.choice(list(RELATIONS))
+        pool, tail_type, _, _ = RELATIONS[rel]
+        tail = rng.choice(pool) if pool else rng.choice(people)
+        if tail != head:
+            quintuples.add((head, "人物", rel, tail, tail_type))
+    return sorted(quintuples)
+
+
+def make_questions(quintuples, count: int, seed: int = 1):
+    """随机取目标五元组，用中/英文模板提问；命中指结果中含与目标同主体同关系的五元组"""
+    rng = random.Random(seed)
+    questions = []
+    for head, _, rel, _, _ in rng.sample(quintuples, count):
+        _, _, templates, rel_word = RELATIONS[rel]
+        lang = rng.randrange(len(templates))
+        questions.append((templates[lang].format(h=head), lang, (head, rel), [head, rel_word]))
+    return questions
+
+
+def keyword_query(quintuples, keywords):
+    """模拟 query_graph_by_keywords：每个关键词在实体名/类型/关系上做 CONTAINS 匹配，各取前5条"""
+    results = []
+    for kw in keywords:
+        matched = 0
+        for q in quintuples:
+            if kw in q[0] or kw in q[1] or kw in q[2] or kw in q[3] or kw in q[4]:
+                results.append(q)
+                matched += 1
+                if matched >= 5:
+                    break
+    return results
+
+
+def is_hit(results, target):
+    head, rel = target
+    return any(q[0] == head and q[2] == rel for q in results)
+
+
+def percentile_row(label, latencies, hits, total, extra=""):
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{label:<30} {statistics.median(latencies):>9.2f} {p95:>9.2f} {hits / total * 100:>8.1f}% {extra:>10}")
+
+
+def sync_check(quintuples):
+    """五元组文件在外部被追加/删减/改写/删除后，索引与文件内容一致"""
+    items = sorted(quintuples)[:200]
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "quintuples.json")
+
+        def write(rows, tick):
+            with open(source, "w", encoding="utf-8") as f:
+                json.dump([list(q) for q in rows], f, ensure_ascii=False)
+            os.utime(source, ns=(tick * 10 ** 9, tick * 10 ** 9))
+
+        def loader():
+            with open(source, "r", encoding="utf-8") as f:
+                return [tuple(q) for q in json.load(f)]
+
+        index = QuintupleVectorIndex(tmp)
+        renamed = [(h + "改", ht, r, t, tt) for h, ht, r, t, tt in items[:50]]
+        steps = [("追加", items[:100]), ("再追加", items), ("删减", items[50:150]),
+                 ("改写", renamed + items[100:150]), ("删除", None)]
+        for tick, (label, rows) in enumerate(steps, 1):
+            if rows is None:
+                os.remove(source)
+                rows = []
+            else:
+                write(rows, tick)
+            index.sync(source, loader)
+            assert len(index) == len(rows) and all(q in index for q in rows), f"{label}后向量索引与五元组文件不一致"
+
+        write(items[:80], len(steps) + 1)
+        index.sync(source, loader)
+        reloaded = QuintupleVectorIndex(tmp)
+        assert reloaded.load() and reloaded.sync(source, loader) == 0, "重新加载后应识别出文件未变化"
+    print("✅ 五元组文件追加/删减/改写/删除后向量索引与文件一致")
+
+
+def main(args):
+    quintuples = synth(args.quintuples)
+    questions = make_questions(quintuples, args.questions)
+    print(f"{len(quintuples)} 条五元组，{len(questions)} 个问题（中英文各约一半），top_k={args.top_k}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = QuintupleVectorIndex(tmp)
+        start = time.perf_counter()
+        index.rebuild(quintuples)
+        print(f"建索引 {time.perf_counter() - start:.2f}s")
+
+        keyword_hits, keyword_latencies, keyword_results = 0, [], []
+        for _, _, target, keywords in questions:
+            start = time.perf_counter()
+            results = keyword_query(quintuples, keywords)
+            keyword_latencies.append((time.perf_counter() - start) * 1000)
+            keyword_results.append(results)
+            keyword_hits += is_hit(results, target)
+
+        print(f"\n{'路径':<30} {'p50(ms)':>9} {'p95(ms)':>9} {'命中率':>9} {'回退比例':>10}")
+        percentile_row("关键词（不含LLM/Neo4j）", keyword_latencies, keyword_hits, len(questions))
+        for threshold in args.thresholds:
+            vector_hits, routed_hits, fallbacks, latencies = 0, 0, 0, []
+            lang_hits = [0, 0]
+            for (question, lang, target, _), kw_results in zip(questions, keyword_results):
+                start = time.perf_counter()
+                results = [q for q, _ in index.search(question, top_k=args.top_k, threshold=threshold)]
+                latencies.append((time.perf_counter() - start) * 1000)
+                hit = is_hit(results, target)
+                vector_hits += hit
+                lang_hits[lang] += hit
+                if results:
+                    routed_hits += hit
+                else:
+                    # 向量未命中（低于阈值）时回退到关键词路径
+                    fallbacks += 1
+                    routed_hits += is_hit(kw_results, target)
+            percentile_row(f"向量 阈值{threshold}", latencies, vector_hits, len(questions))
+            percentile_row(f"向量 阈值{threshold}→未命中回退关键词", latencies, routed_hits, len(questions),
+                           f"{fallbacks / len(questions) * 100:.1f}%")
+            per_lang = sum(1 for _, lang, _, _ in questions if lang == 0)
+            print(f"{'':<30} 向量命中：中文 {lang_hits[0]}/{per_lang}，英文 {lang_hits[1]}/{len(questions) - per_lang}")
+            assert routed_hits >= vector_hits, "回退后命中率不应低于只用向量"
+    sync_check(quintuples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="记忆召回基准")
+    parser.add_argument("--quintuples", type=int, default=100000)
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.0], help="向量召回的相似度阈值")
+    main(parser.parse_args())
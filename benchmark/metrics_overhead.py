@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标与追踪开销基准
+进程内启动一个模拟 /chat 的ASGI应用（桩LLM按固定间隔流式吐出token），
+分别在不挂/挂上 MetricsMiddleware + LLM指标埋点的情况下驱动相同请求，
+对比平均延迟和每请求CPU耗时。目标：开销低于 /chat 请求耗时的2%。
+
+用法:
+    python benchmark/metrics_overhead.py --requests 200 --tokens 50 --token-delay 0.002
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from system.metrics import (  # noqa: E402
+    MetricsMiddleware, LLM_LATENCY, LLM_TTFT, LLM_TOKENS, registry,
+)
+
+
+def make_chat_app(tokens: int, token_delay: float, instrumented: bool):
+    """构造模拟 /chat 的ASGI应用，instrumented时按 llm_service 的方式记录LLM指标"""
+
+    async def stub_llm():
+        for index in range(tokens):
+            await asyncio.sleep(token_delay)
+            yield f"token{index} ".encode("utf-8")
+
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")]})
+        start = time.perf_counter()
+        first = True
+        chunks = 0
+        async for chunk in stub_llm():
+            if instrumented and first:
+                LLM_TTFT.observe(time.perf_counter() - start)
+                first = False
+            chunks += 1
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        if instrumented:
+            LLM_LATENCY.observe(time.perf_counter() - start, mode="stream")
+            LLM_TOKENS.inc(chunks, mode="stream", kind="completion")
+
+    return app
+
+
+async def drive(app, requests: int, concurrency: int):
+    """并发驱动请求，返回(每请求延迟列表, 每请求CPU耗时µs)"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            scope = {"type": "http", "method": "POST", "path": "/chat", "headers": []}
+
+            async def receive():
+                return {"type": "http.request", "body": b"{}", "more_body": False}
+
+            async def send(message):
+                pass
+
+            start = time.perf_counter()
+            await app(scope, receive, send)
+            latencies.append(time.perf_counter() - start)
+
+    cpu_start = time.process_time()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    cpu_us = (time.process_time() - cpu_start) / requests * 1e6
+    return latencies, cpu_us
+
+
+async def run(args):
+    plain = make_chat_app(args.tokens, args.token_delay, instrumented=False)
+    instrumented = MetricsMiddleware(make_chat_app(args.tokens, args.token_delay, instrumented=True), service="api")
+
+    results = {"plain": [], "instrumented": []}
+    cpu = {"plain": [], "instrumented": []}
+    # 交替运行多轮，降低系统抖动的影响
+    for _ in range(args.rounds):
+        for name, app in (("plain", plain), ("instrumented", instrumented)):
+            latencies, cpu_us = await drive(app, args.requests, args.concurrency)
+            results[name].append(statistics.mean(latencies))
+            cpu[name].append(cpu_us)
+
+    plain_ms = statistics.median(results["plain"]) * 1000
+    inst_ms = statistics.median(results["instrumented"]) * 1000
+    cpu_delta = statistics.median(cpu["instrumented"]) - statistics.median(cpu["plain"])
+    latency_overhead = (inst_ms / plain_ms - 1) * 100
+    cpu_share = cpu_delta / (plain_ms * 1000) * 100
+
+    print("=" * 50)
+    print(f"平均延迟  无埋点: {plain_ms:.3f} ms  有埋点: {inst_ms:.3f} ms  ({latency_overhead:+.2f}%)")
+    print(f"每请求CPU 无埋点: {statistics.median(cpu['plain']):.1f} µs  "
+          f"有埋点: {statistics.median(cpu['instrumented']):.1f} µs  (+{cpu_delta:.1f} µs)")
+    print(f"埋点CPU开销占请求耗时: {cpu_share:.3f}%")
+    print("=" * 50)
+    if args.show_metrics:
+        print(registry.render())
+    return max(latency_overhead, cpu_share)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="指标与追踪开销基准")
+    parser.add_argument("--requests", type=int, default=200, help="每轮请求数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--tokens", type=int, default=50, help="每个请求流式输出的token数")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="桩LLM每个token的间隔（秒）")
+    parser.add_argument("--rounds", type=int, default=5, help="交替运行轮数")
+    parser.add_argument("--threshold", type=float, default=2.0, help="允许的开销百分比")
+    parser.add_argument("--show-metrics", action="store_true", help="结束后打印 /metrics 内容")
+    args = parser.parse_args()
+
+    overhead = asyncio.run(run(args))
+    if overhead > args.threshold:
+        print(f"❌ 开销 {overhead:.2f}% 超过 {args.threshold}%")
+        sys.exit(1)
+    print(f"✅ 开销 {overhead:.2f}% 低于 {args.threshold}%")
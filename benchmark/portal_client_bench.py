@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+娜迦官网Agent请求基准
+本地模拟官网服务器（HTTP/1.1 keep-alive，校验登录Cookie，统计TCP连接数与请求数），
+顺序发起100次余额查询/模型列表调用（交替），对比：
+- 改造前：每次调用重新准备上下文并做连接测试，每个请求新建 httpx.AsyncClient
+- 共用长连接客户端 + 上下文缓存（有效期内只做一次连接测试）
+输出每次调用延迟的p50/p95/均值、总耗时、服务器收到的请求数与新建连接数，并校验：
+- 两种方式的返回结果一致
+- 服务端使Cookie失效（401）后上下文被丢弃，恢复后重新校验并成功
+
+可用 --connect-ms 模拟新建连接的握手开销（如远端HTTPS），--latency-ms 模拟服务端处理时间。
+
+用法:
+    python benchmark/portal_client_bench.py [--calls 100] [--connect-ms 0] [--latency-ms 0]
+"""
+
+import io
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+import statistics
+import contextlib
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcpserver.agent_naga_portal import portal_login_manager  # noqa: E402
+from mcpserver.agent_naga_portal.naga_portal_agent import NagaPortalAgent  # noqa: E402
+
+SESSION = "bench-session"
+USER_SELF = {"success": True, "data": {"id": 1, "username": "bench", "quota": 25500000, "used_quota": 500000}}
+GROUPS = {"success": True, "data": {
+    "default": {"desc": "默认分组", "ratio": 1},
+    "deepseek": {"desc": "DeepSeek", "ratio": 0.5},
+    "claude": {"desc": "Claude", "ratio": 2},
+}}
+
+
+class MockPortal:
+    """模拟官网：/api/user/self 与 /api/user/self/groups，要求 session Cookie 和 user-id 头"""
+
+    def __init__(self, connect_ms: float, latency_ms: float):
+        portal = self
+        self.connections = 0
+        self.requests = 0
+        self.valid_session = SESSION
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # 头和体分两次写出，关闭Nagle避免与客户端延迟ACK叠加出40ms停顿
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with portal._lock:
+                    portal.connections += 1
+                if connect_ms:
+                    time.sleep(connect_ms / 1000)
+
+            def do_GET(self):
+                with portal._lock:
+                    portal.requests += 1
+                if latency_ms:
+                    time.sleep(latency_ms / 1000)
+                cookie = self.headers.get("Cookie", "")
+                if f"session={portal.valid_session}" not in cookie or self.headers.get("user-id") != "1":
+                    self._reply(401, {"success": False, "message": "未登录"})
+                elif self.path == "/api/user/self":
+                    self._reply(200, USER_SELF)
+                elif self.path == "/api/user/self/groups":
+                    self._reply(200, GROUPS)
+                else:
+                    self._reply(404, {"success": False, "message": "not found"})
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset_counters(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+
+class LegacyPortalAgent(NagaPortalAgent):
+    """改造前的上下文准备与请求方式（每次连接测试，每个请求新建客户端）"""
+
+    async def _prepare_request_context(self, need_connection_test: bool = False):
+        cookies = portal_login_manager.get_cookies()
+        user_id = portal_login_manager.get_user_id()
+        if not cookies:
+            return {"success": False, "status": "no_cookies", "message": "未找到登录Cookie，请先登录", "data": {}}
+        headers = {}
+        if user_id:
+            headers["user-id"] = str(user_id)
+        if need_connection_test:
+            test_result = await self.test_connection()
+            if not test_result.get("success"):
+                return {
+                    "success": False,
+                    "status": "cookie_invalid",
+                    "message": f"Cookie可能已过期或无效: {test_result.get('message', '未知错误')}",
+                    "data": {"test_result": test_result}
+                }
+        return {"success": True, "cookies": cookies, "headers": headers, "user_id": user_id}
+
+    async def _make_request(self, method, path, payload=None, context=None):
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                url = f"{self.base_url}{path}"
+                if method.upper() == "GET":
+                    response = await client.get(url, headers=context['headers'], cookies=context['cookies'])
+                else:
+                    response = await client.post(url, json=payload, headers=context['headers'], cookies=context['cookies'])
+                if response.status_code == 200:
+                    return {"success": True, "status_code": 200, "data": response.json(), "raw_text": response.text}
+                return {"success": False, "status_code": response.status_code,
+                        "error": f"HTTP {response.status_code}: {response.text}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+
+CALLS = [{"tool_name": "naga_balance"}, {"tool_name": "naga_apply_token"}]  # 余额查询 / 模型列表（不带参数）
+
+
+async def run_calls(agent, calls: int):
+    latencies, results = [], []
+    for i in range(calls):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await agent.handle_handoff(CALLS[i % len(CALLS)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(json.loads(result))
+    return latencies, results
+
+
+async def check_invalidation(agent, portal: MockPortal):
+    """Cookie被服务端吊销后应失败并丢弃缓存上下文，恢复后重新校验成功"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        portal.valid_session = "rotated"
+        failed = json.loads(await agent.handle_handoff(CALLS[0]))
+        assert not failed["success"] and agent._context is None, "Cookie失效后上下文未被丢弃"
+        portal.valid_session = SESSION
+        before = portal.requests
+        recovered = json.loads(await agent.handle_handoff(CALLS[0]))
+        assert recovered["success"] and portal.requests - before == 2, "恢复后未重新做连接测试"
+
+
+async def main(args):
+    portal = MockPortal(args.connect_ms, args.latency_ms)
+    portal_login_manager.set_cookies({"session": SESSION})
+    portal_login_manager.set_user_id(1)
+
+    print(f"模拟官网 {portal.url}，{args.calls} 次顺序调用（余额/模型列表交替），"
+          f"握手 {args.connect_ms}ms，处理 {args.latency_ms}ms")
+    print(f"{'方式':<16} {'p50(ms)':>8} {'p95(ms)':>8} {'均值(ms)':>9} {'总耗时(ms)':>10} {'请求数':>6} {'新建连接':>8}")
+    outputs = {}
+    for label, agent in (("改造前", LegacyPortalAgent(portal.url)), ("长连接+上下文缓存", NagaPortalAgent(portal.url))):
+        portal.reset_counters()
+        start = time.perf_counter()
+        latencies, results = await run_calls(agent, args.calls)
+        total = (time.perf_counter() - start) * 1000
+        outputs[label] = results
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{label:<16} {statistics.median(latencies):>8.2f} {p95:>8.2f} {statistics.mean(latencies):>9.2f} "
+              f"{total:>10.1f} {portal.requests:>6} {portal.connections:>8}")
+        if label != "改造前":
+            await check_invalidation(agent, portal)
+        await agent.close()
+
+    legacy, pooled = outputs.values()
+    assert all(r["success"] for r in legacy), "改造前调用失败"
+    assert legacy == pooled, "两种方式的返回结果不一致"
+    portal.server.shutdown()
+    print("✅ 返回结果一致，Cookie失效后上下文被丢弃并在恢复后重新校验")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="娜迦官网Agent请求基准")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--connect-ms", type=float, default=0, help="模拟每个新连接的握手耗时")
+    parser.add_argument("--latency-ms", type=float, default=0, help="模拟服务端处理耗时")
+    asyncio.run(main(parser.parse_args()))
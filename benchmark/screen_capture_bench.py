@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏幕采集管线基准（无界面，合成帧源）
+在基本静止的合成桌面上执行20步"查找按钮并点击"序列，对比：
+- 改造前：每步整屏截图 → LANCZOS缩放 → PNG编码 → 分析器再解码 → 整帧OCR
+- 采集管线：原始帧常驻内存 → 图块哈希找出变化 → 只对变化区域OCR，其余复用缓存
+OCR用桩实现（按颜色识别按钮文字，耗时按像素面积模拟tesseract），
+逐步校验两种方式定位到的坐标一致，且管线的增量OCR结果与整帧OCR完全相同。
+另外校验元素缩小后不再碰到变化图块（跨两个图块的长条在右侧图块被擦掉）时，增量结果仍与整帧一致，
+以及 region 参数以 bbox 字典或序列给出时只采集该区域。
+
+用法:
+    python benchmark/screen_capture_bench.py --steps 20 --ocr-ms-per-mp 400
+"""
+
+import io
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agentserver.agent_computer_control.screen_capture import CapturePipeline, SyntheticFrameSource  # noqa: E402
+from agentserver.agent_computer_control.computer_use_adapter import ComputerUseAdapter  # noqa: E402
+from agentserver.agent_computer_control.visual_analyzer import VisualAnalyzer  # noqa: E402
+from agentserver.agent_computer_control.action_executor import ActionExecutor  # noqa: E402
+
+WIDTH, HEIGHT = 1920, 1080
+
+# (文字, 区域, 颜色)：每个按钮颜色唯一，桩OCR按颜色还原文字
+BUTTONS = [
+    ("文件", (20, 10, 80, 28), (200, 30, 30)),
+    ("编辑", (110, 10, 80, 28), (30, 200, 30)),
+    ("视图", (200, 10, 80, 28), (30, 30, 200)),
+    ("保存", (1500, 960, 160, 48), (200, 200, 30)),
+    ("取消", (1680, 960, 160, 48), (200, 30, 200)),
+    ("搜索", (760, 80, 400, 36), (30, 200, 200)),
+    ("设置", (1820, 10, 80, 28), (120, 60, 20)),
+    ("开始", (0, 1040, 120, 40), (20, 60, 120)),
+]
+CLOCK = ("时钟", (1780, 1046, 120, 28))
+DIALOG = ("确定", (760, 420, 400, 240), (60, 120, 20))
+
+
+class StubOCR:
+    """桩OCR：按颜色找出文字块，耗时与像素面积成正比"""
+
+    def __init__(self, ms_per_mp: float):
+        self.ms_per_mp = ms_per_mp
+        self.palette = {color: text for text, _, color in BUTTONS}
+        self.palette[DIALOG[2]] = DIALOG[0]
+        self.calls = 0
+        self.pixels = 0
+
+    def register(self, color, text):
+        self.palette[tuple(color)] = text
+
+    def __call__(self, pixels: np.ndarray):
+        self.calls += 1
+        self.pixels += pixels.shape[0] * pixels.shape[1]
+        time.sleep(pixels.shape[0] * pixels.shape[1] / 1e6 * self.ms_per_mp / 1000)
+        packed = (pixels[..., 0].astype(np.uint32) << 16) | (pixels[..., 1].astype(np.uint32) << 8) | pixels[..., 2]
+        elements = []
+        for value in np.unique(packed):
+            color = (int(value >> 16) & 255, int(value >> 8) & 255, int(value) & 255)
+            text = self.palette.get(color)
+            if text is None:
+                continue
+            ys, xs = np.nonzero(packed == value)
+            elements.append({"text": text, "confidence": 95,
+                             "bbox": {"x": int(xs.min()), "y": int(ys.min()),
+                                      "width": int(xs.max() - xs.min() + 1), "height": int(ys.max() - ys.min() + 1)}})
+        elements.sort(key=lambda e: (e["bbox"]["y"], e["bbox"]["x"]))
+        return elements
+
+
+def build_desktop() -> SyntheticFrameSource:
+    source = SyntheticFrameSource(WIDTH, HEIGHT)
+    source.fill((0, 1030, WIDTH, 50), (40, 40, 48))  # 任务栏
+    source.fill((300, 140, 1320, 780), (250, 250, 250))  # 应用窗口
+    for _, region, color in BUTTONS:
+        source.fill(region, color)
+    return source
+
+
+def mutate(source: SyntheticFrameSource, ocr: StubOCR, step: int):
+    """每步只有时钟变化；每5步弹出/关闭一次对话框"""
+    clock_color = (255, step % 200, 255 - step % 200)
+    ocr.register(clock_color, CLOCK[0])
+    source.fill(CLOCK[1], clock_color)
+    if step % 5 == 2:
+        source.fill(DIALOG[1], DIALOG[2])
+    elif step % 5 == 4:
+        source.fill(DIALOG[1], (250, 250, 250))
+
+
+def legacy_screenshot(source: SyntheticFrameSource) -> bytes:
+    """改造前的 take_screenshot：整屏截图、缩放到逻辑尺寸、PNG编码"""
+    screenshot = Image.fromarray(source.grab())
+    screenshot = screenshot.resize((WIDTH, HEIGHT), Image.LANCZOS)
+    buf = io.BytesIO()
+    screenshot.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_analyzer(ocr: StubOCR) -> VisualAnalyzer:
+    analyzer = VisualAnalyzer()
+    # 只测本地识别链路：桩OCR替换tesseract，关闭AI定位与轮廓检测
+    analyzer.ocr_available = True
+    analyzer.ai_coordinate_available = False
+    analyzer.image_matching_available = False
+    analyzer._ocr_image = lambda image: ocr(np.asarray(image.convert("RGB")))
+    return analyzer
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return (statistics.mean(ordered) * 1000, ordered[len(ordered) // 2] * 1000,
+            ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000)
+
+
+def shrink_check():
+    """长条横跨图块(0,0)和(0,1)，图块(0,1)变化后缩小到只在图块(0,0)内：增量结果必须与整帧一致"""
+    source, ocr = SyntheticFrameSource(640, 480), StubOCR(0)
+    ocr.register((200, 100, 50), "长条")
+    source.fill((10, 10, 90, 20), (200, 100, 50))
+    pipeline = CapturePipeline(source, tile_size=64)
+    pipeline.analyze(pipeline.capture(), "ocr", ocr)
+    source.fill((64, 10, 36, 20), (236, 236, 236))
+    frame = pipeline.capture()
+    incremental = pipeline.analyze(frame, "ocr", ocr)
+    assert incremental == ocr(source.frame), f"元素缩小后增量结果与整帧不一致: {incremental}"
+    assert incremental[0]["bbox"]["width"] == 54
+    print("✅ 元素缩小到未变化图块内时，增量OCR结果与整帧一致")
+
+
+async def region_check():
+    """region 参数可以是 bbox 字典或 (x, y, width, height) 序列"""
+    source = SyntheticFrameSource(640, 480)
+    adapter = ComputerUseAdapter(frame_source=source)
+    executor = ActionExecutor(computer_adapter=adapter)
+    for region in ({"x": 10, "y": 20, "width": 100, "height": 50}, [10, 20, 100, 50], "10,20,100,50"):
+        frame = await executor._capture({"region": region})
+        assert frame.pixels.shape[:2] == (50, 100) and frame.origin == (10, 20), f"region={region!r} 采集错误"
+    print("✅ region 参数为字典/序列/字符串时均只采集目标区域")
+
+
+async def main(steps: int, ms_per_mp: float):
+    shrink_check()
+    await region_check()
+
+    targets = [BUTTONS[i % len(BUTTONS)][0] if i % 5 != 3 else DIALOG[0] for i in range(steps)]
+
+    # 改造前
+    legacy_source, legacy_ocr = build_desktop(), StubOCR(ms_per_mp)
+    legacy_analyzer = make_analyzer(legacy_ocr)
+    legacy_latency, legacy_locations = [], []
+    for step, target in enumerate(targets):
+        mutate(legacy_source, legacy_ocr, step)
+        start = time.perf_counter()
+        screenshot = legacy_screenshot(legacy_source)
+        legacy_locations.append(await legacy_analyzer.find_text_element(screenshot, target))
+        legacy_latency.append(time.perf_counter() - start)
+
+    # 采集管线（经 ActionExecutor 的查找元素动作）
+    source, ocr = build_desktop(), StubOCR(ms_per_mp)
+    adapter = ComputerUseAdapter(frame_source=source)
+    executor = ActionExecutor(computer_adapter=adapter, visual_analyzer=make_analyzer(ocr))
+    pipeline_latency, pipeline_locations = [], []
+    reference = StubOCR(0)
+    for step, target in enumerate(targets):
+        mutate(source, ocr, step)
+        reference.register((255, step % 200, 255 - step % 200), CLOCK[0])
+        start = time.perf_counter()
+        result = await executor.execute_action({"action": "find_element", "target": target})
+        pipeline_latency.append(time.perf_counter() - start)
+        pipeline_locations.append(result.data["location"] if result.success else None)
+        # 增量OCR结果必须与整帧OCR一致
+        frame = await adapter.capture_frame()
+        assert adapter.capture.analyze(frame, "ocr", ocr) == reference(source.frame), f"第{step}步增量OCR与整帧OCR不一致"
+
+    assert pipeline_locations == legacy_locations, "两种方式定位到的坐标不一致"
+    assert all(pipeline_locations), "存在未定位到的目标"
+
+    print(f"{steps} 步查找点击序列（{WIDTH}x{HEIGHT}，桩OCR {ms_per_mp:.0f}ms/百万像素）")
+    print(f"{'方式':<12} {'平均(ms)':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'OCR像素(M)':>12} {'PNG编码':>8}")
+    for name, latencies, ocr_pixels, encodes in (
+            ("改造前", legacy_latency, legacy_ocr.pixels, steps),
+            ("采集管线", pipeline_latency, ocr.pixels, adapter.capture.png_encodes)):
+        mean, p50, p95 = summarize(latencies)
+        print(f"{name:<12} {mean:>10.1f} {p50:>10.1f} {p95:>10.1f} {ocr_pixels / 1e6:>12.2f} {encodes:>8}")
+    stats = adapter.capture.stats()
+    print(f"变化图块占比 {stats['dirty_tile_ratio']:.1%}，检测器调用 {stats['detector_calls']} 次，按内容复用 {stats['cache_hits']} 次")
+    print("✅ 各步定位坐标一致，增量OCR结果与整帧OCR一致")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="屏幕采集管线基准")
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--ocr-ms-per-mp", type=float, default=400, help="桩OCR每百万像素耗时（毫秒），模拟tesseract")
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.ocr_ms_per_mp))
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式断句基准
+对比 StreamingToolCallExtractor 改造前（逐字符 re.search + 整缓冲区 re.split，每句一个线程送TTS）
+与改造后（只扫描新文本块 + 常驻分发线程）：
+- 属性测试：随机生成中英文混合、含连续/相邻标点、空白句、单字符块的流，
+  校验两种实现切出的句子序列（含结束时刷新的尾部）完全一致
+- 吞吐：长回复按1~8字符随机分块送入，统计断句的字符/秒
+- 延迟：按固定间隔送入句子，从含句末标点的文本块到达，到语音集成收到该句的延迟p50/p95，并校验送达顺序
+- 反压：慢速语音集成 + 小队列时，校验没有句子被丢弃
+
+用法:
+    python benchmark/segmenter_bench.py [--cases 2000] [--chars 200000] [--sentences 2000]
+"""
+
+import re
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apiserver import streaming_tool_extractor as ste  # noqa: E402
+from apiserver.streaming_tool_extractor import StreamingToolCallExtractor, _VoiceDispatcher  # noqa: E402
+
+ALPHABET = list("今天天气很好我们去公园散步吧") + list("abcXYZ 0123") + list("。？！；.?!;") + [" ", "\n", "  "]
+
+
+class LegacyExtractor(StreamingToolCallExtractor):
+    """改造前的逐字符断句与每句一个线程的TTS发送"""
+
+    def __init__(self):
+        super().__init__()
+        self.sentence_endings = r"[。？！；\.\?\!\;]"
+
+    async def process_text_chunk(self, text_chunk: str):
+        if not text_chunk:
+            return None
+        await self.callback_manager.call_callback("text_chunk", text_chunk, "chunk")
+        self.complete_text += text_chunk
+        for char in text_chunk:
+            self.text_buffer += char
+            if re.search(self.sentence_endings, char):
+                sentences = re.split(self.sentence_endings, self.text_buffer)
+                if len(sentences) > 1:
+                    complete_sentence = sentences[0] + char
+                    if complete_sentence.strip():
+                        self._legacy_send(complete_sentence)
+                    remaining_sentences = [s for s in sentences[1:] if s.strip()]
+                    self.text_buffer = "".join(remaining_sentences)
+        return None
+
+    async def _flush_text_buffer(self):
+        if self.text_buffer:
+            self._legacy_send(self.text_buffer)
+            self.text_buffer = ""
+        return None
+
+    def _legacy_send(self, text: str):
+        if self.voice_integration:
+            threading.Thread(target=self.voice_integration.receive_text_chunk, args=(text,), daemon=True).start()
+
+
+class Collector:
+    """同步收集句子（属性测试/吞吐用，不经过线程）"""
+
+    def __init__(self):
+        self.sentences = []
+
+
+def attach_collector(extractor, legacy: bool):
+    collector = Collector()
+    if legacy:
+        extractor._legacy_send = collector.sentences.append
+    else:
+        async def send(text):
+            collector.sentences.append(text)
+        extractor._send_to_voice_integration = send
+    return collector
+
+
+def random_stream(rng: random.Random):
+    text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 200)))
+    chunks, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(1, 8)
+        chunks.append(text[pos:pos + size])
+        pos += size
+    return chunks
+
+
+async def segment(chunks, legacy: bool):
+    extractor = LegacyExtractor() if legacy else StreamingToolCallExtractor()
+    collector = attach_collector(extractor, legacy)
+    for chunk in chunks:
+        await extractor.process_text_chunk(chunk)
+    await extractor.finish_processing()
+    return collector.sentences
+
+
+async def property_check(cases: int):
+    rng = random.Random(26)
+    for case in range(cases):
+        chunks = random_stream(rng)
+        old, new = await segment(chunks, True), await segment(chunks, False)
+        assert old == new, f"第{case}个随机流切句不一致: {chunks!r}\n改造前 {old!r}\n改造后 {new!r}"
+    print(f"属性测试：{cases} 个随机流切句结果一致")
+
+
+async def throughput(total_chars: int):
+    rng = random.Random(1)
+    words = ["今天", "天气", "很好", "我们", "hello", "world", " ", "，", "。", "？", "!", "."]
+    text = "".join(rng.choice(words) for _ in range(total_chars // 2))[:total_chars]
+    chunks, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(1, 8)
+        chunks.append(text[pos:pos + size])
+        pos += size
+    print(f"{'方式':<8} {'耗时(ms)':>10} {'字符/秒':>12} {'句数':>6}")
+    for label, legacy in (("改造前", True), ("改造后", False)):
+        start = time.perf_counter()
+        sentences = await segment(chunks, legacy)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<8} {elapsed * 1000:>10.1f} {len(text) / elapsed:>12.0f} {len(sentences):>6}")
+
+
+class TimedVoice:
+    """记录每句送达时刻的语音集成"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = []
+        self.lock = threading.Lock()
+
+    def receive_text_chunk(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            self.received.append((text, time.perf_counter()))
+
+
+async def latency(sentence_count: int, pace: float):
+    sentences = [f"第{i}句话。" for i in range(sentence_count)]
+    print(f"{'方式':<8} {'p50(us)':>9} {'p95(us)':>9} {'乱序句数':>8}")
+    for label, legacy in (("改造前", True), ("改造后", False)):
+        extractor = LegacyExtractor() if legacy else StreamingToolCallExtractor()
+        voice = TimedVoice()
+        extractor.voice_integration = voice
+        sent_at = {}
+        for sentence in sentences:
+            sent_at[sentence] = time.perf_counter()
+            await extractor.process_text_chunk(sentence)
+            # 按LLM流式输出的节奏送入，测的是分发延迟而不是排队
+            await asyncio.sleep(pace)
+        deadline = time.time() + 10
+        while len(voice.received) < sentence_count and time.time() < deadline:
+            await asyncio.sleep(0.01)
+        assert len(voice.received) == sentence_count, f"{label}: 只送达 {len(voice.received)}/{sentence_count} 句"
+        delays = [(at - sent_at[text]) * 1e6 for text, at in voice.received]
+        order = [text for text, _ in voice.received]
+        out_of_order = sum(1 for a, b in zip(order, sentences) if a != b)
+        print(f"{label:<8} {statistics.median(delays):>9.0f} {statistics.quantiles(delays, n=20)[-1]:>9.0f} {out_of_order:>8}")
+        if not legacy:
+            assert order == sentences, "改造后送达顺序与原文不一致"
+
+
+async def backpressure(sentence_count: int):
+    """慢速TTS + 小队列：文本流被反压等待，句子全部按序送达"""
+    ste._voice_dispatcher = _VoiceDispatcher(maxsize=4)
+    extractor = StreamingToolCallExtractor()
+    voice = TimedVoice(delay=0.001)
+    extractor.voice_integration = voice
+    sentences = [f"慢速第{i}句。" for i in range(sentence_count)]
+    for sentence in sentences:
+        await extractor.process_text_chunk(sentence)
+    ste._voice_dispatcher.join()
+    assert [text for text, _ in voice.received] == sentences, "反压时有句子丢失或乱序"
+    print(f"反压：{sentence_count} 句全部按序送达，队列满等待 {ste._voice_dispatcher.backpressure_waits} 次")
+
+
+async def main(args):
+    await property_check(args.cases)
+    await throughput(args.chars)
+    await latency(args.sentences, args.pace_ms / 1000)
+    await backpressure(args.slow_sentences)
+    print("✅ 切句结果一致，改造后按序送达且不丢句")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="流式断句基准")
+    parser.add_argument("--cases", type=int, default=2000, help="属性测试的随机流数量")
+    parser.add_argument("--chars", type=int, default=200000, help="吞吐测试的文本长度")
+    parser.add_argument("--sentences", type=int, default=2000, help="延迟测试的句子数")
+    parser.add_argument("--pace-ms", type=float, default=1.0, help="延迟测试中句子的到达间隔")
+    parser.add_argument("--slow-sentences", type=int, default=300, help="反压测试的句子数")
+    asyncio.run(main(parser.parse_args()))
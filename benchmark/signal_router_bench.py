@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SignalRouter 可达性基准
+在 10~500 个智能体的合成拓扑上对比：
+- 旧实现：对路径列表逐个中介遍历的两跳检查
+- 新实现：位集可达性索引
+同时校验两者生成的通信矩阵完全一致，增量加边后的索引与重建结果一致，
+以及直接替换路径或智能体（数量不变）后缓存不会返回过期结果。
+
+用法:
+    python benchmark/signal_router_bench.py --sizes 10,50,100,200,500 --degree 4
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from game.core.interaction_graph.reachability import ReachabilityIndex  # noqa: E402
+from game.core.interaction_graph.signal_router import SignalRouter  # noqa: E402
+from game.core.models.config import GameConfig  # noqa: E402
+from game.core.models.data_models import Agent, InteractionGraph  # noqa: E402
+
+
+def legacy_communication_matrix(graph: InteractionGraph) -> Dict[str, Dict[str, str]]:
+    """改造前的实现：路径为列表，两跳检查逐个中介遍历"""
+    def has_indirect_path(from_id, to_id):
+        for intermediate_agent in graph.agents:
+            intermediate_id = intermediate_agent.agent_id
+            if intermediate_id == from_id or intermediate_id == to_id:
+                continue
+            if ((from_id, intermediate_id) in graph.allowed_paths and
+                    (intermediate_id, to_id) in graph.allowed_paths):
+                return True
+        return False
+
+    matrix = {}
+    for agent in graph.agents:
+        matrix[agent.agent_id] = {}
+        for other_agent in graph.agents:
+            if agent.agent_id == other_agent.agent_id:
+                continue
+            if (agent.agent_id, other_agent.agent_id) in graph.allowed_paths:
+                if (agent.agent_id, other_agent.agent_id) in graph.forbidden_paths:
+                    matrix[agent.agent_id][other_agent.agent_id] = "forbidden"
+                else:
+                    matrix[agent.agent_id][other_agent.agent_id] = "direct"
+            elif has_indirect_path(agent.agent_id, other_agent.agent_id):
+                matrix[agent.agent_id][other_agent.agent_id] = "indirect"
+            else:
+                matrix[agent.agent_id][other_agent.agent_id] = "none"
+    return matrix
+
+
+def synthetic_graph(size: int, degree: int, seed: int) -> InteractionGraph:
+    """随机稀疏拓扑：每个执行者随机连向degree个智能体，带自环，另有少量禁止路径"""
+    rng = random.Random(seed)
+    agents = [
+        Agent(name=f"角色{i}", role="执行者", responsibilities=[], skills=[], thinking_vector="",
+              system_prompt="", connection_permissions=[], agent_id=f"agent_{i}", is_requester=(i == 0))
+        for i in range(size)
+    ]
+    ids = [a.agent_id for a in agents]
+    edges = set()
+    for i, agent in enumerate(agents):
+        for target in rng.sample(ids, min(degree, size)):
+            if target != agent.agent_id:
+                edges.add((agent.agent_id, target))
+        if not agent.is_requester:
+            edges.add((agent.agent_id, agent.agent_id))
+    forbidden = set()
+    while len(forbidden) < size // 10:
+        pair = (rng.choice(ids), rng.choice(ids))
+        if pair[0] != pair[1] and pair not in edges:
+            forbidden.add(pair)
+    return InteractionGraph(agents=agents, allowed_paths=list(edges), forbidden_paths=list(forbidden),
+                            collaboration_matrix={}, domain="通用", task_description="benchmark")
+
+
+def check_incremental(graph: InteractionGraph, seed: int, steps: int = 20):
+    """增量加边/删边后的索引与整体重建的索引一致"""
+    rng = random.Random(seed)
+    ids = [a.agent_id for a in graph.agents]
+    index = ReachabilityIndex(ids, graph.allowed_paths)
+    for step in range(steps):
+        pair = (rng.choice(ids), rng.choice(ids))
+        if step % 5 == 4 and index.edges:
+            index.remove_edge(*sorted(index.edges)[rng.randrange(len(index.edges))])
+        else:
+            index.add_edge(*pair)
+        rebuilt = ReachabilityIndex(ids, index.edges)
+        assert index.direct == rebuilt.direct, "增量更新后直接边不一致"
+        assert index.two_hop == rebuilt.two_hop, "增量更新后两跳可达不一致"
+        assert index.closure == rebuilt.closure, "增量更新后传递闭包不一致"
+
+
+def check_cache_staleness(router: SignalRouter, graph: InteractionGraph, seed: int):
+    """直接改写路径/替换智能体且数量不变时，缓存的索引不会过期"""
+    rng = random.Random(seed)
+    router.get_communication_matrix(graph)
+    ids = [a.agent_id for a in graph.agents]
+    old_edge = graph.allowed_paths[rng.randrange(len(graph.allowed_paths))]
+    new_edge = next((f, t) for f in ids for t in ids if (f, t) not in graph.allowed_paths)
+    graph.allowed_paths[graph.allowed_paths.index(old_edge)] = new_edge
+    assert router.get_communication_matrix(graph) == legacy_communication_matrix(graph), "替换路径后通信矩阵过期"
+
+    replaced = graph.agents[-1]
+    new_agent = Agent(name="替换角色", role="执行者", responsibilities=[], skills=[], thinking_vector="",
+                      system_prompt="", connection_permissions=[], agent_id="agent_replaced")
+    graph.agents[-1] = new_agent
+    graph.allowed_paths = [(new_agent.agent_id if f == replaced.agent_id else f,
+                            new_agent.agent_id if t == replaced.agent_id else t) for f, t in graph.allowed_paths]
+    assert router.get_communication_matrix(graph) == legacy_communication_matrix(graph), "替换智能体后通信矩阵过期"
+
+
+def timed(func, repeat: int = 1) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = None
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main(sizes: List[int], degree: int, seed: int, legacy_limit: int):
+    router = SignalRouter(GameConfig())
+    print(f"{'智能体数':>8} {'路径数':>8} {'旧实现(ms)':>12} {'建索引(ms)':>12} {'新实现(ms)':>12} {'加速':>8}")
+    for size in sizes:
+        graph = synthetic_graph(size, degree, seed + size)
+        build_time, _ = timed(lambda: router.invalidate_reachability(graph) or router.get_reachability(graph))
+        new_time, new_matrix = timed(lambda: router.get_communication_matrix(graph), repeat=3)
+
+        if size <= legacy_limit:
+            legacy_time, legacy_matrix = timed(lambda: legacy_communication_matrix(graph))
+            assert new_matrix == legacy_matrix, f"{size}个智能体时通信矩阵与旧实现不一致"
+            legacy_text = f"{legacy_time * 1000:>12.1f}"
+            speedup = f"{legacy_time / (new_time + build_time):>7.0f}x"
+        else:
+            legacy_text, speedup = f"{'跳过':>10}", f"{'-':>8}"
+        check_incremental(graph, seed)
+        if size <= legacy_limit:
+            check_cache_staleness(router, graph, seed)
+        print(f"{size:>8} {len(graph.allowed_paths):>8} {legacy_text} {build_time * 1000:>12.2f} "
+              f"{new_time * 1000:>12.2f} {speedup}")
+    print("✅ 通信矩阵与旧实现一致，增量更新与重建一致，改写路径/智能体后缓存不过期")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SignalRouter 可达性基准")
+    parser.add_argument("--sizes", default="10,50,100,200,500")
+    parser.add_argument("--degree", type=int, default=4, help="每个智能体的平均出边数")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--legacy-limit", type=int, default=100, help="超过该规模不再运行旧实现（耗时过长）")
+    args = parser.parse_args()
+    main([int(v) for v in args.sizes.split(",")], args.degree, args.seed, args.legacy_limit)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI兼容的桩LLM服务
+实现 /v1/chat/completions（流式与非流式）和 /v1/models，用于端到端压测：
+- 输出速率（token/秒）与首token延迟分布可配置
+- 同一请求内容 + 同一随机种子得到完全相同的输出与延迟，便于跨提交对比
+- 按脚本规则返回固定内容：意图分析返回工具调用、五元组提取返回合法JSON
+
+用法:
+    python benchmark/stub_llm.py --port 18080 --token-rate 200 --latency-ms 150 --latency-dist lognormal
+    python benchmark/stub_llm.py --script my_script.json   # 自定义脚本规则
+"""
+
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 默认脚本：规则按顺序匹配，关键字需全部出现在请求消息中，先匹配先生效
+# 意图分析提示词自带"天气"示例，因此工具调用用"现在几点"触发
+DEFAULT_SCRIPT: Dict[str, Any] = {
+    "rules": [
+        {
+            "name": "tool_call",
+            "match": ["对话任务意图分析器", "现在几点"],
+            "content": "｛\n\"agentType\": \"mcp\",\n\"service_name\": \"天气时间Agent\",\n"
+                       "\"tool_name\": \"time\",\n\"city\": \"北京 北京\"\n｝",
+        },
+        {
+            "name": "no_tool",
+            "match": ["对话任务意图分析器"],
+            "content": "｛｝",
+        },
+        {
+            "name": "quintuple_fallback",
+            "match": ["以 JSON 数组格式返回"],
+            "content": "[[\"用户\", \"人物\", \"询问\", \"天气\", \"概念\"]]",
+        },
+    ],
+    "default_tokens": [40, 120],  # 普通对话回复的token数范围
+}
+
+_WORDS = ["好的", "我", "明白", "了", "这个", "问题", "可以", "从", "几个", "方面", "来看", "，", "。",
+          "首先", "其次", "另外", "需要", "注意", "的是", "总之", "希望", "对你", "有帮助"]
+_QUINTUPLE = {"subject": "用户", "subject_type": "人物", "predicate": "询问",
+              "object": "天气", "object_type": "概念"}
+_SEGMENT_RE = re.compile(r"^\[(\d+)\]", re.MULTILINE)
+
+
+class StubLLM:
+    """桩LLM：根据请求内容确定输出与延迟"""
+
+    def __init__(self, script: Dict[str, Any], token_rate: float, latency_ms: float,
+                 latency_dist: str, latency_jitter: float, seed: int):
+        self.script = script
+        self.token_rate = token_rate
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_jitter = latency_jitter
+        self.seed = seed
+        self.stats: Dict[str, int] = {"requests": 0, "stream": 0}
+
+    def _rng(self, messages: List[Dict[str, Any]]) -> random.Random:
+        digest = zlib.crc32(json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        return random.Random(self.seed ^ digest)
+
+    def first_token_delay(self, rng: random.Random) -> float:
+        """首token延迟（秒）"""
+        base = self.latency_ms / 1000
+        if self.latency_dist == "uniform":
+            delay = rng.uniform(base * (1 - self.latency_jitter), base * (1 + self.latency_jitter))
+        elif self.latency_dist == "lognormal":
+            # 均值保持为 base，jitter 作为对数标准差
+            sigma = self.latency_jitter
+            delay = rng.lognormvariate(0.0, sigma) * base / (2.718281828 ** (sigma * sigma / 2))
+        else:
+            delay = base
+        return max(0.0, delay)
+
+    def _structured(self, body: Dict[str, Any], prompt: str) -> Optional[str]:
+        """response_format 为JSON Schema时（结构化输出）按Schema字段生成合法内容"""
+        response_format = body.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema") or {}
+        properties = schema.get("properties") or {}
+        if "items" in properties:
+            count = len(_SEGMENT_RE.findall(prompt)) or 1
+            return json.dumps({"items": [{"index": i, "quintuples": [_QUINTUPLE]} for i in range(count)]},
+                              ensure_ascii=False)
+        if "quintuples" in properties:
+            return json.dumps({"quintuples": [_QUINTUPLE]}, ensure_ascii=False)
+        return None
+
+    def respond(self, body: Dict[str, Any]):
+        """返回(规则名, 输出token列表, 首token延迟)"""
+        messages = body.get("messages") or []
+        rng = self._rng(messages)
+        prompt = "\n".join(str(m.get("content", "")) for m in messages if isinstance(m, dict))
+
+        structured = self._structured(body, prompt)
+        if structured is not None:
+            return "structured", _chunk(structured), self.first_token_delay(rng)
+
+        for rule in self.script.get("rules", []):
+            keywords = rule.get("match") or []
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            if all(keyword in prompt for keyword in keywords):
+                return rule.get("name", "rule"), _chunk(rule.get("content", "")), self.first_token_delay(rng)
+
+        low, high = self.script.get("default_tokens", [40, 120])
+        tokens = [rng.choice(_WORDS) for _ in range(rng.randint(low, high))]
+        return "chat", tokens, self.first_token_delay(rng)
+
+
+def _chunk(text: str, size: int = 4) -> List[str]:
+    """把固定内容切成流式片段"""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def create_app(stub: StubLLM) -> FastAPI:
+    app = FastAPI(title="NagaAgent Stub LLM")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "benchmark"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return stub.stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        rule, tokens, delay = stub.respond(body)
+        stub.stats["requests"] += 1
+        stub.stats[rule] = stub.stats.get(rule, 0) + 1
+        model = body.get("model", "stub-model")
+        completion_id = f"chatcmpl-stub-{stub.stats['requests']}"
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages") or []) // 2
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        interval = 1.0 / stub.token_rate if stub.token_rate > 0 else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay + interval * len(tokens))
+            return JSONResponse({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": usage,
+            })
+
+        stub.stats["stream"] += 1
+
+        async def stream():
+            await asyncio.sleep(delay)
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(interval)
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def load_script(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI兼容的桩LLM服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--token-rate", type=float, default=200.0, help="流式输出速率（token/秒），0为不限速")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="首token平均延迟（毫秒）")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-jitter", type=float, default=0.3, help="uniform为相对幅度，lognormal为对数标准差")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--script", help="脚本规则JSON文件，格式同 DEFAULT_SCRIPT")
+    args = parser.parse_args()
+
+    stub = StubLLM(load_script(args.script), args.token_rate, args.latency_ms,
+                   args.latency_dist, args.latency_jitter, args.seed)
+    print(f"🧪 桩LLM服务: http://{args.host}:{args.port}/v1", file=sys.stderr)
+    uvicorn.run(create_app(stub), host=args.host, port=args.port, log_level="warning")
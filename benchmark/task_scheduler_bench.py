@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务调度器基准
+- 完成时间（makespan）：桩任务按设定时长 asyncio.sleep，对比顺序执行与 run_task_graph 按依赖并发执行：
+  固定的5任务DAG（关键路径0.4s）+ 随机DAG，校验任务都在其依赖完成后才开始、
+  并发数不超过 max_parallel、完成时间接近 max(关键路径, 总时长/并发数) 下界；
+  依赖图无效（id重复、依赖未知任务、循环依赖）时抛出 _TaskGraphError
+- 记忆占用：10000个会话依次创建任务并写入步骤（含失败步骤），每1000个会话记录一次
+  get_memory_usage() 与 tracemalloc 当前内存，校验会话数/任务数不超过上限且内存不随会话数增长
+
+用法:
+    python benchmark/task_scheduler_bench.py [--random-dags 20] [--sessions 10000] [--max-sessions 1000]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agentserver.config import TaskSchedulerConfig  # noqa: E402
+from agentserver.task_scheduler import _TaskScheduler, _TaskGraphError, run_task_graph, TaskStep  # noqa: E402
+
+# 固定DAG：a→b→e（0.1+0.2+0.1）与 c→d（0.2+0.2）两条链并行，关键路径0.4s
+FIXED_DAG = [
+    {"id": "a", "duration": 0.1, "depends_on": []},
+    {"id": "b", "duration": 0.2, "depends_on": ["a"]},
+    {"id": "c", "duration": 0.2, "depends_on": []},
+    {"id": "d", "duration": 0.2, "depends_on": ["c"]},
+    {"id": "e", "duration": 0.1, "depends_on": ["b"]},
+]
+
+
+def critical_path(tasks) -> float:
+    finish = {}
+    for task in tasks:  # 任务按拓扑顺序给出
+        finish[task["id"]] = task["duration"] + max((finish[d] for d in task["depends_on"]), default=0.0)
+    return max(finish.values())
+
+
+def random_dag(count: int, rng: random.Random):
+    tasks = []
+    for i in range(count):
+        deps = [f"t{j}" for j in range(i) if rng.random() < 2.0 / max(1, i)]
+        tasks.append({"id": f"t{i}", "duration": rng.uniform(0.01, 0.05), "depends_on": deps})
+    return tasks
+
+
+async def run_graph(tasks, max_parallel: int):
+    running = [0, 0]  # 当前并发数、最大并发数
+
+    async def executor(task, dep_results):
+        running[0] += 1
+        running[1] = max(running[1], running[0])
+        await asyncio.sleep(task["duration"])
+        running[0] -= 1
+        return task["id"]
+
+    start = time.perf_counter()
+    outcomes = await run_task_graph(tasks, executor, max_parallel)
+    makespan = time.perf_counter() - start
+    by_id = {o["id"]: o for o in outcomes}
+    for task in tasks:
+        outcome = by_id[task["id"]]
+        assert outcome["success"], f"任务 {task['id']} 失败: {outcome.get('error')}"
+        for dep in task["depends_on"]:
+            assert outcome["started_at"] >= by_id[dep]["finished_at"], f"{task['id']} 在依赖 {dep} 完成前开始"
+    assert running[1] <= max_parallel, f"并发数 {running[1]} 超过上限 {max_parallel}"
+    return makespan
+
+
+async def makespan_bench(args):
+    serial = sum(t["duration"] for t in FIXED_DAG)
+    makespan = await run_graph(FIXED_DAG, args.max_parallel)
+    print(f"固定DAG：顺序 {serial:.2f}s，关键路径 {critical_path(FIXED_DAG):.2f}s，并发执行 {makespan:.3f}s")
+    assert makespan < critical_path(FIXED_DAG) + 0.1, "并发执行完成时间明显超过关键路径"
+
+    rng = random.Random(30)
+    ratios, speedups = [], []
+    for _ in range(args.random_dags):
+        tasks = random_dag(args.dag_size, rng)
+        serial = sum(t["duration"] for t in tasks)
+        bound = max(critical_path(tasks), serial / args.max_parallel)
+        makespan = await run_graph(tasks, args.max_parallel)
+        ratios.append(makespan / bound)
+        speedups.append(serial / makespan)
+    print(f"随机DAG×{args.random_dags}（每个{args.dag_size}任务，并发{args.max_parallel}）："
+          f"加速比 {min(speedups):.2f}~{max(speedups):.2f}，完成时间/下界 平均 {sum(ratios) / len(ratios):.2f} 最大 {max(ratios):.2f}")
+
+    for label, tasks in (
+        ("id重复", [{"id": "x"}, {"id": "x"}]),
+        ("依赖未知任务", [{"id": "x", "depends_on": ["y"]}]),
+        ("循环依赖", [{"id": "x", "depends_on": ["y"]}, {"id": "y", "depends_on": ["x"]}]),
+    ):
+        try:
+            await run_task_graph(tasks, lambda task, deps: asyncio.sleep(0))
+        except _TaskGraphError:
+            continue
+        raise AssertionError(f"{label} 未抛出 _TaskGraphError")
+    print("无效依赖图（id重复/依赖未知/循环）均抛出 _TaskGraphError")
+
+
+async def memory_bench(args):
+    config = replace(TaskSchedulerConfig(), max_sessions=args.max_sessions, max_tasks=args.max_sessions * 2)
+    scheduler = _TaskScheduler(config)
+    output = "执行结果：" + "窗口已打开，" * 40
+
+    tracemalloc.start()
+    print(f"\n{'会话数':>8} {'保留会话':>8} {'任务':>6} {'步骤':>6} {'会话记忆(字符)':>14} {'关键事实':>8} {'内存(MB)':>9}")
+    samples = []
+    for n in range(1, args.sessions + 1):
+        session_id = f"session-{n}"
+        for k in range(args.tasks_per_session):
+            task_id = f"{session_id}-task-{k}"
+            await scheduler.create_task(task_id, "打开应用并输入文字", session_id=session_id,
+                                        analysis_session_id=f"analysis-{n}")
+            for s in range(args.steps_per_task):
+                await scheduler.add_task_step(task_id, TaskStep(
+                    step_id=f"step_{s}", task_id=task_id, purpose="执行Agent任务", content=f"指令{n}-{k}-{s}",
+                    output=output, success=(s % 3 != 2), error=None if s % 3 != 2 else "窗口未找到"))
+        if n % 1000 == 0:
+            usage = scheduler.get_memory_usage()
+            current = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+            samples.append(current)
+            print(f"{n:>8} {usage['sessions']:>8} {usage['tasks']:>6} {usage['task_steps']:>6} "
+                  f"{usage['session_memory_size']:>14} {usage['key_facts']:>8} {current:>9.1f}")
+            assert usage["sessions"] <= config.max_sessions, "会话数超过上限"
+            assert usage["tasks"] <= config.max_tasks, "任务数超过上限"
+            assert usage["key_facts"] <= config.max_key_facts, "关键事实超过上限"
+    tracemalloc.stop()
+    if len(samples) >= 3:
+        # 达到会话上限之后内存应保持平稳
+        warm = samples[len(samples) // 3]
+        assert samples[-1] < warm * 1.2 + 1, f"内存随会话数增长: {warm:.1f}MB → {samples[-1]:.1f}MB"
+
+
+async def main(args):
+    await makespan_bench(args)
+    await memory_bench(args)
+    print("✅ 依赖顺序与并发上限正确，完成时间接近下界，记忆占用不随会话数增长")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="任务调度器基准")
+    parser.add_argument("--max-parallel", type=int, default=4)
+    parser.add_argument("--random-dags", type=int, default=20)
+    parser.add_argument("--dag-size", type=int, default=30)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--max-sessions", type=int, default=1000, help="调度器保留的会话数上限")
+    parser.add_argument("--tasks-per-session", type=int, default=2)
+    parser.add_argument("--steps-per-task", type=int, default=3)
+    logging.disable(logging.INFO)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板匹配定位器基准（合成桌面，无需显示器和真实模型）
+在合成桌面上按描述反复定位12个带纹理的按钮（共60次），画面依次经历：
+静止、局部变化、窗口整体平移、界面缩放到110%。对比：
+- 改造前：每次定位都调用视觉模型
+- 模板层：首次由模型定位并保存模板，之后在缓存的图像金字塔上本地匹配，未命中才调用模型
+视觉模型用桩实现（按真实位置返回0-1000边界框，可配置延迟并计数），
+校验每次定位结果与按钮真实中心的偏差不超过3像素。
+
+用法:
+    python benchmark/template_locator_bench.py --model-latency-ms 800
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+import nagaagent_core.vendors.cv2 as cv2
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agentserver.agent_computer_control.screen_capture import SyntheticFrameSource  # noqa: E402
+from agentserver.agent_computer_control.computer_use_adapter import ComputerUseAdapter  # noqa: E402
+from agentserver.agent_computer_control.visual_analyzer import VisualAnalyzer  # noqa: E402
+
+WIDTH, HEIGHT = 1920, 1080
+NAMES = ["保存按钮", "取消按钮", "文件菜单", "编辑菜单", "搜索框", "设置图标",
+         "刷新按钮", "关闭按钮", "下一步按钮", "返回按钮", "分享图标", "帮助图标"]
+
+
+def make_patches(seed: int = 3):
+    """每个按钮：底色 + 边框 + 随机"文字"笔画，保证有可匹配的纹理"""
+    rng = np.random.default_rng(seed)
+    patches = []
+    for i in range(len(NAMES)):
+        w, h = int(rng.integers(90, 180)), int(rng.integers(30, 50))
+        patch = np.empty((h, w, 3), dtype=np.uint8)
+        patch[:] = rng.integers(60, 200, size=3)
+        patch[:2, :], patch[-2:, :], patch[:, :2], patch[:, -2:] = 20, 20, 20, 20
+        for _ in range(6):
+            x, y = int(rng.integers(8, w - 14)), int(rng.integers(8, h - 12))
+            patch[y:y + 4, x:x + 10] = 250
+        patches.append(patch)
+    layout = [(int(rng.integers(40, WIDTH - 400)), int(rng.integers(60, HEIGHT - 200))) for _ in NAMES]
+    return patches, layout
+
+
+class Desktop:
+    """合成桌面：按平移量和缩放比例重绘按钮，并记录每个按钮的真实位置"""
+
+    def __init__(self, source: SyntheticFrameSource):
+        self.source = source
+        self.patches, self.layout = make_patches()
+        self.truth = {}
+
+    def render(self, dx: int = 0, dy: int = 0, scale: float = 1.0, clock: int = 0):
+        frame = self.source.frame
+        frame[:] = (236, 236, 236)
+        frame[1030:, :] = (40, 40, 48)
+        frame[1040:1070, 1800:1800 + 60] = (clock * 37 % 255, 200, 120)  # 时钟区域每次都变
+        for name, patch, (x, y) in zip(NAMES, self.patches, self.layout):
+            if scale != 1.0:
+                patch = cv2.resize(patch, (int(round(patch.shape[1] * scale)), int(round(patch.shape[0] * scale))),
+                                   interpolation=cv2.INTER_LINEAR)
+            x, y = int(round(x * scale)) + dx, int(round(y * scale)) + dy
+            h, w = patch.shape[:2]
+            frame[y:y + h, x:x + w] = patch
+            self.truth[name] = (x, y, w, h)
+
+    def center(self, name):
+        x, y, w, h = self.truth[name]
+        return x + w // 2, y + h // 2
+
+
+class StubVisionModel:
+    """桩视觉模型：返回目标真实位置的0-1000边界框"""
+
+    def __init__(self, desktop: Desktop, latency: float):
+        self.desktop = desktop
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self, prompt: str, screenshot: bytes) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        name = next(n for n in NAMES if f'"{n}"' in prompt)
+        x, y, w, h = self.desktop.truth[name]
+        box = [x / WIDTH * 1000, y / HEIGHT * 1000, (x + w) / WIDTH * 1000, (y + h) / HEIGHT * 1000]
+        return "[" + ", ".join(f"{v:.1f}" for v in box) + "]"
+
+
+def make_analyzer(model: StubVisionModel, use_templates: bool) -> VisualAnalyzer:
+    analyzer = VisualAnalyzer()
+    analyzer.ai_coordinate_available = True
+    analyzer.ocr_available = False
+    analyzer._query_vision_model = model
+    if not use_templates:
+        analyzer.locator = None
+    return analyzer
+
+
+PHASES = [
+    ("静止", dict()),
+    ("局部变化", dict()),
+    ("窗口平移", dict(dx=37, dy=-21)),
+    ("缩放110%", dict(scale=1.1)),
+    ("恢复", dict()),
+]
+
+
+async def run(use_templates: bool, latency: float):
+    source = SyntheticFrameSource(WIDTH, HEIGHT)
+    desktop = Desktop(source)
+    adapter = ComputerUseAdapter(frame_source=source)
+    model = StubVisionModel(desktop, latency)
+    analyzer = make_analyzer(model, use_templates)
+    hit_latency, miss_latency, errors = [], [], []
+    step = 0
+    for _, layout in PHASES:
+        for name in NAMES:
+            step += 1
+            desktop.render(clock=step, **layout)
+            frame = await adapter.capture_frame()
+            calls = model.calls
+            start = time.perf_counter()
+            location = await analyzer.locate_element(name, frame)
+            elapsed = time.perf_counter() - start
+            (miss_latency if model.calls > calls else hit_latency).append(elapsed)
+            truth = desktop.center(name)
+            errors.append(max(abs(location[0] - truth[0]), abs(location[1] - truth[1])) if location else 10 ** 6)
+    return model.calls, hit_latency, miss_latency, errors, analyzer
+
+
+def pct(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000 if ordered else float("nan")
+
+
+async def main(latency_ms: float):
+    latency = latency_ms / 1000
+    total = len(PHASES) * len(NAMES)
+    baseline_calls, _, baseline_latency, baseline_errors, _ = await run(False, latency)
+    calls, hits, misses, errors, analyzer = await run(True, latency)
+
+    assert max(baseline_errors) <= 3, f"模型定位偏差过大: {max(baseline_errors)}px"
+    assert max(errors) <= 3, f"模板定位偏差过大: {max(errors)}px"
+    assert calls < baseline_calls
+
+    print(f"{total} 次定位（{len(NAMES)} 个按钮 × {len(PHASES)} 个阶段：{'/'.join(p for p, _ in PHASES)}），"
+          f"桩模型延迟 {latency_ms:.0f}ms")
+    print(f"{'方式':<10} {'模型调用':>8} {'总耗时(s)':>10} {'命中p50(ms)':>12} {'命中p95(ms)':>12} {'最大偏差(px)':>12}")
+    print(f"{'仅模型':<10} {baseline_calls:>8} {sum(baseline_latency):>10.2f} {'-':>12} {'-':>12} {max(baseline_errors):>12}")
+    print(f"{'模板层':<10} {calls:>8} {sum(hits) + sum(misses):>10.2f} {pct(hits, 0.5):>12.2f} "
+          f"{pct(hits, 0.95):>12.2f} {max(errors):>12}")
+    print(f"模板匹配统计: {analyzer.locator.stats()}")
+    print("✅ 所有定位结果与按钮真实中心的偏差不超过3像素")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模板匹配定位器基准")
+    parser.add_argument("--model-latency-ms", type=float, default=800, help="桩视觉模型单次调用延迟")
+    args = parser.parse_args()
+    asyncio.run(main(args.model_latency_ms))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时语音VAD门基准（离线，逐帧回放WAV）
+对语音/静音混合的WAV夹具逐帧（20ms）回放，对比上行策略：
+- 改造前：除连续静音超过2秒后的帧以外全部上行
+- VAD门：能量+过零率判决，前导缓冲+拖尾+周期保活（安装了 webrtcvad 时额外测试模型判决）
+输出每个夹具的上行帧数、Base64编码CPU时间、VAD自身CPU时间、语音起音延迟（开门时刻-标注起点）、
+起音被截断的语音段数与标注语音帧的上行覆盖率。
+
+夹具：默认合成三段90秒录音（安静房间 / 办公室底噪+敲击声 / 风扇低频噪声），
+语音由带谐波的浊音音节和清辅音（s/sh）起头的音节组成，语音段边界作为标注。
+也可用 --wav 传入16kHz单声道录音，同名 .json 文件（[[起点秒, 终点秒], ...]）作为标注。
+
+用法:
+    python benchmark/vad_gate_bench.py [--wav a.wav b.wav] [--save-fixtures DIR] [--hangover-ms 1000]
+"""
+
+import sys
+import json
+import time
+import wave
+import base64
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from voice.input.voice_realtime.core.vad_gate import VADGate, WEBRTCVAD_AVAILABLE  # noqa: E402
+
+RATE, CHUNK_MS = 16000, 20
+FRAME = RATE * CHUNK_MS // 1000
+SILENCE_SKIP_MS = 2000
+ENERGY_THRESHOLD = 0.02
+
+
+# ---------- 夹具 ----------
+
+def synth_syllable(rng, fricative: bool) -> np.ndarray:
+    """一个音节：可选清辅音起头（高频噪声），随后是带谐波、音高滑动的浊音"""
+    parts = []
+    if fricative:
+        n = int(rng.uniform(0.06, 0.12) * RATE)
+        noise = np.diff(rng.standard_normal(n + 1))  # 一阶差分 ≈ 高通
+        parts.append(noise / np.std(noise) * rng.uniform(500, 800))
+    n = int(rng.uniform(0.12, 0.25) * RATE)
+    t = np.arange(n) / RATE
+    f0 = rng.uniform(110, 230) * (1 + 0.15 * t / t[-1])
+    phase = 2 * np.pi * np.cumsum(f0) / RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.sin(np.pi * np.arange(n) / n) ** 0.6
+    parts.append(voiced / np.max(np.abs(voiced)) * envelope * rng.uniform(4000, 10000))
+    return np.concatenate(parts)
+
+
+def synth_fixture(name: str, seconds: float, seed: int):
+    """合成语音/静音混合录音，返回 (PCM, 语音段标注[(起点秒, 终点秒)])"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * RATE)
+    t = np.arange(total) / RATE
+    if name == "quiet_room":
+        background = rng.standard_normal(total) * 30
+    elif name == "office":
+        # 粉红化底噪 + 偶发敲击（单帧尖峰）
+        background = np.convolve(rng.standard_normal(total), np.ones(8) / 8, mode="same") * 400
+        for pos in rng.integers(0, total - FRAME, size=int(seconds / 6)):
+            background[pos:pos + 80] += rng.standard_normal(80) * 6000
+    else:
+        background = 450 * np.sin(2 * np.pi * 100 * t) + 150 * np.sin(2 * np.pi * 200 * t) \
+            + rng.standard_normal(total) * 60
+
+    pcm = background.copy()
+    labels = []
+    pos = int(rng.uniform(1.0, 3.0) * RATE)
+    while True:
+        segment = []
+        target = rng.uniform(0.8, 4.0) * RATE
+        while sum(len(s) for s in segment) < target:
+            segment.append(synth_syllable(rng, fricative=rng.random() < 0.35))
+            segment.append(np.zeros(int(rng.uniform(0.03, 0.09) * RATE)))
+        # 标注语音段从第一个样本到最后一个音节结束
+        speech = np.concatenate(segment[:-1])
+        if pos + len(speech) >= total - RATE:
+            break
+        pcm[pos:pos + len(speech)] += speech
+        labels.append((pos / RATE, (pos + len(speech)) / RATE))
+        pos += len(speech) + int(rng.uniform(1.0, 8.0) * RATE)
+    return np.clip(pcm, -32768, 32767).astype(np.int16), labels
+
+
+def write_wav(path: Path, pcm: np.ndarray, labels):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(pcm.tobytes())
+    path.with_suffix(".json").write_text(json.dumps(labels), encoding="utf-8")
+
+
+def load_fixture(path: Path):
+    with wave.open(str(path), "rb") as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, RATE), f"{path.name}: 需为16kHz单声道16bit"
+        pcm = w.readframes(w.getnframes())
+    label_path = path.with_suffix(".json")
+    labels = json.loads(label_path.read_text(encoding="utf-8")) if label_path.exists() else []
+    frames = [pcm[i:i + FRAME * 2] for i in range(0, len(pcm) - FRAME * 2 + 1, FRAME * 2)]
+    return frames, labels
+
+
+# ---------- 上行策略 ----------
+
+def legacy_uplink(frames):
+    """改造前 AudioManager._input_loop 的静音跳过规则，返回每帧的上行时刻（帧序号）"""
+    sent_at = {}
+    silence_duration = 0
+    for i, frame in enumerate(frames):
+        samples = np.frombuffer(frame, dtype=np.int16)
+        if np.sqrt(np.mean(samples.astype(np.float32) ** 2)) / 32768.0 < ENERGY_THRESHOLD:
+            silence_duration += CHUNK_MS
+            if silence_duration > SILENCE_SKIP_MS:
+                continue
+        else:
+            silence_duration = 0
+        sent_at[i] = i
+    return sent_at
+
+
+def gated_uplink(frames, gate: VADGate):
+    """经VAD门上行，返回 {帧序号: 上行时刻（帧序号）}"""
+    index = {id(frame): i for i, frame in enumerate(frames)}
+    sent_at = {}
+    for i, frame in enumerate(frames):
+        for forwarded in gate.process(frame):
+            sent_at[index[id(forwarded)]] = i
+    return sent_at
+
+
+def measure(frames, labels, uplink):
+    start = time.process_time()
+    sent_at = uplink()
+    vad_cpu = time.process_time() - start
+
+    start = time.process_time()
+    for i in sent_at:
+        base64.b64encode(frames[i]).decode("ascii")
+    encode_cpu = time.process_time() - start
+
+    onset_delays, clipped, missed, covered, speech_frames = [], 0, 0, 0, 0
+    for begin, end in labels:
+        first, last = int(begin * 1000) // CHUNK_MS, int(end * 1000) // CHUNK_MS
+        speech_frames += last - first + 1
+        covered += sum(1 for i in range(first, last + 1) if i in sent_at)
+        in_segment = [sent_at[i] for i in range(first, last + 1) if i in sent_at]
+        if not in_segment:
+            missed += 1
+            continue
+        # 起音延迟：段内第一帧语音被送出的时刻 - 标注起点
+        onset_delays.append((min(in_segment) - first) * CHUNK_MS)
+        if first not in sent_at:
+            clipped += 1
+    return {
+        "sent": len(sent_at),
+        "encode_ms": encode_cpu * 1000,
+        "vad_ms": vad_cpu * 1000,
+        "onset_mean": float(np.mean(onset_delays)) if onset_delays else float("nan"),
+        "onset_max": max(onset_delays) if onset_delays else float("nan"),
+        "clipped": clipped,
+        "missed": missed,
+        "coverage": covered / speech_frames if speech_frames else float("nan"),
+    }
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = Path(args.save_fixtures or tmp)
+        fixture_dir.mkdir(parents=True, exist_ok=True)
+        paths = [Path(p) for p in args.wav]
+        if not paths:
+            for seed, name in enumerate(("quiet_room", "office", "fan"), 1):
+                pcm, labels = synth_fixture(name, args.seconds, seed)
+                write_wav(fixture_dir / f"{name}.wav", pcm, labels)
+                paths.append(fixture_dir / f"{name}.wav")
+
+        modes = [("改造前", None), ("VAD门", False)]
+        if WEBRTCVAD_AVAILABLE:
+            modes.append(("VAD门+模型", True))
+        print(f"帧长 {CHUNK_MS}ms，拖尾 {args.hangover_ms}ms，前导 {args.preroll_ms}ms，保活 {args.keepalive_ms}ms"
+              + ("" if WEBRTCVAD_AVAILABLE else "（未安装 webrtcvad，跳过模型判决）"))
+        print(f"{'夹具':<12} {'方式':<10} {'上行帧':>12} {'编码CPU(ms)':>11} {'VAD CPU(ms)':>11} "
+              f"{'起音延迟均值/最大(ms)':>20} {'截断/漏检/段数':>14} {'语音覆盖':>8}")
+        for path in paths:
+            frames, labels = load_fixture(path)
+            results = {}
+            for label, use_model in modes:
+                if use_model is None:
+                    uplink = lambda: legacy_uplink(frames)  # noqa: E731
+                else:
+                    gate = VADGate(RATE, CHUNK_MS, energy_threshold=ENERGY_THRESHOLD, hangover_ms=args.hangover_ms,
+                                   preroll_ms=args.preroll_ms, keepalive_ms=args.keepalive_ms, use_model=use_model)
+                    uplink = lambda gate=gate: gated_uplink(frames, gate)  # noqa: E731
+                r = results[label] = measure(frames, labels, uplink)
+                print(f"{path.stem:<12} {label:<10} {r['sent']:>6}/{len(frames):<5} {r['encode_ms']:>11.2f} "
+                      f"{r['vad_ms']:>11.1f} {r['onset_mean']:>10.1f}/{r['onset_max']:<9.0f} "
+                      f"{r['clipped']:>4}/{r['missed']}/{len(labels):<6} {r['coverage']:>8.1%}")
+            if labels:
+                gated = results["VAD门"]
+                assert gated["missed"] == 0, f"{path.stem}: 有语音段未上行"
+                assert gated["coverage"] >= args.min_coverage, f"{path.stem}: 语音覆盖率 {gated['coverage']:.1%}"
+                assert gated["sent"] < results["改造前"]["sent"], f"{path.stem}: 上行帧数未减少"
+    print("✅ VAD门未漏检任何语音段，上行帧数低于改造前")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="实时语音VAD门基准")
+    parser.add_argument("--wav", nargs="*", default=[], help="16kHz单声道WAV，同名.json为语音段标注")
+    parser.add_argument("--save-fixtures", help="把合成夹具保存到该目录")
+    parser.add_argument("--seconds", type=float, default=90, help="合成夹具时长")
+    parser.add_argument("--hangover-ms", type=int, default=1000)
+    parser.add_argument("--preroll-ms", type=int, default=300)
+    parser.add_argument("--keepalive-ms", type=int, default=5000)
+    parser.add_argument("--min-coverage", type=float, default=0.98, help="标注语音帧的最低上行覆盖率")
+    main(parser.parse_args())
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时语音音频管线离线测试台（无声卡、无云端）
+WAV文件作为麦克风（按实时节奏每20ms读出一帧），本地WebSocket回声服务器模拟实时语音模型：
+收到 input_audio_buffer.append 后把16kHz音频升采样到24kHz，以 response.audio.delta 立即回传；
+输出端是按实时节奏消费的虚拟声卡。每帧前3个样本写入序号戳，虚拟声卡开始播放该帧时计算端到端延迟。
+对比：
+- 改造前：采集回调线程上Base64编码 → 三个队列 + 解码线程 → 播放线程按接收块整块写声卡
+- 环形缓冲区：采集写入预分配帧环 → 发送线程编码一次 → 接收端直接解码进播放帧环 → 播放线程按帧视图写声卡
+输出端到端延迟 p50/p95/p99、抖动（延迟标准差与RFC3550到达抖动）、每分钟对话的客户端CPU秒数，
+以及播放中打断后仍写入声卡的音频时长。回声服务器运行在子进程中，不计入客户端CPU。
+另外校验播放缓冲区写满时扩容不丢帧（扩容前拿到的帧视图不受影响），采集缓冲区写满时丢弃新帧。
+回环中没有声学回声，测试台在播放开始时保持麦克风开启，使采集与播放全双工运行。
+
+用法:
+    python benchmark/voice_pipeline_bench.py --seconds 60 [--wav speech_16k_mono.wav]
+"""
+
+import sys
+import json
+import time
+import wave
+import queue
+import base64
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from pathlib import Path
+from contextlib import suppress
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+INPUT_RATE, OUTPUT_RATE, CHUNK_MS = 16000, 24000, 20
+IN_FRAME = INPUT_RATE * CHUNK_MS // 1000
+OUT_FRAME = OUTPUT_RATE * CHUNK_MS // 1000
+FRAME_S = CHUNK_MS / 1000
+STAMP, AI_STAMP = 12345, 23456  # 帧首样本：麦克风帧 / 打断测试中的AI音频帧
+UPSAMPLE_INDEX = np.arange(OUT_FRAME) * IN_FRAME // OUT_FRAME
+
+
+def stamp(frame: np.ndarray, marker: int, seq: int):
+    frame[0], frame[1], frame[2] = marker, seq & 0x7FFF, seq >> 15
+
+
+# ---------- 回声服务器（子进程） ----------
+
+def serve(port: int):
+    """模拟实时语音模型：16kHz输入帧升采样为24kHz输出帧，保留序号戳"""
+    from websockets.sync.server import serve as ws_serve
+
+    def handler(ws):
+        for message in ws:
+            event = json.loads(message)
+            if event.get("type") != "input_audio_buffer.append":
+                continue
+            pcm = np.frombuffer(base64.b64decode(event["audio"]), dtype=np.int16).reshape(-1, IN_FRAME)
+            out = pcm[:, UPSAMPLE_INDEX]
+            out[:, :3] = pcm[:, :3]
+            ws.send(json.dumps({"type": "response.audio.delta", "delta": base64.b64encode(out.tobytes()).decode("ascii")}))
+
+    with ws_serve(handler, "127.0.0.1", port, compression=None) as server:
+        print("ready", flush=True)
+        server.serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------- 虚拟音频设备 ----------
+
+def synth_speech_wav(path: Path, seconds: float, seed: int = 3):
+    """合成类语音WAV：基频+谐波+噪声，按音节包络调制（幅度始终高于静音阈值）"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * INPUT_RATE)) / INPUT_RATE
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / INPUT_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6)) + 0.3 * rng.standard_normal(len(t))
+    envelope = 0.35 + 0.65 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+    pcm = (voice / np.max(np.abs(voice)) * envelope * 12000).astype(np.int16)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(INPUT_RATE)
+        w.writeframes(pcm.tobytes())
+
+
+class WavSource:
+    """按实时节奏读出WAV的"麦克风"流（实现PyAudio输入流的read接口），每帧打序号戳"""
+
+    def __init__(self, path: Path):
+        with wave.open(str(path), "rb") as w:
+            assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, INPUT_RATE), \
+                "WAV需为16kHz单声道16bit"
+            self.pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        self.sent = {}
+        self.seq = 0
+        self.start = None
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        if self.start is None:
+            self.start = time.perf_counter()
+        offset = (self.seq * num_frames) % (len(self.pcm) - num_frames)
+        frame = self.pcm[offset:offset + num_frames].copy()
+        stamp(frame, STAMP, self.seq)
+        # 一帧采满之后才可读
+        delay = self.start + (self.seq + 1) * FRAME_S - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.sent[self.seq] = time.perf_counter()
+        self.seq += 1
+        return frame.tobytes()
+
+    def is_active(self):
+        return True
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class VirtualSpeaker:
+    """按实时节奏消费的"声卡"（实现PyAudio输出流的write接口），记录每个带戳帧开始播放的时刻"""
+
+    def __init__(self, source: WavSource):
+        self.source = source
+        self.clock = 0.0
+        self.latencies = []  # (序号, 延迟秒)
+        self.ai_frames_after = []  # 打断测试：AI音频帧开始播放时刻
+        self._lock = threading.Lock()
+
+    def write(self, data, num_frames=None, exception_on_underflow=False):
+        samples = np.frombuffer(data, dtype=np.int16)
+        frames = samples.reshape(-1, OUT_FRAME) if len(samples) % OUT_FRAME == 0 else [samples]
+        with self._lock:
+            start = max(time.perf_counter(), self.clock)
+            for i, frame in enumerate(frames):
+                played_at = start + i * FRAME_S
+                if len(frame) >= 3 and frame[0] == STAMP:
+                    seq = int(frame[1]) | int(frame[2]) << 15
+                    if seq in self.source.sent:
+                        self.latencies.append((seq, played_at - self.source.sent[seq]))
+                elif len(frame) >= 3 and frame[0] == AI_STAMP:
+                    self.ai_frames_after.append(played_at)
+            self.clock = start + len(frames) * FRAME_S
+        # 设备缓冲约一帧：最后一帧开始播放时 write 返回
+        delay = self.clock - FRAME_S - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def is_active(self):
+        return True
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ---------- 改造前的实现 ----------
+
+def legacy_manager_class():
+    from voice.input.voice_realtime.core.audio_manager import AudioManager
+
+    class LegacyAudioManager(AudioManager):
+        """改造前的队列管线：采集回调原始PCM，Base64队列 → 解码线程 → 播放队列 → 整块写声卡"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.input_queue = queue.Queue()
+            self.output_queue = queue.Queue()
+            self.b64_output_queue = queue.Queue()
+
+        def start(self):
+            self.is_running = True
+            self.is_recording = True
+            self.threads = [threading.Thread(target=loop, daemon=True) for loop in
+                            (self._input_loop, self._output_decoder_loop, self._output_player_loop)]
+            for thread in self.threads:
+                thread.start()
+
+        def stop(self):
+            self.is_running = False
+            self._stop_lip_sync_thread()
+            for thread in self.threads:
+                thread.join(timeout=1.0)
+
+        def _input_loop(self):
+            silence_duration = 0
+            while self.is_running:
+                audio_data = self.input_stream.read(self.input_chunk_size, exception_on_overflow=False)
+                self.stats['input_chunks'] += 1
+                if self.force_mute or not self.is_recording:
+                    self.stats['muted_chunks'] += 1
+                    continue
+                if self._is_silence(audio_data):
+                    silence_duration += self.chunk_size_ms
+                    if silence_duration > 2000:
+                        continue
+                else:
+                    silence_duration = 0
+                self.input_queue.put(audio_data)
+                if self.on_audio_input:
+                    self.on_audio_input(audio_data)
+
+        def _output_decoder_loop(self):
+            while self.is_running:
+                with suppress(queue.Empty):
+                    audio_b64 = self.b64_output_queue.get(timeout=0.1)
+                    self.output_queue.put(base64.b64decode(audio_b64))
+
+        def _output_player_loop(self):
+            was_playing = False
+            while self.is_running:
+                audio_chunk = None
+                with suppress(queue.Empty):
+                    audio_chunk = self.output_queue.get(timeout=0.1)
+                if not audio_chunk:
+                    continue
+                if not was_playing:
+                    was_playing = True
+                    self.is_playing = True
+                    self.force_mute = True
+                    self.chunk_counter = 0
+                    self._start_lip_sync_thread()
+                    if self.on_playback_started:
+                        self.on_playback_started()
+                audio_array = np.frombuffer(audio_chunk, dtype=np.int16)
+                for i in range(0, len(audio_array), self.output_chunk_size):
+                    with self.buffer_lock:
+                        self.lip_sync_buffer.append(audio_array[i:i + self.output_chunk_size].tobytes())
+                        self.chunk_counter += 1
+                if self.playback_start_time is None:
+                    self.playback_start_time = time.time()
+                self.output_stream.write(audio_chunk)
+                self.stats['output_chunks'] += 1
+
+        def add_output_audio(self, audio_b64: str):
+            self.ai_response_done = False
+            self.empty_queue_count = 0
+            self.b64_output_queue.put(audio_b64)
+
+        def clear_output_buffer(self):
+            for q in (self.b64_output_queue, self.output_queue):
+                while not q.empty():
+                    with suppress(queue.Empty):
+                        q.get_nowait()
+            with self.buffer_lock:
+                self.lip_sync_buffer.clear()
+                self.playback_start_time = None
+                self.chunk_counter = 0
+
+    return LegacyAudioManager
+
+
+# ---------- 运行 ----------
+
+def run_pipeline(legacy: bool, wav: Path, port: int, seconds: float, warmup: float, delta_ms: int):
+    from websockets.sync.client import connect
+    from voice.input.voice_realtime.core.audio_manager import AudioManager
+
+    source = WavSource(wav)
+    speaker = VirtualSpeaker(source)
+    cls = legacy_manager_class() if legacy else AudioManager
+    manager = cls(input_sample_rate=INPUT_RATE, output_sample_rate=OUTPUT_RATE, chunk_size_ms=CHUNK_MS,
+                  vad_threshold=0.02, input_stream=source, output_stream=speaker,
+                  vad_options={"vad_gate": False})  # 只比较管线本身，VAD门见 vad_gate_bench.py
+    # 两种实现都不驱动Live2D
+    manager._advanced_lip_sync_v2 = None
+
+    ws = connect(f"ws://127.0.0.1:{port}", compression=None)
+
+    def send(audio_b64: str):
+        ws.send(json.dumps({"type": "input_audio_buffer.append", "audio": audio_b64}))
+
+    if legacy:
+        # 改造前客户端：采集回调线程上逐块编码
+        manager.on_audio_input = lambda audio_data: send(base64.b64encode(audio_data).decode("ascii"))
+    else:
+        manager.on_audio_encoded = send
+
+    def keep_mic_open():
+        manager.force_mute = False
+
+    manager.on_playback_started = keep_mic_open
+
+    def receive():
+        with suppress(Exception):
+            for message in ws:
+                manager.add_output_audio(json.loads(message)["delta"])
+
+    receiver = threading.Thread(target=receive, daemon=True)
+    receiver.start()
+
+    manager.start()
+    time.sleep(warmup)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    first_seq = source.seq
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    last_seq = source.seq
+
+    # 打断：停止采集，播放一段按 delta_ms 分块到达的5秒AI音频，播放0.3秒后打断
+    manager.stop_recording()
+    time.sleep(0.5)
+    ai = np.full((int(5 / FRAME_S), OUT_FRAME), 800, dtype=np.int16)
+    for i, frame in enumerate(ai):
+        stamp(frame, AI_STAMP, i)
+    per_delta = max(1, delta_ms // CHUNK_MS)
+    for i in range(0, len(ai), per_delta):
+        manager.add_output_audio(base64.b64encode(ai[i:i + per_delta]).decode("ascii"))
+    time.sleep(0.3)
+    interrupted_at = time.perf_counter()
+    manager.interrupt_playback()
+    interrupt_call = time.perf_counter() - interrupted_at
+    time.sleep(0.6)
+    after = sum(1 for t in speaker.ai_frames_after if t >= interrupted_at)
+
+    manager.stop()
+    ws.close()
+    receiver.join(timeout=1.0)
+
+    latencies = [lat for seq, lat in speaker.latencies if first_seq <= seq < last_seq]
+    seqs = [seq for seq, _ in speaker.latencies if first_seq <= seq < last_seq]
+    return {
+        "latencies": latencies,
+        "in_order": seqs == sorted(seqs),
+        "captured": last_seq - first_seq,
+        "cpu_per_min": cpu / wall * 60,
+        "after_interrupt_ms": after * CHUNK_MS,
+        "interrupt_call_ms": interrupt_call * 1000,
+    }
+
+
+def ring_overflow_check(seconds: float = 90):
+    """AI音频一次性到达且超过播放缓冲区容量：播放端按序保留全部帧，采集端按容量丢弃"""
+    from voice.input.voice_realtime.core.audio_manager import AudioManager
+
+    manager = AudioManager(input_sample_rate=INPUT_RATE, output_sample_rate=OUTPUT_RATE, chunk_size_ms=CHUNK_MS,
+                           input_stream=object(), output_stream=object())
+    ring = manager.output_ring
+    initial = ring.capacity
+    ai = np.full((int(seconds / FRAME_S), OUT_FRAME), 800, dtype=np.int16)
+    for i, frame in enumerate(ai):
+        stamp(frame, AI_STAMP, i)
+    per_delta = 240 // CHUNK_MS
+    manager.add_output_audio(base64.b64encode(ai[:per_delta]).decode("ascii"))
+    held = ring.peek(per_delta)
+    expected = held.copy()
+    for i in range(per_delta, len(ai), per_delta):
+        manager.add_output_audio(base64.b64encode(ai[i:i + per_delta]).decode("ascii"))
+    assert np.array_equal(held, expected), "扩容后先前拿到的帧视图被改写"
+    ring.release()
+
+    seqs = [int(expected[k][1]) | int(expected[k][2]) << 15 for k in range(len(expected))]
+    while True:
+        frames = ring.peek(manager.play_batch_frames)
+        if frames is None:
+            break
+        seqs.extend(int(f[1]) | int(f[2]) << 15 for f in frames)
+        ring.release()
+    stats = ring.get_stats()
+    assert seqs == list(range(len(ai))), f"播放缓冲区丢帧或乱序：收到 {len(seqs)}/{len(ai)} 帧"
+    assert stats["dropped_frames"] == 0, "播放缓冲区丢帧"
+    grown = ring.capacity
+    ring.reset()
+    assert ring.capacity == initial, "reset() 后播放缓冲区未恢复初始容量"
+
+    mic = manager.input_ring
+    mic.write(np.zeros((mic.capacity + 50) * IN_FRAME, dtype=np.int16))
+    assert mic.dropped_frames == 50 and len(mic) == mic.capacity, "采集缓冲区写满时应丢弃新帧"
+    print(f"✅ {seconds:.0f}s AI音频一次性到达：播放缓冲区 {initial}→{grown} 帧（扩容 {stats['grow_count']} 次），"
+          f"{len(ai)} 帧按序无丢失；采集缓冲区写满丢弃 {mic.dropped_frames} 帧")
+
+
+def rfc3550_jitter(latencies):
+    jitter = 0.0
+    for prev, cur in zip(latencies, latencies[1:]):
+        jitter += (abs(cur - prev) - jitter) / 16
+    return jitter
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def main(args):
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("voice").setLevel(logging.WARNING)
+    ring_overflow_check()
+    port = free_port()
+    server = subprocess.Popen([sys.executable, __file__, "--serve", "--port", str(port)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        assert server.stdout.readline().strip() == "ready", "回声服务器启动失败"
+        with tempfile.TemporaryDirectory() as tmp:
+            wav = Path(args.wav) if args.wav else Path(tmp) / "speech.wav"
+            if not args.wav:
+                synth_speech_wav(wav, 30)
+            print(f"WAV: {wav.name}，每种方式稳态运行 {args.seconds:.0f}s（预热 {args.warmup:.0f}s），"
+                  f"帧长 {CHUNK_MS}ms，回声服务器 ws://127.0.0.1:{port}")
+            print(f"{'方式':<10} {'延迟p50(ms)':>11} {'p95':>7} {'p99':>7} {'标准差':>7} {'RFC3550抖动':>11} "
+                  f"{'CPU秒/分钟':>10} {'收/采帧':>11} {'打断后播放(ms)':>14}")
+            results = {}
+            for label, legacy in (("改造前", True), ("环形缓冲区", False)):
+                r = run_pipeline(legacy, wav, port, args.seconds, args.warmup, args.delta_ms)
+                lat = [x * 1000 for x in r["latencies"]]
+                results[label] = r
+                print(f"{label:<10} {percentile(lat, 50):>11.1f} {percentile(lat, 95):>7.1f} {percentile(lat, 99):>7.1f} "
+                      f"{statistics.pstdev(lat):>7.2f} {rfc3550_jitter(lat):>11.2f} {r['cpu_per_min']:>10.2f} "
+                      f"{len(lat):>5}/{r['captured']:<5} {r['after_interrupt_ms']:>14.0f}")
+                assert r["in_order"], f"{label}: 帧乱序"
+                assert len(lat) >= r["captured"] * 0.98, f"{label}: 丢帧"
+    finally:
+        server.terminate()
+        server.wait(timeout=5)
+    print("✅ 两种方式均按序回放全部采集帧")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="实时语音音频管线离线测试台")
+    parser.add_argument("--seconds", type=float, default=60, help="每种方式的稳态运行时长")
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--wav", help="16kHz单声道16bit WAV，缺省时合成类语音信号")
+    parser.add_argument("--delta-ms", type=int, default=240, help="打断测试中AI音频每个delta的时长")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.port)
+    else:
+        main(args)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word文档文本索引基准
+生成约1000页（默认8000段落）并含200个表格的文档，对比 document_utils 中
+逐段落/逐单元格遍历的原实现与基于文档索引的实现：
+- find_paragraph_by_text 精确/部分匹配的重复查询
+- extract_document_text / get_document_structure 的重复调用
+- 多组查找替换（find_and_replace_text 逐组调用 vs find_and_replace_many）
+并校验两种实现的返回值以及替换后的文档内容一致；另用含大小写映射会改变长度的字符
+（如 'İ'、'ẞ'、'ﬁ'）的小文档校验部分匹配结果与原实现一致。
+
+用法:
+    python benchmark/word_index_bench.py --paragraphs 8000 --tables 200 --queries 50
+"""
+
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "mcpserver" / "Office-Word-MCP-Server-main"))
+
+from docx import Document  # noqa: E402
+from word_document_server.utils import document_utils  # noqa: E402
+from word_document_server.utils.document_index import get_document_index  # noqa: E402
+
+WORDS = ["系统", "模块", "性能", "缓存", "索引", "agent", "memory", "report", "latency", "throughput",
+         "配置", "服务", "请求", "响应", "文档", "table", "query", "result", "分析", "优化"]
+
+
+# ---------- 改造前的实现 ----------
+
+def legacy_find_paragraph_by_text(doc, text, partial_match=False):
+    matching_paragraphs = []
+    for i, para in enumerate(doc.paragraphs):
+        if partial_match and text in para.text:
+            matching_paragraphs.append(i)
+        elif not partial_match and para.text == text:
+            matching_paragraphs.append(i)
+    return matching_paragraphs
+
+
+def legacy_find_and_replace_text(doc, old_text, new_text):
+    count = 0
+    for para in doc.paragraphs:
+        if old_text in para.text:
+            for run in para.runs:
+                if old_text in run.text:
+                    run.text = run.text.replace(old_text, new_text)
+                    count += 1
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for para in cell.paragraphs:
+                    if old_text in para.text:
+                        for run in para.runs:
+                            if old_text in run.text:
+                                run.text = run.text.replace(old_text, new_text)
+                                count += 1
+    return count
+
+
+def legacy_extract_document_text(doc_path):
+    doc = Document(doc_path)
+    text = [paragraph.text for paragraph in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    text.append(paragraph.text)
+    return "\n".join(text)
+
+
+def legacy_get_document_structure(doc_path):
+    doc = Document(doc_path)
+    return document_utils._build_structure(_UnindexedView(doc))
+
+
+class _UnindexedView:
+    """让 _build_structure 直接遍历 doc.paragraphs（不借助索引）"""
+
+    class _Entry:
+        __slots__ = ("paragraph", "text")
+
+        def __init__(self, paragraph):
+            self.paragraph = paragraph
+            self.text = paragraph.text
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.entries = [self._Entry(p) for p in doc.paragraphs]
+        self.body_count = len(self.entries)
+
+
+# ---------- 夹具 ----------
+
+def build_document(path: str, paragraphs: int, tables: int, seed: int = 7):
+    rng = random.Random(seed)
+    doc = Document()
+    every = max(1, paragraphs // max(1, tables))
+    for i in range(paragraphs):
+        if i % 40 == 0:
+            doc.add_heading(f"第{i // 40}章 {rng.choice(WORDS)}", level=1)
+            continue
+        para = doc.add_paragraph()
+        # 每段落拆成几个run，模拟格式化文本
+        for _ in range(3):
+            para.add_run(" ".join(rng.choice(WORDS) for _ in range(8)) + f" #{i} ")
+        if (i + 1) % every == 0 and len(doc.tables) < tables:
+            table = doc.add_table(rows=5, cols=4)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"{rng.choice(WORDS)} r{r}c{c} t{len(doc.tables)}"
+    doc.save(path)
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main(paragraphs: int, tables: int, queries: int):
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "large.docx")
+        build_document(path, paragraphs, tables)
+        doc = Document(path)
+        print(f"文档: {len(doc.paragraphs)} 段落, {len(doc.tables)} 表格")
+
+        # 查询集合：部分匹配（含空格的多词短语、单个词、不存在的词）与精确匹配
+        texts = [p.text for p in doc.paragraphs]
+        partial = []
+        for _ in range(queries):
+            words = rng.choice([t for t in texts if t]).split()
+            k = rng.randint(0, max(0, len(words) - 3))
+            partial.append(" ".join(words[k:k + rng.choice((1, 3))]))
+        partial += ["不存在的文本", "#1234 "]
+        exact = [rng.choice(texts) for _ in range(queries)]
+
+        rows = []
+
+        _, build = timed(lambda: get_document_index(doc))
+        rows.append(("构建索引（每次解析一次）", None, build))
+
+        legacy, t_legacy = timed(lambda: [legacy_find_paragraph_by_text(doc, q, True) for q in partial])
+        indexed, t_index = timed(lambda: [document_utils.find_paragraph_by_text(doc, q, True) for q in partial])
+        assert legacy == indexed, "部分匹配结果不一致"
+        rows.append((f"部分匹配 ×{len(partial)}", t_legacy, t_index))
+
+        legacy, t_legacy = timed(lambda: [legacy_find_paragraph_by_text(doc, q) for q in exact])
+        indexed, t_index = timed(lambda: [document_utils.find_paragraph_by_text(doc, q) for q in exact])
+        assert legacy == indexed, "精确匹配结果不一致"
+        rows.append((f"精确匹配 ×{len(exact)}", t_legacy, t_index))
+
+        legacy, t_legacy = timed(lambda: legacy_extract_document_text(path), 3)
+        indexed, t_index = timed(lambda: document_utils.extract_document_text(path), 3)
+        assert legacy == indexed, "提取文本不一致"
+        rows.append(("extract_document_text ×3", t_legacy * 3, t_index * 3))
+
+        legacy, t_legacy = timed(lambda: legacy_get_document_structure(path), 3)
+        indexed, t_index = timed(lambda: document_utils.get_document_structure(path), 3)
+        assert legacy == indexed, "文档结构不一致"
+        rows.append(("get_document_structure ×3", t_legacy * 3, t_index * 3))
+
+        pairs = [("缓存", "高速缓存"), ("latency", "延迟"), ("r1c2", "R1C2"), ("高速缓存", "cache"), ("无此文本", "x")]
+        legacy_doc, indexed_doc = Document(path), Document(path)
+        legacy, t_legacy = timed(lambda: [legacy_find_and_replace_text(legacy_doc, o, n) for o, n in pairs])
+        indexed, t_index = timed(lambda: document_utils.find_and_replace_many(indexed_doc, pairs))
+        assert sum(legacy) == indexed, f"替换次数不一致: {sum(legacy)} != {indexed}"
+        assert legacy_extract_text(legacy_doc) == legacy_extract_text(indexed_doc), "替换后的文档内容不一致"
+        rows.append((f"多组查找替换 ×{len(pairs)}（含建索引）", t_legacy, t_index))
+
+        print(f"{'操作':<34} {'原实现(ms)':>12} {'索引(ms)':>10} {'加速':>8}")
+        for name, t_legacy, t_index in rows:
+            if t_legacy is None:
+                print(f"{name:<34} {'-':>12} {t_index * 1000:>10.1f} {'-':>8}")
+            else:
+                print(f"{name:<34} {t_legacy * 1000:>12.1f} {t_index * 1000:>10.1f} {t_legacy / t_index:>7.1f}x")
+        print("✅ 各操作结果与原实现一致")
+
+
+def unicode_check():
+    """大小写映射改变长度的字符不能让索引漏掉匹配"""
+    doc = Document()
+    lines = ["x.İ y", "İstanbul ve İzmir", "STRAẞE und straße", "ﬁle ﬁnder", "ΣΊΣΥΦΟΣ σίσυφος",
+             "Kelvin K sign", "dotless ı and I", "x.i̇ y"]
+    for line in lines:
+        doc.add_paragraph(line)
+    queries = [".İ ", " İzmir", "ve İ", " STRAẞE ", "RAẞE u", "ﬁle ", " ﬁnder", "Σ σ", " K s", " ı a",
+               ".i̇ ", "x.İ y", "nbul ve"]
+    for query in queries:
+        legacy = legacy_find_paragraph_by_text(doc, query, True)
+        indexed = document_utils.find_paragraph_by_text(doc, query, True)
+        assert legacy == indexed, f"部分匹配 {query!r} 结果不一致: {legacy} != {indexed}"
+    print(f"✅ 含特殊大小写映射字符的 {len(queries)} 个部分匹配查询与原实现一致")
+
+
+def legacy_extract_text(doc):
+    return [p.text for p in doc.paragraphs] + [p.text for t in doc.tables for row in t.rows
+                                               for cell in row.cells for p in cell.paragraphs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Word文档文本索引基准")
+    parser.add_argument("--paragraphs", type=int, default=8000, help="段落数（约8段/页）")
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    main(args.paragraphs, args.tables, args.queries)
+    unicode_check()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word文档会话缓存基准
+逐次调用追加500个段落和50个表格，对比：
+- 改造前：每次调用都 Document(filename) 解析并 doc.save(filename) 整体重写
+- 会话缓存：经 WordDocumentMCPServer.handle_handoff 编辑内存中的文档，最后 save_document 一次落盘
+统计耗时与写入字节数，并校验两种方式生成的文档内容一致。
+
+用法:
+    python benchmark/word_session_bench.py --paragraphs 500 --tables 50
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import importlib
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from docx import Document  # noqa: E402
+
+adapter_module = importlib.import_module("mcpserver.Office-Word-MCP-Server-main.word_mcp_adapter")
+
+
+def build_calls(filename: str, paragraphs: int, tables: int):
+    """每10个段落后插入一个表格，与逐段撰写报告的调用序列一致"""
+    every = max(1, paragraphs // max(1, tables))
+    calls, table_count = [], 0
+    for i in range(paragraphs):
+        calls.append({"tool_name": "add_paragraph", "filename": filename,
+                      "text": f"第{i}段：这是用于基准测试的报告正文，包含若干中文和English混排内容。" * 3})
+        if (i + 1) % every == 0 and table_count < tables:
+            calls.append({"tool_name": "add_table", "filename": filename, "rows": 4, "cols": 3,
+                          "headers": ["指标", "数值", "备注"]})
+            table_count += 1
+    return calls
+
+
+def legacy_apply(call: dict) -> int:
+    """改造前的单次调用：解析整个文档、修改、整体重写，返回写入字节数"""
+    filename = call["filename"]
+    doc = Document(filename)
+    if call["tool_name"] == "add_paragraph":
+        doc.add_paragraph(call["text"])
+    else:
+        table = doc.add_table(rows=call["rows"], cols=call["cols"])
+        table.style = 'Table Grid'
+        for i, header in enumerate(call["headers"]):
+            table.rows[0].cells[i].text = header
+    doc.save(filename)
+    return os.path.getsize(filename)
+
+
+def document_digest(filename: str):
+    doc = Document(filename)
+    tables = [[cell.text for cell in table.rows[0].cells] for table in doc.tables]
+    return [p.text for p in doc.paragraphs], tables
+
+
+async def main(paragraphs: int, tables: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, "legacy.docx")
+        session_file = os.path.join(tmp, "session.docx")
+        for path in (legacy_file, session_file):
+            Document().save(path)
+        legacy_calls = build_calls(legacy_file, paragraphs, tables)
+        session_calls = build_calls(session_file, paragraphs, tables)
+
+        start = time.perf_counter()
+        legacy_bytes = sum(legacy_apply(call) for call in legacy_calls)
+        legacy_time = time.perf_counter() - start
+
+        server = adapter_module.WordDocumentMCPServer()
+        server.sessions.idle_flush = 0  # 基准只在显式提交时落盘
+        start = time.perf_counter()
+        for call in session_calls:
+            response = json.loads(await server.handle_handoff(call))
+            assert response["status"] == "ok", response
+        await server.handle_handoff({"tool_name": "save_document", "filename": session_file})
+        session_time = time.perf_counter() - start
+        stats = server.sessions.stats()
+
+        assert document_digest(legacy_file) == document_digest(session_file), "两种方式生成的文档内容不一致"
+        print(f"{len(legacy_calls)} 次调用（{paragraphs} 段落 + {tables} 表格）")
+        print(f"{'方式':<12} {'耗时(s)':>10} {'写入(MB)':>10} {'解析次数':>8} {'落盘次数':>8}")
+        print(f"{'逐次解析重写':<12} {legacy_time:>10.2f} {legacy_bytes / 1e6:>10.2f} {len(legacy_calls):>8} {len(legacy_calls):>8}")
+        print(f"{'会话缓存':<12} {session_time:>10.2f} {stats['bytes_written'] / 1e6:>10.2f} "
+              f"{stats['parse_count']:>8} {stats['save_count']:>8}")
+        print(f"✅ 文档内容一致，加速 {legacy_time / session_time:.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Word文档会话缓存基准")
+    parser.add_argument("--paragraphs", type=int, default=500)
+    parser.add_argument("--tables", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.paragraphs, args.tables))
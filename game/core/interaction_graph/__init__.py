@@ -1,4 +1,5 @@
 from .role_generator import RoleGenerator
 from .signal_router import SignalRouter
 from .dynamic_dispatcher import DynamicDispatcher
+from .reachability import ReachabilityIndex
 
@@ -4,12 +4,85 @@
 
 import logging
 import asyncio
+from collections import Counter, OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from ..models.data_models import Agent, InteractionGraph, Task, GameResult
 from ..models.config import GameConfig
 
 logger = logging.getLogger(__name__)
 
+# 需求技能 -> 智能体技能关键词（简单的关键词匹配,实际可以使用更复杂的语义匹配）
+SKILL_MAPPINGS = {
+    "技术实现": ["编程", "开发", "实现", "coding"],
+    "设计创作": ["设计", "美工", "创作", "UI", "UX"],
+    "质量验证": ["测试", "验证", "质量", "QA"],
+    "数据分析": ["分析", "统计", "数据", "analytics"],
+    "产品评审": ["产品", "评审", "管理", "策划"],
+    "创新改进": ["创新", "改进", "优化", "创意"]
+}
+
+# 角色 -> 各输出类型的兼容度
+ROLE_COMPATIBILITY = {
+    "产品经理": {"analysis": 0.8, "implementation": 0.6, "validation": 0.7, "integration": 0.9},
+    "程序员": {"analysis": 0.6, "implementation": 0.9, "validation": 0.7, "integration": 0.8},
+    "美工": {"analysis": 0.5, "implementation": 0.7, "validation": 0.4, "integration": 0.6},
+    "测试人员": {"analysis": 0.7, "implementation": 0.3, "validation": 0.9, "integration": 0.5},
+    "研究员": {"analysis": 0.9, "implementation": 0.5, "validation": 0.6, "integration": 0.7},
+    "数据分析师": {"analysis": 0.9, "implementation": 0.6, "validation": 0.8, "integration": 0.5}
+}
+
+COORDINATOR_ROLES = ["产品经理", "项目经理", "研究员", "主管", "负责人"]
+
+
+class AgentCapabilityMatrix:
+    """全体智能体的能力特征矩阵 - 名册变化时重建
+    
+    技能列按需求技能懒加载（每列为各智能体命中的技能数），角色列按输出类型预计算，
+    一次任务打分即对所有智能体做一次向量运算
+    """
+    
+    def __init__(self, agents: List[Agent]):
+        self.agents = list(agents)
+        self.index = {agent.agent_id: i for i, agent in enumerate(self.agents)}
+        self._skills_lower = [[skill.lower() for skill in agent.skills] for agent in self.agents]
+        self._skill_columns: Dict[str, np.ndarray] = {}
+        self._role_columns: Dict[str, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        return len(self.agents)
+    
+    def skill_column(self, required_skill: str) -> np.ndarray:
+        """各智能体与某项需求技能匹配的技能数"""
+        column = self._skill_columns.get(required_skill)
+        if column is None:
+            keywords = SKILL_MAPPINGS.get(required_skill, [required_skill.lower()])
+            column = np.fromiter(
+                (sum(1 for skill in skills if any(keyword in skill for keyword in keywords))
+                 for skills in self._skills_lower),
+                dtype=np.float64, count=len(self.agents)
+            )
+            self._skill_columns[required_skill] = column
+        return column
+    
+    def role_column(self, output_type: str) -> np.ndarray:
+        """各智能体角色对某输出类型的兼容度"""
+        column = self._role_columns.get(output_type)
+        if column is None:
+            column = np.fromiter(
+                (ROLE_COMPATIBILITY.get(agent.role, {}).get(output_type, 0.5) for agent in self.agents),
+                dtype=np.float64, count=len(self.agents)
+            )
+            self._role_columns[output_type] = column
+        return column
+    
+    def base_scores(self, required_skills: List[str], output_type: str) -> np.ndarray:
+        """技能匹配分 + 角色兼容分（与历史、负载无关的部分）"""
+        matches = np.zeros(len(self.agents), dtype=np.float64)
+        for required_skill, times in Counter(required_skills).items():
+            matches += self.skill_column(required_skill) * times
+        return matches * 0.3 + self.role_column(output_type)
+
 
 class DynamicDispatcher:
     """动态分发器 - 根据任务输出和下阶段需求自主选择传输目标"""
@@ -18,6 +91,11 @@ class DynamicDispatcher:
         self.config = config
         self.dispatch_history: List[Dict[str, Any]] = []
         self.iteration_counts: Dict[str, int] = {}
+        # 能力矩阵按名册缓存，静态分按任务签名缓存
+        self._capability_matrix: Optional[AgentCapabilityMatrix] = None
+        self._roster_key: Optional[Tuple[int, ...]] = None
+        self._score_cache: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._score_cache_size = 256
     
     async def dispatch_message(self, 
                                source_agent_id: str,
@@ -59,7 +137,7 @@ class DynamicDispatcher:
             
             # 选择最佳目标智能体
             target_selections = self._select_target_agents(
-                reachable_agents, next_phase_requirements, interaction_graph, task
+                reachable_agents, next_phase_requirements, interaction_graph, task, source_agent_id
             )
             
             # 生成分发消息
@@ -99,12 +177,13 @@ class DynamicDispatcher:
     def _get_reachable_agents(self, source_agent_id: str, interaction_graph: InteractionGraph) -> List[Agent]:
         """获取可达的智能体列表"""
         reachable_ids = interaction_graph.get_reachable_agents(source_agent_id)
+        matrix = self._get_capability_matrix(interaction_graph)
         reachable_agents = []
         
         for agent_id in reachable_ids:
-            agent = interaction_graph.get_agent_by_id(agent_id)
-            if agent:
-                reachable_agents.append(agent)
+            index = matrix.index.get(agent_id)
+            if index is not None:
+                reachable_agents.append(matrix.agents[index])
         
         return reachable_agents
     
@@ -172,20 +251,14 @@ class DynamicDispatcher:
                               reachable_agents: List[Agent],
                               requirements: Dict[str, Any],
                               interaction_graph: InteractionGraph,
-                              task: Task) -> List[Tuple[str, str]]:
+                              task: Task,
+                              source_agent_id: Optional[str] = None) -> List[Tuple[str, str]]:
         """选择目标智能体"""
         selections = []
-        required_skills = requirements.get("required_skills", [])
         collaboration_type = requirements.get("collaboration_type", "sequential")
         
-        # 计算每个智能体的匹配分数
-        agent_scores = []
-        for agent in reachable_agents:
-            score = self._calculate_agent_match_score(agent, requirements, interaction_graph)
-            agent_scores.append((agent, score))
-        
-        # 按分数排序
-        agent_scores.sort(key=lambda x: x[1], reverse=True)
+        # 计算每个智能体的匹配分数并取前3名（按分数降序,同分保持可达顺序）
+        agent_scores = self._rank_agents(reachable_agents, requirements, interaction_graph, top_k=3)
         
         # 根据协作类型选择智能体
         if collaboration_type == "parallel":
@@ -219,7 +292,7 @@ class DynamicDispatcher:
         # 如果没有选择任何智能体,选择默认的下一个智能体
         if not selections:
             # 默认自指（若图允许或存在自环），否则回传需求方
-            if interaction_graph.is_path_allowed(source_agent_id, source_agent_id):
+            if source_agent_id and interaction_graph.is_path_allowed(source_agent_id, source_agent_id):
                 selections.append((source_agent_id, "默认自指"))
             else:
                 requester = next((x for x in interaction_graph.agents if getattr(x, "is_requester", False)), None)
@@ -231,6 +304,93 @@ class DynamicDispatcher:
          
         return selections
     
+    def _get_capability_matrix(self, interaction_graph: InteractionGraph) -> AgentCapabilityMatrix:
+        """获取名册对应的能力矩阵（智能体列表变化时重建）"""
+        # 按各智能体对象本身识别名册：缓存的矩阵持有这些对象，它们的id在缓存有效期内不会被复用
+        roster_key = tuple(id(agent) for agent in interaction_graph.agents)
+        if self._capability_matrix is None or roster_key != self._roster_key:
+            self._capability_matrix = AgentCapabilityMatrix(interaction_graph.agents)
+            self._roster_key = roster_key
+            self._score_cache.clear()
+        return self._capability_matrix
+    
+    def invalidate_roster(self):
+        """名册内容原地修改（技能、角色变化）后调用，丢弃能力矩阵与分数缓存"""
+        self._capability_matrix = None
+        self._roster_key = None
+        self._score_cache.clear()
+    
+    def _static_scores(self, matrix: AgentCapabilityMatrix, requirements: Dict[str, Any]) -> np.ndarray:
+        """按任务签名缓存的静态分"""
+        required_skills = requirements.get("required_skills", [])
+        output_type = requirements.get("output_type", "analysis")
+        key = (tuple(required_skills), output_type)
+        scores = self._score_cache.get(key)
+        if scores is None:
+            scores = matrix.base_scores(required_skills, output_type)
+            self._score_cache[key] = scores
+            if len(self._score_cache) > self._score_cache_size:
+                self._score_cache.popitem(last=False)
+        else:
+            self._score_cache.move_to_end(key)
+        return scores
+    
+    def _history_scores(self, matrix: AgentCapabilityMatrix) -> np.ndarray:
+        """各智能体的协作历史分（与 _calculate_collaboration_history_score 一致）"""
+        totals: Dict[str, int] = {}
+        successes: Dict[str, int] = {}
+        for record in self.dispatch_history:
+            success = record.get("success", True)
+            for agent_id in {decision[0] for decision in record.get("decisions", [])}:
+                totals[agent_id] = totals.get(agent_id, 0) + 1
+                if success:
+                    successes[agent_id] = successes.get(agent_id, 0) + 1
+        scores = np.zeros(len(matrix), dtype=np.float64)
+        for agent_id, total in totals.items():
+            index = matrix.index.get(agent_id)
+            if index is not None:
+                scores[index] = (successes.get(agent_id, 0) / total - 0.5) * 0.2
+        return scores
+    
+    def _workload_scores(self, matrix: AgentCapabilityMatrix) -> np.ndarray:
+        """各智能体的负载系数（与 _calculate_workload_score 一致）"""
+        scores = np.ones(len(matrix), dtype=np.float64)
+        max_iterations = self.config.self_game.max_iterations
+        if max_iterations > 0:
+            for agent_id, count in self.iteration_counts.items():
+                index = matrix.index.get(agent_id)
+                if index is not None:
+                    scores[index] = 1.0 - (count / max_iterations * 0.3)
+        return scores
+    
+    def _rank_agents(self,
+                     agents: List[Agent],
+                     requirements: Dict[str, Any],
+                     interaction_graph: InteractionGraph,
+                     top_k: Optional[int] = None) -> List[Tuple[Agent, float]]:
+        """
+        对候选智能体做一次向量化打分,返回按分数降序的前top_k个 [(agent, score)]
+        
+        分数与 _calculate_agent_match_score 逐个计算的结果一致,同分时保持候选顺序
+        """
+        if not agents:
+            return []
+        matrix = self._get_capability_matrix(interaction_graph)
+        indices = np.fromiter((matrix.index[agent.agent_id] for agent in agents), dtype=np.intp, count=len(agents))
+        scores = (self._static_scores(matrix, requirements)[indices]
+                  + self._history_scores(matrix)[indices]) * self._workload_scores(matrix)[indices]
+        scores = np.minimum(scores, 1.0)  # 限制最大分数为1.0
+        
+        count = len(agents)
+        if top_k is None or top_k >= count:
+            order = np.argsort(-scores, kind="stable")
+        else:
+            # 先按第k大的分数筛出候选,再稳定排序,保证同分时与逐个排序的结果一致
+            kth = np.partition(scores, count - top_k)[count - top_k]
+            candidates = np.flatnonzero(scores >= kth)
+            order = candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
+        return [(agents[i], float(scores[i])) for i in order]
+    
     def _calculate_agent_match_score(self, 
                                      agent: Agent,
                                      requirements: Dict[str, Any],
@@ -261,34 +421,15 @@ class DynamicDispatcher:
     
     def _skills_match(self, required_skill: str, agent_skill: str) -> bool:
         """检查技能是否匹配"""
-        # 简单的关键词匹配,实际可以使用更复杂的语义匹配
-        skill_mappings = {
-            "技术实现": ["编程", "开发", "实现", "coding"],
-            "设计创作": ["设计", "美工", "创作", "UI", "UX"],
-            "质量验证": ["测试", "验证", "质量", "QA"],
-            "数据分析": ["分析", "统计", "数据", "analytics"],
-            "产品评审": ["产品", "评审", "管理", "策划"],
-            "创新改进": ["创新", "改进", "优化", "创意"]
-        }
-        
-        required_keywords = skill_mappings.get(required_skill, [required_skill.lower()])
+        required_keywords = SKILL_MAPPINGS.get(required_skill, [required_skill.lower()])
         agent_skill_lower = agent_skill.lower()
         
         return any(keyword in agent_skill_lower for keyword in required_keywords)
     
     def _calculate_role_compatibility(self, role: str, requirements: Dict[str, Any]) -> float:
         """计算角色兼容性分数"""
-        role_compatibility = {
-            "产品经理": {"analysis": 0.8, "implementation": 0.6, "validation": 0.7, "integration": 0.9},
-            "程序员": {"analysis": 0.6, "implementation": 0.9, "validation": 0.7, "integration": 0.8},
-            "美工": {"analysis": 0.5, "implementation": 0.7, "validation": 0.4, "integration": 0.6},
-            "测试人员": {"analysis": 0.7, "implementation": 0.3, "validation": 0.9, "integration": 0.5},
-            "研究员": {"analysis": 0.9, "implementation": 0.5, "validation": 0.6, "integration": 0.7},
-            "数据分析师": {"analysis": 0.9, "implementation": 0.6, "validation": 0.8, "integration": 0.5}
-        }
-        
         output_type = requirements.get("output_type", "analysis")
-        return role_compatibility.get(role, {}).get(output_type, 0.5)
+        return ROLE_COMPATIBILITY.get(role, {}).get(output_type, 0.5)
     
     def _calculate_collaboration_history_score(self, agent_id: str) -> float:
         """计算协作历史分数"""
@@ -320,8 +461,7 @@ class DynamicDispatcher:
     
     def _is_coordinator_role(self, role: str) -> bool:
         """判断是否为协调者角色"""
-        coordinator_roles = ["产品经理", "项目经理", "研究员", "主管", "负责人"]
-        return role in coordinator_roles
+        return role in COORDINATOR_ROLES
     
     def _generate_dispatch_message(self, 
                                    source_agent: Agent,
@@ -0,0 +1,142 @@
+"""
+可达性索引 - 用位集矩阵预计算交互图中的直接、两跳与传递可达关系
+
+每个智能体对应一行位集（Python整数，第j位表示能否到达第j个智能体），
+查询为O(1)的位运算；增加边时增量更新，删除边时整体重建。
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def iter_bits(bits: int):
+    """依次返回位集中为1的位序号"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class ReachabilityIndex:
+    """交互图可达性索引
+
+    - direct: 直接边（含自环）
+    - two_hop: 经过一个不同于起点和终点的中介可达（与逐个中介遍历的判定一致）
+    - closure: 传递闭包，经过任意多跳可达
+    """
+
+    def __init__(self, agent_ids: Sequence[str], edges: Iterable[Tuple[str, str]]):
+        self.agent_ids: List[str] = list(agent_ids)
+        self.index: Dict[str, int] = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+        self.edges = set()
+        for from_id, to_id in edges:
+            if from_id in self.index and to_id in self.index:
+                self.edges.add((from_id, to_id))
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self.agent_ids)
+
+    # ---------- 构建 ----------
+
+    def _rebuild(self):
+        size = len(self.agent_ids)
+        self.direct = [0] * size
+        self._succ = [0] * size  # 不含自环的出边
+        self._pred = [0] * size  # 不含自环的入边
+        for from_id, to_id in self.edges:
+            i, j = self.index[from_id], self.index[to_id]
+            self.direct[i] |= 1 << j
+            if i != j:
+                self._succ[i] |= 1 << j
+                self._pred[j] |= 1 << i
+
+        self.two_hop = [self._two_hop_row(i) for i in range(size)]
+
+        # Warshall：以k为中介，能到达k的行并上k的行
+        closure = list(self.direct)
+        for k in range(size):
+            bit = 1 << k
+            row_k = closure[k]
+            for i in range(size):
+                if closure[i] & bit:
+                    closure[i] |= row_k
+        self.closure = closure
+
+    def _two_hop_row(self, i: int) -> int:
+        row = 0
+        for k in iter_bits(self._succ[i]):
+            row |= self._succ[k]
+        return row
+
+    # ---------- 增量更新 ----------
+
+    def add_edge(self, from_id: str, to_id: str) -> bool:
+        """增加一条边并增量更新各矩阵，返回是否为新边"""
+        if (from_id, to_id) in self.edges:
+            return False
+        if from_id not in self.index or to_id not in self.index:
+            raise ValueError(f"路径中包含不存在的智能体ID: {from_id} -> {to_id}")
+        i, j = self.index[from_id], self.index[to_id]
+        self.edges.add((from_id, to_id))
+        bit_j = 1 << j
+        self.direct[i] |= bit_j
+
+        if i != j:
+            self._succ[i] |= bit_j
+            self._pred[j] |= 1 << i
+            # 新中介j：i可以经j两跳到达j的后继
+            self.two_hop[i] |= self._succ[j]
+            # 以i为中介：i的前驱可以经i两跳到达j
+            for x in iter_bits(self._pred[i]):
+                self.two_hop[x] |= bit_j
+
+        # 所有能到达i的行（以及i自身）都能到达j及j可达的全部节点
+        gained = bit_j | self.closure[j]
+        bit_i = 1 << i
+        closure = self.closure
+        for x in range(len(closure)):
+            if x == i or closure[x] & bit_i:
+                closure[x] |= gained
+        return True
+
+    def remove_edge(self, from_id: str, to_id: str) -> bool:
+        """删除一条边（闭包无法增量回退，整体重建），返回边是否存在"""
+        if (from_id, to_id) not in self.edges:
+            return False
+        self.edges.discard((from_id, to_id))
+        self._rebuild()
+        return True
+
+    # ---------- 查询 ----------
+
+    def _bit(self, rows: List[int], from_id: str, to_id: str) -> bool:
+        i = self.index.get(from_id)
+        j = self.index.get(to_id)
+        if i is None or j is None:
+            return False
+        return bool((rows[i] >> j) & 1)
+
+    def has_edge(self, from_id: str, to_id: str) -> bool:
+        return self._bit(self.direct, from_id, to_id)
+
+    def has_two_hop(self, from_id: str, to_id: str) -> bool:
+        return self._bit(self.two_hop, from_id, to_id)
+
+    def is_reachable(self, from_id: str, to_id: str) -> bool:
+        return self._bit(self.closure, from_id, to_id)
+
+    def reachable_from(self, from_id: str) -> List[str]:
+        """从指定智能体经任意多跳可达的全部智能体"""
+        i = self.index.get(from_id)
+        if i is None:
+            return []
+        return [self.agent_ids[j] for j in iter_bits(self.closure[i])]
+
+    def row_mask(self, agent_ids: Iterable[str]) -> int:
+        """把一组智能体ID转为位集，用于整行批量判定"""
+        mask = 0
+        for agent_id in agent_ids:
+            j = self.index.get(agent_id)
+            if j is not None:
+                mask |= 1 << j
+        return mask
@@ -6,6 +6,7 @@ import logging
 from typing import List, Dict, Any, Tuple, Set, Optional
 from ..models.data_models import Agent, InteractionGraph, Task
 from ..models.config import GameConfig
+from .reachability import ReachabilityIndex, iter_bits
 
 logger = logging.getLogger(__name__)
 
@@ -150,43 +151,101 @@ class SignalRouter:
             通信矩阵,格式为 {from_agent: {to_agent: communication_type}}
         """
         matrix = {}
+        reachability = self.get_reachability(interaction_graph)
+        forbidden_rows: Dict[str, Set[str]] = {}
+        for from_id, to_id in interaction_graph.forbidden_paths:
+            forbidden_rows.setdefault(from_id, set()).add(to_id)
         
         for agent in interaction_graph.agents:
             matrix[agent.agent_id] = {}
+            i = reachability.index[agent.agent_id]
+            direct_row = reachability.direct[i]
+            indirect_row = reachability.two_hop[i]
+            forbidden_row = reachability.row_mask(forbidden_rows.get(agent.agent_id, ()))
             
             for other_agent in interaction_graph.agents:
                 if agent.agent_id == other_agent.agent_id:
                     continue
                 
+                bit = 1 << reachability.index[other_agent.agent_id]
                 # 检查是否有直接路径
-                if (agent.agent_id, other_agent.agent_id) in interaction_graph.allowed_paths:
-                    if (agent.agent_id, other_agent.agent_id) in interaction_graph.forbidden_paths:
+                if direct_row & bit:
+                    if forbidden_row & bit:
                         matrix[agent.agent_id][other_agent.agent_id] = "forbidden"
                     else:
                         matrix[agent.agent_id][other_agent.agent_id] = "direct"
                 else:
                     # 检查是否有间接路径
-                    if self._has_indirect_path(agent.agent_id, other_agent.agent_id, interaction_graph):
+                    if indirect_row & bit:
                         matrix[agent.agent_id][other_agent.agent_id] = "indirect"
                     else:
                         matrix[agent.agent_id][other_agent.agent_id] = "none"
         
         return matrix
     
+    def get_reachability(self, interaction_graph: InteractionGraph) -> ReachabilityIndex:
+        """
+        获取交互图的可达性索引
+        
+        索引缓存在交互图上，以智能体ID序列和路径列表为键：
+        直接改写、替换智能体或路径后自动重建，
+        通过 add_path/remove_path 修改路径时增量更新。
+        """
+        signature = self._reachability_signature(interaction_graph)
+        cached = getattr(interaction_graph, "_reachability", None)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        reachability = ReachabilityIndex([a.agent_id for a in interaction_graph.agents],
+                                         interaction_graph.allowed_paths)
+        interaction_graph._reachability = (signature, reachability)
+        return reachability
+    
+    @staticmethod
+    def _reachability_signature(interaction_graph: InteractionGraph) -> Tuple:
+        """可达性索引的缓存键：智能体ID序列与路径列表的快照"""
+        return (tuple(a.agent_id for a in interaction_graph.agents),
+                tuple(tuple(p) for p in interaction_graph.allowed_paths))
+    
+    def invalidate_reachability(self, interaction_graph: InteractionGraph):
+        """丢弃交互图上缓存的可达性索引"""
+        interaction_graph._reachability = None
+    
+    def add_path(self, interaction_graph: InteractionGraph, from_id: str, to_id: str) -> bool:
+        """增加一条允许路径并增量更新可达性索引，返回是否为新路径"""
+        reachability = self.get_reachability(interaction_graph)
+        if not reachability.add_edge(from_id, to_id):
+            return False
+        interaction_graph.allowed_paths.append((from_id, to_id))
+        interaction_graph._reachability = (self._reachability_signature(interaction_graph), reachability)
+        return True
+    
+    def remove_path(self, interaction_graph: InteractionGraph, from_id: str, to_id: str) -> bool:
+        """删除一条允许路径并更新可达性索引，返回路径是否存在"""
+        reachability = self.get_reachability(interaction_graph)
+        if not reachability.remove_edge(from_id, to_id):
+            return False
+        interaction_graph.allowed_paths[:] = [p for p in interaction_graph.allowed_paths if p != (from_id, to_id)]
+        interaction_graph._reachability = (self._reachability_signature(interaction_graph), reachability)
+        return True
+    
+    def route_signal(self, from_id: str, to_ids: List[str], interaction_graph: InteractionGraph) -> List[str]:
+        """
+        一次判定一组接收方：返回可直接或经一个中介收到信号的智能体ID
+        
+        Returns:
+            按智能体顺序排列的可达接收方
+        """
+        reachability = self.get_reachability(interaction_graph)
+        i = reachability.index.get(from_id)
+        if i is None:
+            return []
+        routable = (reachability.direct[i] | reachability.two_hop[i]) & reachability.row_mask(to_ids)
+        return [reachability.agent_ids[j] for j in iter_bits(routable)]
+    
     def _has_indirect_path(self, from_id: str, to_id: str, interaction_graph: InteractionGraph) -> bool:
         """检查是否存在间接路径（通过中介）"""
-        # 简单的两跳路径检查
-        for intermediate_agent in interaction_graph.agents:
-            intermediate_id = intermediate_agent.agent_id
-            if intermediate_id == from_id or intermediate_id == to_id:
-                continue
-            
-            # 检查 from -> intermediate -> to 路径
-            if ((from_id, intermediate_id) in interaction_graph.allowed_paths and
-                (intermediate_id, to_id) in interaction_graph.allowed_paths):
-                return True
-        
-        return False
+        # 两跳路径检查：from -> intermediate -> to，中介不同于起点和终点
+        return self.get_reachability(interaction_graph).has_two_hop(from_id, to_id)
     
     def visualize_interaction_graph(self, interaction_graph: InteractionGraph) -> str:
         """
@@ -48,6 +48,9 @@ class SelfGameConfig:
     thinking_vector_max_depth: int = 5  # 思维向量最大深度
     max_self_route_iterations: int = 10  # 单节点自指最大迭代轮次
     branches_per_agent: int = 1  # 每个角色并行的自博弈分支数（默认1，避免重复执行五次）
+    critique_window: int = 4  # 批判阶段同时在途的LLM调用数
+    critique_pack_size: int = 4  # 每次批判调用打包的Actor输出数（同一批判者）
+    critique_cache_size: int = 1024  # 按输出内容哈希复用历史批判的条目上限
 
 
 @dataclass
@@ -72,6 +75,8 @@ class SystemConfig:
     checkpoint_interval: int = 10  # 检查点间隔（秒）
     max_concurrent_api: int = 10  # API限流-最大并发
     min_api_interval_seconds: float = 0.0  # API限流-最小调用间隔
+    history_limit: int = 1000  # 批判/评估/会话历史在内存中保留的条数（统计值按全部历史流式累计）
+    history_spill_dir: str = ""  # 超出保留条数的历史追加写入该目录下的JSONL文件，为空则丢弃
 
 
 @dataclass  
@@ -21,6 +21,7 @@ import numpy as np
 
 from ...models.data_models import HiddenState, TextBlock, NoveltyScore
 from ...models.config import GameConfig
+from ...utils.running_stats import RunningStats, make_history
 from ..actor import ActorOutput
 from ..criticizer import CriticOutput
 
@@ -51,6 +52,17 @@ class PhilossOutput:
         }
 
 
+def _evaluation_summary(output: PhilossOutput) -> Dict[str, Any]:
+    """溢出到JSONL的评估摘要（不含文本块与隐藏状态）"""
+    return {
+        'target_content_id': output.target_content_id,
+        'novelty_score': output.novelty_score,
+        'prediction_errors': output.prediction_errors,
+        'analysis_time': output.analysis_time,
+        'metadata': output.metadata,
+    }
+
+
 class PhilossChecker:
     """Philoss创新性评估器 - 基于Qwen2.5-VL的创新度检测"""
     
@@ -69,7 +81,11 @@ class PhilossChecker:
         self.token_block_size = config.philoss.token_block_size
         self.prediction_threshold = config.philoss.prediction_threshold
         self.novelty_threshold = config.philoss.novelty_threshold
-        self.evaluation_history: List[PhilossOutput] = []
+        # 隐藏状态占用较大,原始评估只保留最近若干条(溢出时只写摘要),统计值流式累计
+        self.evaluation_history = make_history(config.system, "evaluations", _evaluation_summary)
+        self.novelty_stats = RunningStats()
+        self.analysis_time_stats = RunningStats()
+        self.failed_evaluations = 0
         
         # 初始化模型
         self._initialize_model()
@@ -240,7 +256,7 @@ class PhilossChecker:
             )
             
             # 记录到历史
-            self.evaluation_history.append(philoss_output)
+            self._record_evaluation(philoss_output)
             
             logger.info(f"Philoss评估完成,创新性评分:{novelty_score:.3f}")
             return philoss_output
@@ -547,7 +563,7 @@ class PhilossChecker:
     
     def get_evaluation_statistics(self) -> Dict[str, Any]:
         """获取评估统计信息"""
-        if not self.evaluation_history:
+        if not self.novelty_stats.count:
             return {
                 'total_evaluations': 0,
                 'average_novelty_score': 0,
@@ -555,21 +571,27 @@ class PhilossChecker:
                 'mlp_available': self.mlp_layer is not None
             }
         
-        successful_evaluations = [e for e in self.evaluation_history if not e.metadata.get('error', False)]
-        total_novelty = sum(e.novelty_score for e in self.evaluation_history)
-        
         return {
-            'total_evaluations': len(self.evaluation_history),
-            'successful_evaluations': len(successful_evaluations),
-            'failed_evaluations': len(self.evaluation_history) - len(successful_evaluations),
-            'average_novelty_score': total_novelty / len(self.evaluation_history),
-            'average_analysis_time': sum(e.analysis_time for e in self.evaluation_history) / len(self.evaluation_history),
+            'total_evaluations': self.novelty_stats.count,
+            'successful_evaluations': self.novelty_stats.count - self.failed_evaluations,
+            'failed_evaluations': self.failed_evaluations,
+            'average_novelty_score': self.novelty_stats.mean,
+            'novelty_score_std': self.novelty_stats.std,
+            'average_analysis_time': self.analysis_time_stats.mean,
             'model_available': self.model is not None,
             'mlp_available': self.mlp_layer is not None,
             'device': self.device,
             'token_block_size': self.token_block_size
         }
     
+    def _record_evaluation(self, output: PhilossOutput):
+        """记录评估结果并更新流式统计"""
+        self.evaluation_history.append(output)
+        self.novelty_stats.push(output.novelty_score)
+        self.analysis_time_stats.push(output.analysis_time)
+        if output.metadata.get('error', False):
+            self.failed_evaluations += 1
+    
     def get_latest_evaluation(self) -> Optional[PhilossOutput]:
         """获取最新的评估结果"""
         return self.evaluation_history[-1] if self.evaluation_history else None
@@ -577,6 +599,9 @@ class PhilossChecker:
     def clear_history(self):
         """清空评估历史"""
         self.evaluation_history.clear()
+        self.novelty_stats.reset()
+        self.analysis_time_stats.reset()
+        self.failed_evaluations = 0
         logger.info("PhilossChecker评估历史已清空")
     
     def is_model_ready(self) -> bool:
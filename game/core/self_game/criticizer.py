@@ -14,7 +14,9 @@ from dataclasses import dataclass
 from ..models.data_models import Agent, Task
 from ..models.config import GameConfig
 from .actor import ActorOutput
+from .critique_planner import CritiquePlanner
 from ..utils.api_pool import get_api_limiter
+from ..utils.running_stats import RunningStats, make_history
 
 logger = logging.getLogger(__name__)
 
@@ -54,8 +56,18 @@ class GameCriticizer:
     def __init__(self, config: GameConfig, naga_conversation=None):
         self.config = config
         self.naga_conversation = naga_conversation
-        self.critique_history: List[CriticOutput] = []
+        # 原始批判只保留最近若干条,统计值按全部批判流式累计
+        self.critique_history = make_history(config.system, "critiques")
+        self.overall_stats = RunningStats()
+        self.satisfaction_stats = RunningStats()
         self.current_iteration = 0
+        self.llm_calls = 0
+        self.planner = CritiquePlanner(
+            self,
+            window=config.self_game.critique_window,
+            pack_size=config.self_game.critique_pack_size,
+            cache_size=config.self_game.critique_cache_size,
+        )
         self._init_naga_api()
 
     def _init_naga_api(self):
@@ -86,39 +98,153 @@ class GameCriticizer:
             )
 
             llm_text = await self._call_llm_for_critique(prompt)
-            overall, response_score, summary, suggestions, dim_scores = self._parse_llm_json(
-                llm_text, has_previous=self.current_iteration >= 2
-            )
-
-            critique = CriticOutput(
-                target_output_id=actor_output.target_output_id,
-                critic_agent_id=critic_agent.agent_id,
-                overall_score=overall,
-                satisfaction_score=response_score,
-                dimension_scores=dim_scores,
-                summary_critique=summary,
-                improvement_suggestions=suggestions,
-                critique_time=time.time() - start_time,
-                iteration=self.current_iteration,
-                metadata={
-                    'target_agent_name': actor_output.metadata.get('agent_name', 'unknown'),
-                    'critic_agent_name': critic_agent.name,
-                    'task_domain': task.domain,
-                    'content_length': len(actor_output.content),
-                },
-            )
-
-            self.critique_history.append(critique)
-            logger.info(
-                f"Criticizer完成批判, 批判分{overall:.3f}, 响应分{response_score:.3f}"
+            parsed = self._parse_llm_json(llm_text, has_previous=self.current_iteration >= 2)
+            return self._record_critique(
+                actor_output, critic_agent, task, parsed, time.time() - start_time, self.current_iteration
             )
-            return critique
 
         except Exception as e:
             logger.error(f"Criticizer批判失败:{e}")
             # 将错误上抛，让引擎感知失败
             raise
 
+    def _record_critique(
+        self,
+        actor_output: ActorOutput,
+        critic_agent: Agent,
+        task: Task,
+        parsed: tuple,
+        critique_time: float,
+        iteration: int,
+    ) -> CriticOutput:
+        overall, response_score, summary, suggestions, dim_scores = parsed
+        critique = CriticOutput(
+            target_output_id=actor_output.target_output_id,
+            critic_agent_id=critic_agent.agent_id,
+            overall_score=overall,
+            satisfaction_score=response_score,
+            dimension_scores=dim_scores,
+            summary_critique=summary,
+            improvement_suggestions=suggestions,
+            critique_time=critique_time,
+            iteration=iteration,
+            metadata={
+                'target_agent_name': actor_output.metadata.get('agent_name', 'unknown'),
+                'critic_agent_name': critic_agent.name,
+                'task_domain': task.domain,
+                'content_length': len(actor_output.content),
+            },
+        )
+
+        self.record_critique(critique)
+        logger.info(
+            f"Criticizer完成批判, 批判分{overall:.3f}, 响应分{response_score:.3f}"
+        )
+        return critique
+
+    def record_critique(self, critique: CriticOutput):
+        """计入批判历史与统计(调度器复用的历史批判也经过这里)"""
+        self.critique_history.append(critique)
+        self.overall_stats.push(critique.overall_score)
+        self.satisfaction_stats.push(critique.satisfaction_score)
+
+    async def critique_outputs(
+        self,
+        actor_outputs: List[ActorOutput],
+        critic_agent: Agent,
+        task: Task,
+        previous_critiques: Optional[List[CriticOutput]] = None,
+    ) -> List[CriticOutput]:
+        """同一批判者一次调用批判多个输出;单个输出时与 critique_output 相同"""
+        if len(actor_outputs) == 1:
+            return [await self.critique_output(actor_outputs[0], critic_agent, task, previous_critiques)]
+
+        start_time = time.time()
+        iterations = []
+        for _ in actor_outputs:
+            self.current_iteration += 1
+            iterations.append(self.current_iteration)
+
+        logger.info(f"Criticizer开始合并批判:{critic_agent.name} 批判 {len(actor_outputs)} 个输出")
+        prompt = self._build_packed_critique_prompt(actor_outputs, critic_agent, task, previous_critiques)
+        try:
+            llm_text = await self._call_llm_for_critique(prompt)
+        except Exception as e:
+            # 合并调用失败不应连累整包,与解析失败一样逐条独立批判
+            logger.warning(f"合并批判调用失败,逐条重试:{e}")
+            llm_text = None
+        items = [None] * len(actor_outputs)
+        if llm_text is not None:
+            try:
+                items = self._parse_packed_json(llm_text, len(actor_outputs), [i >= 2 for i in iterations])
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"合并批判结果解析失败,逐条重试:{e}")
+
+        critique_time = (time.time() - start_time) / len(actor_outputs)
+        critiques: List[CriticOutput] = []
+        last_error: Optional[Exception] = None
+        for actor_output, iteration, parsed in zip(actor_outputs, iterations, items):
+            if parsed is None:
+                # 模型漏掉的条目单独补批;单条失败只丢该条,与逐对批判时一致
+                try:
+                    critiques.append(await self.critique_output(actor_output, critic_agent, task, previous_critiques))
+                except Exception as e:
+                    last_error = e
+                continue
+            critiques.append(self._record_critique(actor_output, critic_agent, task, parsed, critique_time, iteration))
+        if not critiques and last_error is not None:
+            # 整包全部失败时上抛,由调度器计入失败批次
+            raise last_error
+        return critiques
+
+    def _build_packed_critique_prompt(
+        self,
+        actor_outputs: List[ActorOutput],
+        critic_agent: Agent,
+        task: Task,
+        previous_critiques: Optional[List[CriticOutput]] = None,
+    ) -> str:
+        prompt = (
+            "你是一个批判者，负责对执行者的输出进行批判，但是若是没有大问题不强行批判。"
+            "除了你以外还有若干个同类批判者，执行者会对批判者的回复都作出回应，但是你只能看见你自己的上下文。\n"
+            f"本次共有{len(actor_outputs)}条执行者输出，请逐条独立批判，条目之间互不参考。\n"
+        )
+
+        contexts = {output.metadata.get('previous_context', '') for output in actor_outputs}
+        if len(contexts) == 1:
+            prompt += (
+                "以下是执行者除了最新输出外响应的上下文\n"
+                f"{contexts.pop()}\n"
+            )
+
+        prompt += "以下是你此前进行的批判\n"
+        if previous_critiques:
+            last = previous_critiques[-1]
+            prompt += f"上一轮你的批判摘要: {last.summary_critique}\n"
+        else:
+            prompt += "（无历史批判）\n"
+
+        for index, output in enumerate(actor_outputs, 1):
+            prompt += (
+                f"\n### 条目{index}\n"
+                f"被你批判的模型的提示词内容: {output.metadata.get('actor_system_prompt','')}\n"
+            )
+            if len(contexts) > 1:
+                prompt += f"执行者除了最新输出外响应的上下文: {output.metadata.get('previous_context','')}\n"
+            prompt += (
+                "执行者最新输出\n"
+                f"{output.content}\n"
+            )
+
+        prompt += (
+            "\n请仅输出一个严格JSON对象，不要包含任何注释或额外文字。格式为："
+            "{\"items\": [{\"index\": number, \"critique_score\": number, \"response_score\": number (可选), "
+            "\"summary\": string, \"suggestions\": string[]}]}，"
+            f"items 中每个条目对应一条输出，index 为条目编号（1~{len(actor_outputs)}）。"
+        )
+
+        return prompt
+
     def _build_critique_prompt(
         self,
         actor_output: ActorOutput,
@@ -167,16 +293,35 @@ class GameCriticizer:
         if self.naga_conversation is None:
             raise RuntimeError("LLM不可用，无法执行批判")
         limiter = get_api_limiter()
+        self.llm_calls += 1
         return await limiter.call(self.naga_conversation.get_response, prompt, temperature=0.4)
 
-    def _parse_llm_json(self, text: str, has_previous: bool) -> tuple:
+    @staticmethod
+    def _load_json(text: str) -> Any:
         import json, re
         s = text.strip()
         m = re.search(r"```json\s*(\{[\s\S]*?\})\s*```", s)
         if m:
             s = m.group(1)
+        return json.loads(s)
 
-        data = json.loads(s)
+    def _parse_llm_json(self, text: str, has_previous: bool) -> tuple:
+        return self._parse_critique(self._load_json(text), has_previous)
+
+    def _parse_packed_json(self, text: str, count: int, has_previous: List[bool]) -> List[Optional[tuple]]:
+        """解析多条目批判结果,缺失的条目为None"""
+        data = self._load_json(text)
+        items = data.get('items') if isinstance(data, dict) else data
+        parsed: List[Optional[tuple]] = [None] * count
+        for position, item in enumerate(items or []):
+            if not isinstance(item, dict):
+                continue
+            index = int(item.get('index', position + 1)) - 1
+            if 0 <= index < count and parsed[index] is None:
+                parsed[index] = self._parse_critique(item, has_previous[index])
+        return parsed
+
+    def _parse_critique(self, data: Dict[str, Any], has_previous: bool) -> tuple:
         critique_score = float(max(0.0, min(1.0, data.get('critique_score', 0.5))))
         response_score = float(max(0.0, min(1.0, data.get('response_score', critique_score)))) if has_previous else critique_score
         summary = str(data.get('summary', ''))
@@ -193,39 +338,25 @@ class GameCriticizer:
         logger.info(
             f"开始批量批判,输出数量:{len(actor_outputs)},批判者数量:{len(critic_agents)}"
         )
-        critique_tasks = []
+        pairs = []
         for actor_output in actor_outputs:
             for critic_agent in critic_agents:
                 if actor_output.agent_id != critic_agent.agent_id:
-                    critique_tasks.append(
-                        self.critique_output(actor_output, critic_agent, task)
-                    )
-
-        results = await asyncio.gather(*critique_tasks, return_exceptions=True)
-        valid: List[CriticOutput] = []
-        for r in results:
-            if isinstance(r, Exception):
-                logger.error(f"批判任务失败:{r}")
-            else:
-                valid.append(r)
-        logger.info(f"批量批判完成,成功:{len(valid)}/{len(critique_tasks)}")
+                    pairs.append((actor_output, critic_agent))
+
+        # 由调度器限制在途调用、按批判者合并并复用内容未变的历史批判
+        valid = await self.planner.run(pairs, task)
+        logger.info(f"批量批判完成,成功:{len(valid)}/{len(pairs)}")
         return valid
 
     def get_critique_statistics(self) -> Dict[str, Any]:
-        if not self.critique_history:
-            return {
-                'total_critiques': 0,
-                'average_overall_score': 0.0,
-                'average_satisfaction_score': 0.0,
-                'current_iteration': self.current_iteration,
-                'api_available': self.naga_conversation is not None,
-            }
-        total_overall = sum(c.overall_score for c in self.critique_history)
-        total_satisfaction = sum(c.satisfaction_score for c in self.critique_history)
         return {
-            'total_critiques': len(self.critique_history),
-            'average_overall_score': total_overall / len(self.critique_history),
-            'average_satisfaction_score': total_satisfaction / len(self.critique_history),
+            'total_critiques': self.overall_stats.count,
+            'average_overall_score': self.overall_stats.mean,
+            'average_satisfaction_score': self.satisfaction_stats.mean,
+            'overall_score_std': self.overall_stats.std,
+            'satisfaction_score_std': self.satisfaction_stats.std,
+            'retained_critiques': len(self.critique_history),
             'current_iteration': self.current_iteration,
             'api_available': self.naga_conversation is not None,
         }
@@ -235,6 +366,9 @@ class GameCriticizer:
 
     def clear_history(self):
         self.critique_history.clear()
+        self.overall_stats.reset()
+        self.satisfaction_stats.reset()
         self.current_iteration = 0
+        self.planner.clear()
         logger.info("Criticizer批判历史已清空") 
  
\ No newline at end of file
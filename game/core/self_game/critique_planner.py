@@ -0,0 +1,173 @@
+"""
+CritiquePlanner - 批判阶段调度器
+
+把 (Actor输出 × 批判者) 的批判请求整理为有界、可合并的LLM调用:
+- 同一批判者的多个输出打包进一次多条目批判提示词
+- 在途调用数受并发窗口限制,而不是一次性 gather 全部请求
+- 输出内容哈希与此前轮次相同的 (批判者, 输出) 直接复用历史批判,不再调用LLM
+- 以异步生成器逐个产出批判结果,下游(评估阶段)可边批判边处理
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from ..models.data_models import Agent, Task
+from .actor import ActorOutput
+
+if TYPE_CHECKING:
+    from .criticizer import CriticOutput
+
+logger = logging.getLogger(__name__)
+
+CritiquePair = Tuple[ActorOutput, Agent]
+
+
+def output_hash(actor_output: ActorOutput) -> str:
+    """Actor输出内容的哈希(与轮次、分支无关)"""
+    return hashlib.blake2b(actor_output.content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CritiquePlanner:
+    """有界、合并的批判调度器
+
+    Args:
+        criticizer: GameCriticizer 实例,负责提示词构建与结果解析
+        window: 同时在途的批判调用数
+        pack_size: 每次调用最多打包的输出数
+        cache_size: 内容哈希复用缓存的条目上限
+    """
+
+    def __init__(self, criticizer, window: int = 4, pack_size: int = 4, cache_size: int = 1024):
+        self.criticizer = criticizer
+        self.window = max(1, int(window))
+        self.pack_size = max(1, int(pack_size))
+        self.cache_size = max(0, int(cache_size))
+        # (task_id, critic_agent_id, 内容哈希) -> 历史批判
+        self._cache: "OrderedDict[Tuple[str, str, str], CriticOutput]" = OrderedDict()
+        self.planned_pairs = 0
+        self.reused = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    def _cache_key(self, task: Task, actor_output: ActorOutput, critic_agent: Agent) -> Tuple[str, str, str]:
+        return (getattr(task, "task_id", ""), critic_agent.agent_id, output_hash(actor_output))
+
+    def _remember(self, task: Task, pairs: Sequence[CritiquePair], critiques: List["CriticOutput"]):
+        if not self.cache_size:
+            return
+        by_target = {c.target_output_id: c for c in critiques}
+        for actor_output, critic_agent in pairs:
+            critique = by_target.get(actor_output.target_output_id)
+            if critique is None or actor_output.metadata.get("error"):
+                continue
+            key = self._cache_key(task, actor_output, critic_agent)
+            self._cache[key] = critique
+            self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _reuse(self, cached: "CriticOutput", actor_output: ActorOutput) -> "CriticOutput":
+        """把历史批判挂到内容相同的新输出上"""
+        metadata = dict(cached.metadata)
+        metadata["reused_from"] = cached.target_output_id
+        return dataclasses.replace(
+            cached,
+            target_output_id=actor_output.target_output_id,
+            improvement_suggestions=list(cached.improvement_suggestions),
+            critique_time=0.0,
+            metadata=metadata,
+        )
+
+    def plan(self, pairs: Sequence[CritiquePair], task: Task) -> Tuple[List["CriticOutput"], List[List[CritiquePair]]]:
+        """拆分为可复用的历史批判与按批判者打包的调用批次"""
+        reused: List["CriticOutput"] = []
+        by_critic: "OrderedDict[str, List[CritiquePair]]" = OrderedDict()
+        for actor_output, critic_agent in pairs:
+            key = self._cache_key(task, actor_output, critic_agent)
+            cached = self._cache.get(key)
+            if cached is not None and not actor_output.metadata.get("error"):
+                self._cache.move_to_end(key)
+                reused.append(self._reuse(cached, actor_output))
+                continue
+            by_critic.setdefault(critic_agent.agent_id, []).append((actor_output, critic_agent))
+
+        batches: List[List[CritiquePair]] = []
+        for critic_pairs in by_critic.values():
+            for i in range(0, len(critic_pairs), self.pack_size):
+                batches.append(critic_pairs[i:i + self.pack_size])
+        return reused, batches
+
+    async def stream(
+        self,
+        pairs: Sequence[CritiquePair],
+        task: Task,
+        previous_critiques: Optional[List["CriticOutput"]] = None,
+    ) -> AsyncIterator["CriticOutput"]:
+        """按完成顺序逐个产出批判结果;失败的批次记录日志后跳过"""
+        reused, batches = self.plan(pairs, task)
+        self.planned_pairs += len(pairs)
+        self.reused += len(reused)
+        self.batches += len(batches)
+        logger.debug(f"批判计划: {len(pairs)} 对, 复用 {len(reused)}, 调用批次 {len(batches)}")
+
+        for critique in reused:
+            self.criticizer.record_critique(critique)
+            yield critique
+        if not batches:
+            return
+
+        semaphore = asyncio.Semaphore(self.window)
+
+        async def run_batch(batch: List[CritiquePair]) -> List["CriticOutput"]:
+            async with semaphore:
+                critiques = await self.criticizer.critique_outputs(
+                    [actor_output for actor_output, _ in batch], batch[0][1], task, previous_critiques
+                )
+            self._remember(task, batch, critiques)
+            return critiques
+
+        tasks = [asyncio.ensure_future(run_batch(batch)) for batch in batches]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    critiques = await finished
+                except Exception as e:
+                    self.failed_batches += 1
+                    logger.error(f"批判任务失败:{e}")
+                    continue
+                for critique in critiques:
+                    yield critique
+        finally:
+            for pending in tasks:
+                if not pending.done():
+                    pending.cancel()
+
+    async def run(
+        self,
+        pairs: Sequence[CritiquePair],
+        task: Task,
+        previous_critiques: Optional[List["CriticOutput"]] = None,
+    ) -> List["CriticOutput"]:
+        """执行全部批判,结果按输入顺序排列"""
+        order = {(a.target_output_id, c.agent_id): i for i, (a, c) in enumerate(pairs)}
+        results = [critique async for critique in self.stream(pairs, task, previous_critiques)]
+        results.sort(key=lambda c: order.get((c.target_output_id, c.critic_agent_id), len(order)))
+        return results
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "planned_pairs": self.planned_pairs,
+            "reused": self.reused,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "cached": len(self._cache),
+            "window": self.window,
+            "pack_size": self.pack_size,
+        }
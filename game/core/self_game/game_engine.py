@@ -17,6 +17,7 @@ from ..models.config import GameConfig
 from .actor import GameActor, ActorOutput
 from .criticizer import GameCriticizer, CriticOutput
 from .checker.philoss_checker import PhilossChecker, PhilossOutput
+from ..utils.running_stats import RunningStats, make_history
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,19 @@ class GameSession:
     metadata: Dict[str, Any]
 
 
+def _session_summary(session: GameSession) -> Dict[str, Any]:
+    """溢出到JSONL的会话摘要"""
+    return {
+        'session_id': session.session_id,
+        'task_id': getattr(session.task, 'task_id', ''),
+        'status': session.status,
+        'rounds': len(session.rounds),
+        'total_time': session.total_time,
+        'success': bool(session.final_result and session.final_result.success),
+        'metadata': session.metadata,
+    }
+
+
 class GameEngine:
     """自博弈引擎 - 协调Actor/Criticizer/Checker三组件"""
     
@@ -72,8 +86,12 @@ class GameEngine:
         self.criticizer = GameCriticizer(config, naga_conversation)
         self.philoss_checker = PhilossChecker(config)
         
-        self.sessions: List[GameSession] = []
+        # 会话只保留最近若干个,统计值按全部会话流式累计
+        self.sessions = make_history(config.system, "sessions", _session_summary)
         self.current_session: Optional[GameSession] = None
+        self.session_round_stats = RunningStats()
+        self.session_time_stats = RunningStats()
+        self.successful_sessions = 0
     
     async def start_game_session(self, 
                                 task: Task, 
@@ -147,7 +165,7 @@ class GameEngine:
             session.total_time = time.time() - start_time
             
             # 记录会话
-            self.sessions.append(session)
+            self._record_session(session)
             
             logger.info(f"自博弈会话完成:{session_id},总轮数:{len(session.rounds)}")
             return session
@@ -158,7 +176,7 @@ class GameEngine:
             session.total_time = time.time() - start_time
             session.metadata['error'] = str(e)
             
-            self.sessions.append(session)
+            self._record_session(session)
             return session
     
     async def _execute_game_round(self, 
@@ -175,13 +193,13 @@ class GameEngine:
             logger.debug(f"第{round_number}轮 - 生成阶段")
             actor_outputs = await self._generation_phase(agents, task, context, previous_rounds)
             
-            # 阶段2:批判阶段 (Criticizer)
-            logger.debug(f"第{round_number}轮 - 批判阶段")
-            critic_outputs = await self._critique_phase(actor_outputs, agents, task, previous_rounds)
-            
-            # 阶段3:评估阶段 (PhilossChecker)
-            logger.debug(f"第{round_number}轮 - 评估阶段")
-            philoss_outputs = await self._evaluation_phase(actor_outputs, previous_rounds)
+            # 阶段2+3:批判阶段 (Criticizer) 与评估阶段 (PhilossChecker) 流水执行
+            logger.debug(f"第{round_number}轮 - 批判/评估阶段")
+            llm_calls_before = self.criticizer.llm_calls
+            reused_before = self.criticizer.planner.reused
+            critic_outputs, philoss_outputs = await self._critique_and_evaluation_phase(
+                actor_outputs, agents, task, previous_rounds
+            )
             
             # 严格校验：任一阶段无有效结果则本轮失败
             if not actor_outputs:
@@ -191,6 +209,11 @@ class GameEngine:
             if not philoss_outputs:
                 raise RuntimeError("评估阶段无有效输出")
 
+            # 本轮分数的流式统计(均值/方差),会话级指标与收敛判断直接使用
+            critical_stats = RunningStats.of(c.overall_score for c in critic_outputs)
+            satisfaction_stats = RunningStats.of(c.satisfaction_score for c in critic_outputs)
+            novelty_stats = RunningStats.of(p.novelty_score for p in philoss_outputs)
+            
             # 创建轮次结果
             game_round = GameRound(
                 round_number=round_number,
@@ -204,9 +227,14 @@ class GameEngine:
                     'generation_count': len(actor_outputs),
                     'critique_count': len(critic_outputs),
                     'evaluation_count': len(philoss_outputs),
-                    'average_critical_score': self._calculate_average_critical_score(critic_outputs),
-                    'average_novelty_score': self._calculate_average_novelty_score(philoss_outputs),
-                    'average_satisfaction_score': (sum(c.satisfaction_score for c in critic_outputs)/len(critic_outputs)) if critic_outputs else 0.0,
+                    'average_critical_score': critical_stats.mean,
+                    'average_novelty_score': novelty_stats.mean,
+                    'average_satisfaction_score': satisfaction_stats.mean,
+                    'critical_score_stats': critical_stats.to_dict(),
+                    'satisfaction_score_stats': satisfaction_stats.to_dict(),
+                    'novelty_score_stats': novelty_stats.to_dict(),
+                    'critique_llm_calls': self.criticizer.llm_calls - llm_calls_before,
+                    'critique_reused': self.criticizer.planner.reused - reused_before,
                     'context_length': len(context) if context else 0
                 }
             )
@@ -303,32 +331,10 @@ class GameEngine:
                 logger.warning("没有Actor输出可供批判")
                 return []
             
-            # 准备历史批判作为参考
-            previous_critiques = []
-            if previous_rounds:
-                for round_data in previous_rounds[-1:]:  # 最近1轮
-                    previous_critiques.extend(round_data.critic_outputs)
-            
-            # 为每个Actor输出分配批判者（避免同一agent自评）
-            critique_tasks = []
-            for actor_output in actor_outputs:
-                for critic_agent in agents:
-                    if actor_output.agent_id != critic_agent.agent_id:
-                        task_coroutine = self.criticizer.critique_output(
-                            actor_output, critic_agent, task, previous_critiques
-                        )
-                        critique_tasks.append(task_coroutine)
-                        break  # 每个输出只分配一个批判者
-            
-            critic_outputs = await asyncio.gather(*critique_tasks, return_exceptions=True)
-            
-            # 处理结果
-            valid_critiques = []
-            for output in critic_outputs:
-                if isinstance(output, Exception):
-                    logger.error(f"批判任务失败:{output}")
-                    continue
-                valid_critiques.append(output)
+            pairs = self._assign_critics(actor_outputs, agents)
+            valid_critiques = await self.criticizer.planner.run(
+                pairs, task, self._previous_critiques(previous_rounds)
+            )
             
             logger.debug(f"批判阶段完成:{len(valid_critiques)}个批判结果")
             return valid_critiques
@@ -337,6 +343,75 @@ class GameEngine:
             logger.error(f"批判阶段失败:{e}")
             return []
     
+    def _previous_critiques(self, previous_rounds: List[GameRound]) -> List[CriticOutput]:
+        """准备历史批判作为参考（最近1轮）"""
+        previous_critiques = []
+        for round_data in previous_rounds[-1:]:
+            previous_critiques.extend(round_data.critic_outputs)
+        return previous_critiques
+    
+    def _assign_critics(self, actor_outputs: List[ActorOutput], agents: List[Agent]) -> List[Tuple[ActorOutput, Agent]]:
+        """为每个Actor输出分配批判者（避免同一agent自评，每个输出只分配一个批判者）"""
+        pairs = []
+        for actor_output in actor_outputs:
+            for critic_agent in agents:
+                if actor_output.agent_id != critic_agent.agent_id:
+                    pairs.append((actor_output, critic_agent))
+                    break
+        return pairs
+    
+    async def _critique_and_evaluation_phase(self,
+                                            actor_outputs: List[ActorOutput],
+                                            agents: List[Agent],
+                                            task: Task,
+                                            previous_rounds: List[GameRound]) -> Tuple[List[CriticOutput], List[PhilossOutput]]:
+        """批判与评估阶段 - 每条批判完成即开始对应输出的创新性评估，不等待整个批判阶段"""
+        if not actor_outputs:
+            logger.warning("没有Actor输出可供批判")
+            return [], []
+        
+        outputs_by_id = {output.target_output_id: output for output in actor_outputs}
+        evaluations: Dict[str, asyncio.Task] = {}
+        
+        def start_evaluation(target_output_id: str):
+            if target_output_id in evaluations or target_output_id not in outputs_by_id:
+                return
+            output = outputs_by_id[target_output_id]
+            evaluations[target_output_id] = asyncio.ensure_future(
+                self.philoss_checker.evaluate_novelty(output.content, target_output_id)
+            )
+        
+        critic_outputs: List[CriticOutput] = []
+        try:
+            pairs = self._assign_critics(actor_outputs, agents)
+            async for critique in self.criticizer.planner.stream(
+                pairs, task, self._previous_critiques(previous_rounds)
+            ):
+                critic_outputs.append(critique)
+                start_evaluation(critique.target_output_id)
+        except Exception as e:
+            logger.error(f"批判阶段失败:{e}")
+        
+        # 没有拿到批判的输出（批判失败）同样需要评估
+        for output in actor_outputs:
+            start_evaluation(output.target_output_id)
+        
+        philoss_outputs: List[PhilossOutput] = []
+        for output in actor_outputs:
+            try:
+                philoss_outputs.append(await evaluations[output.target_output_id])
+            except Exception as e:
+                logger.error(f"内容{output.target_output_id}评估失败:{e}")
+                # 与 batch_evaluate 一致:失败的输出使用默认评估,保证每个输出都有一条评估
+                philoss_outputs.append(self.philoss_checker._get_default_evaluation(
+                    output.target_output_id, output.content, time.time()
+                ))
+        
+        order = {output.target_output_id: i for i, output in enumerate(actor_outputs)}
+        critic_outputs.sort(key=lambda c: order.get(c.target_output_id, len(order)))
+        logger.debug(f"批判/评估阶段完成:{len(critic_outputs)}个批判结果, {len(philoss_outputs)}个创新性评估")
+        return critic_outputs, philoss_outputs
+    
     async def _evaluation_phase(self, 
                                actor_outputs: List[ActorOutput],
                                previous_rounds: List[GameRound]) -> List[PhilossOutput]:
@@ -406,15 +481,15 @@ class GameEngine:
             if len(recent_rounds) < 2:
                 return 0.0
             
-            # 比较最近两轮的Critical Score
-            prev_scores = [c.overall_score for c in recent_rounds[-2].critic_outputs]
-            curr_scores = [c.overall_score for c in recent_rounds[-1].critic_outputs]
+            # 比较最近两轮的Critical Score(使用轮次结束时已累计的统计)
+            prev_stats = self._round_stats(recent_rounds[-2], 'critical_score_stats')
+            curr_stats = self._round_stats(recent_rounds[-1], 'critical_score_stats')
             
-            if not prev_scores or not curr_scores:
+            if not prev_stats.count or not curr_stats.count:
                 return 0.0
             
-            prev_avg = sum(prev_scores) / len(prev_scores)
-            curr_avg = sum(curr_scores) / len(curr_scores)
+            prev_avg = prev_stats.mean
+            curr_avg = curr_stats.mean
             
             # 计算改进程度（越小说明越收敛）
             improvement = abs(curr_avg - prev_avg)
@@ -426,17 +501,24 @@ class GameEngine:
             logger.error(f"收敛性检查失败:{e}")
             return 0.0
     
+    def _round_stats(self, game_round: GameRound, key: str) -> RunningStats:
+        """读取轮次的分数统计;旧轮次(无统计字段)按输出现算"""
+        data = game_round.metadata.get(key)
+        if data is not None:
+            return RunningStats.from_dict(data)
+        if key == 'critical_score_stats':
+            return RunningStats.of(c.overall_score for c in game_round.critic_outputs)
+        if key == 'satisfaction_score_stats':
+            return RunningStats.of(c.satisfaction_score for c in game_round.critic_outputs)
+        return RunningStats.of(p.novelty_score for p in game_round.philoss_outputs)
+    
     def _calculate_average_critical_score(self, critic_outputs: List[CriticOutput]) -> float:
         """计算平均批判评分"""
-        if not critic_outputs:
-            return 0.0
-        return sum(c.overall_score for c in critic_outputs) / len(critic_outputs)
+        return RunningStats.of(c.overall_score for c in critic_outputs).mean
     
     def _calculate_average_novelty_score(self, philoss_outputs: List[PhilossOutput]) -> float:
         """计算平均创新性评分"""
-        if not philoss_outputs:
-            return 0.0
-        return sum(p.novelty_score for p in philoss_outputs) / len(philoss_outputs)
+        return RunningStats.of(p.novelty_score for p in philoss_outputs).mean
     
     def _prepare_next_round_context(self, rounds: List[GameRound]) -> str:
         """为下一轮准备上下文信息"""
@@ -559,33 +641,35 @@ class GameEngine:
             return {}
         
         try:
-            # 收集所有轮次的评分
-            critical_scores = []
-            novelty_scores = []
-            satisfaction_scores = []
-            
+            # 合并各轮次的分数统计
+            critical = RunningStats()
+            novelty = RunningStats()
+            satisfaction = RunningStats()
             for round_data in rounds:
-                critical_scores.extend([c.overall_score for c in round_data.critic_outputs])
-                novelty_scores.extend([p.novelty_score for p in round_data.philoss_outputs])
-                satisfaction_scores.extend([c.satisfaction_score for c in round_data.critic_outputs])
+                critical.merge(self._round_stats(round_data, 'critical_score_stats'))
+                novelty.merge(self._round_stats(round_data, 'novelty_score_stats'))
+                satisfaction.merge(self._round_stats(round_data, 'satisfaction_score_stats'))
+            
+            critiqued = [r for r in rounds if r.critic_outputs]
+            evaluated = [r for r in rounds if r.philoss_outputs]
             
             metrics = {
                 'total_rounds': len(rounds),
-                'final_critical_score': critical_scores[-1] if critical_scores else 0,
-                'final_novelty_score': novelty_scores[-1] if novelty_scores else 0,
-                'average_critical_score': sum(critical_scores) / len(critical_scores) if critical_scores else 0,
-                'average_novelty_score': sum(novelty_scores) / len(novelty_scores) if novelty_scores else 0,
-                'average_satisfaction_score': sum(satisfaction_scores) / len(satisfaction_scores) if satisfaction_scores else 0,
-                'max_critical_score': max(critical_scores) if critical_scores else 0,
-                'max_novelty_score': max(novelty_scores) if novelty_scores else 0,
+                'final_critical_score': critiqued[-1].critic_outputs[-1].overall_score if critiqued else 0,
+                'final_novelty_score': evaluated[-1].philoss_outputs[-1].novelty_score if evaluated else 0,
+                'average_critical_score': critical.mean if critical.count else 0,
+                'average_novelty_score': novelty.mean if novelty.count else 0,
+                'average_satisfaction_score': satisfaction.mean if satisfaction.count else 0,
+                'max_critical_score': critical.max if critical.count else 0,
+                'max_novelty_score': novelty.max if novelty.count else 0,
                 'score_improvement': 0,
                 'convergence_achieved': False
             }
             
             # 计算改进程度
-            if len(critical_scores) >= 2:
-                initial_score = critical_scores[0]
-                final_score = critical_scores[-1]
+            if critical.count >= 2:
+                initial_score = critiqued[0].critic_outputs[0].overall_score
+                final_score = critiqued[-1].critic_outputs[-1].overall_score
                 metrics['score_improvement'] = final_score - initial_score
             
             # 检查收敛
@@ -601,7 +685,8 @@ class GameEngine:
     
     def get_session_statistics(self) -> Dict[str, Any]:
         """获取会话统计信息"""
-        if not self.sessions:
+        total_sessions = self.session_time_stats.count
+        if not total_sessions:
             return {
                 'total_sessions': 0,
                 'successful_sessions': 0,
@@ -609,21 +694,25 @@ class GameEngine:
                 'average_session_time': 0
             }
         
-        successful_sessions = [s for s in self.sessions if s.final_result and s.final_result.success]
-        total_rounds = sum(len(s.rounds) for s in self.sessions)
-        total_time = sum(s.total_time for s in self.sessions)
-        
         return {
-            'total_sessions': len(self.sessions),
-            'successful_sessions': len(successful_sessions),
-            'failed_sessions': len(self.sessions) - len(successful_sessions),
-            'success_rate': len(successful_sessions) / len(self.sessions) * 100,
-            'average_rounds': total_rounds / len(self.sessions),
-            'average_session_time': total_time / len(self.sessions),
-            'total_game_time': total_time,
+            'total_sessions': total_sessions,
+            'successful_sessions': self.successful_sessions,
+            'failed_sessions': total_sessions - self.successful_sessions,
+            'success_rate': self.successful_sessions / total_sessions * 100,
+            'average_rounds': self.session_round_stats.mean,
+            'average_session_time': self.session_time_stats.mean,
+            'total_game_time': self.session_time_stats.total,
             'philoss_model_ready': self.philoss_checker.is_model_ready()
         }
     
+    def _record_session(self, session: GameSession):
+        """记录会话并更新流式统计"""
+        self.sessions.append(session)
+        self.session_round_stats.push(len(session.rounds))
+        self.session_time_stats.push(session.total_time)
+        if session.final_result and session.final_result.success:
+            self.successful_sessions += 1
+    
     def get_latest_session(self) -> Optional[GameSession]:
         """获取最新的博弈会话"""
         return self.sessions[-1] if self.sessions else None
@@ -632,6 +721,9 @@ class GameEngine:
         """清空所有历史数据"""
         self.sessions.clear()
         self.current_session = None
+        self.session_round_stats.reset()
+        self.session_time_stats.reset()
+        self.successful_sessions = 0
         self.actor.clear_history()
         self.criticizer.clear_history()
         self.philoss_checker.clear_history()
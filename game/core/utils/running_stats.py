@@ -0,0 +1,183 @@
+"""
+流式统计工具 - 长时间运行的博弈会话中保持统计调用O(1)、内存恒定
+
+- RunningStats: Welford 算法的均值/方差/极值,可合并(Chan并行公式)并序列化为字典
+- BoundedHistory: 只保留最近N条原始记录的环形缓冲,被挤出的记录可追加写入JSONL文件
+"""
+
+import json
+import logging
+import math
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RunningStats:
+    """Welford 流式均值与方差"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "RunningStats":
+        stats = cls()
+        for value in values:
+            stats.push(value)
+        return stats
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls()
+        stats.count = int(data.get("count", 0))
+        stats.mean = float(data.get("mean", 0.0))
+        stats.m2 = float(data.get("m2", 0.0))
+        if stats.count:
+            stats.min = float(data.get("min", stats.mean))
+            stats.max = float(data.get("max", stats.mean))
+        return stats
+
+    def push(self, value: float):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """合并另一组统计(结果与把两组数据依次push相同)"""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """总体方差"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def sample_variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def total(self) -> float:
+        return self.mean * self.count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+
+    def reset(self):
+        self.__init__()
+
+
+class BoundedHistory:
+    """保留最近 maxlen 条记录的历史列表
+
+    支持 append / len / 迭代 / 下标 / 真值判断 / clear,可直接替换原来的 list 历史。
+    设置 spill_path 后,被挤出的记录经 serializer 转为字典追加写入JSONL文件。
+
+    Args:
+        maxlen: 内存中保留的条数
+        spill_path: 溢出文件路径,为空则直接丢弃
+        serializer: 记录 -> 可JSON序列化对象,默认调用记录的 to_dict()
+    """
+
+    def __init__(self, maxlen: int = 1000, spill_path: Optional[str] = None,
+                 serializer: Optional[Callable[[Any], Any]] = None):
+        self._items: Deque[Any] = deque(maxlen=max(1, int(maxlen)))
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.serializer = serializer or (lambda item: item.to_dict() if hasattr(item, "to_dict") else item)
+        self.total = 0  # 累计追加的条数(含已挤出的)
+        self.spilled = 0
+        self._spill_file = None
+        self._lock = threading.Lock()
+
+    @property
+    def maxlen(self) -> int:
+        return self._items.maxlen
+
+    def append(self, item: Any):
+        with self._lock:
+            if len(self._items) == self._items.maxlen and self.spill_path is not None:
+                self._spill(self._items[0])
+            self._items.append(item)
+            self.total += 1
+
+    def _spill(self, item: Any):
+        try:
+            if self._spill_file is None:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                # 行缓冲：每条记录写完即落盘,进程退出不丢已挤出的记录
+                self._spill_file = open(self.spill_path, "a", encoding="utf-8", buffering=1)
+            self._spill_file.write(json.dumps(self.serializer(item), ensure_ascii=False, default=str) + "\n")
+            self.spilled += 1
+        except Exception as e:
+            logger.warning(f"历史记录溢出写入失败: {e}")
+
+    def close(self):
+        """关闭溢出文件"""
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self._items))
+
+    def __getitem__(self, index: int) -> Any:
+        return self._items[index]
+
+
+def make_history(system_config, name: str, serializer: Optional[Callable[[Any], Any]] = None) -> BoundedHistory:
+    """按 SystemConfig 的 history_limit / history_spill_dir 创建历史缓冲,溢出文件为 <目录>/<name>.jsonl"""
+    spill_dir = getattr(system_config, "history_spill_dir", "")
+    return BoundedHistory(
+        getattr(system_config, "history_limit", 1000),
+        str(Path(spill_dir) / f"{name}.jsonl") if spill_dir else None,
+        serializer,
+    )
@@ -45,9 +45,6 @@ LOCAL_PKG_DIR = os.path.join(REPO_ROOT, "nagaagent-core")  # 统一入口 #
 if LOCAL_PKG_DIR not in sys.path:
     sys.path.insert(0, LOCAL_PKG_DIR)  # 优先使用本地包 #
 
-from nagaagent_core.vendors.PyQt5.QtGui import QIcon  # 统一入口 #
-from nagaagent_core.vendors.PyQt5.QtWidgets import QApplication  # 统一入口 #
-
 # 本地模块导入
 from system.system_checker import run_system_check, run_quick_check
 from system.config import config, AI_NAME
@@ -55,10 +52,7 @@ from system.config import config, AI_NAME
 # V14版本已移除早期拦截器，采用运行时猴子补丁
 
 # conversation_core已删除，相关功能已迁移到apiserver
-from summer_memory.memory_manager import memory_manager
-from summer_memory.task_manager import start_task_manager, task_manager
-from ui.pyqt_chat_window import ChatWindow
-from ui.tray.console_tray import integrate_console_tray
+# PyQt5、记忆系统、聊天窗口等重量级模块在首次使用时才导入，环境检测失败时不必加载
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -114,6 +108,8 @@ class ServiceManager:
             # 任务管理器由memory_manager自动启动，无需手动启动
             # await start_task_manager()
             
+            from summer_memory.task_manager import task_manager
+
             # 标记服务就绪
             self._services_ready = True
             logger.info(f"任务管理器状态: running={task_manager.is_running}")
@@ -445,6 +441,7 @@ class ServiceManager:
     def _init_memory_system(self):
         """初始化记忆系统"""
         try:
+            from summer_memory.memory_manager import memory_manager
             if memory_manager and memory_manager.enabled:
                 logger.info("夏园记忆系统已初始化")
             else:
@@ -540,6 +537,7 @@ def _lazy_init_services():
         #何意味？注释了 by Null
         
         # 显示系统状态
+        from summer_memory.memory_manager import memory_manager
         print("=" * 30)
         print(f"GRAG状态: {'启用' if memory_manager.enabled else '禁用'}")
         if memory_manager.enabled:
@@ -614,6 +612,11 @@ if __name__ == "__main__":
     if not asyncio.get_event_loop().is_running():
         asyncio.set_event_loop(asyncio.new_event_loop())
     
+    from nagaagent_core.vendors.PyQt5.QtGui import QIcon  # 统一入口 #
+    from nagaagent_core.vendors.PyQt5.QtWidgets import QApplication  # 统一入口 #
+    from ui.pyqt_chat_window import ChatWindow
+    from ui.tray.console_tray import integrate_console_tray
+
     # 快速启动UI，后台服务延迟初始化
     app = QApplication(sys.argv)
     icon_path = os.path.join(os.path.dirname(__file__), "ui", "img/window_icon.png")
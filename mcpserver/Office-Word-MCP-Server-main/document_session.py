@@ -0,0 +1,209 @@
+"""
+文档会话缓存 - 已打开的Word文档常驻内存，编辑直接作用在缓存对象上，按需一次性落盘
+
+- 以绝对路径为键的LRU，记录解析时文件的mtime/大小；文件被外部修改且本地没有未保存编辑时重新解析
+- 编辑只标记为脏，在显式提交、空闲超时或被LRU淘汰时保存一次
+- 保存先写同目录临时文件再原子替换，中途失败不会留下半个文档
+"""
+
+import os
+import sys
+import atexit
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from docx import Document
+
+
+class _Session:
+    """一个已解析的文档"""
+    __slots__ = ("doc", "signature", "dirty", "last_edit")
+
+    def __init__(self, doc, signature):
+        self.doc = doc
+        self.signature = signature  # (mtime_ns, size)，用于发现外部修改
+        self.dirty = False
+        self.last_edit = 0.0
+
+
+def _file_signature(path: str):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class DocumentSessionCache:
+    """Word文档会话缓存
+
+    Args:
+        max_open: 最多同时缓存的文档数
+        idle_flush: 最后一次编辑后多少秒自动保存，0表示只在提交/淘汰时保存
+    """
+
+    def __init__(self, max_open: int = 8, idle_flush: float = 2.0):
+        self.max_open = max(1, max_open)
+        self.idle_flush = idle_flush
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.parse_count = 0  # 解析次数
+        self.save_count = 0  # 落盘次数
+        self.bytes_written = 0  # 落盘字节数
+        atexit.register(self.commit_all)
+
+    # ---------- 打开 ----------
+
+    def _open(self, path: str) -> _Session:
+        path = os.path.abspath(path)
+        session = self._sessions.get(path)
+        if session is not None:
+            self._sessions.move_to_end(path)
+            if session.dirty or not os.path.exists(path):
+                return session
+            if _file_signature(path) == session.signature:
+                return session
+            # 文件在外部被修改过，丢弃旧解析
+            del self._sessions[path]
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"文档 '{path}' 不存在")
+        signature = _file_signature(path)
+        session = _Session(Document(path), signature)
+        self.parse_count += 1
+        self._sessions[path] = session
+        self._evict()
+        return session
+
+    def _evict(self):
+        while len(self._sessions) > self.max_open:
+            path, session = self._sessions.popitem(last=False)
+            if session.dirty:
+                self._save(path, session)
+
+    def read(self, path: str):
+        """只读访问：返回缓存的解析结果（调用方不得修改）"""
+        with self._lock:
+            return self._open(path).doc
+
+    @contextmanager
+    def edit(self, path: str):
+        """编辑访问：持锁期间修改缓存的文档对象，退出时标记为待保存"""
+        with self._lock:
+            session = self._open(path)
+            try:
+                yield session.doc
+            finally:
+                session.dirty = True
+                session.last_edit = time.monotonic()
+                self._schedule_flush()
+
+    def create(self, path: str, doc):
+        """保存新建的文档并登记到缓存（同名文档未保存的编辑被丢弃）"""
+        path = os.path.abspath(path)
+        with self._lock:
+            session = _Session(doc, None)
+            self._save(path, session)
+            self._sessions[path] = session
+            self._sessions.move_to_end(path)
+            self._evict()
+
+    def is_dirty(self, path: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(os.path.abspath(path))
+            return bool(session and session.dirty)
+
+    # ---------- 保存 ----------
+
+    def _save(self, path: str, session: _Session):
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=".~", suffix=".docx.tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                session.doc.save(f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        session.dirty = False
+        session.signature = _file_signature(path)
+        self.save_count += 1
+        self.bytes_written += size
+
+    def commit(self, path: str) -> bool:
+        """保存指定文档的未保存编辑，返回是否发生了写入"""
+        path = os.path.abspath(path)
+        with self._lock:
+            session = self._sessions.get(path)
+            if session is None or not session.dirty:
+                return False
+            self._save(path, session)
+            return True
+
+    def commit_all(self) -> List[str]:
+        """保存所有未保存的文档，返回写入的路径"""
+        saved = []
+        with self._lock:
+            for path, session in list(self._sessions.items()):
+                if session.dirty:
+                    try:
+                        self._save(path, session)
+                        saved.append(path)
+                    except Exception as e:
+                        sys.stderr.write(f"保存文档失败 {path}: {e}\n")
+        return saved
+
+    def close(self, path: str):
+        """保存并移出缓存"""
+        path = os.path.abspath(path)
+        with self._lock:
+            session = self._sessions.pop(path, None)
+            if session is not None and session.dirty:
+                self._save(path, session)
+
+    # ---------- 空闲保存 ----------
+
+    def _schedule_flush(self):
+        if self.idle_flush <= 0:
+            return
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="docx-idle-flush", daemon=True)
+            self._flusher.start()
+        self._wakeup.set()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    pending = {path: s for path, s in self._sessions.items() if s.dirty}
+                    for path, session in pending.items():
+                        if now - session.last_edit >= self.idle_flush:
+                            try:
+                                self._save(path, session)
+                            except Exception as e:
+                                sys.stderr.write(f"空闲保存文档失败 {path}: {e}\n")
+                                session.last_edit = now  # 保留编辑，下个空闲周期重试
+                    waits = [self.idle_flush - (now - s.last_edit) for s in pending.values() if s.dirty]
+                if not waits:
+                    break
+                time.sleep(max(0.05, min(waits)))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open_documents": len(self._sessions),
+                "dirty_documents": sum(1 for s in self._sessions.values() if s.dirty),
+                "parse_count": self.parse_count,
+                "save_count": self.save_count,
+                "bytes_written": self.bytes_written,
+            }
@@ -0,0 +1,198 @@
+"""
+Text index for Word documents.
+
+A document is traversed once (body paragraphs, then every table/row/cell
+paragraph in the same order the utility functions always used) and the
+result is kept alongside the Document object:
+
+- a flat list of paragraph entries with their offsets into one
+  concatenated text buffer (run offsets are resolved on demand),
+- an inverted index from word tokens (split first, then lowercased, so
+  length-changing case mappings such as 'İ' cannot shift token
+  boundaries) to entries,
+- exact paragraph text to body paragraph indices.
+
+Indexes are stored on the Document object itself, so they live exactly as
+long as the parsed document. Appending body content (add_paragraph, add_table, ...)
+is detected automatically; code that edits paragraph or run text in place
+must call invalidate_document_index(doc).
+"""
+import os
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from docx import Document
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class ParagraphEntry:
+    """One indexed paragraph."""
+    __slots__ = ("paragraph", "location", "start", "text", "_run_starts")
+
+    def __init__(self, paragraph, location: Tuple, start: int, text: str):
+        self.paragraph = paragraph
+        self.location = location  # ("body", i) or ("table", table, row, cell, paragraph)
+        self.start = start  # offset of the paragraph in DocumentIndex.text
+        self.text = text
+        self._run_starts = None
+
+    @property
+    def run_starts(self) -> Tuple[int, ...]:
+        """Offset of each run (hyperlink runs excluded) in the paragraph, computed on first use."""
+        if self._run_starts is None:
+            starts, offset = [], 0
+            for run in self.paragraph.runs:
+                starts.append(offset)
+                offset += len(run.text)
+            self._run_starts = tuple(starts)
+        return self._run_starts
+
+    def run_at(self, offset: int) -> int:
+        """Index of the run containing the given paragraph offset."""
+        return max(0, bisect_right(self.run_starts, offset) - 1)
+
+
+def _body_signature(doc) -> int:
+    return len(doc.element.body)
+
+
+class DocumentIndex:
+    """Flat text index of a parsed document."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.signature = _body_signature(doc)
+        self.entries: List[ParagraphEntry] = []
+        self.exact: Dict[str, List[int]] = {}
+        self.tokens: Dict[str, List[int]] = {}
+        self.memo: Dict[str, Any] = {}  # derived views (e.g. structure) computed on demand
+
+        texts = []
+        offset = 0
+
+        def add(paragraph, location):
+            nonlocal offset
+            text = paragraph.text
+            entry_id = len(self.entries)
+            self.entries.append(ParagraphEntry(paragraph, location, offset, text))
+            for token in {word.lower() for word in _TOKEN_RE.findall(text)}:
+                self.tokens.setdefault(token, []).append(entry_id)
+            texts.append(text)
+            offset += len(text) + 1
+
+        for i, paragraph in enumerate(doc.paragraphs):
+            add(paragraph, ("body", i))
+            self.exact.setdefault(self.entries[-1].text, []).append(i)
+        self.body_count = len(self.entries)
+
+        for t, table in enumerate(doc.tables):
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    for p, paragraph in enumerate(cell.paragraphs):
+                        add(paragraph, ("table", t, r, c, p))
+
+        self.text = "\n".join(texts)
+        self.body_end = self.entries[self.body_count].start if self.body_count < len(self.entries) else len(self.text)
+        self._starts = [entry.start for entry in self.entries]
+
+    def entry_at(self, position: int) -> int:
+        """Entry id containing the given buffer position."""
+        return bisect_right(self._starts, position) - 1
+
+    def locate(self, position: int) -> Tuple[ParagraphEntry, int, int]:
+        """Resolve a buffer position to (entry, run index, offset in paragraph)."""
+        entry = self.entries[self.entry_at(position)]
+        offset = position - entry.start
+        return entry, entry.run_at(offset), offset
+
+    def _scan(self, text: str, body_only: bool) -> List[int]:
+        """Entries whose text contains ``text``, by scanning the buffer."""
+        end = self.body_end if body_only else len(self.text)
+        found = []
+        position = self.text.find(text, 0, end)
+        while position != -1:
+            entry_id = self.entry_at(position)
+            entry = self.entries[entry_id]
+            if position + len(text) <= entry.start + len(entry.text):
+                found.append(entry_id)
+                position = entry.start + len(entry.text) + 1
+            else:
+                # match spans the separator between two paragraphs
+                position += 1
+            position = self.text.find(text, position, end)
+        return found
+
+    def containing(self, text: str, body_only: bool = False) -> List[int]:
+        """Ids of entries whose text contains ``text`` (in document order).
+
+        Whole words inside the query are looked up in the token index first;
+        queries without one fall back to a scan of the text buffer.
+        """
+        if not text:
+            limit = self.body_count if body_only else len(self.entries)
+            return list(range(limit))
+        # a word bounded by other characters on both sides of the query must
+        # appear as a complete token in any matching paragraph; both sides split
+        # the original text before lowercasing, so the keys always agree
+        interior = [m.group().lower() for m in _TOKEN_RE.finditer(text)
+                    if m.start() > 0 and m.end() < len(text)]
+        if not interior:
+            return self._scan(text, body_only)
+        postings = [self.tokens.get(token, ()) for token in interior]
+        candidates = min(postings, key=len)
+        limit = self.body_count if body_only else len(self.entries)
+        return [i for i in candidates if i < limit and text in self.entries[i].text]
+
+    def with_token(self, word: str) -> List[int]:
+        """Ids of entries containing ``word`` as a whole token (case-insensitive)."""
+        return list(self.tokens.get(word.lower(), ()))
+
+
+_INDEX_ATTR = "_text_index"
+_indexes_lock = threading.Lock()
+
+
+def get_document_index(doc) -> DocumentIndex:
+    """Return the index of a Document, building it on first use."""
+    index = getattr(doc, _INDEX_ATTR, None)
+    if index is not None and index.signature == _body_signature(doc):
+        return index
+    index = DocumentIndex(doc)
+    setattr(doc, _INDEX_ATTR, index)
+    return index
+
+
+def invalidate_document_index(doc) -> None:
+    """Drop the cached index after editing a document in place."""
+    if getattr(doc, _INDEX_ATTR, None) is not None:
+        setattr(doc, _INDEX_ATTR, None)
+
+
+_MAX_FILE_INDEXES = 4
+_file_indexes: "OrderedDict[str, Tuple[Tuple[int, int], DocumentIndex]]" = OrderedDict()
+
+
+def load_document_index(doc_path: str) -> DocumentIndex:
+    """Parse and index a document file, reusing the result while the file is unchanged.
+
+    The returned index (and its ``doc``) is shared and must be treated as read-only.
+    """
+    path = os.path.abspath(doc_path)
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    with _indexes_lock:
+        cached = _file_indexes.get(path)
+        if cached is not None and cached[0] == signature:
+            _file_indexes.move_to_end(path)
+            return cached[1]
+    index = DocumentIndex(Document(path))
+    with _indexes_lock:
+        _file_indexes[path] = (signature, index)
+        _file_indexes.move_to_end(path)
+        while len(_file_indexes) > _MAX_FILE_INDEXES:
+            _file_indexes.popitem(last=False)
+    return index
@@ -1,10 +1,13 @@
 """
 Document utility functions for Word Document Server.
 """
+import copy
 import json
 from typing import Dict, List, Any
 from docx import Document
 
+from word_document_server.utils.document_index import get_document_index, invalidate_document_index, load_document_index
+
 
 def get_document_properties(doc_path: str) -> Dict[str, Any]:
     """Get properties of a Word document."""
@@ -41,23 +44,56 @@ def extract_document_text(doc_path: str) -> str:
         return f"Document {doc_path} does not exist"
     
     try:
-        doc = Document(doc_path)
-        text = []
-        
-        for paragraph in doc.paragraphs:
-            text.append(paragraph.text)
-            
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        text.append(paragraph.text)
-        
-        return "\n".join(text)
+        # body paragraphs followed by table cell paragraphs, joined by newlines
+        return load_document_index(doc_path).text
     except Exception as e:
         return f"Failed to extract text: {str(e)}"
 
 
+def _build_structure(index) -> Dict[str, Any]:
+    """Collect paragraph and table previews from a document index."""
+    doc = index.doc
+    structure = {
+        "paragraphs": [],
+        "tables": []
+    }
+    
+    # Get paragraphs
+    for i, entry in enumerate(index.entries[:index.body_count]):
+        para = entry.paragraph
+        structure["paragraphs"].append({
+            "index": i,
+            "text": entry.text[:100] + ("..." if len(entry.text) > 100 else ""),
+            "style": para.style.name if para.style else "Normal"
+        })
+    
+    # Get tables
+    for i, table in enumerate(doc.tables):
+        table_data = {
+            "index": i,
+            "rows": len(table.rows),
+            "columns": len(table.columns),
+            "preview": []
+        }
+        
+        # Get sample of table data
+        max_rows = min(3, len(table.rows))
+        for row_idx in range(max_rows):
+            row_data = []
+            max_cols = min(3, len(table.columns))
+            for col_idx in range(max_cols):
+                try:
+                    cell_text = table.cell(row_idx, col_idx).text
+                    row_data.append(cell_text[:20] + ("..." if len(cell_text) > 20 else ""))
+                except IndexError:
+                    row_data.append("N/A")
+            table_data["preview"].append(row_data)
+        
+        structure["tables"].append(table_data)
+    
+    return structure
+
+
 def get_document_structure(doc_path: str) -> Dict[str, Any]:
     """Get the structure of a Word document."""
     import os
@@ -65,45 +101,10 @@ def get_document_structure(doc_path: str) -> Dict[str, Any]:
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
-        structure = {
-            "paragraphs": [],
-            "tables": []
-        }
-        
-        # Get paragraphs
-        for i, para in enumerate(doc.paragraphs):
-            structure["paragraphs"].append({
-                "index": i,
-                "text": para.text[:100] + ("..." if len(para.text) > 100 else ""),
-                "style": para.style.name if para.style else "Normal"
-            })
-        
-        # Get tables
-        for i, table in enumerate(doc.tables):
-            table_data = {
-                "index": i,
-                "rows": len(table.rows),
-                "columns": len(table.columns),
-                "preview": []
-            }
-            
-            # Get sample of table data
-            max_rows = min(3, len(table.rows))
-            for row_idx in range(max_rows):
-                row_data = []
-                max_cols = min(3, len(table.columns))
-                for col_idx in range(max_cols):
-                    try:
-                        cell_text = table.cell(row_idx, col_idx).text
-                        row_data.append(cell_text[:20] + ("..." if len(cell_text) > 20 else ""))
-                    except IndexError:
-                        row_data.append("N/A")
-                table_data["preview"].append(row_data)
-            
-            structure["tables"].append(table_data)
-        
-        return structure
+        index = load_document_index(doc_path)
+        if "structure" not in index.memo:
+            index.memo["structure"] = _build_structure(index)
+        return copy.deepcopy(index.memo["structure"])
     except Exception as e:
         return {"error": f"Failed to get document structure: {str(e)}"}
 
@@ -120,15 +121,20 @@ def find_paragraph_by_text(doc, text, partial_match=False):
     Returns:
         List of paragraph indices that match the criteria
     """
-    matching_paragraphs = []
-    
-    for i, para in enumerate(doc.paragraphs):
-        if partial_match and text in para.text:
-            matching_paragraphs.append(i)
-        elif not partial_match and para.text == text:
-            matching_paragraphs.append(i)
-            
-    return matching_paragraphs
+    index = get_document_index(doc)
+    if not partial_match:
+        return list(index.exact.get(text, ()))
+    return index.containing(text, body_only=True)
+
+
+def _replace_in_runs(para, old_text, new_text):
+    """Replace inside the runs of one paragraph, returning the number of runs changed."""
+    count = 0
+    for run in para.runs:
+        if old_text in run.text:
+            run.text = run.text.replace(old_text, new_text)
+            count += 1
+    return count
 
 
 def find_and_replace_text(doc, old_text, new_text):
@@ -143,25 +149,41 @@ def find_and_replace_text(doc, old_text, new_text):
     Returns:
         Number of replacements made
     """
-    count = 0
+    return find_and_replace_many(doc, [(old_text, new_text)])
+
+
+def find_and_replace_many(doc, replacements):
+    """
+    Apply several find/replace pairs in order, resolving candidate paragraphs
+    for all of them from a single document index.
     
-    # Search in paragraphs
-    for para in doc.paragraphs:
-        if old_text in para.text:
-            for run in para.runs:
-                if old_text in run.text:
-                    run.text = run.text.replace(old_text, new_text)
-                    count += 1
+    Args:
+        doc: Document object
+        replacements: Iterable of (old_text, new_text) pairs, or a dict
+        
+    Returns:
+        Number of replacements made
+    """
+    if isinstance(replacements, dict):
+        replacements = replacements.items()
+    index = get_document_index(doc)
+    entries = index.entries
+    count = 0
+    touched = set()
     
-    # Search in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    if old_text in para.text:
-                        for run in para.runs:
-                            if old_text in run.text:
-                                run.text = run.text.replace(old_text, new_text)
-                                count += 1
+    for old_text, new_text in replacements:
+        # the index is exact for untouched paragraphs; paragraphs changed by an
+        # earlier pair are re-checked against their live text
+        candidates = set(index.containing(old_text))
+        for entry_id in touched:
+            if entry_id not in candidates and old_text in entries[entry_id].paragraph.text:
+                candidates.add(entry_id)
+        for entry_id in sorted(candidates):
+            replaced = _replace_in_runs(entries[entry_id].paragraph, old_text, new_text)
+            if replaced:
+                count += replaced
+                touched.add(entry_id)
     
+    if touched:
+        invalidate_document_index(doc)
     return count
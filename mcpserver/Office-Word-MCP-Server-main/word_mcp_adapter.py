@@ -6,11 +6,15 @@ from typing import Dict, Any, Optional
 try:
     from docx import Document
     from docx.shared import Inches
+    from .document_session import DocumentSessionCache
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
     print("警告: python-docx未安装，Word文档功能将受限")
 
+DOCUMENT_CACHE_SIZE = 8  # 同时保持打开的文档数
+DOCUMENT_IDLE_FLUSH = 2.0  # 最后一次编辑后多少秒自动保存
+
 class WordDocumentMCPServer:
     """Word文档处理MCP服务器适配器"""
     
@@ -18,6 +22,9 @@ class WordDocumentMCPServer:
         self.name = "WordDocumentMCPServer"
         self.instructions = "专业的Microsoft Word文档创建、编辑和管理工具"
         
+        # 已打开文档的会话缓存：编辑作用在内存中的文档上，提交/空闲/淘汰时一次性保存
+        self.sessions = DocumentSessionCache(DOCUMENT_CACHE_SIZE, DOCUMENT_IDLE_FLUSH) if DOCX_AVAILABLE else None
+        
         # 工具映射表
         self.tool_mapping = {
             # 文档管理
@@ -25,6 +32,7 @@ class WordDocumentMCPServer:
             "get_document_info": self._get_document_info,
             "get_document_text": self._get_document_text,
             "list_available_documents": self._list_available_documents,
+            "save_document": self._save_document,
             
             # 内容添加
             "add_paragraph": self._add_paragraph,
@@ -134,8 +142,8 @@ class WordDocumentMCPServer:
             if author:
                 doc.add_paragraph(f'Author: {author}')
             
-            # 保存文档
-            doc.save(full_path)
+            # 保存文档并登记到会话缓存，后续编辑直接复用
+            self.sessions.create(full_path, doc)
             
             return {
                 "filename": os.path.basename(full_path),
@@ -162,17 +170,10 @@ class WordDocumentMCPServer:
             raise Exception("缺少file_path或filename参数")
         
         try:
-            # 打开文档
-            if os.path.exists(filename):
-                doc = Document(filename)
-            else:
-                raise FileNotFoundError(f"文档 '{filename}' 不存在")
-            
-            # 添加段落
-            paragraph = doc.add_paragraph(text)
-            
-            # 保存文档
-            doc.save(filename)
+            # 打开文档（复用会话缓存中的解析结果，修改在提交/空闲时统一保存）
+            with self.sessions.edit(filename) as doc:
+                # 添加段落
+                paragraph = doc.add_paragraph(text)
             
             return {
                 "filename": filename,
@@ -206,17 +207,10 @@ class WordDocumentMCPServer:
             raise Exception(f"无效的标题级别: {level}。级别必须在1-9之间。")
         
         try:
-            # 打开文档
-            if os.path.exists(filename):
-                doc = Document(filename)
-            else:
-                raise FileNotFoundError(f"文档 '{filename}' 不存在")
-            
-            # 添加标题
-            heading = doc.add_heading(text, level)
-            
-            # 保存文档
-            doc.save(filename)
+            # 打开文档（复用会话缓存中的解析结果，修改在提交/空闲时统一保存）
+            with self.sessions.edit(filename) as doc:
+                # 添加标题
+                heading = doc.add_heading(text, level)
             
             return {
                 "filename": filename,
@@ -256,25 +250,18 @@ class WordDocumentMCPServer:
             raise Exception(f"表格尺寸过大: {rows}x{cols}。建议行数不超过100，列数不超过50。")
         
         try:
-            # 打开文档
-            if os.path.exists(filename):
-                doc = Document(filename)
-            else:
-                raise FileNotFoundError(f"文档 '{filename}' 不存在")
-            
-            # 添加表格
-            table = doc.add_table(rows=rows, cols=cols)
-            table.style = 'Table Grid'
-            
-            # 如果提供了表头，设置第一行
-            if headers and len(headers) <= cols:
-                hdr_cells = table.rows[0].cells
-                for i, header in enumerate(headers):
-                    if i < len(hdr_cells):
-                        hdr_cells[i].text = str(header)
-            
-            # 保存文档
-            doc.save(filename)
+            # 打开文档（复用会话缓存中的解析结果，修改在提交/空闲时统一保存）
+            with self.sessions.edit(filename) as doc:
+                # 添加表格
+                table = doc.add_table(rows=rows, cols=cols)
+                table.style = 'Table Grid'
+
+                # 如果提供了表头，设置第一行
+                if headers and len(headers) <= cols:
+                    hdr_cells = table.rows[0].cells
+                    for i, header in enumerate(headers):
+                        if i < len(hdr_cells):
+                            hdr_cells[i].text = str(header)
             
             return {
                 "filename": filename,
@@ -298,17 +285,10 @@ class WordDocumentMCPServer:
             raise Exception("缺少file_path或filename参数")
         
         try:
-            # 打开文档
-            if os.path.exists(filename):
-                doc = Document(filename)
-            else:
-                raise FileNotFoundError(f"文档 '{filename}' 不存在")
-            
-            # 添加分页符
-            doc.add_page_break()
-            
-            # 保存文档
-            doc.save(filename)
+            # 打开文档（复用会话缓存中的解析结果，修改在提交/空闲时统一保存）
+            with self.sessions.edit(filename) as doc:
+                # 添加分页符
+                doc.add_page_break()
             
             return {
                 "filename": filename,
@@ -329,11 +309,9 @@ class WordDocumentMCPServer:
             raise Exception("缺少file_path或filename参数")
         
         try:
-            if not os.path.exists(filename):
-                raise FileNotFoundError(f"文档 '{filename}' 不存在")
-            
-            # 打开文档
-            doc = Document(filename)
+            # 文件大小以磁盘为准，先保存未提交的编辑
+            self.sessions.commit(filename)
+            doc = self.sessions.read(filename)
             
             # 获取文档属性
             props = doc.core_properties
@@ -363,11 +341,8 @@ class WordDocumentMCPServer:
             raise Exception("缺少file_path或filename参数")
         
         try:
-            if not os.path.exists(filename):
-                raise FileNotFoundError(f"文档 '{filename}' 不存在")
-            
-            # 打开文档
-            doc = Document(filename)
+            # 复用会话缓存中的解析结果（包含尚未保存的编辑）
+            doc = self.sessions.read(filename)
             
             # 提取所有段落文本
             text_content = []
@@ -383,6 +358,24 @@ class WordDocumentMCPServer:
         except Exception as e:
             raise Exception(f"获取文档文本失败: {str(e)}")
     
+    def _save_document(self, data: dict) -> dict:
+        """保存未提交的编辑（不传文件名时保存全部文档）"""
+        if not DOCX_AVAILABLE:
+            raise Exception("python-docx未安装，无法保存Word文档")
+        
+        filename = data.get("file_path") or data.get("filename")
+        try:
+            if filename:
+                saved = [os.path.abspath(filename)] if self.sessions.commit(filename) else []
+            else:
+                saved = self.sessions.commit_all()
+            return {
+                "saved": saved,
+                "count": len(saved)
+            }
+        except Exception as e:
+            raise Exception(f"保存文档失败: {str(e)}")
+    
     def _list_available_documents(self, data: dict) -> dict:
         """列出可用文档"""
         directory = data.get("directory", ".")
@@ -391,6 +384,10 @@ class WordDocumentMCPServer:
             if not os.path.exists(directory):
                 raise FileNotFoundError(f"目录 '{directory}' 不存在")
             
+            # 大小和修改时间以磁盘为准，先保存未提交的编辑
+            if self.sessions is not None:
+                self.sessions.commit_all()
+            
             # 查找所有.docx文件
             docx_files = []
             for file in os.listdir(directory):
@@ -2,9 +2,10 @@ import json
 import os
 import asyncio
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from system.config import config
 from charset_normalizer import from_path
+from .page_cache import CachedPage, PageCache
 
 try:
     from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
@@ -12,6 +13,31 @@ try:
 except ImportError:
     CRAWL4AI_AVAILABLE = False
 
+# 浏览器进程退出/断开时 Playwright 抛出的错误信息片段
+_BROWSER_DEAD_MARKERS = (
+    "browser has been closed",
+    "browser has disconnected",
+    "target page, context or browser has been closed",
+    "connection closed",
+)
+
+
+def _browser_dead(crawler, error: Exception) -> bool:
+    """判断爬取异常是否由共享浏览器退出引起（页面级错误不需要重启浏览器）
+
+    能取到 Playwright 浏览器对象时以其连接状态为准，否则按错误信息判断。
+    """
+    manager = getattr(getattr(crawler, "crawler_strategy", None), "browser_manager", None)
+    browser = getattr(manager, "browser", None)
+    if browser is not None and hasattr(browser, "is_connected"):
+        try:
+            return not browser.is_connected()
+        except Exception:
+            return True
+    message = str(error).lower()
+    return any(marker in message for marker in _BROWSER_DEAD_MARKERS)
+
+
 class Crawl4aiAgent:
     
     name = "Crawl4aiAgent"
@@ -28,10 +54,20 @@ class Crawl4aiAgent:
         self.viewport_width = 1280
         self.viewport_height = 720
         self.max_chars = 4096  # 默认获取前4096个字符
+        self.max_concurrency = 4  # 共享爬虫同时处理的页面数
+        self.cache_ttl = 600  # 缓存有效期（秒），过期后向源站确认
+        self.cache_max_entries = 256  # 最多缓存的页面数，0表示不缓存
         
         # 从配置中读取设置
         self._load_config()
         
+        # 常驻爬虫（首次使用时启动）与页面缓存
+        self._crawler = None
+        self.crawler_restarts = 0
+        self._crawler_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.cache = PageCache(ttl=self.cache_ttl, max_entries=self.cache_max_entries)
+        
         print(f"[OK] Crawl4aiAgent初始化完成，Headless: {self.headless}, Timeout: {self.timeout}ms")
     
     def _load_config(self):
@@ -52,6 +88,12 @@ class Crawl4aiAgent:
                     self.viewport_height = int(crawl4ai_config.viewport_height)
                 if hasattr(crawl4ai_config, 'max_chars'):
                     self.max_chars = int(crawl4ai_config.max_chars)
+                if hasattr(crawl4ai_config, 'max_concurrency'):
+                    self.max_concurrency = max(1, int(crawl4ai_config.max_concurrency))
+                if hasattr(crawl4ai_config, 'cache_ttl'):
+                    self.cache_ttl = float(crawl4ai_config.cache_ttl)
+                if hasattr(crawl4ai_config, 'cache_max_entries'):
+                    self.cache_max_entries = int(crawl4ai_config.cache_max_entries)
         except Exception as e:
             print(f"[WARN] 从全局配置读取Crawl4AI配置时出错: {e}")
             
@@ -93,13 +135,95 @@ class Crawl4aiAgent:
                         self.viewport_height = int(crawl4ai_config['viewport_height'])
                     if 'max_chars' in crawl4ai_config:
                         self.max_chars = int(crawl4ai_config['max_chars'])
+                    if 'max_concurrency' in crawl4ai_config:
+                        self.max_concurrency = max(1, int(crawl4ai_config['max_concurrency']))
+                    if 'cache_ttl' in crawl4ai_config:
+                        self.cache_ttl = float(crawl4ai_config['cache_ttl'])
+                    if 'cache_max_entries' in crawl4ai_config:
+                        self.cache_max_entries = int(crawl4ai_config['cache_max_entries'])
         except Exception as e:
             print(f"[WARN] 从config.json文件读取Crawl4AI配置时出错: {e}")
     
+    async def _get_crawler(self):
+        """获取常驻爬虫，首次调用或被关闭后重新启动"""
+        if self._crawler is not None:
+            return self._crawler
+        async with self._crawler_lock:
+            if self._crawler is None:
+                browser_config = BrowserConfig(
+                    headless=self.headless,
+                    user_agent=self.user_agent,
+                    viewport_width=self.viewport_width,
+                    viewport_height=self.viewport_height
+                )
+                crawler = AsyncWebCrawler(config=browser_config)
+                await crawler.start()
+                self._crawler = crawler
+        return self._crawler
+    
+    async def _discard_crawler(self, crawler):
+        """浏览器已退出时丢弃该爬虫；已被其他请求替换过则不动，避免关掉新启动的爬虫"""
+        async with self._crawler_lock:
+            if self._crawler is not crawler:
+                return
+            self._crawler = None
+            self.crawler_restarts += 1
+        try:
+            await crawler.close()
+        except Exception as e:
+            print(f"[WARN] 关闭已退出的Crawl4AI爬虫时出错: {e}")
+    
+    async def close(self):
+        """关闭常驻爬虫"""
+        async with self._crawler_lock:
+            crawler, self._crawler = self._crawler, None
+        if crawler is not None:
+            try:
+                await crawler.close()
+            except Exception as e:
+                print(f"[WARN] 关闭Crawl4AI爬虫时出错: {e}")
+    
+    async def _revalidate(self, url: str, entry: CachedPage) -> bool:
+        """携带ETag/Last-Modified向源站确认，返回内容是否未变化（304）"""
+        headers = entry.validators()
+        if not headers:
+            return False
+        try:
+            import aiohttp
+            headers["User-Agent"] = self.user_agent
+            timeout = aiohttp.ClientTimeout(total=self.timeout / 1000)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(url, headers=headers, allow_redirects=True) as resp:
+                    return resp.status == 304
+        except Exception:
+            return False
+    
+    async def _crawl(self, url: str, run_config) -> Any:
+        """经共享爬虫执行一次爬取，浏览器异常退出时重启后重试一次；其他错误直接抛出，不影响并发中的爬取"""
+        async with self._semaphore:
+            crawler = await self._get_crawler()
+            try:
+                return await crawler.arun(url=url, config=run_config)
+            except Exception as e:
+                if not _browser_dead(crawler, e):
+                    raise
+                print(f"[WARN] 共享浏览器已退出，重启后重试: {e}")
+                # 并发的多个请求同时发现浏览器退出时只重启一次
+                await self._discard_crawler(crawler)
+                crawler = await self._get_crawler()
+                return await crawler.arun(url=url, config=run_config)
+    
+    @staticmethod
+    def _truncate(markdown_content: str, char_limit: int) -> str:
+        if char_limit > 0 and len(markdown_content) > char_limit:
+            markdown_content = markdown_content[:char_limit] + "\n\n...（内容已截断，仅显示前" + str(char_limit) + "个字符）"
+        return markdown_content
+    
     async def crawl_page(self, url: str, css_selector: Optional[str] = None, 
                        wait_for: Optional[str] = None, javascript_enabled: bool = True,
-                       screenshot: bool = False, max_chars: Optional[int] = None) -> Dict[str, Any]:
-        """使用Crawl4AI解析网页"""
+                       screenshot: bool = False, max_chars: Optional[int] = None,
+                       use_cache: bool = True) -> Dict[str, Any]:
+        """使用Crawl4AI解析网页（共享爬虫，结果按URL缓存）"""
         if not CRAWL4AI_AVAILABLE:
             return {
                 "success": False,
@@ -110,13 +234,20 @@ class Crawl4aiAgent:
             # 使用传入的max_chars或默认值
             char_limit = max_chars if max_chars is not None else self.max_chars
             
-            # 创建浏览器配置
-            browser_config = BrowserConfig(
-                headless=self.headless,
-                user_agent=self.user_agent,
-                viewport_width=self.viewport_width,
-                viewport_height=self.viewport_height
-            )
+            # 截图每次都要重新生成，不走缓存
+            cache_key = (url, css_selector or None, wait_for or None, bool(javascript_enabled))
+            use_cache = use_cache and not screenshot
+            entry = self.cache.get(cache_key) if use_cache else None
+            if entry is not None:
+                if self.cache.is_fresh(entry):
+                    self.cache.hits += 1
+                    return self._cached_result(entry, char_limit)
+                if await self._revalidate(url, entry):
+                    self.cache.touch(entry)
+                    self.cache.revalidated += 1
+                    return self._cached_result(entry, char_limit)
+            if use_cache:
+                self.cache.misses += 1
             
             # 创建爬取配置
             run_config = CrawlerRunConfig(
@@ -124,43 +255,47 @@ class Crawl4aiAgent:
                 css_selector=css_selector if css_selector else None,
                 wait_for=wait_for if wait_for else None,
                 screenshot=screenshot,
-                cache_mode="bypass"  # 不使用缓存，获取最新内容
+                cache_mode="bypass"  # 不使用Crawl4AI自带缓存，由页面缓存负责复用
             )
             
-            # 创建爬虫实例
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                # 执行爬取
-                result = await crawler.arun(url=url, config=run_config)
+            result = await self._crawl(url, run_config)
+            
+            if result.success:
+                # 构建返回数据
+                metadata = {
+                    "url": result.url,
+                    "title": getattr(result, 'title', ''),
+                    "description": getattr(result, 'description', ''),
+                    "media_count": len(getattr(result, 'media', [])),
+                    "links_count": len(getattr(result, 'links', [])),
+                    "screenshot_path": getattr(result, 'screenshot_path', None)
+                }
                 
-                if result.success:
-                    # 构建返回数据
-                    metadata = {
-                        "url": result.url,
-                        "title": getattr(result, 'title', ''),
-                        "description": getattr(result, 'description', ''),
-                        "media_count": len(getattr(result, 'media', [])),
-                        "links_count": len(getattr(result, 'links', [])),
-                        "screenshot_path": getattr(result, 'screenshot_path', None)
-                    }
-                    
-                    # 格式化Markdown内容
-                    markdown_content = self._format_markdown(result)
-                    
-                    # 限制字符数
-                    if char_limit > 0 and len(markdown_content) > char_limit:
-                        markdown_content = markdown_content[:char_limit] + "\n\n...（内容已截断，仅显示前" + str(char_limit) + "个字符）"
-                    
-                    return {
-                        "success": True,
-                        "data": markdown_content,
-                        "metadata": metadata,
-                        "raw_markdown": result.markdown
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"爬取失败: {result.error_message if hasattr(result, 'error_message') else '未知错误'}"
-                    }
+                # 格式化Markdown内容
+                markdown_content = self._format_markdown(result)
+                
+                if use_cache:
+                    headers = {str(k).lower(): v for k, v in (getattr(result, 'response_headers', None) or {}).items()}
+                    self.cache.put(cache_key, CachedPage(
+                        markdown=markdown_content,
+                        metadata=metadata,
+                        raw_markdown=result.markdown,
+                        etag=headers.get('etag'),
+                        last_modified=headers.get('last-modified')
+                    ))
+                
+                return {
+                    "success": True,
+                    "data": self._truncate(markdown_content, char_limit),
+                    "metadata": metadata,
+                    "raw_markdown": result.markdown
+                }
+            else:
+                self.cache.discard(cache_key)
+                return {
+                    "success": False,
+                    "error": f"爬取失败: {result.error_message if hasattr(result, 'error_message') else '未知错误'}"
+                }
                     
         except Exception as e:
             return {
@@ -168,6 +303,18 @@ class Crawl4aiAgent:
                 "error": f"解析过程中发生错误: {str(e)}"
             }
     
+    def _cached_result(self, entry: CachedPage, char_limit: int) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "data": self._truncate(entry.markdown, char_limit),
+            "metadata": dict(entry.metadata, cached=True),
+            "raw_markdown": entry.raw_markdown
+        }
+    
+    async def crawl_many(self, urls: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """批量解析多个网页，经共享爬虫并发执行（并发数受max_concurrency限制），结果与urls顺序一致"""
+        return list(await asyncio.gather(*(self.crawl_page(url, **kwargs) for url in urls)))
+    
     def _format_markdown(self, result) -> str:
         """格式化Markdown内容，添加AI友好的结构"""
         markdown_content = f"# 网页解析结果\n\n"
@@ -279,10 +426,48 @@ class Crawl4aiAgent:
                         "message": f"解析失败: {crawl_result['error']}",
                         "data": {}
                     }, ensure_ascii=False)
+            elif tool_name == "批量网页解析":
+                urls = data.get("urls")
+                if isinstance(urls, str):
+                    urls = [u.strip() for u in urls.replace("\n", ",").split(",") if u.strip()]
+                if not urls:
+                    return json.dumps({
+                        "status": "error",
+                        "message": "批量解析需要指定URL列表（urls参数）",
+                        "data": {}
+                    }, ensure_ascii=False)
+                
+                max_chars = data.get("max_chars")
+                try:
+                    max_chars = int(max_chars) if max_chars is not None else None
+                except (ValueError, TypeError):
+                    return json.dumps({
+                        "status": "error",
+                        "message": f"无效的max_chars参数: '{max_chars}'，必须是一个有效的整数。",
+                        "data": {}
+                    }, ensure_ascii=False)
+                
+                results = await self.crawl_many(
+                    urls,
+                    css_selector=data.get("css_selector"),
+                    wait_for=data.get("wait_for"),
+                    max_chars=max_chars
+                )
+                pages = [
+                    {"url": url, "status": "ok", "data": r["data"], "metadata": r.get("metadata", {})}
+                    if r["success"] else {"url": url, "status": "error", "message": r["error"]}
+                    for url, r in zip(urls, results)
+                ]
+                succeeded = sum(1 for page in pages if page["status"] == "ok")
+                return json.dumps({
+                    "status": "ok" if succeeded else "error",
+                    "message": f"批量解析完成，成功 {succeeded}/{len(pages)} 个网页",
+                    "data": pages
+                }, ensure_ascii=False)
             else:
                 return json.dumps({
                     "status": "error",
-                    "message": f"不支持的操作: {tool_name}，支持的操作：网页解析",
+                    "message": f"不支持的操作: {tool_name}，支持的操作：网页解析、批量网页解析",
                     "data": {}
                 }, ensure_ascii=False)
                 
@@ -0,0 +1,79 @@
+"""
+网页内容缓存 - 按URL缓存格式化后的Markdown，过期后用ETag/Last-Modified向源站确认是否变化
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional
+
+
+@dataclass
+class CachedPage:
+    """一次成功爬取的结果（未截断）"""
+    markdown: str  # _format_markdown 的输出
+    metadata: Dict[str, Any]
+    raw_markdown: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头，没有验证信息时为空"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """带TTL的LRU页面缓存
+
+    - ttl 内直接命中
+    - 过期条目仍保留，供调用方携带验证信息重新确认（304时调用 touch 续期）
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedPage]:
+        """返回条目（可能已过期），不存在时返回None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry: CachedPage) -> bool:
+        return time.monotonic() - entry.fetched_at < self.ttl
+
+    def put(self, key: Hashable, entry: CachedPage):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def touch(self, entry: CachedPage):
+        """源站确认未变化，重新计时"""
+        entry.fetched_at = time.monotonic()
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits,
+                "revalidated": self.revalidated, "misses": self.misses}
@@ -15,6 +15,7 @@ class NagaPortalClient:
         self._username_masked: str = ""  # 掩码用户名 #
         self._cached_user_id: Optional[int] = None  # 缓存的用户ID #
         self._user_id_initialized: bool = False  # 用户ID是否已初始化 #
+        self._synced_cookies: Dict[str, str] = {}  # 上次同步到连接池的登录cookie #
         
         # 项目启动时初始化用户ID缓存 #
         self._init_user_id_cache()  # 初始化用户ID缓存 #
@@ -49,6 +50,25 @@ class NagaPortalClient:
                 if hasattr(self, '_saved_cookies') and self._saved_cookies:
                     self._client.cookies.update(self._saved_cookies)  # 重新设置cookie #
 
+    def _sync_cookies(self):  # 同步cookie #
+        """登录管理器中的cookie变化时才写入客户端cookie罐；服务端下发的Set-Cookie由cookie罐自动保留 #"""
+        try:
+            from .portal_login_manager import get_cookies
+            latest_cookies = get_cookies()  # 获取最新cookie #
+        except Exception:
+            latest_cookies = getattr(self, '_saved_cookies', None) or {}  # 使用保存的cookie #
+        if latest_cookies and latest_cookies != self._synced_cookies:
+            self._client.cookies.update(latest_cookies)  # 更新cookie罐 #
+            self._synced_cookies = latest_cookies  # 记录已同步 #
+
+    async def request(self, method: str, path: str, json_body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> httpx.Response:  # 通用请求 #
+        """经长连接池发送请求并返回原始响应，网络异常由调用方处理 #"""
+        await self._ensure_client()  # 确保客户端 #
+        if not path.startswith(('/', 'http://', 'https://')):
+            path = '/' + path  # 规范路径 #
+        self._sync_cookies()  # 同步最新cookie #
+        return await self._client.request(method.upper(), path, json=json_body, params=params, headers=headers)  # 发送 #
+
     @staticmethod
     def _mask(s: str) -> str:  # 掩码 #
         if not s:  # 空处理 #
@@ -112,19 +132,10 @@ class NagaPortalClient:
         if not path.startswith('/'):
             path = '/' + path  # 规范路径 #
         
-        # 获取最新的cookie并直接传递给请求 #
-        cookies = {}
-        try:
-            from .portal_login_manager import get_cookies
-            cookies = get_cookies()  # 获取最新cookie #
-        except Exception as e:
-            # 如果获取cookie失败，使用保存的cookie #
-            if hasattr(self, '_saved_cookies'):
-                cookies = self._saved_cookies or {}
+        self._sync_cookies()  # 同步最新cookie到连接池 #
         
         try:
-            # 直接传递cookies参数到GET请求 #
-            resp = await self._client.get(path, params=params or {}, headers=headers, cookies=cookies)  # 发送 #
+            resp = await self._client.get(path, params=params or {}, headers=headers)  # 发送 #
             return {"success": True, "status": "ok", "message": f"HTTP {resp.status_code}", "data": {"status_code": resp.status_code, "text": resp.text[:1000]}}  # 返回 #
         except Exception as e:
             return {"success": False, "status": "network_error", "message": str(e), "data": {}}  # 异常 #
@@ -134,19 +145,10 @@ class NagaPortalClient:
         if not path.startswith('/'):
             path = '/' + path  # 规范路径 #
         
-        # 获取最新的cookie并直接传递给请求 #
-        cookies = {}
-        try:
-            from .portal_login_manager import get_cookies
-            cookies = get_cookies()  # 获取最新cookie #
-        except Exception as e:
-            # 如果获取cookie失败，使用保存的cookie #
-            if hasattr(self, '_saved_cookies'):
-                cookies = self._saved_cookies or {}
+        self._sync_cookies()  # 同步最新cookie到连接池 #
         
         try:
-            # 直接传递cookies参数到POST请求 #
-            resp = await self._client.post(path, json=json_body or {}, headers=headers, cookies=cookies)  # 发送 #
+            resp = await self._client.post(path, json=json_body or {}, headers=headers)  # 发送 #
             return {"success": True, "status": "ok", "message": f"HTTP {resp.status_code}", "data": {"status_code": resp.status_code, "text": resp.text[:1000]}}  # 返回 #
         except Exception as e:
             return {"success": False, "status": "network_error", "message": str(e), "data": {}}  # 异常 #
@@ -1,11 +1,75 @@
 """NagaPortal MCP Agent #"""
 import json  # JSON #
+import html  # HTML转义 #
+import time  # 时间 #
 import asyncio  # 异步 #
-import httpx  # HTTP客户端 #
+import threading  # 线程 #
 import webbrowser  # 浏览器 #
+from http.server import BaseHTTPRequestHandler, HTTPServer  # 本地页面服务 #
 from typing import Any, Dict, Optional  # 类型 #
 from system.config import config  # 全局配置 #
-from .portal_login_manager import get_cookies, get_user_id  # 登录管理器 #
+from .client import NagaPortalClient  # 长连接客户端 #
+from .portal_login_manager import get_cookies, get_user_id, get_portal_login_manager  # 登录管理器 #
+
+def _build_payment_form(payment_url: str, payment_data: Dict[str, Any]) -> str:  # 支付跳转页 #
+    """生成自动提交支付参数的表单页 #"""
+    fields = "".join(
+        f'        <input type="hidden" name="{html.escape(str(key))}" value="{html.escape(str(value))}">\n'
+        for key, value in (payment_data or {}).items()
+    )  # 支付参数 #
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>正在跳转到支付页面...</title>
+</head>
+<body>
+    <h2>正在跳转到支付页面，请稍候...</h2>
+    <form id="paymentForm" method="post" action="{html.escape(payment_url)}">
+{fields}    </form>
+    <script>
+        // 自动提交表单
+        document.getElementById('paymentForm').submit();
+    </script>
+</body>
+</html>
+"""
+
+
+def _serve_page_once(content: str, timeout: float = 120.0) -> str:  # 一次性本地页面 #
+    """在127.0.0.1随机端口上提供一次内存中的页面，页面被取走或超时后自动关闭，返回页面地址 #"""
+    body = content.encode("utf-8")  # 页面内容 #
+    served = threading.Event()  # 是否已提供 #
+
+    class _PageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/favicon"):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            served.set()
+
+        def log_message(self, format, *args):  # 静默日志 #
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), _PageHandler)  # 随机端口 #
+    server.timeout = 1.0  # 单次等待时间 #
+
+    def serve():
+        deadline = time.monotonic() + timeout
+        try:
+            while not served.is_set() and time.monotonic() < deadline:
+                server.handle_request()
+        finally:
+            server.server_close()  # 释放端口 #
+
+    threading.Thread(target=serve, name="PortalPaymentPage", daemon=True).start()  # 后台提供页面 #
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
 
 class NagaPortalAgent:
     """娜迦官网API Agent(简化版) #"""
@@ -13,8 +77,31 @@ class NagaPortalAgent:
     name = "NagaPortalAgent"  # 名称 #
     instructions = "与娜迦官网API交互，支持充值等操作"  # 描述 #
 
-    def __init__(self):  # 初始化 #
-        self.base_url = "https://naga.furina.chat"  # 基础URL #
+    def __init__(self, base_url: Optional[str] = None):  # 初始化 #
+        self.base_url = (base_url or "https://naga.furina.chat").rstrip('/')  # 基础URL #
+        self._client: Optional[NagaPortalClient] = None  # 长连接客户端 #
+        self._owns_client: bool = False  # 客户端是否由本Agent创建 #
+        self._context: Optional[Dict[str, Any]] = None  # 缓存的请求上下文 #
+        self._context_verified: bool = False  # 缓存的上下文是否已通过连接测试 #
+        self._context_expires: float = 0.0  # 上下文过期时间 #
+        self.context_ttl: float = getattr(config.naga_portal, 'context_ttl', 300)  # 上下文缓存时间 #
+
+    def _get_client(self) -> NagaPortalClient:  # 获取客户端 #
+        """所有官网请求共用一个长连接客户端，优先复用登录管理器已登录的客户端 #"""
+        if self._client is None:
+            login_client = get_portal_login_manager().client  # 登录时创建的客户端 #
+            if login_client is not None and login_client.base_url == self.base_url:
+                self._client = login_client  # 复用连接与会话 #
+            else:
+                self._client = NagaPortalClient(self.base_url)  # 新建客户端 #
+                self._owns_client = True
+        return self._client
+
+    def invalidate_context(self):  # 使上下文失效 #
+        """Cookie失效或切换账号后丢弃缓存的请求上下文 #"""
+        self._context = None
+        self._context_verified = False
+        self._context_expires = 0.0
 
     async def handle_handoff(self, data: dict) -> str:  # 统一入口 #
         tool = data.get("tool_name")  # 工具名 #
@@ -30,7 +117,7 @@ class NagaPortalAgent:
                 if payment_type not in ["wxpay", "alipay"]:
                     return json.dumps({"success": False, "status": "invalid_args", "message": "payment_type只能是wxpay或alipay", "data": {}}, ensure_ascii=False)  # 校验 #
                 
-                # 直接使用httpx进行API调用 #
+                # 经共用的长连接客户端进行API调用 #
                 result = await self._simple_recharge(amount, payment_type)  # 充值 #
                 return json.dumps(result, ensure_ascii=False)  # 返回 #
 
@@ -39,12 +126,12 @@ class NagaPortalAgent:
                 if not key:
                     return json.dumps({"success": False, "status": "invalid_args", "message": "缺少key参数", "data": {}}, ensure_ascii=False)  # 校验 #
                 
-                # 直接使用httpx进行API调用 #
+                # 经共用的长连接客户端进行API调用 #
                 result = await self._simple_redeem_code(key)  # 兑换码 #
                 return json.dumps(result, ensure_ascii=False)  # 返回 #
 
             elif tool in ["naga_balance", "查询余额"]:
-                # 直接使用httpx进行API调用 #
+                # 经共用的长连接客户端进行API调用 #
                 result = await self._simple_balance()  # 余额查询 #
                 return json.dumps(result, ensure_ascii=False)  # 返回 #
 
@@ -67,36 +154,46 @@ class NagaPortalAgent:
             return json.dumps({"success": False, "status": "exception", "message": str(e), "data": {}}, ensure_ascii=False)  # 异常 #
 
     async def _prepare_request_context(self, need_connection_test: bool = False) -> Dict[str, Any]:  # 准备请求上下文 #
-        """准备请求上下文（Cookie、用户ID、Headers等） #"""
+        """准备请求上下文（Cookie、用户ID、Headers等），在有效期内且Cookie未变化时直接复用 #"""
         # 获取cookie和用户ID #
         cookies = get_cookies()  # 获取cookie #
         user_id = get_user_id()  # 获取用户ID #
         
         if not cookies:
+            self.invalidate_context()  # 清除缓存 #
             return {"success": False, "status": "no_cookies", "message": "未找到登录Cookie，请先登录", "data": {}}  # 无cookie #
         
-        # 构建请求参数 #
-        headers = {}
-        if user_id:
-            headers["user-id"] = str(user_id)  # 设置用户ID #
+        context = self._context
+        if (context is None or time.monotonic() >= self._context_expires
+                or context["cookies"] != cookies or context["user_id"] != user_id):
+            # 构建请求参数 #
+            headers = {}
+            if user_id:
+                headers["user-id"] = str(user_id)  # 设置用户ID #
+            context = {
+                "success": True,
+                "cookies": cookies,
+                "headers": headers,
+                "user_id": user_id
+            }  # 新上下文 #
+            self._context = context
+            self._context_verified = False
+            self._context_expires = time.monotonic() + self.context_ttl
         
-        # 如果需要连接测试 #
-        if need_connection_test:
+        # 如果需要连接测试（有效期内只测试一次） #
+        if need_connection_test and not self._context_verified:
             test_result = await self.test_connection()  # 测试连接 #
             if not test_result.get("success"):
+                self.invalidate_context()  # 清除缓存 #
                 return {
                     "success": False, 
                     "status": "cookie_invalid", 
                     "message": f"Cookie可能已过期或无效: {test_result.get('message', '未知错误')}", 
                     "data": {"test_result": test_result}
                 }  # Cookie无效 #
+            self._context_verified = self._context is context  # 标记已校验 #
         
-        return {
-            "success": True,
-            "cookies": cookies,
-            "headers": headers,
-            "user_id": user_id
-        }  # 返回上下文 #
+        return context  # 返回上下文 #
 
     async def test_connection(self) -> Dict[str, Any]:  # 测试连接 #
         """测试与服务器的连接是否有效 #"""
@@ -107,7 +204,7 @@ class NagaPortalAgent:
                 return context  # 返回错误 #
             
             # 发送简单的GET请求测试连接 #
-            result = await self._make_request("GET", f"{self.base_url}/api/user/self", None, context)  # 发送请求 #
+            result = await self._make_request("GET", "/api/user/self", None, context)  # 发送请求 #
             
             if result.get("success"):
                 return {
@@ -129,54 +226,50 @@ class NagaPortalAgent:
                 "message": str(e)
             }  # 连接异常 #
 
-    async def _make_request(self, method: str, url: str, payload: Dict[str, Any] = None, context: Dict[str, Any] = None) -> Dict[str, Any]:  # 发送请求 #
-        """发送HTTP请求的通用方法 #"""
+    async def _make_request(self, method: str, path: str, payload: Dict[str, Any] = None, context: Dict[str, Any] = None) -> Dict[str, Any]:  # 发送请求 #
+        """经共用的长连接客户端发送HTTP请求的通用方法 #"""
         try:
             # 打印调试信息 #
-            print(f"🍪 使用Cookie: {context['cookies']}")  # 调试信息 #
             print(f"📋 Headers: {context['headers']}")  # 调试信息 #
             if payload:
                 print(f"📦 Payload: {payload}")  # 调试信息 #
-            print(f"🌐 请求URL: {url}")  # 调试信息 #
+            print(f"🌐 请求路径: {method.upper()} {path}")  # 调试信息 #
             
-            # 发送请求 #
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                if method.upper() == "GET":
-                    response = await client.get(url, headers=context['headers'], cookies=context['cookies'])  # GET请求 #
-                else:
-                    response = await client.post(url, json=payload, headers=context['headers'], cookies=context['cookies'])  # POST请求 #
-                
-                print(f"📋 响应状态: {response.status_code}")  # 调试信息 #
-                print(f"📋 响应内容: {response.text}")  # 调试信息 #
-                
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
-                        return {
-                            "success": True,
-                            "status_code": response.status_code,
-                            "data": response_data,
-                            "raw_text": response.text
-                        }  # 返回成功 #
-                    except json.JSONDecodeError:
-                        return {
-                            "success": True,
-                            "status_code": response.status_code,
-                            "data": None,
-                            "raw_text": response.text
-                        }  # 返回原始文本 #
-                else:
+            # 发送请求（Cookie由客户端cookie罐携带） #
+            response = await self._get_client().request(method, path, json_body=payload if method.upper() != "GET" else None, headers=context['headers'])
+            
+            print(f"📋 响应状态: {response.status_code}")  # 调试信息 #
+            
+            if response.status_code == 200:
+                try:
+                    response_data = response.json()
+                    return {
+                        "success": True,
+                        "status_code": response.status_code,
+                        "data": response_data,
+                        "raw_text": response.text
+                    }  # 返回成功 #
+                except json.JSONDecodeError:
                     return {
-                        "success": False,
+                        "success": True,
                         "status_code": response.status_code,
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    }  # 返回错误 #
+                        "data": None,
+                        "raw_text": response.text
+                    }  # 返回原始文本 #
+            else:
+                if response.status_code in (401, 403):
+                    self.invalidate_context()  # 登录失效，下次重新校验 #
+                return {
+                    "success": False,
+                    "status_code": response.status_code,
+                    "error": f"HTTP {response.status_code}: {response.text}"
+                }  # 返回错误 #
                     
         except Exception as e:
             return {"success": False, "error": str(e)}  # 返回异常 #
 
     async def _simple_recharge(self, amount: str, payment_type: str) -> Dict[str, Any]:  # 简化充值 #
-        """直接使用httpx进行充值请求 #"""
+        """经共用的长连接客户端进行充值请求 #"""
         try:
             # 准备请求上下文 #
             context = await self._prepare_request_context(need_connection_test=False)  # 充值不需要连接测试 #
@@ -191,7 +284,7 @@ class NagaPortalAgent:
             }  # 载荷 #
             
             # 发送请求 #
-            result = await self._make_request("POST", f"{self.base_url}/api/user/pay", payload, context)  # 发送请求 #
+            result = await self._make_request("POST", "/api/user/pay", payload, context)  # 发送请求 #
             
             if not result.get("success"):
                 return {
@@ -226,59 +319,12 @@ class NagaPortalAgent:
                 
                 # 方法1: 使用POST方式提交数据到支付页面 #
                 try:
-                    # 创建临时HTML文件，包含自动提交的表单 #
-                    import tempfile  # 临时文件 #
-                    import os  # 操作系统 #
-                    
-                    # 生成临时HTML文件 #
-                    html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>正在跳转到支付页面...</title>
-</head>
-<body>
-    <h2>正在跳转到支付页面，请稍候...</h2>
-    <form id="paymentForm" method="post" action="{payment_url}">
-"""
-                    
-                    # 添加所有支付参数 #
-                    for key, value in payment_data.items():
-                        html_content += f'        <input type="hidden" name="{key}" value="{value}">\n'
-                    
-                    html_content += """
-    </form>
-    <script>
-        // 自动提交表单
-        document.getElementById('paymentForm').submit();
-    </script>
-</body>
-</html>
-"""
-                    
-                    # 创建临时HTML文件 #
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-                        f.write(html_content)
-                        temp_html_path = f.name
-                    
-                    # 打开临时HTML文件 #
-                    webbrowser.open(f"file://{temp_html_path}")  # 打开本地HTML文件 #
+                    # 自动提交的表单页在内存中生成，由本地一次性服务提供，不落临时文件 #
+                    page_url = _serve_page_once(_build_payment_form(payment_url, payment_data))  # 本地页面地址 #
+                    webbrowser.open(page_url)  # 打开跳转页 #
                     print(f"🌐 已自动打开支付页面（带数据）: {payment_url}")  # 调试信息 #
                     opened = True  # 标记成功 #
                     
-                    # 延迟删除临时文件 #
-                    import threading  # 线程 #
-                    def delete_temp_file():
-                        import time  # 时间 #
-                        time.sleep(5)  # 等待5秒 #
-                        try:
-                            os.unlink(temp_html_path)  # 删除临时文件 #
-                        except:
-                            pass  # 忽略删除错误 #
-                    
-                    threading.Thread(target=delete_temp_file, daemon=True).start()  # 启动删除线程 #
-                    
                 except Exception as e:
                     print(f"❌ POST方式打开失败: {e}")  # 调试信息 #
                 
@@ -325,7 +371,7 @@ class NagaPortalAgent:
             return {"success": False, "status": "network_error", "message": str(e), "data": {}}  # 异常 #
 
     async def _simple_redeem_code(self, key: str) -> Dict[str, Any]:  # 简化兑换码 #
-        """直接使用httpx进行兑换码请求 #"""
+        """经共用的长连接客户端进行兑换码请求 #"""
         try:
             # 准备请求上下文 #
             context = await self._prepare_request_context(need_connection_test=True)  # 兑换码需要连接测试 #
@@ -338,7 +384,7 @@ class NagaPortalAgent:
             }  # 载荷 #
             
             # 发送请求 #
-            result = await self._make_request("POST", f"{self.base_url}/api/user/topup", payload, context)  # 发送请求 #
+            result = await self._make_request("POST", "/api/user/topup", payload, context)  # 发送请求 #
             
             if not result.get("success"):
                 return {
@@ -389,7 +435,7 @@ class NagaPortalAgent:
             return {"success": False, "status": "network_error", "message": str(e), "data": {}}  # 异常 #
 
     async def _simple_balance(self) -> Dict[str, Any]:  # 简化余额查询 #
-        """直接使用httpx进行余额查询 #"""
+        """经共用的长连接客户端进行余额查询 #"""
         try:
             # 准备请求上下文 #
             context = await self._prepare_request_context(need_connection_test=True)  # 余额查询需要连接测试 #
@@ -397,7 +443,7 @@ class NagaPortalAgent:
                 return context  # 返回错误 #
             
             # 发送请求 #
-            result = await self._make_request("GET", f"{self.base_url}/api/user/self", None, context)  # 发送请求 #
+            result = await self._make_request("GET", "/api/user/self", None, context)  # 发送请求 #
             
             if not result.get("success"):
                 return {
@@ -548,7 +594,7 @@ class NagaPortalAgent:
                 return context  # 返回错误 #
             
             # 发送请求 #
-            result = await self._make_request("GET", f"{self.base_url}/api/user/self/groups", None, context)  # 发送请求 #
+            result = await self._make_request("GET", "/api/user/self/groups", None, context)  # 发送请求 #
             
             if not result.get("success"):
                 return {
@@ -636,7 +682,7 @@ class NagaPortalAgent:
             }  # 载荷 #
             
             # 发送请求 #
-            result = await self._make_request("POST", f"{self.base_url}/api/token/", payload, context)  # 发送请求 #
+            result = await self._make_request("POST", "/api/token/", payload, context)  # 发送请求 #
             
             if not result.get("success"):
                 return {
@@ -697,7 +743,7 @@ class NagaPortalAgent:
                 return context  # 返回错误 #
             
             # 发送请求 #
-            result = await self._make_request("GET", f"{self.base_url}/api/token/?p=0&size=10", None, context)  # 发送请求 #
+            result = await self._make_request("GET", "/api/token/?p=0&size=10", None, context)  # 发送请求 #
             
             if not result.get("success"):
                 return {
@@ -765,8 +811,12 @@ class NagaPortalAgent:
             return {"success": False, "status": "network_error", "message": str(e), "data": {}}  # 异常 #
 
     async def close(self):  # 关闭资源 #
-        """关闭资源 #"""
-        pass  # 简化版本无需关闭 #
+        """关闭本Agent创建的客户端（复用登录管理器的客户端不关闭） #"""
+        if self._client is not None and self._owns_client:
+            await self._client.close()  # 关闭连接池 #
+        self._client = None
+        self._owns_client = False
+        self.invalidate_context()  # 清除缓存 #
 
 
 # 工厂方法 #
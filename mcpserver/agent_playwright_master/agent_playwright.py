@@ -2,19 +2,20 @@
 import asyncio
 import json
 import sys
-import os
-import platform
-from playwright.async_api import async_playwright
 from nagaagent_core.vendors.agents import Agent  # 统一代理 #
-from system.config import config
+from .browser_pool import get_browser_pool
+from .playwright_search import SearchEngine
 
 print = lambda *a, **k: sys.stderr.write('[print] ' + (' '.join(map(str, a))) + '\n')
 
 class SimpleBrowserTool:
-    """简化的浏览器工具类，只保留基本功能"""
+    """简化的浏览器工具类，只保留基本功能
+    
+    浏览器进程由浏览器池统一管理：打开网页使用一个常驻的交互页面，
+    搜索则从池中租用隔离页面，多个请求可以并发执行
+    """
     
     def __init__(self):
-        self._playwright = None
         self._browser = None
         self._page = None
         self._is_initialized = False
@@ -35,36 +36,16 @@ class SimpleBrowserTool:
             return False
     
     async def _init_browser(self, force_reinit=False):
-        """初始化浏览器"""
+        """初始化交互页面（浏览器断开时由浏览器池重启）"""
         # 如果强制重新初始化或检查发现连接断开，则重新初始化
         if force_reinit or not await self._check_browser_alive():
             # 先清理现有资源
             await self._cleanup_browser()
             
             try:
-                self._playwright = await async_playwright().start()
-                
-                # 尝试使用Edge通道启动
-                try:
-                    self._browser = await self._playwright.chromium.launch(
-                        headless=config.browser.playwright_headless,
-                        channel="msedge"
-                    )
-                    print("✅ 使用Edge通道启动浏览器成功")
-                except Exception as e:
-                    print(f"Edge通道启动失败: {e}，尝试使用可执行文件路径")
-                    # 尝试使用可执行文件路径
-                    edge_path = self._get_edge_path()
-                    if edge_path:
-                        self._browser = await self._playwright.chromium.launch(
-                            headless=config.browser.playwright_headless,
-                            executable_path=edge_path
-                        )
-                        print(f"✅ 使用路径启动浏览器成功: {edge_path}")
-                    else:
-                        raise Exception("未找到Edge浏览器")
-                        
-                self._page = await self._browser.new_page()
+                pool = get_browser_pool()
+                self._browser = await pool.get_browser()
+                self._page = await pool.new_page()
                 self._is_initialized = True
                 print("✅ 浏览器初始化完成")
                 
@@ -74,59 +55,17 @@ class SimpleBrowserTool:
                 raise
     
     async def _cleanup_browser(self):
-        """清理浏览器资源"""
+        """清理交互页面（浏览器进程归浏览器池管理）"""
         try:
             if self._page:
-                await self._page.close()
-        except Exception:
-            pass
-        
-        try:
-            if self._browser:
-                await self._browser.close()
-        except Exception:
-            pass
-            
-        try:
-            if self._playwright:
-                await self._playwright.stop()
+                await self._page.context.close()
         except Exception:
             pass
             
         self._page = None
         self._browser = None
-        self._playwright = None
         self._is_initialized = False
     
-    def _get_edge_path(self):
-        """获取Edge浏览器路径"""
-        if platform.system() != "Windows":
-            return None
-            
-        # 1. 尝试解析.lnk文件
-        if os.path.exists(config.browser.edge_lnk_path):
-            try:
-                import pythoncom
-                from win32com.shell import shell
-                shortcut = pythoncom.CoCreateInstance(
-                    shell.CLSID_ShellLink, None, pythoncom.CLSCTX_INPROC_SERVER, shell.IID_IShellLink
-                )
-                shortcut.QueryInterface(shell.IID_IPersistFile).Load(config.browser.edge_lnk_path)
-                exe = shortcut.GetPath(shell.SLGP_UNCPRIORITY)[0]
-                if exe and os.path.exists(exe):
-                    return exe
-            except ImportError as e:
-                print(f"win32com模块未安装，跳过.lnk文件解析: {e}")
-            except Exception as e:
-                print(f"解析.lnk文件失败: {e}")
-        
-        # 2. 尝试常见路径
-        for path in config.browser.edge_common_paths:
-            if os.path.exists(path):
-                return path
-                
-        return None
-    
     async def open_url(self, url: str, new_tab: bool = False) -> dict:
         """打开URL"""
         try:
@@ -139,7 +78,7 @@ class SimpleBrowserTool:
                 
             if new_tab:
                 # 新建标签页
-                page = await self._browser.new_page()
+                page = await self._page.context.new_page()
             else:
                 # 使用当前页面
                 page = self._page
@@ -154,7 +93,7 @@ class SimpleBrowserTool:
                 
                 # 重新尝试打开URL
                 if new_tab:
-                    page = await self._browser.new_page()
+                    page = await self._page.context.new_page()
                 else:
                     page = self._page
                 await page.goto(url, wait_until='domcontentloaded', timeout=30000)
@@ -180,31 +119,15 @@ class SimpleBrowserTool:
             }
     
     async def search_web(self, query: str, engine: str = 'google') -> dict:
-        """搜索网页"""
+        """搜索网页（从浏览器池租用隔离页面，拦截图片、字体和媒体）"""
         try:
-            # 先检查并确保浏览器连接有效
-            await self._init_browser()
-            
             # 构建搜索URL
-            if engine.lower() == 'google':
-                search_url = f'https://www.google.com/search?q={query}'
-            elif engine.lower() == 'bing':
-                search_url = f'https://www.bing.com/search?q={query}'
-            elif engine.lower() == 'baidu':
-                search_url = f'https://www.baidu.com/s?wd={query}'
-            else:
-                search_url = f'https://www.google.com/search?q={query}'
-                
-            # 打开搜索页面 - 如果失败可能是连接断开，尝试重新初始化
-            try:
-                await self._page.goto(search_url, wait_until='domcontentloaded', timeout=30000)
-            except Exception as goto_error:
-                print(f"搜索页面导航失败，尝试重新初始化浏览器: {goto_error}")
-                # 强制重新初始化浏览器
-                await self._init_browser(force_reinit=True)
-                await self._page.goto(search_url, wait_until='domcontentloaded', timeout=30000)
-                
-            title = await self._page.title()
+            search_url = SearchEngine.build_search_url(query, engine)
+            
+            async with get_browser_pool().lease(block_resources=True) as page:
+                await page.goto(search_url, wait_until='domcontentloaded', timeout=30000)
+                title = await page.title()
+                results = await SearchEngine.extract_search_results(page, engine)
             
             return {
                 'status': 'ok',
@@ -213,7 +136,8 @@ class SimpleBrowserTool:
                     'query': query,
                     'engine': engine,
                     'url': search_url,
-                    'title': title
+                    'title': title,
+                    'results': results
                 }
             }
             
@@ -225,9 +149,9 @@ class SimpleBrowserTool:
             }
     
     async def close(self):
-        """关闭浏览器"""
+        """关闭本工具的交互页面（常驻浏览器由其他租用共享，不在这里关闭）"""
         await self._cleanup_browser()
-        print("✅ 浏览器已关闭")
+        print("✅ 交互页面已关闭")
 
 class PlaywrightAgent(Agent):
     """简化的Playwright浏览器Agent"""
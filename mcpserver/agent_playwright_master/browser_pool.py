@@ -0,0 +1,215 @@
+# browser_pool.py # 浏览器池：常驻一个浏览器进程，按需租用隔离的上下文/页面
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright
+from system.config import config
+
+# 归还页面时清空当前源的站点数据（页面停留在about:blank等无权访问存储的页面时各项静默跳过）
+_CLEAR_STORAGE_JS = """async () => {
+    try { localStorage.clear(); } catch (e) {}
+    try { sessionStorage.clear(); } catch (e) {}
+    try {
+        await Promise.all((await indexedDB.databases()).map((db) => new Promise((resolve) => {
+            const request = indexedDB.deleteDatabase(db.name);
+            request.onsuccess = request.onerror = request.onblocked = resolve;
+        })));
+    } catch (e) {}
+    try {
+        for (const key of await caches.keys()) { await caches.delete(key); }
+    } catch (e) {}
+    try {
+        for (const reg of await navigator.serviceWorker.getRegistrations()) { await reg.unregister(); }
+    } catch (e) {}
+}"""
+
+
+def _origin(url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    if parts.scheme in ("http", "https"):
+        return f"{parts.scheme}://{parts.netloc}"
+    return None
+
+
+class _PooledPage:
+    """池中的一个隔离上下文及其页面"""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+        self.crashed = False
+        self.origins: Set[str] = set()  # 本次租用中主框架访问过的源
+        page.on("crash", lambda *_: setattr(self, "crashed", True))
+        page.on("framenavigated", self._on_navigated)
+
+    def _on_navigated(self, frame):
+        origin = _origin(frame.url)
+        if frame == self.page.main_frame and origin:
+            self.origins.add(origin)
+
+    def can_reset(self) -> bool:
+        """页面仍停留在本次访问过的唯一源上时，才能在原地清空该源的站点数据"""
+        return self.origins <= {_origin(self.page.url)}
+
+    def is_healthy(self) -> bool:
+        return not self.crashed and not self.page.is_closed()
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """浏览器池
+
+    - 只启动一个常驻浏览器，崩溃或断开后在下次租用时自动重启
+    - 每次租用独占一个上下文/页面，归还时清空cookie、权限和当前源的站点数据，取消拦截并回到空白页；
+      只能清理当前所在的源，租用期间主框架跨过多个源或已离开访问过的源时直接销毁上下文
+    - 信号量限制同时租用的页面数；崩溃或已关闭的页面直接丢弃并新建
+    - 可按资源类型拦截请求（搜索抓取时拦截图片、字体、媒体）
+    """
+
+    def __init__(self, size: Optional[int] = None, headless: Optional[bool] = None,
+                 max_uses: Optional[int] = None, block_resources: Optional[Iterable[str]] = None):
+        self.size = size or config.browser.pool_size
+        self.headless = config.browser.playwright_headless if headless is None else headless
+        self.max_uses = max_uses or config.browser.pool_max_uses
+        self.block_resources = frozenset(config.browser.pool_block_resources if block_resources is None
+                                         else block_resources)
+        self._playwright = None
+        self._browser = None
+        self._idle: List[_PooledPage] = []
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._launch_lock = asyncio.Lock()
+        self.launch_count = 0  # 浏览器启动次数（用于观测重启）
+
+    # ---------- 浏览器 ----------
+
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, channel="msedge")  # 优先用官方Edge通道
+        except Exception as e:
+            sys.stderr.write(f"用channel方式启动Edge失败: {e}，尝试executable_path方式\n")
+            from .playwright_search import get_edge_path
+            edge_path = get_edge_path()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, executable_path=edge_path)
+        self.launch_count += 1
+        sys.stderr.write(f"浏览器池已启动浏览器（第{self.launch_count}次）\n")
+
+    async def get_browser(self):
+        """返回可用的浏览器，必要时启动或重启"""
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                # 旧浏览器上的页面全部失效
+                stale, self._idle = self._idle, []
+                for slot in stale:
+                    await slot.close()
+                await self._launch()
+        return self._browser
+
+    async def new_page(self):
+        """在独立上下文中新建一个不受池管理的页面（交互式浏览使用，由调用方负责关闭）"""
+        browser = await self.get_browser()
+        context = await browser.new_context()
+        return await context.new_page()
+
+    # ---------- 租用 ----------
+
+    async def _take_slot(self) -> _PooledPage:
+        browser = await self.get_browser()
+        while self._idle:
+            slot = self._idle.pop()
+            if slot.is_healthy():
+                return slot
+            await slot.close()
+        context = await browser.new_context()
+        return _PooledPage(context, await context.new_page())
+
+    async def _block_route(self, route):
+        if route.request.resource_type in self.block_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _release(self, slot: _PooledPage, reusable: bool):
+        slot.uses += 1
+        if (reusable and slot.is_healthy() and slot.uses < self.max_uses and slot.can_reset()
+                and self._browser is not None and self._browser.is_connected()):
+            try:
+                await slot.page.unroute("**/*")
+                await slot.page.evaluate(_CLEAR_STORAGE_JS)
+                await slot.context.clear_cookies()
+                await slot.context.clear_permissions()
+                await slot.page.goto("about:blank")
+                slot.origins.clear()
+                self._idle.append(slot)
+                return
+            except Exception as e:
+                sys.stderr.write(f"浏览器池页面重置失败，丢弃该页面: {e}\n")
+        await slot.close()
+
+    @asynccontextmanager
+    async def lease(self, block_resources: bool = False):
+        """租用一个隔离页面
+
+        Args:
+            block_resources: 是否拦截 block_resources 中的资源类型
+        """
+        async with self._semaphore:
+            slot = await self._take_slot()
+            reusable = False
+            try:
+                if block_resources and self.block_resources:
+                    await slot.page.route("**/*", self._block_route)
+                yield slot.page
+                reusable = True
+            finally:
+                await self._release(slot, reusable)
+
+    # ---------- 关闭 ----------
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for slot in idle:
+            await slot.close()
+        try:
+            if self._browser:
+                await self._browser.close()
+        except Exception:
+            pass
+        try:
+            if self._playwright:
+                await self._playwright.stop()
+        except Exception:
+            pass
+        self._browser = None
+        self._playwright = None
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """获取全局浏览器池（首次租用时才启动浏览器）"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """关闭全局浏览器池"""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
@@ -183,10 +183,34 @@ def get_edge_path():
     raise RuntimeError("未检测到Microsoft Edge浏览器，请先安装Edge或检查.lnk路径！")
 # ----------- END Edge路径动态扫描 -----------
 
+async def scrape_search_page(page: Page, search_url: str, engine: str = "google") -> Dict[str, Any]:
+    """
+    在给定页面上打开搜索URL并提取结果
+    
+    Args:
+        page: Playwright页面对象
+        search_url: 搜索URL
+        engine: 搜索引擎
+        
+    Returns:
+        页面标题、搜索结果和页面内容长度
+    """
+    await page.goto(search_url, wait_until="networkidle")
+    results = await SearchEngine.extract_search_results(page, engine)
+    title = await page.title()
+    content = await page.content()
+    return {
+        "page_title": title,
+        "results": results,
+        "page_content_length": len(content)
+    }
+
 async def search_web(query: str, engine: str = "google") -> Dict[str, Any]:
     """
     执行Web搜索并返回结果
     
+    从浏览器池租用一个隔离页面（拦截图片、字体和媒体），不再每次启动浏览器
+    
     Args:
         query: 搜索关键词
         engine: 搜索引擎
@@ -195,13 +219,7 @@ async def search_web(query: str, engine: str = "google") -> Dict[str, Any]:
         搜索结果字典
     """
     # 动态导入，避免循环引用
-    from playwright.async_api import async_playwright
-    
-    # 尝试从config导入，如果失败则使用默认值
-    try:
-        from system.config import config
-    except ImportError:
-        PLAYWRIGHT_HEADLESS = True
+    from .browser_pool import get_browser_pool
     
     sys.stderr.write(f"执行Web搜索: query={query}, engine={engine}\n")
     
@@ -210,29 +228,8 @@ async def search_web(query: str, engine: str = "google") -> Dict[str, Any]:
         search_url = SearchEngine.build_search_url(query, engine)
         sys.stderr.write(f"搜索URL: {search_url}\n")
         
-        # 启动浏览器
-        playwright = await async_playwright().start()
-        try:
-            browser = await playwright.chromium.launch(headless=config.browser.playwright_headless, channel="msedge")  # 优先用官方Edge通道
-        except Exception as e:
-            sys.stderr.write(f"用channel方式启动Edge失败: {e}，尝试executable_path方式\n")
-            edge_path = get_edge_path()
-            browser = await playwright.chromium.launch(headless=config.browser.playwright_headless, executable_path=edge_path)
-        page = await browser.new_page()
-        
-        # 访问搜索页面
-        await page.goto(search_url, wait_until="networkidle")
-        
-        # 提取搜索结果
-        results = await SearchEngine.extract_search_results(page, engine)
-        
-        # 获取页面标题和内容
-        title = await page.title()
-        content = await page.content()
-        
-        # 关闭浏览器
-        await browser.close()
-        await playwright.stop()
+        async with get_browser_pool().lease(block_resources=True) as page:
+            scraped = await scrape_search_page(page, search_url, engine)
         
         # 返回结果
         return {
@@ -242,9 +239,7 @@ async def search_web(query: str, engine: str = "google") -> Dict[str, Any]:
                 "query": query,
                 "engine": engine,
                 "url": search_url,
-                "page_title": title,
-                "results": results,
-                "page_content_length": len(content)
+                **scraped
             }
         }
     
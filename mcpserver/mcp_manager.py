@@ -404,20 +404,8 @@ class MCPManager:
         Returns:
             list: 可用服务列表
         """
-        from mcpserver.mcp_registry import get_all_services_info # 动态服务池查询
-        services_info = get_all_services_info()
-        
-        return [
-            {
-                "name": name,
-                "description": info.get('description', ''),
-                "display_name": info.get('display_name', name),
-                "version": info.get('version', '1.0.0'),
-                "available_tools": info.get('available_tools', []),
-                "id": name
-            }
-            for name, info in services_info.items()
-        ]
+        from mcpserver.mcp_registry import get_manifest_snapshot # 按清单版本缓存的服务摘要
+        return [dict(info) for info in get_manifest_snapshot().services_info]
             
     def get_available_services_filtered(self) -> dict:
         """获取过滤后的服务列表，分为MCP服务和Agent服务
@@ -425,25 +413,12 @@ class MCPManager:
         Returns:
             dict: 包含mcp_services和agent_services的服务列表
         """
-        from mcpserver.mcp_registry import get_all_services_info, get_service_statistics # 动态服务池查询
+        from mcpserver.mcp_registry import get_manifest_snapshot # 按清单版本缓存的服务摘要
         
-        mcp_services = []
+        # 动态服务池中的服务都是MCP类型，归类为mcp_services
+        mcp_services = [dict(info) for info in get_manifest_snapshot().services_info]
         agent_services = []
         
-        # 从动态服务池获取所有已注册的MCP服务信息
-        services_info = get_all_services_info()
-        for name, info in services_info.items():
-            service_info = {
-                "name": name,
-                "description": info.get('description', ''),
-                "display_name": info.get('display_name', name),
-                "version": info.get('version', '1.0.0'),
-                "available_tools": info.get('available_tools', []),
-                "id": name
-            }
-            # 动态服务池中的服务都是MCP类型，归类为mcp_services
-            mcp_services.append(service_info)
-        
         # 从handoff服务中获取Agent服务信息（这些是handoff配置）
         for service_name, service_config in self.services.items():
             agent_service_info = {
@@ -526,24 +501,8 @@ class MCPManager:
         Returns:
             str: 格式化后的服务列表字符串
         """
-        from mcpserver.mcp_registry import get_all_services_info # 动态服务池查询
-        
-        services_info = get_all_services_info()
-        formatted_services = []
-        
-        for name, info in services_info.items():
-            description = info.get('description', '')
-            tools = info.get('available_tools', [])
-            tool_names = [tool.get('name', '') for tool in tools]
-            
-            if description:
-                formatted_services.append(f"- {name}: {description}")
-                if tool_names:
-                    formatted_services.append(f"  可用工具: {', '.join(tool_names)}")
-            else:
-                formatted_services.append(f"- {name}")
-        
-        return "\n".join(formatted_services)
+        from mcpserver.mcp_registry import get_manifest_snapshot # 按清单版本缓存的渲染结果
+        return get_manifest_snapshot().services_text
             
     async def cleanup(self):
         """清理所有MCP服务连接"""
@@ -1,11 +1,13 @@
 # mcp_registry.py # 动态扫描JSON元数据文件注册MCP服务
 import json
 import os
+import asyncio
 import importlib
 import inspect
+import threading
 from pathlib import Path
 import sys
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, NamedTuple, Tuple
 
 # 从稳定模块导入MCP管理功能
 from nagaagent_core.stable.mcp import (
@@ -16,6 +18,249 @@ from nagaagent_core.stable.mcp import (
     MANIFEST_CACHE
 )
 
+
+class ManifestSnapshot(NamedTuple):
+    """注册表清单快照：只在服务注册/注销后重建，读取方按版本复用预渲染的内容"""
+    version: int
+    services: Tuple[str, ...]  # 已注册服务名
+    tools: Dict[str, List[Dict[str, Any]]]  # 服务名 -> 工具列表
+    services_info: List[Dict[str, Any]]  # /services 返回的服务摘要
+    statistics: Dict[str, Any]  # 服务统计
+    tools_prompt: str  # 意图分析提示词中的工具摘要
+    services_text: str  # format_available_services 的文本
+
+
+_manifest_lock = threading.Lock()
+_manifest_version = 0
+_manifest_snapshot: Optional[ManifestSnapshot] = None
+_registry_signature: Optional[Tuple[int, int]] = None
+
+
+def bump_manifest_version():
+    """服务注册或注销后调用，使清单快照在下次读取时重建"""
+    global _manifest_version, _manifest_snapshot
+    with _manifest_lock:
+        _manifest_version += 1
+        _manifest_snapshot = None
+
+
+def _render_tools(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+    invocation_commands = manifest.get('capabilities', {}).get('invocationCommands', [])
+    return [
+        {
+            "name": cmd.get('command', ''),
+            "description": cmd.get('description', ''),
+            "example": cmd.get('example', ''),
+        }
+        for cmd in invocation_commands
+    ]
+
+
+def _prompt_tool_names(manifest: Dict[str, Any]) -> List[str]:
+    """意图分析提示词中的工具名：沿用分析器原有的 capabilities[*].tools 渲染"""
+    names = []
+    for cap_info in manifest.get('capabilities', {}).values():
+        if isinstance(cap_info, dict) and "tools" in cap_info:
+            names.extend(cap_info["tools"])
+    return names
+
+
+def _build_snapshot(version: int) -> ManifestSnapshot:
+    services = tuple(MCP_REGISTRY.keys())
+    tools = {name: _render_tools(MANIFEST_CACHE.get(name, {})) for name in services}
+
+    services_info = []
+    prompt_lines = []
+    text_lines = []
+    for name in services:
+        manifest = MANIFEST_CACHE.get(name, {})
+        description = manifest.get('description', '')
+        display_name = manifest.get('displayName', name)
+        tool_names = [tool['name'] for tool in tools[name] if tool['name']]
+        services_info.append({
+            "name": name,
+            "description": description,
+            "display_name": display_name,
+            "version": manifest.get('version', '1.0.0'),
+            "available_tools": tools[name],
+            "id": name
+        })
+        prompt_tools = _prompt_tool_names(manifest)
+        if prompt_tools:
+            prompt_lines.append(f"- {display_name}: {description} (工具: {', '.join(prompt_tools)})")
+        else:
+            prompt_lines.append(f"- {display_name}: {description}")
+        if description:
+            text_lines.append(f"- {name}: {description}")
+            if tool_names:
+                text_lines.append(f"  可用工具: {', '.join(tool_names)}")
+        else:
+            text_lines.append(f"- {name}")
+
+    statistics = {
+        "total_services": len(services),
+        "total_tools": sum(len(items) for items in tools.values()),
+        "registered_services": list(services),
+        "manifest_version": version,
+        "last_update": "动态更新"
+    }
+    return ManifestSnapshot(version, services, tools, services_info, statistics,
+                            "\n".join(prompt_lines), "\n".join(text_lines))
+
+
+def get_manifest_snapshot() -> ManifestSnapshot:
+    """获取当前清单快照
+    
+    通过本模块注册/注销时显式递增版本；绕过本模块直接改动注册表时，
+    按服务数量变化补一次版本递增
+    """
+    global _manifest_version, _manifest_snapshot, _registry_signature
+    snapshot = _manifest_snapshot
+    signature = (len(MCP_REGISTRY), len(MANIFEST_CACHE))
+    if snapshot is not None and signature == _registry_signature:
+        return snapshot
+    with _manifest_lock:
+        if _manifest_snapshot is not None and signature == _registry_signature:
+            return _manifest_snapshot
+        if _manifest_snapshot is not None:
+            _manifest_version += 1
+        _manifest_snapshot = _build_snapshot(_manifest_version)
+        _registry_signature = signature
+        return _manifest_snapshot
+
+
+def register_agent(service_name: str, instance: Any, manifest: Dict[str, Any]):
+    """注册单个服务实例及其清单"""
+    MCP_REGISTRY[service_name] = instance
+    MANIFEST_CACHE[service_name] = manifest
+    bump_manifest_version()
+
+
+def unregister_agent(service_name: str) -> bool:
+    """注销服务，返回服务是否存在"""
+    existed = MCP_REGISTRY.pop(service_name, None) is not None
+    MANIFEST_CACHE.pop(service_name, None)
+    if existed:
+        bump_manifest_version()
+    return existed
+
+MCP_AGENT_DIR = Path(__file__).parent  # 智能体清单所在目录
+
+
+class LazyAgentProxy:
+    """智能体懒加载代理
+    
+    注册时只持有清单，首次handle_handoff时才导入entryPoint模块并实例化。
+    模块导入放在线程中执行，避免阻塞事件循环；实例化在调用方线程完成。
+    """
+
+    def __init__(self, service_name: str, manifest: Dict[str, Any]):
+        self.service_name = service_name
+        self.manifest = manifest
+        entry = manifest.get('entryPoint', {})
+        self.module_name: str = entry.get('module', '')
+        self.class_name: str = entry.get('class', '')
+        self._agent_class = None
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def import_class(self):
+        """导入智能体模块并返回入口类（预热只做到这一步）"""
+        if self._agent_class is None:
+            with self._lock:
+                if self._agent_class is None:
+                    module = importlib.import_module(self.module_name)
+                    self._agent_class = getattr(module, self.class_name)
+        return self._agent_class
+
+    def get_instance(self):
+        """获取真实智能体实例，必要时同步导入并实例化"""
+        if self._instance is None:
+            agent_class = self.import_class()
+            with self._lock:
+                if self._instance is None:
+                    self._instance = agent_class()
+                    sys.stderr.write(f"MCP服务 {self.service_name} 已按需加载\n")
+        return self._instance
+
+    async def handle_handoff(self, data: dict) -> str:
+        if self._instance is None:
+            if self._agent_class is None:
+                await asyncio.to_thread(self.import_class)
+            self.get_instance()
+        result = self._instance.handle_handoff(data)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def __getattr__(self, item):
+        # 仅在代理自身没有该属性时触发，转发给真实实例
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return getattr(self.get_instance(), item)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "lazy"
+        return f"<LazyAgentProxy {self.service_name} ({state})>"
+
+
+def discover_manifests(base_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """只读取各智能体目录下的 agent-manifest.json，不导入任何智能体模块
+    
+    Returns:
+        Dict[str, Dict[str, Any]]: 服务名(displayName) -> 清单
+    """
+    manifests = {}
+    for manifest_path in sorted(Path(base_dir or MCP_AGENT_DIR).glob('**/agent-manifest.json')):
+        manifest = load_manifest_file(manifest_path)
+        if not manifest or manifest.get('agentType') != 'mcp':
+            continue
+        # 与全量注册一致，只使用displayName作为注册名称
+        service_name = manifest.get('displayName')
+        if not service_name:
+            sys.stderr.write(f"manifest缺少displayName字段: {manifest_path}\n")
+            continue
+        manifests[service_name] = manifest
+    return manifests
+
+
+def register_lazy_agents(base_dir: Optional[Path] = None) -> List[str]:
+    """按清单注册懒加载代理，已注册的服务保持不变"""
+    registered = []
+    for service_name, manifest in discover_manifests(base_dir).items():
+        if service_name in MCP_REGISTRY:
+            continue
+        MCP_REGISTRY[service_name] = LazyAgentProxy(service_name, manifest)
+        MANIFEST_CACHE[service_name] = manifest
+        registered.append(service_name)
+    if registered:
+        bump_manifest_version()
+    return registered
+
+
+def prewarm_agents(service_names: List[str]) -> Optional[threading.Thread]:
+    """在后台线程中预先导入热点智能体的模块，首次调用时只剩实例化"""
+    proxies = [MCP_REGISTRY[name] for name in service_names
+               if isinstance(MCP_REGISTRY.get(name), LazyAgentProxy)]
+    if not proxies:
+        return None
+
+    def _worker():
+        for proxy in proxies:
+            try:
+                proxy.import_class()
+            except Exception as e:
+                sys.stderr.write(f"预热MCP服务 {proxy.service_name} 失败: {e}\n")
+
+    thread = threading.Thread(target=_worker, name="mcp-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
 def get_service_info(service_name: str) -> Optional[Dict[str, Any]]:
     """获取指定服务的详细信息
     
@@ -53,20 +298,11 @@ def get_available_tools(service_name: str) -> List[Dict[str, Any]]:
     """
     if service_name not in MANIFEST_CACHE:
         return []
-        
-    manifest = MANIFEST_CACHE[service_name]
-    capabilities = manifest.get('capabilities', {})
-    invocation_commands = capabilities.get('invocationCommands', [])
-    
-    tools = []
-    for cmd in invocation_commands:
-        tools.append({
-            "name": cmd.get('command', ''),
-            "description": cmd.get('description', ''),
-            "example": cmd.get('example', ''),
-        })
     
-    return tools
+    tools = get_manifest_snapshot().tools.get(service_name)
+    if tools is None:  # 只有清单、未注册实例的服务
+        return _render_tools(MANIFEST_CACHE[service_name])
+    return list(tools)
 
 def get_all_services_info() -> Dict[str, Any]:
     """获取所有已注册服务的详细信息
@@ -108,20 +344,27 @@ def get_service_statistics() -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: 统计信息
     """
-    total_services = len(MCP_REGISTRY)
-    total_tools = sum(len(get_available_tools(name)) for name in MCP_REGISTRY.keys())
-    
-    return {
-        "total_services": total_services,
-        "total_tools": total_tools,
-        "registered_services": list(MCP_REGISTRY.keys()),
-        "last_update": "动态更新"
-    }
+    statistics = get_manifest_snapshot().statistics
+    return dict(statistics, registered_services=list(statistics["registered_services"]))
 
 # 自动扫描并注册
-def auto_register_mcp():
-    """自动注册所有MCP服务"""
-    registered = scan_and_register_mcp_agents()
+def auto_register_mcp(lazy: Optional[bool] = None):
+    """自动注册所有MCP服务
+    
+    Args:
+        lazy: 是否只按清单注册懒加载代理，默认读取 config.mcp.lazy_load
+    """
+    from system.config import config  # 延迟导入，避免循环导入
+    if lazy is None:
+        lazy = config.mcp.lazy_load
+    if lazy:
+        registered = register_lazy_agents()
+        hot_agents = [name for name, manifest in MANIFEST_CACHE.items()
+                      if manifest.get('hot') or name in config.mcp.hot_agents]
+        prewarm_agents(hot_agents)
+    else:
+        registered = scan_and_register_mcp_agents()
+        bump_manifest_version()
     sys.stderr.write(f"MCP注册完成，共注册 {len(registered)} 个服务: {registered}\n")
     return registered
 
@@ -6,11 +6,13 @@ MCP调度器 - 负责MCP任务的调度和执行
 """
 
 import asyncio
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from system.config import config, logger
+from system.metrics import trace_headers, MCP_TASK_LATENCY
 
 # 能力信息从注册中心获取，由上层管理
 
@@ -32,6 +34,7 @@ class MCPTask:
     error: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 3
+    trace_id: Optional[str] = None  # 调度请求的追踪ID，回调时原样带回
 
 class MCPScheduler:
     """MCP调度器 - 负责任务调度和执行"""
@@ -43,6 +46,7 @@ class MCPScheduler:
         self.task_queue = asyncio.Queue()
         self.worker_tasks: List[asyncio.Task] = []
         self.max_concurrent = 10
+        self.busy_workers = 0  # 正在执行任务的工作协程数
         self.shutdown_event = asyncio.Event()
         
         # 启动工作线程
@@ -67,7 +71,11 @@ class MCPScheduler:
                 if task is None:  # 关闭信号
                     break
                 
-                await self._execute_task(task)
+                self.busy_workers += 1
+                try:
+                    await self._execute_task(task)
+                finally:
+                    self.busy_workers -= 1
                 
             except asyncio.TimeoutError:
                 continue
@@ -78,6 +86,7 @@ class MCPScheduler:
     
     async def _execute_task(self, task: MCPTask):
         """执行单个任务"""
+        start = time.perf_counter()
         try:
             task.status = "running"
             task.started_at = datetime.utcnow().isoformat() + "Z"
@@ -131,6 +140,7 @@ class MCPScheduler:
                 pass
         
         finally:
+            MCP_TASK_LATENCY.observe(time.perf_counter() - start, status=task.status)
             # 移动到已完成任务
             if task.id in self.active_tasks:
                 del self.active_tasks[task.id]
@@ -150,7 +160,7 @@ class MCPScheduler:
                 "error": task.error,
                 "completed_at": task.completed_at,
             }
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(headers=trace_headers(task.trace_id)) as session:
                 # 直接调用外部回调URL（通常是apiserver的tool_result_callback）
                 callback_url = task.callback_url
                 if not callback_url.startswith('http'):
@@ -210,7 +220,8 @@ class MCPScheduler:
                 session_id=task_info.get("session_id"),
                 request_id=task_info.get("request_id"),
                 callback_url=task_info.get("callback_url"),
-                created_at=task_info["created_at"]
+                created_at=task_info["created_at"],
+                trace_id=task_info.get("trace_id")
             )
             
             # 添加到活跃任务
@@ -17,6 +17,7 @@ from contextlib import asynccontextmanager
 
 from .mcp_scheduler import MCPScheduler
 from system.config import config, logger
+from system.metrics import install_metrics, get_trace_id, MCP_QUEUE_DEPTH, MCP_WORKERS_BUSY, MCP_WORKERS_TOTAL
 # 能力发现逻辑已由注册中心承担，移除独立能力管理器
 # 精简：移除流式工具调用与独立工具解析执行，统一走调度器与管理器
 
@@ -50,6 +51,10 @@ async def lifespan(app: FastAPI):
     
     # 初始化调度器（注入mcp_manager）
     Modules.scheduler = MCPScheduler(Modules.mcp_manager)
+    scheduler = Modules.scheduler
+    MCP_QUEUE_DEPTH.set_function(scheduler.task_queue.qsize)
+    MCP_WORKERS_BUSY.set_function(lambda: scheduler.busy_workers)
+    MCP_WORKERS_TOTAL.set_function(lambda: len(scheduler.worker_tasks))
     
     logger.info("MCP服务器启动完成")
     
@@ -68,6 +73,7 @@ app = FastAPI(
     version="1.0.0",
     lifespan=lifespan
 )
+install_metrics(app, service="mcp")
 
 class Modules:
     """全局模块管理"""
@@ -135,6 +141,7 @@ async def schedule_mcp_task(payload: Dict[str, Any]):
             "session_id": session_id,
             "request_id": request_id,
             "callback_url": callback_url,
+            "trace_id": get_trace_id(),
             "status": "queued",
             "created_at": _now_iso(),
             "result": None,
@@ -185,8 +192,13 @@ async def get_mcp_status():
         if Modules.scheduler:
             scheduler_status = await Modules.scheduler.get_status()
             status["scheduler"] = scheduler_status
-            
-    # 能力统计可由注册中心提供（此处先省略）
+        
+        # 能力统计由注册中心的清单快照提供
+        try:
+            from mcpserver.mcp_registry import get_service_statistics
+            status["services"] = get_service_statistics()
+        except Exception as e:
+            logger.debug(f"获取服务统计失败: {e}")
         
         return status
         
@@ -194,6 +206,21 @@ async def get_mcp_status():
         logger.error(f"获取MCP状态失败: {e}")
         raise HTTPException(500, f"获取状态失败: {str(e)}")
 
+@app.get("/services")
+async def get_services():
+    """获取已注册的MCP服务及工具清单（按清单版本缓存）"""
+    try:
+        from mcpserver.mcp_registry import get_manifest_snapshot
+        snapshot = get_manifest_snapshot()
+        return {
+            "version": snapshot.version,
+            "statistics": snapshot.statistics,
+            "services": snapshot.services_info
+        }
+    except Exception as e:
+        logger.error(f"获取服务清单失败: {e}")
+        raise HTTPException(500, f"获取服务清单失败: {str(e)}")
+
 @app.get("/tasks/{task_id}")
 async def get_task_status(task_id: str):
     """获取特定任务状态"""
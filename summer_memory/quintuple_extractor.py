@@ -6,7 +6,8 @@ import sys
 import os
 import time
 import asyncio
-from typing import List, Tuple
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 
 # 添加项目根目录到路径，以便导入config
@@ -29,6 +30,15 @@ async_client = AsyncOpenAI(
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# 调用方设置的LLM请求计数器（任务管理器按批统计实际发出的请求数，含重试和回退）
+llm_call_counter: ContextVar[Optional[List[int]]] = ContextVar("llm_call_counter", default=None)
+
+
+def _count_llm_call():
+    counter = llm_call_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
 
 # 定义五元组的Pydantic模型
 class Quintuple(BaseModel):
@@ -43,6 +53,15 @@ class QuintupleResponse(BaseModel):
     quintuples: List[Quintuple]
 
 
+class BatchQuintupleItem(BaseModel):
+    index: int
+    quintuples: List[Quintuple]
+
+
+class BatchQuintupleResponse(BaseModel):
+    items: List[BatchQuintupleItem]
+
+
 async def extract_quintuples_async(text):
     """异步版本的五元组提取"""
     # 首先尝试使用结构化输出
@@ -74,6 +93,7 @@ async def _extract_quintuples_async_structured(text):
 
         try:
             # 尝试使用结构化输出
+            _count_llm_call()
             completion = await async_client.beta.chat.completions.parse(
                 model=config.api.model,
                 messages=[
@@ -110,6 +130,60 @@ async def _extract_quintuples_async_structured(text):
     return []
 
 
+async def extract_quintuples_batch_async(texts: List[str]) -> List[List[Tuple]]:
+    """批量五元组提取：多段短文本合并为一次结构化请求，按序号拆分回每段的结果
+
+    批量请求失败或返回的序号不完整时，缺失的文本逐条回退到单条提取
+    """
+    if not texts:
+        return []
+    if len(texts) == 1:
+        return [await extract_quintuples_async(texts[0])]
+
+    system_prompt = """
+你是一个专业的中文文本信息抽取专家。你的任务是从给定的多段中文文本中分别抽取五元组关系。
+五元组格式为：(主体, 主体类型, 动作, 客体, 客体类型)。
+
+类型包括但不限于：人物、地点、组织、物品、概念、时间、事件、活动等。
+
+每段文本以 [序号] 开头。请为每一段单独输出一个条目，index 为该段的序号，quintuples 为只从该段中提取的五元组；
+没有可提取关系的段落也要输出 quintuples 为空列表的条目，不要把不同段落的关系混在一起。
+"""
+    numbered = "\n\n".join(f"[{i}] {text}" for i, text in enumerate(texts))
+
+    results: List[List[Tuple]] = [None] * len(texts)
+    try:
+        _count_llm_call()
+        completion = await async_client.beta.chat.completions.parse(
+            model=config.api.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"请分别从以下{len(texts)}段文本中提取五元组：\n\n{numbered}"}
+            ],
+            response_format=BatchQuintupleResponse,
+            max_tokens=config.api.max_tokens,
+            temperature=0.3,
+            timeout=600
+        )
+        parsed = completion.choices[0].message.parsed
+        for item in parsed.items:
+            if 0 <= item.index < len(texts) and results[item.index] is None:
+                results[item.index] = [
+                    (q.subject, q.subject_type, q.predicate, q.object, q.object_type)
+                    for q in item.quintuples
+                ]
+        logger.info(f"批量结构化输出成功，{len(texts)} 段文本共提取到 {sum(len(r) for r in results if r)} 个五元组")
+    except Exception as e:
+        logger.warning(f"批量结构化输出失败，回退到逐条提取: {str(e)}")
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        fallback = await asyncio.gather(*(extract_quintuples_async(texts[i]) for i in missing))
+        for i, quintuples in zip(missing, fallback):
+            results[i] = quintuples
+    return results
+
+
 async def _extract_quintuples_async_fallback(text):
     """传统JSON解析的异步五元组提取（回退方案）"""
     prompt = f"""
@@ -131,6 +205,7 @@ async def _extract_quintuples_async_fallback(text):
 
     for attempt in range(max_retries + 1):
         try:
+            _count_llm_call()
             response = await async_client.chat.completions.create(
                 model=config.api.model,
                 messages=[{"role": "user", "content": prompt}],
@@ -195,6 +270,7 @@ def _extract_quintuples_structured(text):
 
         try:
             # 尝试使用结构化输出
+            _count_llm_call()
             completion = client.beta.chat.completions.parse(
                 model=config.api.model,
                 messages=[
@@ -252,6 +328,7 @@ def _extract_quintuples_fallback(text):
 
     for attempt in range(max_retries + 1):
         try:
+            _count_llm_call()
             response = client.chat.completions.create(
                 model=config.api.model,
                 messages=[{"role": "user", "content": prompt}],
@@ -117,6 +117,11 @@ def store_quintuples(new_quintuples) -> bool:
         # 持久化到文件
         save_quintuples(all_quintuples)
 
+        # 增量更新本地向量索引（仅在启用向量召回时）和图谱增量存储
+        if _vector_recall_enabled():
+            _update_vector_index()
+        _update_graph_store(new_quintuples)
+
         # 同步更新Neo4j图谱数据库（仅在GRAG_ENABLED时）
         success = True
         if graph is not None:
@@ -160,6 +165,63 @@ def get_all_quintuples():
     return load_quintuples()
 
 
+def _vector_recall_enabled():
+    """运行时读取 grag.vector_recall，设置界面修改后立即生效"""
+    try:
+        from system.config import config
+        return bool(getattr(config.grag, 'vector_recall', False))
+    except Exception:
+        return False
+
+
+def _get_vector_index():
+    """获取与五元组文件同目录的向量索引（已与五元组文件对齐），不可用时返回None"""
+    try:
+        from .quintuple_vector_index import get_vector_index
+        return get_vector_index(os.path.dirname(QUINTUPLES_FILE), load_quintuples, QUINTUPLES_FILE)
+    except Exception as e:
+        logger.error(f"向量索引不可用: {e}")
+        return None
+
+
+def _update_vector_index():
+    # 获取索引时按五元组文件对齐：只新增时增量补齐，文件被删除/改写过时重建
+    index = _get_vector_index()
+    if index is not None:
+        logger.info(f"向量索引已与五元组文件对齐，共 {len(index)} 个五元组")
+
+
+def _get_graph_store():
+    """获取与五元组文件同目录的图谱增量存储（心智云图用），不可用时返回None"""
+    try:
+        from .quintuple_graph_store import get_graph_store
+        return get_graph_store(os.path.dirname(QUINTUPLES_FILE), load_quintuples, QUINTUPLES_FILE)
+    except Exception as e:
+        logger.error(f"图谱增量存储不可用: {e}")
+        return None
+
+
+def _update_graph_store(new_quintuples):
+    store = _get_graph_store()
+    if store is None:
+        return
+    try:
+        added = store.add(new_quintuples)
+        # 五元组文件已由本进程写入，不必再对齐
+        store.mark_synced(QUINTUPLES_FILE)
+        logger.info(f"图谱增量存储新增 {added} 条边，共 {store.node_count} 个节点")
+    except Exception as e:
+        logger.error(f"更新图谱增量存储失败: {e}")
+
+
+def query_graph_by_vector(question, top_k=10, threshold=0.0):
+    """本地向量检索五元组，不调用LLM；索引不可用时返回None"""
+    index = _get_vector_index()
+    if index is None or len(index) == 0:
+        return None
+    return [quintuple for quintuple, _ in index.search(question, top_k=top_k, threshold=threshold)]
+
+
 def query_graph_by_keywords(keywords):
     results = []
     if graph is not None:
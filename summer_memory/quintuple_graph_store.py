@@ -0,0 +1,562 @@
+"""
+五元组图谱增量存储 - 心智云图可视化
+
+五元组写入时同步维护节点/边增量文件（追加写的JSONL，与五元组文件放在同一目录）和节点坐标缓存。
+导出时只取一个窗口子图（焦点实体的k跳邻域，或按度数取前N个节点），分块写成数据脚本，
+由静态查看页逐块懒加载；查看页关闭物理模拟，直接使用缓存坐标。
+查看页引用的 vis-network 随仓库附带（lib/），导出时复制到 graph.html 旁边，离线也能打开。
+
+布局是增量的：新节点放在已放置的邻居附近（无邻居时放在黄金角螺旋上），已放置的节点不再移动，
+因此加入新五元组后不需要重新计算整张图的布局。
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+TYPE_COLORS = {
+    '人物': '#FF6B6B',
+    '地点': '#4ECDC4',
+    '组织': '#45B7D1',
+    '物品': '#96CEB4',
+    '概念': '#FFEAA7',
+    '时间': '#DDA0DD',
+    '事件': '#F4A460',
+    '活动': '#FFB347'
+}
+DEFAULT_COLOR = '#CCCCCC'
+
+# 查看页使用的 vis-network（与 pyvis 本地资源相同的 lib/ 目录结构，相对 graph.html 引用）
+VIS_NETWORK_JS = "lib/vis-9.1.2/vis-network.min.js"
+VIS_NETWORK_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), *VIS_NETWORK_JS.split("/"))
+
+VIEWER_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>心智云图</title>
+<script src="__VIS_NETWORK_JS__"></script>
+<style>
+html, body { margin: 0; height: 100%; font-family: sans-serif; }
+#graph { width: 100%; height: 100%; }
+#status { position: fixed; top: 8px; left: 8px; padding: 4px 8px; background: rgba(255,255,255,0.85); z-index: 1; }
+</style>
+</head>
+<body>
+<div id="status">加载中...</div>
+<div id="graph"></div>
+<script>
+const COLORS = __COLORS__;
+const DEFAULT_COLOR = "__DEFAULT_COLOR__";
+const DATA_DIR = "__DATA_DIR__";
+const nodes = new vis.DataSet();
+const edges = new vis.DataSet();
+const network = new vis.Network(document.getElementById("graph"), { nodes: nodes, edges: edges }, {
+  physics: false,
+  nodes: { font: { size: 20 } },
+  edges: { arrows: "to", smooth: false, font: { size: 16, align: "middle" } },
+  interaction: { hideEdgesOnDrag: true, hideEdgesOnZoom: true }
+});
+const status = document.getElementById("status");
+let manifest = null;
+let loaded = 0;
+
+function loadScript(src) {
+  const script = document.createElement("script");
+  script.src = src;
+  document.body.appendChild(script);
+}
+
+function loadChunk(k) {
+  loadScript(DATA_DIR + "/window_" + k + ".js?v=" + manifest.version);
+}
+
+window.loadGraphWindow = function (data) {
+  manifest = data;
+  status.textContent = "窗口 " + data.nodes + "/" + data.total_nodes + " 个节点，" +
+    data.edges + "/" + data.total_edges + " 条边" + (data.focus ? "（焦点：" + data.focus + "）" : "");
+  if (data.chunks > 0) {
+    loadChunk(0);
+  }
+};
+
+window.loadGraphChunk = function (chunk) {
+  nodes.add(chunk.nodes.map(function (n) {
+    return { id: n[0], label: n[1] + "\\n(" + n[2] + ")", color: COLORS[n[2]] || DEFAULT_COLOR, x: n[3], y: n[4] };
+  }));
+  edges.add(chunk.edges.map(function (e) {
+    return { from: e[0], to: e[1], label: e[2] };
+  }));
+  loaded += 1;
+  if (loaded < manifest.chunks) {
+    // 等浏览器绘制完当前块再加载下一块
+    requestAnimationFrame(function () { loadChunk(loaded); });
+  } else {
+    network.fit();
+  }
+};
+
+loadScript(DATA_DIR + "/window.js?t=" + Date.now());
+</script>
+</body>
+</html>
+"""
+
+
+def is_valid_quintuple(quintuple) -> bool:
+    """五个字段都是非空字符串"""
+    return (isinstance(quintuple, (tuple, list)) and len(quintuple) == 5
+            and all(isinstance(x, str) and x.strip() for x in quintuple))
+
+
+def _file_stamp(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _js_call(function: str, payload) -> str:
+    return f"{function}({json.dumps(payload, ensure_ascii=False, separators=(',', ':'))});\n"
+
+
+class QuintupleGraphStore:
+    """五元组图谱增量存储（节点/边增量文件 + 坐标缓存 + 窗口子图导出）"""
+
+    DELTA_FILE = "graph_delta.jsonl"
+    LAYOUT_FILE = "graph_layout.f32"
+    META_FILE = "graph_meta.json"
+    DATA_DIR = "graph_data"
+
+    def __init__(self, store_dir: str, edge_length: float = 120.0):
+        self.store_dir = store_dir
+        self.edge_length = edge_length
+        self._lock = threading.Lock()
+        self._clear()
+        # 最近一次对齐时五元组文件的 [大小, 修改时间]，未变化时跳过对齐
+        self.source_stamp: Optional[List[int]] = None
+
+    def _clear(self):
+        self._names: List[str] = []
+        self._types: List[str] = []
+        self._anchors: List[int] = []
+        self._node_ids: Dict[str, int] = {}
+        self._adjacency: List[List[int]] = []
+        self._edges: List[Tuple[int, int, str]] = []
+        self._items: List[Quintuple] = []
+        self._item_set = set()
+        self._positions = np.zeros((0, 2), dtype=np.float32)
+        self._roots = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, quintuple) -> bool:
+        return tuple(quintuple) in self._item_set
+
+    @property
+    def node_count(self) -> int:
+        return len(self._names)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    # ---------- 布局 ----------
+
+    def _place(self, node_id: int, anchor: int):
+        """计算新节点坐标：有已放置的邻居时放在其附近，否则放在螺旋上"""
+        if anchor >= 0:
+            # 方向由名称哈希决定，同一锚点的多个新邻居散开在不同方向
+            angle = (zlib.crc32(self._names[node_id].encode("utf-8")) % 3600) / 3600 * 2 * math.pi
+            x, y = self._positions[anchor]
+            self._positions[node_id] = (x + self.edge_length * math.cos(angle),
+                                        y + self.edge_length * math.sin(angle))
+        else:
+            radius = self.edge_length * 2 * math.sqrt(self._roots)
+            angle = self._roots * GOLDEN_ANGLE
+            self._positions[node_id] = (radius * math.cos(angle), radius * math.sin(angle))
+            self._roots += 1
+
+    # ---------- 持久化 ----------
+
+    def load(self) -> bool:
+        """从增量文件重放图谱，坐标优先取缓存；文件缺失或损坏时返回False"""
+        try:
+            with open(self._path(self.DELTA_FILE), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            try:
+                cached = np.fromfile(self._path(self.LAYOUT_FILE), dtype=np.float32).reshape(-1, 2)
+            except FileNotFoundError:
+                cached = np.zeros((0, 2), dtype=np.float32)
+            with open(self._path(self.META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"加载图谱增量文件失败，将重建: {e}")
+            return False
+
+        truncated = False
+        with self._lock:
+            self._clear()
+            try:
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 写入中途中断的末行
+                        truncated = True
+                        break
+                    if "n" in record:
+                        name, entity_type, anchor = record["n"]
+                        node_id = self._new_node(name, entity_type, anchor, place=False)
+                        if node_id < len(cached):
+                            self._positions[node_id] = cached[node_id]
+                            if anchor < 0:
+                                self._roots += 1
+                        else:
+                            self._place(node_id, anchor)
+                    else:
+                        self._new_edge(tuple(record["e"]))
+            except Exception as e:
+                logger.warning(f"图谱增量文件不一致，将重建: {e}")
+                self._clear()
+                return False
+            if truncated or len(cached) != self.node_count:
+                logger.warning("图谱增量文件与坐标缓存不一致，按已恢复的部分重写")
+                self._rewrite()
+            else:
+                self.source_stamp = meta.get("source_stamp")
+        logger.info(f"已加载图谱增量存储: {self.node_count} 个节点，{len(self._edges)} 条边")
+        return True
+
+    def _node_line(self, node_id: int) -> str:
+        record = {"n": [self._names[node_id], self._types[node_id], self._anchors[node_id]]}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def _edge_line(self, quintuple: Quintuple) -> str:
+        return json.dumps({"e": list(quintuple)}, ensure_ascii=False) + "\n"
+
+    def _write_meta(self):
+        with open(self._path(self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"nodes": self.node_count, "edges": len(self._edges),
+                       "edge_length": self.edge_length, "source_stamp": self.source_stamp}, f)
+
+    def _rewrite(self):
+        """整体重写增量文件与坐标缓存（调用方持有锁）"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        node_written = 0
+        with open(self._path(self.DELTA_FILE), "w", encoding="utf-8") as f:
+            # 节点记录写在首次引用它的边之前，重放时节点编号不变
+            for item in self._items:
+                src, dst = self._node_ids[item[0]], self._node_ids[item[3]]
+                while node_written <= max(src, dst):
+                    f.write(self._node_line(node_written))
+                    node_written += 1
+                f.write(self._edge_line(item))
+        self._positions[:self.node_count].tofile(self._path(self.LAYOUT_FILE))
+        self._write_meta()
+
+    def _append(self, first_node: int, items: List[Quintuple], node_order: List[Tuple[int, int]]):
+        """增量追加写入：node_order 为 [(新节点编号, 其后第一条引用它的边序号)]"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(self._path(self.DELTA_FILE), "a", encoding="utf-8") as f:
+            pending = iter(node_order)
+            current = next(pending, None)
+            for index, item in enumerate(items):
+                while current is not None and current[1] == index:
+                    f.write(self._node_line(current[0]))
+                    current = next(pending, None)
+                f.write(self._edge_line(item))
+        with open(self._path(self.LAYOUT_FILE), "ab") as f:
+            self._positions[first_node:self.node_count].tofile(f)
+        self._write_meta()
+
+    # ---------- 更新 ----------
+
+    def _new_node(self, name: str, entity_type: str, anchor: int, place: bool = True) -> int:
+        node_id = len(self._names)
+        self._names.append(name)
+        self._types.append(entity_type)
+        self._anchors.append(anchor)
+        self._node_ids[name] = node_id
+        self._adjacency.append([])
+        if node_id >= len(self._positions):
+            grown = np.zeros((max(1024, len(self._positions) * 2), 2), dtype=np.float32)
+            grown[:node_id] = self._positions[:node_id]
+            self._positions = grown
+        if place:
+            self._place(node_id, anchor)
+        return node_id
+
+    def _new_edge(self, item: Quintuple):
+        """加入一条边，端点必须已存在（节点类型以首次出现为准）"""
+        head, _, rel, tail, _ = item
+        src, dst = self._node_ids[head], self._node_ids[tail]
+        edge_id = len(self._edges)
+        self._edges.append((src, dst, rel))
+        self._items.append(item)
+        self._item_set.add(item)
+        self._adjacency[src].append(edge_id)
+        if dst != src:
+            self._adjacency[dst].append(edge_id)
+
+    def add(self, quintuples: Iterable[Sequence[str]], persist: bool = True) -> int:
+        """增量加入五元组（已存在或无效的跳过），返回新增数量"""
+        with self._lock:
+            first_node = self.node_count
+            new_items: List[Quintuple] = []
+            node_order: List[Tuple[int, int]] = []
+            for q in quintuples:
+                if not is_valid_quintuple(q):
+                    continue
+                item = tuple(q)
+                if item in self._item_set:
+                    continue
+                head, head_type, _, tail, tail_type = item
+                src = self._node_ids.get(head)
+                if src is None:
+                    src = self._new_node(head, head_type, self._node_ids.get(tail, -1))
+                    node_order.append((src, len(new_items)))
+                if tail not in self._node_ids:
+                    node_order.append((self._new_node(tail, tail_type, src), len(new_items)))
+                self._new_edge(item)
+                new_items.append(item)
+            if not new_items:
+                return 0
+            if persist:
+                try:
+                    self._append(first_node, new_items, node_order)
+                except Exception as e:
+                    logger.error(f"图谱增量文件写入失败: {e}")
+            return len(new_items)
+
+    def rebuild(self, quintuples: Iterable[Sequence[str]]) -> int:
+        """清空并从五元组全集重建（坐标重新计算）"""
+        with self._lock:
+            self._clear()
+        added = self.add(quintuples, persist=False)
+        with self._lock:
+            self._rewrite()
+        logger.info(f"图谱增量存储重建完成: {self.node_count} 个节点，{added} 条边")
+        return added
+
+    def mark_synced(self, source_file: str):
+        """记录五元组文件当前状态，表示存储已与其对齐"""
+        with self._lock:
+            self.source_stamp = _file_stamp(source_file)
+            try:
+                os.makedirs(self.store_dir, exist_ok=True)
+                self._write_meta()
+            except Exception as e:
+                logger.error(f"图谱元数据写入失败: {e}")
+
+    def sync(self, source_file: str, all_quintuples_loader) -> int:
+        """五元组文件在本进程之外被修改过时与其对齐：只是新增了五元组时增量补齐；
+        文件缺失、条数变少或不再包含存储中的全部五元组（被删除/改写）时整体重建"""
+        stamp = _file_stamp(source_file)
+        if stamp is not None and stamp == self.source_stamp:
+            return 0
+        quintuples = [] if stamp is None else [tuple(q) for q in all_quintuples_loader() if is_valid_quintuple(q)]
+        with self._lock:
+            superset = len(quintuples) >= len(self._items) and self._item_set.issubset(quintuples)
+        if superset:
+            added = self.add(quintuples)
+            if added:
+                logger.info(f"图谱增量存储补齐 {added} 个五元组")
+        else:
+            logger.info("五元组文件缺失或已删除/改写部分五元组，重建图谱增量存储")
+            added = self.rebuild(quintuples)
+        self.mark_synced(source_file)
+        return added
+
+    # ---------- 窗口子图 ----------
+
+    def degree(self, node_id: int) -> int:
+        return len(self._adjacency[node_id])
+
+    def _neighbors(self, node_id: int) -> Iterable[int]:
+        for edge_id in self._adjacency[node_id]:
+            src, dst, _ = self._edges[edge_id]
+            yield dst if src == node_id else src
+
+    def top_nodes(self, n: int) -> List[int]:
+        """度数最高的前n个节点"""
+        if n >= self.node_count:
+            return list(range(self.node_count))
+        degrees = np.fromiter((len(a) for a in self._adjacency), dtype=np.int64, count=self.node_count)
+        top = np.argpartition(-degrees, n - 1)[:n]
+        return top[np.argsort(-degrees[top], kind="stable")].tolist()
+
+    def neighborhood(self, focus: str, hops: int = 2, max_nodes: Optional[int] = None) -> List[int]:
+        """焦点实体的k跳邻域（逐层扩展，超出上限时同层优先保留度数高的节点）"""
+        start = self._node_ids.get(focus)
+        if start is None:
+            return []
+        limit = max_nodes or self.node_count
+        selected = [start]
+        seen = {start}
+        frontier = [start]
+        for _ in range(hops):
+            layer = []
+            for node_id in frontier:
+                for neighbor in self._neighbors(node_id):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        layer.append(neighbor)
+            if not layer:
+                break
+            room = limit - len(selected)
+            if len(layer) >= room:
+                layer.sort(key=self.degree, reverse=True)
+                selected.extend(layer[:room])
+                break
+            selected.extend(layer)
+            frontier = layer
+        return selected
+
+    def window(self, focus: Optional[str] = None, hops: int = 2,
+               max_nodes: Optional[int] = None) -> Tuple[List[int], List[int]]:
+        """返回窗口内的节点编号和两端都在窗口内的边编号；焦点不存在时按度数取前N个节点"""
+        with self._lock:
+            node_ids = self.neighborhood(focus, hops, max_nodes) if focus else []
+            if not node_ids:
+                node_ids = self.top_nodes(max_nodes or self.node_count)
+            if len(node_ids) == self.node_count:
+                return node_ids, list(range(len(self._edges)))
+            inside = set(node_ids)
+            edge_ids = set()
+            for node_id in node_ids:
+                for edge_id in self._adjacency[node_id]:
+                    src, dst, _ = self._edges[edge_id]
+                    if src in inside and dst in inside:
+                        edge_ids.add(edge_id)
+            return node_ids, sorted(edge_ids)
+
+    # ---------- 导出 ----------
+
+    def export_view(self, out_dir: str, focus: Optional[str] = None, hops: int = 2,
+                    max_nodes: Optional[int] = None, chunk_size: int = 2000) -> Dict[str, object]:
+        """
+        导出窗口子图：out_dir/graph.html（静态查看页，内容不变时不重写）
+        + out_dir/graph_data/window.js（清单）和 window_{k}.js（分块数据）
+        + out_dir/lib/（查看页引用的 vis-network，缺失或不同时复制）
+        """
+        node_ids, edge_ids = self.window(focus, hops, max_nodes)
+        data_dir = os.path.join(out_dir, self.DATA_DIR)
+        os.makedirs(data_dir, exist_ok=True)
+
+        # 节点按顺序分块；每条边放进两个端点都已加载的那一块
+        chunk_of = {node_id: index // chunk_size for index, node_id in enumerate(node_ids)}
+        chunks = [{"nodes": [], "edges": []} for _ in range((len(node_ids) + chunk_size - 1) // chunk_size)]
+        with self._lock:
+            for node_id in node_ids:
+                x, y = self._positions[node_id]
+                chunks[chunk_of[node_id]]["nodes"].append(
+                    [node_id, self._names[node_id], self._types[node_id], round(float(x), 1), round(float(y), 1)])
+            for edge_id in edge_ids:
+                src, dst, rel = self._edges[edge_id]
+                chunks[max(chunk_of[src], chunk_of[dst])]["edges"].append([src, dst, rel])
+            total_nodes, total_edges = self.node_count, len(self._edges)
+
+        written = 0
+        for index, chunk in enumerate(chunks):
+            written += self._write_text(os.path.join(data_dir, f"window_{index}.js"),
+                                        _js_call("loadGraphChunk", chunk))
+        # 清理上一次导出多出来的分块
+        index = len(chunks)
+        while os.path.exists(os.path.join(data_dir, f"window_{index}.js")):
+            os.remove(os.path.join(data_dir, f"window_{index}.js"))
+            index += 1
+
+        manifest = {
+            "version": f"{total_nodes}-{total_edges}-{zlib.crc32(repr((focus, hops, max_nodes)).encode('utf-8'))}",
+            "focus": focus if focus in self._node_ids else None,
+            "nodes": len(node_ids),
+            "edges": len(edge_ids),
+            "total_nodes": total_nodes,
+            "total_edges": total_edges,
+            "chunks": len(chunks),
+        }
+        written += self._write_text(os.path.join(data_dir, "window.js"), _js_call("loadGraphWindow", manifest))
+
+        html_file = os.path.join(out_dir, "graph.html")
+        viewer = (VIEWER_TEMPLATE
+                  .replace("__COLORS__", json.dumps(TYPE_COLORS, ensure_ascii=False))
+                  .replace("__DEFAULT_COLOR__", DEFAULT_COLOR)
+                  .replace("__DATA_DIR__", self.DATA_DIR)
+                  .replace("__VIS_NETWORK_JS__", VIS_NETWORK_JS))
+        try:
+            with open(html_file, "r", encoding="utf-8") as f:
+                viewer_changed = f.read() != viewer
+        except FileNotFoundError:
+            viewer_changed = True
+        if viewer_changed:
+            written += self._write_text(html_file, viewer)
+        written += self._copy_viewer_lib(out_dir)
+
+        manifest["html_file"] = html_file
+        manifest["bytes_written"] = written
+        return manifest
+
+    @staticmethod
+    def _copy_viewer_lib(out_dir: str) -> int:
+        """把 vis-network 复制到 graph.html 旁边，已存在且大小相同时跳过，返回写出字节数"""
+        target = os.path.join(out_dir, *VIS_NETWORK_JS.split("/"))
+        size = os.path.getsize(VIS_NETWORK_SOURCE)
+        if os.path.exists(target) and os.path.getsize(target) == size:
+            return 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(VIS_NETWORK_SOURCE, target)
+        return size
+
+    @staticmethod
+    def _write_text(path: str, text: str) -> int:
+        data = text.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+
+_graph_store: Optional[QuintupleGraphStore] = None
+_graph_store_lock = threading.Lock()
+
+
+def get_graph_store(store_dir: str, all_quintuples_loader=None,
+                    source_file: Optional[str] = None) -> QuintupleGraphStore:
+    """获取全局图谱增量存储，首次调用时加载并与五元组全集对齐（给出 source_file 时文件未变化则跳过）"""
+    global _graph_store
+    if _graph_store is not None:
+        return _graph_store
+    with _graph_store_lock:
+        if _graph_store is None:
+            store = QuintupleGraphStore(store_dir)
+            loaded = store.load()
+            if all_quintuples_loader is not None:
+                if not loaded:
+                    store.rebuild(all_quintuples_loader())
+                    if source_file:
+                        store.mark_synced(source_file)
+                elif source_file:
+                    store.sync(source_file, all_quintuples_loader)
+                else:
+                    # 补齐增量存储建立前已存储的五元组
+                    store.add(all_quintuples_loader())
+            _graph_store = store
+    return _graph_store
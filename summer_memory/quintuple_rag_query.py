@@ -25,8 +25,37 @@ def set_context(texts):
     recent_context = texts[:context_length]  # 限制上下文长度
     logger.info(f"更新查询上下文: {len(recent_context)} 条记录")
 
+def _format_answer(quintuples):
+    answer = "我在知识图谱中找到以下相关信息：\n\n"
+    for h, h_type, r, t, t_type in quintuples:
+        answer += f"- {h}({h_type}) —[{r}]→ {t}({t_type})\n"
+    return answer
+
+
+def query_knowledge_local(user_question):
+    """使用本地向量索引召回五元组，一次本地检索，不调用LLM；索引不可用或未命中时返回None"""
+    from .quintuple_graph import query_graph_by_vector
+    quintuples = query_graph_by_vector(
+        user_question,
+        top_k=getattr(config.grag, 'vector_top_k', 10),
+        threshold=getattr(config.grag, 'vector_similarity_threshold', 0.3)
+    )
+    if quintuples is None:
+        return None
+    if not quintuples:
+        # 相似度低于阈值不代表图谱中没有，交给关键词路径再查一次
+        logger.info(f"向量索引未找到相关五元组，改用关键词查询: {user_question}")
+        return None
+    return _format_answer(quintuples)
+
+
 def query_knowledge(user_question):
-    """使用 DeepSeek API 提取关键词并查询知识图谱"""
+    """查询知识图谱：优先本地向量召回，不可用或未命中时使用 DeepSeek API 提取关键词查询"""
+    if getattr(config.grag, 'vector_recall', False):
+        local_answer = query_knowledge_local(user_question)
+        if local_answer is not None:
+            return local_answer
+
     context_str = "\n".join(recent_context) if recent_context else "无上下文"
     prompt = (
         f"基于以下上下文和用户问题，提取与知识图谱相关的关键词（如人物、物体、关系、实体类型），"
@@ -98,10 +127,7 @@ def query_knowledge(user_question):
             logger.info(f"未找到相关五元组: {keywords}")
             return "未在知识图谱中找到相关信息。"
 
-        answer = "我在知识图谱中找到以下相关信息：\n\n"
-        for h, h_type, r, t, t_type in quintuples:
-            answer += f"- {h}({h_type}) —[{r}]→ {t}({t_type})\n"
-        return answer
+        return _format_answer(quintuples)
 
     except requests.exceptions.HTTPError as e:
         logger.error(f"DeepSeek API HTTP 错误: {e}")
@@ -0,0 +1,285 @@
+"""
+五元组向量索引 - 本地记忆召回
+
+把每个五元组拼成文本后向量化，存入追加写的本地索引（与五元组文件放在同一目录）。
+召回时只做一次本地向量检索，不需要调用LLM提取关键词。
+
+默认使用哈希向量化器（字符n-gram + 特征哈希），纯CPU、离线、结果确定；
+也可以通过 set_embedder 替换为任何提供 signature()/dim/embed(texts) 的向量模型。
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .quintuple_graph_store import _file_stamp, is_valid_quintuple
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+_WORD_RE = re.compile(r"[a-z0-9_]+|[^\sa-z0-9_]", re.IGNORECASE)
+
+
+def quintuple_to_text(quintuple: Sequence[str]) -> str:
+    """五元组转为用于向量化的文本（类型词在各五元组间高度重复，不参与向量化）"""
+    head, _, rel, tail, _ = quintuple
+    return f"{head} {rel} {tail}"
+
+
+class HashingEmbedder:
+    """哈希向量化器：英文按词、中文按字切分，取1~2元组合做特征哈希，L2归一化"""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 256, max_ngram: int = 2):
+        self.dim = dim
+        self.max_ngram = max_ngram
+
+    def signature(self) -> str:
+        """向量空间签名，签名变化时索引需要重建"""
+        return f"{self.name}-{self.dim}-{self.max_ngram}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _WORD_RE.findall(text.lower())
+        features = list(tokens)
+        for n in range(2, self.max_ngram + 1):
+            features.extend("".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # 低位决定维度，高位决定符号，减少哈希冲突带来的偏差
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class QuintupleVectorIndex:
+    """五元组向量索引（numpy内积检索，追加写持久化）"""
+
+    VECTORS_FILE = "quintuple_index.vec"
+    ITEMS_FILE = "quintuple_index.jsonl"
+    META_FILE = "quintuple_index.meta.json"
+
+    def __init__(self, index_dir: str, embedder=None):
+        self.index_dir = index_dir
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        self._items: List[Quintuple] = []
+        self._item_set = set()
+        self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._size = 0
+        # 最近一次对齐时五元组文件的 [大小, 修改时间]
+        self.source_stamp: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, quintuple) -> bool:
+        return tuple(quintuple) in self._item_set
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    # ---------- 持久化 ----------
+
+    def load(self) -> bool:
+        """从磁盘加载索引，签名不一致或文件缺失时返回False"""
+        try:
+            with open(self._path(self.META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("signature") != self.embedder.signature():
+                logger.info("向量索引签名变化，需要重建")
+                return False
+
+            with open(self._path(self.ITEMS_FILE), "r", encoding="utf-8") as f:
+                items = [tuple(json.loads(line)) for line in f if line.strip()]
+            vectors = np.fromfile(self._path(self.VECTORS_FILE), dtype=np.float32)
+            vectors = vectors.reshape(-1, self.embedder.dim)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"加载向量索引失败，将重建: {e}")
+            return False
+
+        # 两个文件写入中途中断时，以较短的一方为准
+        size = min(len(items), len(vectors))
+        with self._lock:
+            self._items = items[:size]
+            self._item_set = set(self._items)
+            self._vectors = np.array(vectors[:size], dtype=np.float32)
+            self._size = size
+            self.source_stamp = meta.get("source_stamp")
+        if size != len(items) or size != len(vectors):
+            logger.warning(f"向量索引文件不一致，截断到 {size} 条")
+            self._rewrite()
+        logger.info(f"已加载向量索引: {size} 条五元组")
+        return True
+
+    def _write_meta(self):
+        with open(self._path(self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"signature": self.embedder.signature(), "dim": self.embedder.dim,
+                       "count": self._size, "source_stamp": self.source_stamp}, f)
+
+    def _rewrite(self):
+        """整体重写索引文件"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._path(self.ITEMS_FILE), "w", encoding="utf-8") as f:
+            for item in self._items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._vectors[:self._size].tofile(self._path(self.VECTORS_FILE))
+        self._write_meta()
+
+    def _append(self, items: List[Quintuple], vectors: np.ndarray):
+        """增量追加写入"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._path(self.ITEMS_FILE), "a", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        with open(self._path(self.VECTORS_FILE), "ab") as f:
+            vectors.astype(np.float32).tofile(f)
+        self._write_meta()
+
+    # ---------- 更新与检索 ----------
+
+    def _add_in_memory(self, items: List[Quintuple], vectors: np.ndarray):
+        needed = self._size + len(items)
+        if needed > len(self._vectors):
+            capacity = max(needed, len(self._vectors) * 2, 1024)
+            grown = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size:needed] = vectors
+        self._items.extend(items)
+        self._item_set.update(items)
+        self._size = needed
+
+    def add(self, quintuples: Iterable[Sequence[str]], persist: bool = True) -> int:
+        """增量加入五元组（已存在的跳过），返回新增数量"""
+        with self._lock:
+            new_items = []
+            seen = set()
+            for q in quintuples:
+                item = tuple(q)
+                if len(item) != 5 or item in self._item_set or item in seen:
+                    continue
+                seen.add(item)
+                new_items.append(item)
+            if not new_items:
+                return 0
+
+            vectors = self.embedder.embed([quintuple_to_text(q) for q in new_items])
+            self._add_in_memory(new_items, vectors)
+            if persist:
+                try:
+                    self._append(new_items, vectors)
+                except Exception as e:
+                    logger.error(f"向量索引写入失败: {e}")
+            return len(new_items)
+
+    def rebuild(self, quintuples: Iterable[Sequence[str]]) -> int:
+        """清空并从五元组全集重建索引"""
+        with self._lock:
+            self._items = []
+            self._item_set = set()
+            self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            self._size = 0
+        added = self.add(quintuples, persist=False)
+        with self._lock:
+            self._rewrite()
+        logger.info(f"向量索引重建完成: {added} 条五元组")
+        return added
+
+    def mark_synced(self, source_file: str):
+        """记录五元组文件当前状态，表示索引已与其对齐"""
+        with self._lock:
+            self.source_stamp = _file_stamp(source_file)
+            try:
+                os.makedirs(self.index_dir, exist_ok=True)
+                self._write_meta()
+            except Exception as e:
+                logger.error(f"向量索引元数据写入失败: {e}")
+
+    def sync(self, source_file: str, all_quintuples_loader) -> int:
+        """五元组文件在上次对齐后被修改过时与其对齐：只是新增了五元组时增量补齐；
+        文件缺失、条数变少或不再包含索引中的全部五元组（被删除/改写）时整体重建"""
+        stamp = _file_stamp(source_file)
+        if stamp is not None and stamp == self.source_stamp:
+            return 0
+        quintuples = [] if stamp is None else [tuple(q) for q in all_quintuples_loader() if is_valid_quintuple(q)]
+        with self._lock:
+            superset = len(quintuples) >= len(self._items) and self._item_set.issubset(quintuples)
+        if superset:
+            added = self.add(quintuples)
+            if added:
+                logger.info(f"向量索引补齐 {added} 个五元组")
+        else:
+            logger.info("五元组文件缺失或已删除/改写部分五元组，重建向量索引")
+            added = self.rebuild(quintuples)
+        self.mark_synced(source_file)
+        return added
+
+    def search(self, query: str, top_k: int = 10, threshold: float = 0.0) -> List[Tuple[Quintuple, float]]:
+        """检索与查询最相近的五元组，返回[(五元组, 相似度)]，按相似度降序"""
+        if not query or top_k <= 0:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            size = self._size
+            if size == 0:
+                return []
+            scores = self._vectors[:size] @ query_vector
+            k = min(top_k, size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._items[i], float(scores[i])) for i in top if scores[i] >= threshold]
+
+
+_vector_index: Optional[QuintupleVectorIndex] = None
+_vector_index_lock = threading.Lock()
+_embedder = None
+
+
+def set_embedder(embedder):
+    """替换向量模型，下次获取索引时按新签名加载或重建"""
+    global _embedder, _vector_index
+    with _vector_index_lock:
+        _embedder = embedder
+        _vector_index = None
+
+
+def get_vector_index(index_dir: str, all_quintuples_loader=None,
+                     source_file: Optional[str] = None) -> QuintupleVectorIndex:
+    """获取全局向量索引，首次调用时加载并与五元组全集对齐；
+    给出 source_file 时每次获取都检查文件是否变化，文件被删除/改写后重建"""
+    global _vector_index
+    index = _vector_index
+    if index is None:
+        with _vector_index_lock:
+            if _vector_index is None:
+                index = QuintupleVectorIndex(index_dir, _embedder)
+                loaded = index.load()
+                if all_quintuples_loader is not None:
+                    if not loaded:
+                        index.rebuild(all_quintuples_loader())
+                        if source_file:
+                            index.mark_synced(source_file)
+                    elif not source_file:
+                        # 补齐索引建立前已存储的五元组
+                        index.add(all_quintuples_loader())
+                _vector_index = index
+            index = _vector_index
+    if source_file and all_quintuples_loader is not None:
+        index.sync(source_file, all_quintuples_loader)
+    return index
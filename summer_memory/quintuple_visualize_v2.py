@@ -1,4 +1,3 @@
-from pyvis.network import Network
 import webbrowser
 import json
 import os
@@ -6,12 +5,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+JSON_FILE = "logs/knowledge_graph/quintuples.json"
+
 def load_quintuples_from_json():
     """
     直接从JSON文件中读取五元组数据，解耦数据库依赖
     """
     try:
-        json_file = "logs/knowledge_graph/quintuples.json"
+        json_file = JSON_FILE
         print(f"尝试读取 {json_file} 文件...")
         if not os.path.exists(json_file):
             print(f"错误：{json_file} 文件不存在！")
@@ -33,93 +34,44 @@ def load_quintuples_from_json():
         print(f"错误：读取文件时发生异常 - {e}")
         return set()
 
-def visualize_quintuples():
+def _view_settings(max_nodes, hops):
+    """未指定时从配置读取窗口大小"""
+    try:
+        from system.config import config
+        max_nodes = max_nodes or getattr(config.grag, 'graph_view_max_nodes', 500)
+        hops = hops or getattr(config.grag, 'graph_view_hops', 2)
+    except Exception:
+        max_nodes = max_nodes or 500
+        hops = hops or 2
+    return max_nodes, hops
+
+
+def visualize_quintuples(focus=None, hops=None, max_nodes=None):
     """
-    直接从JSON文件中读取所有五元组，并生成可视化图谱 graph.html
-    解耦版本：不依赖Neo4j数据库，直接从JSON文件读取数据
+    生成可视化图谱 graph.html（心智云图）
+    从五元组增量存储中取一个窗口子图导出：给出 focus 时为该实体的 hops 跳邻域，
+    否则为度数最高的 max_nodes 个节点；节点坐标使用缓存，查看页分块懒加载数据。
     """
     try:
-        print("开始读取五元组数据...")
-        quintuples = load_quintuples_from_json()
-        print(f"读取到 {len(quintuples)} 条原始数据")
-        
-        if not quintuples:
+        from .quintuple_graph_store import get_graph_store
+
+        out_dir = os.path.dirname(JSON_FILE)
+        os.makedirs(out_dir, exist_ok=True)
+        # 五元组文件未变化时不重新读取，变化时只补齐新增部分
+        store = get_graph_store(out_dir, load_quintuples_from_json, JSON_FILE)
+        store.sync(JSON_FILE, load_quintuples_from_json)
+
+        if len(store) == 0:
             logger.warning("从JSON文件中未获取到任何五元组，无法生成可视化图谱")
             print("未获取到任何五元组，无法生成图谱。")
             return
-        
-        logger.info(f"从JSON文件获取到 {len(quintuples)} 条五元组进行可视化")
-
-        # 过滤非法五元组
-        print("开始过滤无效五元组...")
-        valid_quintuples = [
-            t for t in quintuples
-            if isinstance(t, tuple) and len(t) == 5 and all(isinstance(x, str) and x.strip() for x in t)
-        ]
-        print(f"过滤后剩余 {len(valid_quintuples)} 条有效五元组")
-        
-        if not valid_quintuples:
-            print("错误：没有有效的五元组数据！")
-            return
-        
-        print("开始创建网络图...")
-        net = Network(height='1600px', width='100%', notebook=False)
-        net.use_template = False
-        net.barnes_hut()
-        net.set_options("""
-        var options = {
-          "physics": {
-            "barnesHut": {
-              "gravitationalConstant": -8000,
-              "springLength": 100,
-              "springConstant": 0.04
-            },
-            "minVelocity": 0.75
-          }
-        }
-        """)
-
-        added_nodes = set()
-        # 定义不同实体类型的颜色
-        type_colors = {
-            '人物': '#FF6B6B',
-            '地点': '#4ECDC4', 
-            '组织': '#45B7D1',
-            '物品': '#96CEB4',
-            '概念': '#FFEAA7',
-            '时间': '#DDA0DD',
-            '事件': '#F4A460',
-            '活动': '#FFB347'
-        }
-        default_color = '#CCCCCC'
-        
-        print("开始构建图谱节点和边...")
-        edge_count = 0
-        for head, head_type, rel, tail, tail_type in valid_quintuples:
-            # 添加主体节点
-            if head not in added_nodes:
-                head_color = type_colors.get(head_type, default_color)
-                net.add_node(head, label=f"{head}\n({head_type})", color=head_color, font={'size': 20})
-                added_nodes.add(head)
-            
-            # 添加客体节点
-            if tail not in added_nodes:
-                tail_color = type_colors.get(tail_type, default_color)
-                net.add_node(tail, label=f"{tail}\n({tail_type})", color=tail_color, font={'size': 20})
-                added_nodes.add(tail)
-            
-            # 添加关系边
-            net.add_edge(head, tail, label=rel, length=120, font={'size': 18})
-            edge_count += 1
 
-        print(f"图谱构建完成：{len(added_nodes)} 个节点，{edge_count} 条边")
-        print("正在生成HTML文件...")
-        # 确保目录存在
-        import os
-        os.makedirs("logs/knowledge_graph", exist_ok=True)
-        
-        html_file = "logs/knowledge_graph/graph.html"
-        net.write_html(html_file)
+        max_nodes, hops = _view_settings(max_nodes, hops)
+        print("开始导出图谱窗口...")
+        view = store.export_view(out_dir, focus=focus, hops=hops, max_nodes=max_nodes)
+        print(f"图谱导出完成：展示 {view['nodes']}/{view['total_nodes']} 个节点，"
+              f"{view['edges']}/{view['total_edges']} 条边，分 {view['chunks']} 块")
+        html_file = view['html_file']
         print(f"HTML文件生成完成：{html_file}")
 
         try:
@@ -4,6 +4,7 @@ import threading
 import time
 from typing import Dict, List, Optional, Callable, Any, Tuple
 from dataclasses import dataclass
+from collections import OrderedDict
 from enum import Enum
 import hashlib
 import traceback
@@ -15,8 +16,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 try:
     from system.config import config
 except ImportError:
+    config = None
     logger = logging.getLogger(__name__)
     logger.warning("无法导入 config 模块，使用默认设置")
+try:
+    from system.metrics import GRAG_BACKLOG
+except ImportError:
+    GRAG_BACKLOG = None
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +53,44 @@ class ExtractionTask:
     future: Optional[asyncio.Future] = None
 
 
+class TimedLock:
+    """asyncio.Lock 包装：统计获取次数、等待时长与持有时长，用于观察锁竞争"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._acquired_at = 0.0
+        self.acquisitions = 0
+        self.wait_total = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        await self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        self.wait_total += self._acquired_at - start
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        held = time.perf_counter() - self._acquired_at
+        self.acquisitions += 1
+        self.hold_total += held
+        if held > self.hold_max:
+            self.hold_max = held
+        self._lock.release()
+
+    def stats(self) -> Dict:
+        return {
+            "lock_acquisitions": self.acquisitions,
+            "lock_wait_ms": round(self.wait_total * 1000, 3),
+            "lock_hold_ms": round(self.hold_total * 1000, 3),
+            "lock_hold_max_ms": round(self.hold_max * 1000, 3),
+        }
+
+
 class QuintupleTaskManager:
     """五元组提取任务管理器 - 重构版"""
 
@@ -65,18 +109,34 @@ class QuintupleTaskManager:
             self.auto_cleanup_hours = 24
             self.enabled = True
 
+        # 微批处理与已完成任务淘汰设置（配置缺失时使用默认值）
+        grag_config = getattr(config, "grag", None)
+        self.batch_size = getattr(grag_config, "extract_batch_size", 4)
+        self.batch_wait = getattr(grag_config, "extract_batch_wait", 0.2)
+        self.batch_max_chars = getattr(grag_config, "extract_batch_max_chars", 2000)
+        self.finished_task_ttl = getattr(grag_config, "finished_task_ttl", 600)
+        self.max_finished_tasks = getattr(grag_config, "max_finished_tasks", 1000)
+
         # 任务存储
         self.tasks: Dict[str, ExtractionTask] = {}
+        # 文本哈希 -> 进行中任务ID，用于O(1)去重
+        self._active_by_hash: Dict[str, str] = {}
+        # 已结束任务，按结束顺序排列，用于按年龄/数量淘汰
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
         self.task_queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if GRAG_BACKLOG is not None:
+            GRAG_BACKLOG.set_function(self.task_queue.qsize)
 
         # 工作协程管理
         self.worker_tasks: List[asyncio.Task] = []
         self.is_running = False
-        self.lock = asyncio.Lock()
+        self.lock = TimedLock()
 
         # 统计信息
         self.completed_tasks = 0
         self.failed_tasks = 0
+        self.llm_calls = 0
+        self.batched_tasks = 0
 
         # 回调函数
         self.on_task_completed: Optional[Callable] = None
@@ -183,27 +243,27 @@ class QuintupleTaskManager:
             logger.warning("任务管理器未运行，尝试启动...")
             await self.start()  # 确保任务管理器已启动
 
-        # 检查重复任务
-        async with self.lock:
-            for task in self.tasks.values():
-                if task.text_hash == text_hash and task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
-                    logger.info(f"发现重复任务: {task.task_id}")
-                    return task.task_id
-
-        # 创建新任务
-        task_id = self._generate_task_id(text)
-        task = ExtractionTask(
-            task_id=task_id,
-            text=text,
-            text_hash=text_hash,
-            status=TaskStatus.PENDING,
-            created_at=time.time(),
-            future=asyncio.Future()
-        )
-
-        # 添加到任务字典
+        # 检查重复任务并登记新任务（哈希索引，O(1)）
         async with self.lock:
+            existing_id = self._active_by_hash.get(text_hash)
+            if existing_id is not None:
+                logger.info(f"发现重复任务: {existing_id}")
+                return existing_id
+
+            # 创建新任务
+            task_id = self._generate_task_id(text)
+            task = ExtractionTask(
+                task_id=task_id,
+                text=text,
+                text_hash=text_hash,
+                status=TaskStatus.PENDING,
+                created_at=time.time(),
+                future=asyncio.Future()
+            )
+
+            # 添加到任务字典
             self.tasks[task_id] = task
+            self._active_by_hash[text_hash] = task_id
 
         logger.info(f"添加新任务: {task_id} (长度={len(text)})")
 
@@ -219,6 +279,7 @@ class QuintupleTaskManager:
             logger.error(f"加入队列失败: {task_id}, 错误: {e}")
             async with self.lock:
                 del self.tasks[task_id]
+                self._active_by_hash.pop(text_hash, None)
             raise RuntimeError("加入队列失败")
 
     async def get_task_result(self, task_id: str, timeout: float = None) -> Tuple[List, str]:
@@ -245,6 +306,137 @@ class QuintupleTaskManager:
         except asyncio.CancelledError:
             return None, "任务被取消"
 
+    def _mark_finished(self, task: ExtractionTask):
+        """登记已结束任务并淘汰过期/超量的已结束任务（需持有锁）"""
+        if self._active_by_hash.get(task.text_hash) == task.task_id:
+            del self._active_by_hash[task.text_hash]
+        self._finished[task.task_id] = task.completed_at or time.time()
+        self._finished.move_to_end(task.task_id)
+
+        expire_before = time.time() - self.finished_task_ttl
+        while self._finished:
+            oldest_id, finished_at = next(iter(self._finished.items()))
+            if finished_at >= expire_before and len(self._finished) <= self.max_finished_tasks:
+                break
+            self._finished.popitem(last=False)
+            self.tasks.pop(oldest_id, None)
+
+    async def _collect_batch(self, batch: List[ExtractionTask]) -> Optional[ExtractionTask]:
+        """微批处理：短暂等待，把多个短文本打包到一次提取请求
+
+        batch 中已有本批第一个任务，取到的任务原地追加（等待期间被取消时调用方仍能看到已取出的任务）；
+        返回放不下的任务，由同一工作协程作为下一批的第一个任务，保持先进先出
+        """
+        first = batch[0]
+        if self.batch_size <= 1 or len(first.text) >= self.batch_max_chars:
+            return None
+
+        total_chars = len(first.text)
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if self.task_queue.empty() and remaining > 0:
+                    task = await asyncio.wait_for(self.task_queue.get(), timeout=remaining)
+                else:
+                    task = self.task_queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+
+            if task.status != TaskStatus.PENDING:
+                logger.warning(f"任务状态异常: {task.task_id} ({task.status.value})")
+                self.task_queue.task_done()
+                continue
+
+            if total_chars + len(task.text) > self.batch_max_chars:
+                # 放不下则留给下一批（不放回队尾，避免打乱顺序或因队列已满丢失任务）
+                return task
+
+            batch.append(task)
+            total_chars += len(task.text)
+        return None
+
+    async def _run_extraction(self, worker_id: str, batch: List[ExtractionTask]) -> List[Tuple[Optional[List], Optional[str]]]:
+        """执行一批提取，返回每个任务的(结果, 错误)"""
+        # 导入提取函数（避免循环导入）
+        from .quintuple_extractor import extract_quintuples_async, extract_quintuples_batch_async, llm_call_counter
+
+        texts = [task.text for task in batch]
+        # 提取函数在实际发出请求处计数（含重试与批量失败后的逐条回退）
+        calls = [0]
+        counter_token = llm_call_counter.set(calls)
+        if len(batch) > 1:
+            self.batched_tasks += len(batch)
+        logger.info(f"{worker_id} 调用五元组提取API: {[task.task_id for task in batch]}")
+
+        try:
+            if len(batch) == 1:
+                coro = extract_quintuples_async(texts[0])
+            else:
+                coro = extract_quintuples_batch_async(texts)
+            # 使用超时控制执行任务，批量请求按任务数放宽
+            result = await asyncio.wait_for(coro, timeout=self.task_timeout * len(batch))
+        except asyncio.TimeoutError:
+            logger.warning(f"{worker_id} 任务超时: {[task.task_id for task in batch]}")
+            return [(None, "任务执行超时")] * len(batch)
+        except Exception as e:
+            logger.error(f"{worker_id} 任务失败: {[task.task_id for task in batch]}, 错误: {e}")
+            traceback.print_exc()
+            return [(None, str(e))] * len(batch)
+        finally:
+            llm_call_counter.reset(counter_token)
+            self.llm_calls += calls[0]
+
+        if len(batch) == 1:
+            return [(result, None)]
+        return [(quintuples, None) for quintuples in result]
+
+    async def _finish_task(self, worker_id: str, task: ExtractionTask, result: Optional[List], error: Optional[str]):
+        """更新任务状态、设置future并触发回调"""
+        async with self.lock:
+            task.completed_at = time.time()
+            if error is None:
+                task.status = TaskStatus.COMPLETED
+                task.result = result
+                self.completed_tasks += 1
+            else:
+                task.status = TaskStatus.FAILED
+                task.error = error
+                self.failed_tasks += 1
+            self._mark_finished(task)
+
+        if error is None:
+            logger.info(f"{worker_id} 提取到 {len(result)} 个五元组: {task.text}")
+
+        # 设置future结果
+        if not task.future.done():
+            if task.status == TaskStatus.COMPLETED:
+                task.future.set_result(result)
+            else:
+                task.future.set_exception(Exception(error or "任务失败"))
+
+        # 触发回调
+        try:
+            if task.status == TaskStatus.COMPLETED and self.on_task_completed:
+                self.on_task_completed(task.task_id, result)
+            elif task.status == TaskStatus.FAILED and self.on_task_failed:
+                self.on_task_failed(task.task_id, error)
+        except Exception as e:
+            logger.error(f"任务回调失败: {task.task_id}, 错误: {str(e)}")
+
+    async def _abandon_task(self, worker_id: str, task: ExtractionTask):
+        """工作协程停止时，已从队列取出但未处理完的任务标记为取消，并计入 task_done"""
+        async with self.lock:
+            if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
+                task.status = TaskStatus.CANCELLED
+                task.error = "任务管理器已停止"
+                task.completed_at = time.time()
+                self._mark_finished(task)
+        if task.future and not task.future.done():
+            task.future.set_exception(asyncio.CancelledError("任务管理器已停止"))
+        self.task_queue.task_done()
+        logger.info(f"{worker_id} 停止，未处理的任务已取消: {task.task_id}")
+
     async def _worker_loop(self, worker_id: str):
         """工作协程主循环"""
         logger.info(f"工作协程启动: {worker_id}")
@@ -252,17 +444,25 @@ class QuintupleTaskManager:
         # === 添加启动确认日志 ===
         logger.info(f"✅ {worker_id} 已进入工作循环，状态: running={self.is_running}")
 
+        # 上一批放不下的任务，作为下一批的第一个任务
+        carry: Optional[ExtractionTask] = None
+        # 已从队列取出、尚未 task_done 的本批任务
+        unfinished: List[ExtractionTask] = []
+
         while self.is_running:
             try:
-                # === 添加队列状态日志 ===
-                logger.debug(f"{worker_id} 正在等待新任务 (队列大小: {self.task_queue.qsize()})")
-
-                # 使用带超时的get，避免永久阻塞
-                try:
-                    task = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
-                    # 超时但继续循环检查
-                    continue
+                if carry is not None:
+                    task, carry = carry, None
+                else:
+                    # === 添加队列状态日志 ===
+                    logger.debug(f"{worker_id} 正在等待新任务 (队列大小: {self.task_queue.qsize()})")
+
+                    # 使用带超时的get，避免永久阻塞
+                    try:
+                        task = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        # 超时但继续循环检查
+                        continue
 
                 logger.info(f"{worker_id} 获取到任务: {task.task_id}")
 
@@ -271,72 +471,32 @@ class QuintupleTaskManager:
                     self.task_queue.task_done()
                     continue
 
+                # 合并短文本为一批
+                batch = unfinished = [task]
+                carry = await self._collect_batch(batch)
+                unfinished = list(batch)
+
                 # 更新任务状态
-                task.status = TaskStatus.RUNNING
-                task.started_at = time.time()
-                logger.info(f"{worker_id} 开始处理任务: {task.task_id}")
+                started_at = time.time()
+                for item in batch:
+                    item.status = TaskStatus.RUNNING
+                    item.started_at = started_at
+                logger.info(f"{worker_id} 开始处理任务: {[item.task_id for item in batch]}")
 
                 # 执行任务
-                result = None
-                error = None
-                try:
-                    # 导入提取函数（避免循环导入）
-                    from .quintuple_extractor import extract_quintuples_async
-                    logger.info(f"{worker_id} 调用五元组提取API: {task.task_id}")
-
-                    # 使用超时控制执行任务
-                    result = await asyncio.wait_for(
-                        extract_quintuples_async(task.text),
-                        timeout=self.task_timeout
-                    )
-                    logger.info(f"{worker_id} 提取到 {len(result)} 个五元组: {task.text}")
-
-                    # 更新任务状态
-                    async with self.lock:
-                        task.status = TaskStatus.COMPLETED
-                        task.result = result
-                        task.completed_at = time.time()
-                        self.completed_tasks += 1
-
-                except asyncio.TimeoutError:
-                    error = "任务执行超时"
-                    logger.warning(f"{worker_id} 任务超时: {task.task_id}")
-                    async with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = error
-                        task.completed_at = time.time()
-                        self.failed_tasks += 1
-
-                except Exception as e:
-                    error = str(e)
-                    logger.error(f"{worker_id} 任务失败: {task.task_id}, 错误: {error}")
-                    traceback.print_exc()
-                    async with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = error
-                        task.completed_at = time.time()
-                        self.failed_tasks += 1
-
-                # 设置future结果
-                if not task.future.done():
-                    if task.status == TaskStatus.COMPLETED:
-                        task.future.set_result(result)
+                outcomes = await self._run_extraction(worker_id, batch)
+                for item, (result, error) in zip(batch, outcomes):
+                    if item.status == TaskStatus.CANCELLED:
+                        # 运行期间被取消，保留取消状态
+                        async with self.lock:
+                            self._mark_finished(item)
                     else:
-                        task.future.set_exception(Exception(error or "任务失败"))
-
-                # 触发回调
-                try:
-                    if task.status == TaskStatus.COMPLETED and self.on_task_completed:
-                        self.on_task_completed(task.task_id, result)
-                    elif task.status == TaskStatus.FAILED and self.on_task_failed:
-                        self.on_task_failed(task.task_id, error)
-                except Exception as e:
-                    logger.error(f"任务回调失败: {task.task_id}, 错误: {str(e)}")
-
-                # 标记任务完成
-                self.task_queue.task_done()
-                logger.info(f"{worker_id} 任务处理完成: {task.task_id}")
+                        await self._finish_task(worker_id, item, result, error)
 
+                    # 标记任务完成
+                    self.task_queue.task_done()
+                    unfinished.pop(0)
+                    logger.info(f"{worker_id} 任务处理完成: {item.task_id}")
 
             except asyncio.CancelledError:
                 logger.info(f"{worker_id} 工作协程被取消")
@@ -348,6 +508,10 @@ class QuintupleTaskManager:
                 # 防止异常导致循环崩溃
                 await asyncio.sleep(1)
 
+        # 停止时本批未处理完的任务和留给下一批的任务不会再被处理，标记取消并计入 task_done
+        for item in unfinished + ([carry] if carry is not None else []):
+            await self._abandon_task(worker_id, item)
+
 
     async def clear_completed_tasks(self, max_age_hours: int = None):
         """清理已完成的任务"""
@@ -367,6 +531,7 @@ class QuintupleTaskManager:
 
             for task_id in tasks_to_remove:
                 del self.tasks[task_id]
+                self._finished.pop(task_id, None)
                 removed_count += 1
 
         if removed_count > 0:
@@ -417,6 +582,7 @@ class QuintupleTaskManager:
             if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
                 task.status = TaskStatus.CANCELLED
                 task.completed_at = time.time()
+                self._mark_finished(task)
 
                 # 设置future异常
                 if task.future and not task.future.done():
@@ -463,7 +629,11 @@ class QuintupleTaskManager:
             "max_queue_size": self.max_queue_size,
             "queue_size": self.task_queue.qsize(),
             "queue_usage": f"{self.task_queue.qsize()}/{self.max_queue_size}",
-            "task_timeout": self.task_timeout
+            "task_timeout": self.task_timeout,
+            "llm_calls": self.llm_calls,
+            "batched_tasks": self.batched_tasks,
+            "batch_size": self.batch_size,
+            **self.lock.stats()
         }
 
 
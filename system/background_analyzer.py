@@ -12,6 +12,7 @@ from system.config import config, logger
 from langchain_openai import ChatOpenAI
 
 from system.config import get_prompt
+from system.metrics import trace_headers
 
 class ConversationAnalyzer:
     """
@@ -37,41 +38,17 @@ class ConversationAnalyzer:
             lines.append(f"{role}: {content}")
         conversation = "\n".join(lines)
         
-        # 获取可用的MCP工具信息，注入到意图识别中
+        # 获取可用的MCP工具摘要（注册表清单快照中预渲染，服务注册/注销后才会变化），注入到意图识别中
+        available_tools = ""
         try:
-            from nagaagent_core.stable.mcp import get_registered_services, get_service_info
-            registered_services = get_registered_services()
-            services_info = {name: get_service_info(name) for name in registered_services}
-            
-            # 构建工具信息摘要
-            tools_summary = []
-            for name, info in services_info.items():
-                if info:
-                    display_name = info.get("displayName", name)
-                    description = info.get("description", "")
-                    capabilities = info.get("capabilities", {})
-                    
-                    # 提取工具名称
-                    tools = []
-                    for cap_name, cap_info in capabilities.items():
-                        if isinstance(cap_info, dict) and "tools" in cap_info:
-                            tools.extend(cap_info["tools"])
-                    
-                    if tools:
-                        tools_summary.append(f"- {display_name}: {description} (工具: {', '.join(tools)})")
-                    else:
-                        tools_summary.append(f"- {display_name}: {description}")
-            
-            if tools_summary:
-                available_tools = "\n".join(tools_summary)
-                # 将工具信息注入到对话分析提示词中
-                return get_prompt("conversation_analyzer_prompt",
-                                conversation=conversation,
-                                available_tools=available_tools)
+            from mcpserver.mcp_registry import get_manifest_snapshot
+            available_tools = get_manifest_snapshot().tools_prompt
         except Exception as e:
             logger.debug(f"获取MCP工具信息失败: {e}")
         
-        return get_prompt("conversation_analyzer_prompt", conversation=conversation)
+        return get_prompt("conversation_analyzer_prompt",
+                          conversation=conversation,
+                          available_tools=available_tools or "（暂无已注册的MCP工具）")
 
     def analyze(self, messages: List[Dict[str, str]]):
         logger.info(f"[ConversationAnalyzer] 开始分析对话，消息数量: {len(messages)}")
@@ -235,7 +212,7 @@ class BackgroundAnalyzer:
             }
             
             from system.config import get_server_port
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with httpx.AsyncClient(timeout=5.0, headers=trace_headers()) as client:
                 await client.post(
                     f"http://localhost:{get_server_port('api_server')}/tool_notification",
                     json=notification_payload
@@ -288,7 +265,7 @@ class BackgroundAnalyzer:
                 "callback_url": f"http://localhost:{get_server_port('api_server')}/tool_result_callback"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=30.0, headers=trace_headers()) as client:
                 response = await client.post(
                     f"http://localhost:{get_server_port('mcp_server')}/schedule",
                     json=mcp_payload
@@ -320,7 +297,7 @@ class BackgroundAnalyzer:
                 "callback_url": f"http://localhost:{get_server_port('api_server')}/agent_result_callback"  # 添加回调URL
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=30.0, headers=trace_headers()) as client:
                 response = await client.post(
                     f"http://localhost:{get_server_port('agent_server')}/schedule",  # 使用统一的schedule端点
                     json=agent_payload
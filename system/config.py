@@ -6,15 +6,19 @@ NagaAgent 配置系统 - 基于Pydantic实现类型安全和验证
 import os
 import socket
 import json
+import threading
+import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Callable
-from datetime import datetime
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Callable, Mapping, NamedTuple, Tuple
 
-from nagaagent_core.vendors.PyQt5.QtWidgets import QWidget
 from pydantic import BaseModel, Field, field_validator
 from nagaagent_core.vendors.charset_normalizer import from_path
 from nagaagent_core.vendors import json5  # 支持带注释的JSON解析
 
+if TYPE_CHECKING:  # 仅类型检查时导入，加载配置不必加载Qt
+    from nagaagent_core.vendors.PyQt5.QtWidgets import QWidget
+
 # ========== 服务器端口配置 - 统一管理 ==========
 class ServerPortsConfig(BaseModel):
     """服务器端口配置 - 统一管理所有服务器端口"""
@@ -137,6 +141,9 @@ class GRAGConfig(BaseModel):
     auto_extract: bool = Field(default=False, description="是否自动提取对话中的五元组")
     context_length: int = Field(default=5, ge=1, le=20, description="记忆上下文长度")
     similarity_threshold: float = Field(default=0.6, ge=0.0, le=1.0, description="记忆检索相似度阈值")
+    vector_similarity_threshold: float = Field(default=0.3, ge=0.0, le=1.0, description="向量召回的余弦相似度下限（哈希向量的余弦值偏低）")
+    vector_recall: bool = Field(default=False, description="是否优先使用本地向量索引召回记忆（未命中时仍走LLM关键词查询）")
+    vector_top_k: int = Field(default=10, ge=1, le=100, description="向量召回返回的五元组数量上限")
     neo4j_uri: str = Field(default="neo4j://127.0.0.1:7687", description="Neo4j连接URI")
     neo4j_user: str = Field(default="neo4j", description="Neo4j用户名")
     neo4j_password: str = Field(default="your_password", description="Neo4j密码")
@@ -144,6 +151,13 @@ class GRAGConfig(BaseModel):
     extraction_timeout: int = Field(default=12, ge=1, le=60, description="知识提取超时时间（秒）")
     extraction_retries: int = Field(default=2, ge=0, le=5, description="知识提取重试次数")
     base_timeout: int = Field(default=15, ge=5, le=120, description="基础操作超时时间（秒）")
+    extract_batch_size: int = Field(default=4, ge=1, le=32, description="单次提取请求合并的最大文本数")
+    extract_batch_wait: float = Field(default=0.2, ge=0.0, le=5.0, description="微批处理等待凑批的时间（秒）")
+    extract_batch_max_chars: int = Field(default=2000, ge=100, le=20000, description="单次批量提取的最大总字符数")
+    finished_task_ttl: int = Field(default=600, ge=0, description="已结束提取任务的保留时间（秒）")
+    max_finished_tasks: int = Field(default=1000, ge=0, description="最多保留的已结束提取任务数")
+    graph_view_max_nodes: int = Field(default=500, ge=10, le=20000, description="心智云图一次展示的最大节点数（按度数或焦点邻域取窗口）")
+    graph_view_hops: int = Field(default=2, ge=1, le=5, description="心智云图焦点实体邻域的跳数")
 
 class HandoffConfig(BaseModel):
     """工具调用循环配置"""
@@ -166,6 +180,12 @@ class BrowserConfig(BaseModel):
         ],
         description="Edge浏览器常见安装路径"
     )
+    pool_size: int = Field(default=4, ge=1, le=32, description="浏览器池中可同时租用的页面数")
+    pool_max_uses: int = Field(default=50, ge=1, description="单个上下文复用多少次后销毁重建")
+    pool_block_resources: List[str] = Field(
+        default=["image", "font", "media"],
+        description="搜索抓取时拦截的资源类型"
+    )
 
 class TTSConfig(BaseModel):
     """TTS服务配置"""
@@ -311,6 +331,11 @@ class VoiceRealtimeConfig(BaseModel):
     chunk_size_ms: int = Field(default=200, description="音频块大小（毫秒）")
     vad_threshold: float = Field(default=0.02, ge=0.0, le=1.0, description="静音检测阈值")
     echo_suppression: bool = Field(default=True, description="回声抑制")
+    vad_gate: bool = Field(default=True, description="本地VAD门：只上行语音段与保活帧")
+    vad_hangover_ms: int = Field(default=1000, ge=0, le=5000, description="语音结束后继续上行的拖尾时长（毫秒），应长于服务端VAD断句静音")
+    vad_preroll_ms: int = Field(default=300, ge=0, le=2000, description="开门时补发的前导音频时长（毫秒）")
+    vad_keepalive_ms: int = Field(default=5000, ge=0, le=60000, description="静音期间保活帧间隔（毫秒），0为不发送")
+    vad_use_model: bool = Field(default=False, description="使用webrtcvad模型判决（需安装webrtcvad）")
     min_user_interval: float = Field(default=2.0, ge=0.5, le=10.0, description="用户输入最小间隔（秒）")
     cooldown_duration: float = Field(default=1.0, ge=0.5, le=5.0, description="冷却期时长（秒）")
     max_user_speech: float = Field(default=30.0, ge=5.0, le=120.0, description="最大说话时长（秒）")
@@ -339,6 +364,7 @@ class NagaPortalConfig(BaseModel):
     login_username_key: str = Field(default="username", description="登录请求中用户名的键名")
     login_password_key: str = Field(default="password", description="登录请求中密码的键名")
     login_payload_mode: str = Field(default="json", description="登录请求载荷模式：json或form")
+    context_ttl: int = Field(default=300, ge=0, le=3600, description="请求上下文（Cookie、用户ID及连接校验结果）的缓存时间（秒），0表示每次都校验")
     default_headers: Dict[str, str] = Field(
         default={
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -365,9 +391,12 @@ class SystemCheckConfig(BaseModel):
 # 提示词管理功能已集成到config.py中
 
 class PromptManager:
-    """提示词管理器 - 统一管理所有提示词模板"""
+    """提示词管理器 - 统一管理所有提示词模板
+
+    模板读取后常驻内存，由文件监视器在模板文件变化时失效缓存，查询时不再访问文件系统。
+    """
     
-    def __init__(self, prompts_dir: str = None):
+    def __init__(self, prompts_dir: str = None, watch: bool = True):
         """初始化提示词管理器"""
         if prompts_dir is None:
             # 默认使用system目录下的prompts文件夹
@@ -376,12 +405,31 @@ class PromptManager:
         self.prompts_dir = Path(prompts_dir)
         self.prompts_dir.mkdir(exist_ok=True)
         
-        # 内存缓存
-        self._cache = {}
-        self._last_modified = {}
+        # 内存缓存：名称 -> 模板内容（None表示文件不存在）
+        self._cache: Dict[str, Optional[str]] = {}
+        self._watching = False
+        if watch:
+            try:
+                from system.file_watcher import get_file_watcher
+                get_file_watcher().watch(self.prompts_dir, self._on_prompt_file_changed)
+                self._watching = True
+            except Exception as e:
+                print(f"警告：提示词目录监视启动失败，每次查询将直接读取文件: {e}")
         
         # 初始化默认提示词
         self._init_default_prompts()
+
+    def _on_prompt_file_changed(self, path: Path):
+        """提示词文件变化时失效对应缓存"""
+        if path.suffix == ".txt":
+            self._cache.pop(path.stem, None)
+
+    def invalidate(self, name: Optional[str] = None):
+        """手动失效缓存；name为None时清空全部"""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
     
     def _init_default_prompts(self):
         """初始化默认提示词 - 现在从文件加载，不再硬编码"""
@@ -425,7 +473,6 @@ class PromptManager:
             
             # 更新缓存
             self._cache[name] = content
-            self._last_modified[name] = datetime.now()
             
             print(f"提示词 '{name}' 已保存")
             
@@ -433,25 +480,21 @@ class PromptManager:
             print(f"错误：保存提示词 '{name}' 失败: {e}")
     
     def _load_prompt(self, name: str) -> Optional[str]:
-        """从文件加载提示词"""
+        """从缓存或文件加载提示词"""
+        if self._watching and name in self._cache:
+            return self._cache[name]
         try:
             prompt_file = self.prompts_dir / f"{name}.txt"
             
-            if not prompt_file.exists():
-                return None
-            
-            # 检查文件是否被修改
-            current_mtime = prompt_file.stat().st_mtime
-            if name in self._last_modified and self._last_modified[name].timestamp() >= current_mtime:
-                return self._cache.get(name)
-            
             # 读取文件
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            try:
+                with open(prompt_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = None
             
-            # 更新缓存
+            # 更新缓存（文件不存在也缓存，文件创建时由监视器失效）
             self._cache[name] = content
-            self._last_modified[name] = datetime.now()
             
             return content
             
@@ -477,6 +520,11 @@ def save_prompt(name: str, content: str):
     """便捷函数：保存提示词"""
     get_prompt_manager().save_prompt(name, content)
 
+class MCPConfig(BaseModel):
+    """MCP服务注册配置"""
+    lazy_load: bool = Field(default=True, description="是否只读取清单注册代理，首次调用时再导入智能体模块")
+    hot_agents: List[str] = Field(default_factory=list, description="启动后在后台预先导入的智能体（服务名，即清单displayName；清单中标记 \"hot\": true 的同样预热）")
+
 class GameModuleConfig(BaseModel):
     """博弈论模块配置"""
     enabled: bool = Field(default=False, description="是否启用博弈论流程")
@@ -489,6 +537,7 @@ class NagaConfig(BaseModel):
     api_server: APIServerConfig = Field(default_factory=APIServerConfig)
     grag: GRAGConfig = Field(default_factory=GRAGConfig)
     handoff: HandoffConfig = Field(default_factory=HandoffConfig)
+    mcp: MCPConfig = Field(default_factory=MCPConfig)
     browser: BrowserConfig = Field(default_factory=BrowserConfig)
     tts: TTSConfig = Field(default_factory=TTSConfig)
     asr: ASRConfig = Field(default_factory=ASRConfig)  # ASR输入服务配置 #
@@ -506,7 +555,7 @@ class NagaConfig(BaseModel):
     online_search: OnlineSearchConfig = Field(default_factory=OnlineSearchConfig)
     system_check: SystemCheckConfig = Field(default_factory=SystemCheckConfig)
     computer_control: ComputerControlConfig = Field(default_factory=ComputerControlConfig)
-    window: QWidget = Field(default=None)
+    window: Any = Field(default=None)  # 主窗口 QWidget，运行时由UI设置
 
     model_config = {
         "extra": "ignore",  # 保留原配置：忽略未定义的字段
@@ -523,82 +572,153 @@ class NagaConfig(BaseModel):
 
 # 全局配置实例
 
+# 可通过环境变量 NAGA_CONFIG_PATH 指定其他配置文件（基准测试等场景）
+CONFIG_PATH = Path(os.environ.get("NAGA_CONFIG_PATH") or Path(__file__).parent.parent / "config.json")
+
+
+class ConfigSnapshot(NamedTuple):
+    """一次加载得到的不可变配置快照，整体替换发布，读取方无需加锁"""
+    version: int
+    data: Mapping[str, Any]  # config.json 原始内容（只读）
+    config: "NagaConfig"
+    signature: Optional[Tuple[int, int]]  # 加载时文件的（修改时间纳秒, 大小）
+    loaded_at: float
+
+
+def _freeze(value):
+    """递归转换为只读结构：dict -> MappingProxyType，list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw_config_data(value):
+    """把只读快照数据还原为可修改、可JSON序列化的dict/list"""
+    if isinstance(value, Mapping):
+        return {k: thaw_config_data(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_config_data(v) for v in value]
+    return value
+
+
+def config_file_signature(config_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = config_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+def _parse_config_text(content: str) -> Dict[str, Any]:
+    """解析config.json文本，json5失败时去除注释后按标准JSON解析"""
+    try:
+        # 使用json5解析支持注释的JSON
+        return json5.loads(content)
+    except Exception as json5_error:
+        print(f"json5解析失败: {json5_error}")
+        print("尝试使用标准JSON库解析（将忽略注释）...")
+        # 回退到标准JSON库，但需要先去除注释
+        cleaned_lines = []
+        for line in content.split('\n'):
+            # 移除行内注释（#后面的内容）
+            if '#' in line:
+                line = line.split('#')[0].rstrip()
+            if line.strip():  # 只保留非空行
+                cleaned_lines.append(line)
+        return json.loads('\n'.join(cleaned_lines))
+
+
+def read_config_file(config_path=CONFIG_PATH) -> Dict[str, Any]:
+    """读取并解析config.json
+
+    绝大多数配置文件是UTF-8，直接解码；解码失败时才使用Charset Normalizer检测编码。
+    """
+    with open(config_path, 'rb') as f:
+        raw = f.read()
+    try:
+        content = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        content = None
+        charset_results = from_path(str(config_path))
+        best_match = charset_results.best() if charset_results else None
+        if best_match:
+            print(f"检测到配置文件编码: {best_match.encoding}")
+            content = raw.decode(best_match.encoding)
+        else:
+            print(f"警告：无法检测 {config_path} 的编码")
+            content = raw.decode('utf-8', errors='replace')
+    return _parse_config_text(content)
+
+
+def _load_snapshot(version: int) -> ConfigSnapshot:
+    """加载配置文件并构建快照，失败时使用默认配置"""
+    signature = config_file_signature(CONFIG_PATH)
+    data: Dict[str, Any] = {}
+    if signature is None:
+        print(f"警告：配置文件 {CONFIG_PATH} 不存在，使用默认配置")
+        naga_config = NagaConfig()
+    else:
+        try:
+            data = read_config_file(CONFIG_PATH)
+            naga_config = NagaConfig(**data)
+        except Exception as e:
+            print(f"警告：加载 {CONFIG_PATH} 失败: {e}")
+            print("使用默认配置")
+            naga_config = NagaConfig()
+    return ConfigSnapshot(version, _freeze(data), naga_config, signature, time.time())
+
+
 def load_config():
     """加载配置"""
-    config_path = str(Path(__file__).parent.parent / "config.json")
+    return _load_snapshot(0).config
 
-    if os.path.exists(config_path):
-        try:
-            # 使用Charset Normalizer自动检测编码
-            charset_results = from_path(config_path)
-            if charset_results:
-                best_match = charset_results.best()
-                if best_match:
-                    detected_encoding = best_match.encoding
-                    print(f"检测到配置文件编码: {detected_encoding}")
-
-                    # 使用检测到的编码直接打开文件，然后使用json5读取
-                    with open(config_path, 'r', encoding=detected_encoding) as f:
-                        # 使用json5解析支持注释的JSON
-                        try:
-                            config_data = json5.load(f)
-                        except Exception as json5_error:
-                            print(f"json5解析失败: {json5_error}")
-                            print("尝试使用标准JSON库解析（将忽略注释）...")
-                            # 回退到标准JSON库，但需要先去除注释
-                            f.seek(0)  # 重置文件指针
-                            content = f.read()
-                            # 去除注释行
-                            lines = content.split('\n')
-                            cleaned_lines = []
-                            for line in lines:
-                                # 移除行内注释（#后面的内容）
-                                if '#' in line:
-                                    line = line.split('#')[0].rstrip()
-                                if line.strip():  # 只保留非空行
-                                    cleaned_lines.append(line)
-                            cleaned_content = '\n'.join(cleaned_lines)
-                            config_data = json.loads(cleaned_content)
-                    return NagaConfig(**config_data)
-                else:
-                    print(f"警告：无法检测 {config_path} 的编码")
-            else:
-                print(f"警告：无法检测 {config_path} 的编码")
 
-            # 如果自动检测失败，回退到原来的方法
-            print("使用回退方法加载配置")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                # 使用json5解析支持注释的JSON
-                config_data = json5.load(f)
-            return NagaConfig(**config_data)
+_snapshot: ConfigSnapshot = _load_snapshot(1)
+_reload_lock = threading.Lock()
+config = _snapshot.config
 
-        except Exception as e:
-            print(f"警告：加载 {config_path} 失败: {e}")
-            print("使用默认配置")
-            return NagaConfig()
-    else:
-        print(f"警告：配置文件 {config_path} 不存在，使用默认配置")
 
-    return NagaConfig()
+def get_config_snapshot() -> ConfigSnapshot:
+    """获取当前配置快照（无锁读取，快照内容只读）"""
+    return _snapshot
+
+
+def _publish_snapshot() -> NagaConfig:
+    """重新加载并原子替换当前快照"""
+    global _snapshot, config
+    with _reload_lock:
+        snapshot = _load_snapshot(_snapshot.version + 1)
+        _snapshot = snapshot
+        config = snapshot.config
+    return snapshot.config
 
-config = load_config()
 
 def reload_config() -> NagaConfig:
     """重新加载配置"""
-    global config
-    config = load_config()
+    _publish_snapshot()
     notify_config_changed()
     return config
 
 def hot_reload_config() -> NagaConfig:
     """热更新配置 - 重新加载配置并通知所有模块"""
-    global config
     old_config = config
-    config = load_config()
+    _publish_snapshot()
     notify_config_changed()
     print(f"配置已热更新: {old_config.system.version} -> {config.system.version}")
     return config
 
+def reload_config_if_changed() -> bool:
+    """配置文件与当前快照不一致时热更新，返回是否发生了重新加载
+
+    供文件监视器调用：通过update_config写入后已经主动热更新的，不会重复加载。
+    """
+    if config_file_signature(CONFIG_PATH) == _snapshot.signature:
+        return False
+    hot_reload_config()
+    return True
+
 def get_config() -> NagaConfig:
     """获取当前配置"""
     return config
@@ -16,9 +16,30 @@ from pathlib import Path
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from .config import config, hot_reload_config, add_config_listener, remove_config_listener
+from .config import (
+    config, hot_reload_config, reload_config_if_changed, add_config_listener, remove_config_listener,
+    read_config_file, get_config_snapshot as _get_current_snapshot, thaw_config_data,
+    config_file_signature, CONFIG_PATH,
+)
+from .file_watcher import get_file_watcher
 from nagaagent_core.vendors.charset_normalizer import from_path
-from nagaagent_core.vendors import json5  # 支持带注释的JSON解析
+
+
+def _detect_encoding(config_path: str) -> str:
+    """检测配置文件编码：能按UTF-8解码的直接使用UTF-8，否则使用Charset Normalizer"""
+    try:
+        with open(config_path, 'rb') as f:
+            f.read().decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        charset_results = from_path(config_path)
+        best_match = charset_results.best() if charset_results else None
+        if best_match:
+            print(f"检测到配置文件编码: {best_match.encoding}")
+            return best_match.encoding
+    except OSError:
+        pass
+    return 'utf-8'
 
 class ConfigManager:
     """配置管理器 - 统一管理配置热更新
@@ -26,7 +47,7 @@ class ConfigManager:
     功能特性:
     - 配置热更新：无需重启应用即可使配置变更生效
     - 模块重新加载：配置变更后自动重新加载相关模块
-    - 配置监视器：自动监视配置文件变化
+    - 配置监视器：基于文件事件通知监视配置文件变化（去抖合并连续写入）
     - 配置快照：支持配置的保存和恢复
     - 错误处理：完善的错误处理和日志记录
     """
@@ -37,8 +58,7 @@ class ConfigManager:
         self._reload_callbacks: List[Callable] = []
         
         # 配置监视器
-        self._config_watcher_thread: Optional[threading.Thread] = None
-        self._stop_watching = False
+        self._watched_config_file: Optional[str] = None
         
         # 注册配置变更监听器
         add_config_listener(self._on_config_changed)
@@ -115,50 +135,31 @@ class ConfigManager:
     
     def start_config_watcher(self, config_file: str = None):
         """启动配置文件监视器"""
-        if self._config_watcher_thread and self._config_watcher_thread.is_alive():
+        if self._watched_config_file:
             return
         
         if config_file is None:
-            config_file = str(Path(__file__).parent.parent / "config.json")
+            config_file = str(CONFIG_PATH)
         
-        self._stop_watching = False
-        self._config_watcher_thread = threading.Thread(
-            target=self._watch_config_file,
-            args=(config_file,),
-            daemon=True
-        )
-        self._config_watcher_thread.start()
-        print(f"配置文件监视器已启动: {config_file}")  # 去除Emoji #
+        watcher = get_file_watcher()
+        watcher.watch(config_file, self._on_config_file_changed)
+        self._watched_config_file = config_file
+        print(f"配置文件监视器已启动: {config_file} ({watcher.backend})")  # 去除Emoji #
     
     def stop_config_watcher(self):
         """停止配置文件监视器"""
-        self._stop_watching = True
-        if self._config_watcher_thread:
-            self._config_watcher_thread.join(timeout=1)
+        if self._watched_config_file:
+            get_file_watcher().unwatch(self._watched_config_file, self._on_config_file_changed)
+            self._watched_config_file = None
         print("配置文件监视器已停止")  # 去除Emoji #
     
-    def _watch_config_file(self, config_file: str):
-        """监视配置文件变化"""
-        last_modified = 0
-        
-        while not self._stop_watching:
-            try:
-                if os.path.exists(config_file):
-                    current_modified = os.path.getmtime(config_file)
-                    if current_modified > last_modified:
-                        last_modified = current_modified
-                        print(f"检测到配置文件变更: {config_file}")  # 去除Emoji #
-                        
-                        # 等待文件写入完成
-                        time.sleep(0.1)
-                        
-                        # 重新加载配置
-                        hot_reload_config()
-                
-                time.sleep(1)  # 每秒检查一次
-            except Exception as e:
-                print(f"配置文件监视器错误: {e}")
-                time.sleep(5)  # 出错时等待更长时间
+    def _on_config_file_changed(self, path: Path):
+        """配置文件变更（已去抖）时重新加载配置"""
+        try:
+            if reload_config_if_changed():
+                print(f"检测到配置文件变更: {path}")  # 去除Emoji #
+        except Exception as e:
+            print(f"配置文件重新加载失败: {e}")
     
     def update_config(self, updates: Dict[str, Any]) -> bool:
         """更新配置并触发热更新
@@ -173,7 +174,7 @@ class ConfigManager:
             print(f"开始更新配置，共 {len(updates)} 项...")  # 去除Emoji #
             
             # 验证配置文件存在性
-            config_path = str(Path(__file__).parent.parent / "config.json")
+            config_path = str(CONFIG_PATH)
             if not os.path.exists(config_path):
                 print(f"❌ 配置文件不存在: {config_path}")
                 print(f"❌ 当前工作目录: {os.getcwd()}")
@@ -192,12 +193,9 @@ class ConfigManager:
             if not self._save_config_file(config_path, config_data):
                 return False
             
-            # 触发热更新
+            # 触发热更新（同步完成，监视器随后收到的同一次写入会被忽略）
             hot_reload_config()
             
-            # 等待配置重新加载完成
-            time.sleep(0.1)
-            
             print(f"配置更新成功: {len(updates)} 项")  # 去除Emoji #
             return True
             
@@ -208,46 +206,7 @@ class ConfigManager:
     def _load_config_file(self, config_path: str) -> Optional[Dict[str, Any]]:
         """加载配置文件"""
         try:
-            # 使用Charset Normalizer自动检测编码
-            charset_results = from_path(config_path)
-            if charset_results:
-                best_match = charset_results.best()
-                if best_match:
-                    detected_encoding = best_match.encoding
-                    print(f"检测到配置文件编码: {detected_encoding}")
-
-                    # 使用检测到的编码直接打开文件，然后使用json5读取
-                    with open(config_path, 'r', encoding=detected_encoding) as f:
-                        # 使用json5解析支持注释的JSON
-                        try:
-                            return json5.load(f)
-                        except Exception as json5_error:
-                            print(f"json5解析失败: {json5_error}")
-                            print("尝试使用标准JSON库解析（将忽略注释）...")
-                            # 回退到标准JSON库，但需要先去除注释
-                            f.seek(0)  # 重置文件指针
-                            content = f.read()
-                            # 去除注释行
-                            lines = content.split('\n')
-                            cleaned_lines = []
-                            for line in lines:
-                                # 移除行内注释（#后面的内容）
-                                if '#' in line:
-                                    line = line.split('#')[0].rstrip()
-                                if line.strip():  # 只保留非空行
-                                    cleaned_lines.append(line)
-                            cleaned_content = '\n'.join(cleaned_lines)
-                            return json.loads(cleaned_content)
-                else:
-                    print(f"警告：无法检测 {config_path} 的编码")
-            else:
-                print(f"警告：无法检测 {config_path} 的编码")
-
-            # 如果自动检测失败，回退到原来的方法
-            print("使用回退方法加载配置")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                # 使用json5解析支持注释的JSON
-                return json5.load(f)
+            return read_config_file(config_path)
         except Exception as e:
             print(f"加载配置文件失败: {e}")  # 去除Emoji #
             return None
@@ -256,14 +215,7 @@ class ConfigManager:
         """保存配置文件"""
         try:
             # 自动检测文件编码
-            detected_encoding = 'utf-8'  # 默认编码
-            if os.path.exists(config_path):
-                charset_results = from_path(config_path)
-                if charset_results:
-                    best_match = charset_results.best()
-                    if best_match:
-                        detected_encoding = best_match.encoding
-                        print(f"检测到配置文件编码: {detected_encoding}")
+            detected_encoding = _detect_encoding(config_path)
 
             with open(config_path, 'w', encoding=detected_encoding) as f:
                 json.dump(config_data, f, ensure_ascii=False, indent=2)
@@ -284,49 +236,12 @@ class ConfigManager:
     
     def get_config_snapshot(self) -> Dict[str, Any]:
         """获取配置快照"""
-        # 直接读取config.json文件，避免序列化问题
+        # 复制当前已发布的解析结果，避免重复读取和解析config.json
         try:
-            config_path = str(Path(__file__).parent.parent / "config.json")
-            # 使用Charset Normalizer自动检测编码
-            charset_results = from_path(config_path)
-            if charset_results:
-                best_match = charset_results.best()
-                if best_match:
-                    detected_encoding = best_match.encoding
-                    print(f"检测到配置文件编码: {detected_encoding}")
-
-                    # 使用检测到的编码直接打开文件，然后使用json5读取
-                    with open(config_path, 'r', encoding=detected_encoding) as f:
-                        # 使用json5解析支持注释的JSON
-                        try:
-                            return json5.load(f)
-                        except Exception as json5_error:
-                            print(f"json5解析失败: {json5_error}")
-                            print("尝试使用标准JSON库解析（将忽略注释）...")
-                            # 回退到标准JSON库，但需要先去除注释
-                            f.seek(0)  # 重置文件指针
-                            content = f.read()
-                            # 去除注释行
-                            lines = content.split('\n')
-                            cleaned_lines = []
-                            for line in lines:
-                                # 移除行内注释（#后面的内容）
-                                if '#' in line:
-                                    line = line.split('#')[0].rstrip()
-                                if line.strip():  # 只保留非空行
-                                    cleaned_lines.append(line)
-                            cleaned_content = '\n'.join(cleaned_lines)
-                            return json.loads(cleaned_content)
-                else:
-                    print(f"警告：无法检测 {config_path} 的编码")
-            else:
-                print(f"警告：无法检测 {config_path} 的编码")
-
-            # 如果自动检测失败，回退到原来的方法
-            print("使用回退方法加载配置")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                # 使用json5解析支持注释的JSON
-                return json5.load(f)
+            snapshot = _get_current_snapshot()
+            if snapshot.data and snapshot.signature == config_file_signature(CONFIG_PATH):
+                return thaw_config_data(snapshot.data)
+            return read_config_file(CONFIG_PATH)
         except Exception as e:
             print(f"获取配置快照失败: {e}")  # 去除Emoji #
             # 如果读取失败，返回一个基本的配置结构
@@ -348,17 +263,10 @@ class ConfigManager:
     def restore_config_snapshot(self, snapshot: Dict[str, Any]) -> bool:
         """恢复配置快照"""
         try:
-            config_path = str(Path(__file__).parent.parent / "config.json")
+            config_path = str(CONFIG_PATH)
 
             # 自动检测文件编码
-            detected_encoding = 'utf-8'  # 默认编码
-            if os.path.exists(config_path):
-                charset_results = from_path(config_path)
-                if charset_results:
-                    best_match = charset_results.best()
-                    if best_match:
-                        detected_encoding = best_match.encoding
-                        print(f"检测到配置文件编码: {detected_encoding}")
+            detected_encoding = _detect_encoding(config_path)
 
             with open(config_path, 'w', encoding=detected_encoding) as f:
                 json.dump(snapshot, f, ensure_ascii=False, indent=2)
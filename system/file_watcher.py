@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件变更监视器 - 配置文件与提示词模板共用
+Linux下使用inotify事件通知（ctypes调用libc，无额外依赖），其他平台回退为按文件签名轮询。
+连续多次写入会被去抖合并，静默一段时间后才触发一次回调。
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# inotify 事件掩码
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+WatchCallback = Callable[[Path], None]
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """文件签名（修改时间纳秒, 大小），文件不存在时返回None"""
+    try:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class _Inotify:
+    """inotify 的最小封装"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._ctypes = ctypes
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+    def add_watch(self, directory: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(self._ctypes.get_errno(), f"inotify_add_watch 失败: {directory}")
+        return wd
+
+    def remove_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """读取所有待处理事件，返回[(wd, mask, 文件名)]"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not data:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+                offset += name_len
+                events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class _Watch:
+    """一个监视目标：文件或目录，以及对应的回调"""
+
+    def __init__(self, path: Path, callback: WatchCallback):
+        self.path = path
+        self.callback = callback
+        self.is_dir = path.is_dir()
+        self.directory = path if self.is_dir else path.parent
+        self.signatures = self._scan()
+
+    def matches(self, name: str) -> bool:
+        return self.is_dir or name == self.path.name
+
+    def _scan(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        if not self.is_dir:
+            return {self.path.name: _file_signature(self.path)}
+        signatures = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return signatures
+
+    def poll_changes(self) -> List[str]:
+        """轮询模式：对比签名，返回发生变化的文件名"""
+        current = self._scan()
+        changed = [name for name in set(current) | set(self.signatures)
+                   if current.get(name) != self.signatures.get(name)]
+        self.signatures = current
+        return changed
+
+
+class FileWatcher:
+    """文件变更监视器
+
+    参数:
+        debounce: 去抖时长（秒），最后一次写入后静默这么久才触发回调
+        poll_interval: 轮询模式的检查间隔（秒）
+        use_inotify: False时强制使用轮询模式
+    """
+
+    def __init__(self, debounce: float = 0.2, poll_interval: float = 1.0, use_inotify: bool = True):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._watches: List[_Watch] = []
+        self._pending: Dict[Tuple[int, Path], Tuple[float, _Watch]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._inotify: Optional[_Inotify] = None
+        self._dir_wds: Dict[Path, int] = {}
+        self._wd_dirs: Dict[int, Path] = {}
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except Exception as e:
+                logger.info(f"inotify不可用，回退为轮询模式: {e}")
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------- 注册 ----------
+
+    def watch(self, path, callback: WatchCallback):
+        """监视文件或目录；目录下任意文件变化时以变化文件的路径调用回调"""
+        watch = _Watch(Path(path).resolve(), callback)
+        with self._lock:
+            if self._inotify and watch.directory not in self._dir_wds:
+                try:
+                    wd = self._inotify.add_watch(str(watch.directory))
+                    self._dir_wds[watch.directory] = wd
+                    self._wd_dirs[wd] = watch.directory
+                except OSError as e:
+                    logger.warning(f"无法监视目录 {watch.directory}: {e}")
+            self._watches.append(watch)
+        self.start()
+
+    def unwatch(self, path, callback: Optional[WatchCallback] = None):
+        """取消监视；callback为None时移除该路径的全部回调"""
+        target = Path(path).resolve()
+        with self._lock:
+            self._watches = [w for w in self._watches
+                             if not (w.path == target and (callback is None or w.callback == callback))]
+            self._pending = {k: v for k, v in self._pending.items() if v[1] in self._watches}
+            if self._inotify:
+                in_use = {w.directory for w in self._watches}
+                for directory in [d for d in self._dir_wds if d not in in_use]:
+                    wd = self._dir_wds.pop(directory)
+                    self._wd_dirs.pop(wd, None)
+                    self._inotify.remove_watch(wd)
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FileWatcher", daemon=True)
+        self._thread.start()
+        logger.debug(f"文件监视器已启动 ({self.backend})")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    # ---------- 事件处理 ----------
+
+    def _schedule(self, watch: _Watch, name: str, now: float):
+        """记录一次变更，重置该文件的去抖计时"""
+        changed_path = watch.path if not watch.is_dir else watch.directory / name
+        self._pending[(id(watch), changed_path)] = (now + self.debounce, watch)
+
+    def _collect_inotify(self, timeout: float):
+        readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+        if not readable:
+            return
+        events = self._inotify.read_events()
+        now = time.monotonic()
+        with self._lock:
+            for wd, mask, name in events:
+                if mask & _IN_Q_OVERFLOW:
+                    # 事件队列溢出：把所有监视目标都视为已变化
+                    for watch in self._watches:
+                        self._schedule(watch, watch.path.name, now)
+                    continue
+                directory = self._wd_dirs.get(wd)
+                for watch in self._watches:
+                    if watch.directory == directory and watch.matches(name):
+                        self._schedule(watch, name, now)
+
+    def _collect_polling(self, timeout: float):
+        self._stop_event.wait(timeout)
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+        with self._lock:
+            for watch in self._watches:
+                for name in watch.poll_changes():
+                    self._schedule(watch, name, now)
+
+    def _fire_due(self) -> Optional[float]:
+        """触发到期的回调，返回下一个到期时间"""
+        now = time.monotonic()
+        with self._lock:
+            due = [(key, watch) for key, (deadline, watch) in self._pending.items() if deadline <= now]
+            for key, _ in due:
+                del self._pending[key]
+            next_deadline = min((deadline for deadline, _ in self._pending.values()), default=None)
+
+        for (_, changed_path), watch in due:
+            try:
+                watch.callback(changed_path)
+            except Exception as e:
+                logger.error(f"文件变更回调执行失败: {changed_path} - {e}")
+        return next_deadline
+
+    def _run(self):
+        self._next_poll = time.monotonic() + self.poll_interval
+        while not self._stop_event.is_set():
+            next_deadline = self._fire_due()
+            if self._inotify:
+                # 定期醒来检查停止标记
+                timeout = 0.5
+            else:
+                timeout = max(0.0, self._next_poll - time.monotonic())
+            if next_deadline is not None:
+                timeout = min(timeout, max(0.0, next_deadline - time.monotonic()))
+            try:
+                if self._inotify:
+                    self._collect_inotify(timeout)
+                else:
+                    self._collect_polling(timeout)
+            except Exception as e:
+                logger.error(f"文件监视器错误: {e}")
+                self._stop_event.wait(1)
+
+
+_file_watcher: Optional[FileWatcher] = None
+_file_watcher_lock = threading.Lock()
+
+
+def get_file_watcher() -> FileWatcher:
+    """获取全局文件监视器（配置文件与提示词共用一个线程）"""
+    global _file_watcher
+    if _file_watcher is None:
+        with _file_watcher_lock:
+            if _file_watcher is None:
+                _file_watcher = FileWatcher()
+    return _file_watcher
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内指标注册表与链路追踪ID
+- 计数器 / 仪表 / 直方图，按 Prometheus 文本格式导出，每个FastAPI应用挂载 /metrics
+- X-Trace-Id 请求头：入口处生成或沿用，经 contextvars 传递到后台任务，
+  服务间调用通过 trace_headers() 带上，一轮对话可以跨API、Agent、MCP服务串联
+不依赖第三方库；三个服务在同一进程内运行时共用同一个注册表，HTTP指标以 service 标签区分
+"""
+
+import bisect
+import itertools
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+TRACE_HEADER = "X-Trace-Id"
+_TRACE_HEADER_BYTES = TRACE_HEADER.lower().encode("latin-1")
+
+trace_id_var: ContextVar[Optional[str]] = ContextVar("naga_trace_id", default=None)
+
+# 延迟类指标的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_INF_LABEL = 'le="+Inf"'
+
+
+# ---------- 链路追踪 ----------
+
+# 进程随机前缀 + 自增序号，比uuid4便宜且同样不会跨进程冲突
+_TRACE_PREFIX = os.urandom(4).hex()
+_trace_counter = itertools.count(1)
+
+
+def new_trace_id() -> str:
+    return f"{_TRACE_PREFIX}{next(_trace_counter):08x}"
+
+
+def get_trace_id() -> Optional[str]:
+    """当前上下文的追踪ID"""
+    return trace_id_var.get()
+
+
+def ensure_trace_id() -> str:
+    """获取当前追踪ID，没有时生成一个并设置到当前上下文"""
+    trace_id = trace_id_var.get()
+    if trace_id is None:
+        trace_id = new_trace_id()
+        trace_id_var.set(trace_id)
+    return trace_id
+
+
+def trace_headers(trace_id: Optional[str] = None) -> Dict[str, str]:
+    """服务间调用需要附带的请求头"""
+    trace_id = trace_id or trace_id_var.get()
+    return {TRACE_HEADER: trace_id} if trace_id else {}
+
+
+# ---------- 指标类型 ----------
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if not self.labelnames:
+            return ()
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def labels(self, **labels):
+        """绑定一组标签值，返回可重复使用的子指标（省去每次拼接标签键）"""
+        return self._child_class(self, self._key(labels))
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: "Counter", key: Tuple[str, ...]):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0):
+        metric = self._metric
+        with metric._lock:
+            metric._values[self._key] = metric._values.get(self._key, 0.0) + amount
+
+
+class Counter(_Metric):
+    """只增计数器"""
+    type_name = "counter"
+    _child_class = _CounterChild
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """仪表：可直接设置，也可以注册取值函数在导出时计算（热路径零开销）"""
+    type_name = "gauge"
+    _child_class = _CounterChild  # 子指标只支持inc
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """导出时调用function取值"""
+        self._functions[self._key(labels)] = function
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        function = self._functions.get(key)
+        return float(function()) if function else self._values.get(key, 0.0)
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, function in list(self._functions.items()):
+            try:
+                values[key] = float(function())
+            except Exception:
+                continue  # 取值对象已释放或出错时跳过
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("_metric", "_row")
+
+    def __init__(self, metric: "Histogram", key: Tuple[str, ...]):
+        self._metric = metric
+        self._row = metric._row(key)
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._metric.buckets, value)
+        with self._metric._lock:
+            self._row[index] += 1
+            self._row[-1] += value
+
+
+class Histogram(_Metric):
+    """直方图（累计分桶 + sum + count）"""
+    type_name = "histogram"
+    _child_class = _HistogramChild
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签: [各分桶计数..., +Inf计数, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def _row(self, key: Tuple[str, ...]) -> List[float]:
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            return row
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        row = self._values.get(key) or self._row(key)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row[index] += 1
+            row[-1] += value
+
+    def time(self, **labels) -> "_Timer":
+        """上下文管理器：记录代码块耗时"""
+        return _Timer(self, labels)
+
+    def get_count(self, **labels) -> int:
+        row = self._values.get(self._key(labels))
+        return int(sum(row[:-1])) if row else 0
+
+    def get_sum(self, **labels) -> float:
+        row = self._values.get(self._key(labels))
+        return row[-1] if row else 0.0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(row)) for key, row in self._values.items()]
+        for key, row in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}"
+            cumulative += row[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, _INF_LABEL)} {_format_value(cumulative)}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(row[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class MetricsRegistry:
+    """指标注册表，同名指标重复注册时返回已有实例"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ---------- 标准指标 ----------
+
+HTTP_REQUESTS = registry.counter(
+    "naga_http_requests_total", "HTTP请求数", ("service", "route", "method", "status"))
+HTTP_LATENCY = registry.histogram(
+    "naga_http_request_duration_seconds", "HTTP请求耗时（流式响应含完整传输时间）", ("service", "route", "method"))
+
+LLM_LATENCY = registry.histogram(
+    "naga_llm_request_duration_seconds", "LLM调用耗时", ("mode",))
+LLM_TTFT = registry.histogram(
+    "naga_llm_time_to_first_token_seconds", "流式LLM调用的首token耗时")
+LLM_TOKENS = registry.counter(
+    "naga_llm_tokens_total", "LLM token数（流式调用的completion按增量片段计数）", ("mode", "kind"))
+LLM_ERRORS = registry.counter(
+    "naga_llm_errors_total", "LLM调用失败次数", ("mode",))
+
+MCP_QUEUE_DEPTH = registry.gauge("naga_mcp_queue_depth", "MCP调度队列中等待的任务数")
+MCP_WORKERS_BUSY = registry.gauge("naga_mcp_workers_busy", "正在执行任务的MCP工作协程数")
+MCP_WORKERS_TOTAL = registry.gauge("naga_mcp_workers_total", "MCP工作协程总数")
+MCP_TASK_LATENCY = registry.histogram(
+    "naga_mcp_task_duration_seconds", "MCP任务执行耗时", ("status",))
+
+TTS_QUEUE_DEPTH = registry.gauge("naga_tts_queue_depth", "等待合成的TTS句子数")
+TTS_QUEUE_LAG = registry.histogram(
+    "naga_tts_queue_lag_seconds", "TTS句子从入队到开始合成的等待时间")
+
+GRAG_BACKLOG = registry.gauge("naga_grag_extraction_backlog", "GRAG五元组提取待处理任务数")
+
+
+# ---------- FastAPI 集成 ----------
+
+class MetricsMiddleware:
+    """纯ASGI中间件：记录请求耗时、设置追踪ID并在响应头回传
+
+    不使用BaseHTTPMiddleware，避免额外的任务切换，也不会缓冲流式响应。
+    """
+
+    def __init__(self, app, service: str, max_route_cache: int = 2048):
+        self.app = app
+        self.service = service
+        self._route_cache: Dict[Tuple[str, str], str] = {}
+        self._max_route_cache = max_route_cache
+        # (路由, 方法, 状态码) -> 已绑定标签的子指标
+        self._children: Dict[Tuple[str, str, int], Tuple[_CounterChild, _HistogramChild]] = {}
+
+    def _route_template(self, scope) -> str:
+        """把请求路径归并为路由模板，避免路径参数导致标签基数膨胀"""
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        cache_key = (scope.get("method", ""), scope.get("path", ""))
+        template = self._route_cache.get(cache_key)
+        if template is not None:
+            return template
+
+        template = "<unmatched>"
+        app = scope.get("app")
+        routes = getattr(getattr(app, "router", None), "routes", None) or []
+        try:
+            from starlette.routing import Match
+            for candidate in routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    template = getattr(candidate, "path", template)
+                    break
+        except ImportError:
+            pass
+        if len(self._route_cache) >= self._max_route_cache:
+            self._route_cache.clear()
+        self._route_cache[cache_key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = None
+        for name, value in scope.get("headers", ()):
+            if name == _TRACE_HEADER_BYTES:
+                trace_id = value.decode("latin-1")[:64]
+                break
+        trace_id = trace_id or new_trace_id()
+        token = trace_id_var.set(trace_id)
+        header = (_TRACE_HEADER_BYTES, trace_id.encode("latin-1"))
+        status = [500]
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [header]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = self._route_template(scope)
+            method = scope.get("method", "")
+            children = self._children.get((route, method, status[0]))
+            if children is None:
+                children = self._children[(route, method, status[0])] = (
+                    HTTP_REQUESTS.labels(service=self.service, route=route, method=method, status=str(status[0])),
+                    HTTP_LATENCY.labels(service=self.service, route=route, method=method),
+                )
+            children[0].inc()
+            children[1].observe(elapsed)
+            trace_id_var.reset(token)
+
+
+def install_metrics(app, service: str, path: str = "/metrics"):
+    """为FastAPI应用挂载指标中间件和 /metrics 接口"""
+    from starlette.responses import Response
+
+    app.add_middleware(MetricsMiddleware, service=service)
+
+    async def metrics_endpoint():
+        return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    app.add_api_route(path, metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动性能分析工具
+以 python -X importtime 启动 main.py，轮询各服务端口记录从启动到可连接的耗时，
+并汇总导入耗时最高的模块。每次结果追加写入 logs/startup_profile.jsonl，
+与上一次记录对比，便于发现启动回退。
+
+用法:
+    python system/startup_profiler.py                 # 分析完整启动流程
+    python system/startup_profiler.py --module apiserver.api_server   # 只分析单个模块的导入耗时
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PROFILE_LOG = PROJECT_ROOT / "logs" / "startup_profile.jsonl"
+
+# 端口无法从配置读取时的默认值
+DEFAULT_PORTS = {
+    "api_server": 8000,
+    "agent_server": 8001,
+    "mcp_server": 8003,
+    "tts_server": 5048,
+}
+
+
+def get_service_ports() -> Dict[str, int]:
+    """读取各服务端口"""
+    try:
+        sys.path.insert(0, str(PROJECT_ROOT))
+        from system.config import get_all_server_ports
+        ports = get_all_server_ports()
+        return {name: ports[name] for name in DEFAULT_PORTS if name in ports}
+    except Exception as e:
+        print(f"⚠️ 读取端口配置失败，使用默认端口: {e}")
+        return dict(DEFAULT_PORTS)
+
+
+def is_port_ready(port: int, host: str = "127.0.0.1") -> bool:
+    """端口是否已可连接"""
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def parse_importtime(lines: List[str]) -> List[Dict[str, Any]]:
+    """解析 -X importtime 输出，返回[{module, self_us, cumulative_us, depth}]"""
+    records = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|", 2)
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0])
+            cumulative_us = int(fields[1])
+        except ValueError:
+            continue  # 表头
+        name = fields[2].rstrip("\n")[1:]
+        stripped = name.lstrip(" ")
+        records.append({
+            "module": stripped,
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "depth": (len(name) - len(stripped)) // 2,
+        })
+    return records
+
+
+def summarize_imports(records: List[Dict[str, Any]], top: int = 15) -> Dict[str, Any]:
+    """汇总导入耗时：总耗时（顶层累计）与累计耗时最高的模块"""
+    top_level = [r for r in records if r["depth"] == 0]
+    slowest = sorted(records, key=lambda r: r["cumulative_us"], reverse=True)[:top]
+    return {
+        "module_count": len(records),
+        "total_import_ms": round(sum(r["cumulative_us"] for r in top_level) / 1000, 1),
+        "slowest": [
+            {"module": r["module"], "cumulative_ms": round(r["cumulative_us"] / 1000, 1),
+             "self_ms": round(r["self_us"] / 1000, 1)}
+            for r in slowest
+        ],
+    }
+
+
+def profile_startup(timeout: float = 120.0, poll_interval: float = 0.1) -> Dict[str, Any]:
+    """以 -X importtime 启动 main.py，记录各服务端口就绪耗时"""
+    ports = get_service_ports()
+    busy = [name for name, port in ports.items() if is_port_ready(port)]
+    if busy:
+        raise RuntimeError(f"以下服务端口已被占用，请先关闭正在运行的实例: {', '.join(busy)}")
+
+    log_file = PROJECT_ROOT / "logs" / "startup_importtime.log"
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+
+    ready: Dict[str, Optional[float]] = {name: None for name in ports}
+    start = time.perf_counter()
+    with open(log_file, "w", encoding="utf-8") as stderr_file:
+        process = subprocess.Popen(
+            [sys.executable, "-X", "importtime", "main.py"],
+            cwd=str(PROJECT_ROOT), env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file,
+            text=True,
+        )
+        try:
+            # 环境检测未通过时main.py会询问是否继续，这里默认继续
+            process.stdin.write("y\n")
+            process.stdin.flush()
+        except OSError:
+            pass
+
+        try:
+            while time.perf_counter() - start < timeout:
+                elapsed = time.perf_counter() - start
+                for name, port in ports.items():
+                    if ready[name] is None and is_port_ready(port):
+                        ready[name] = round(elapsed, 3)
+                        print(f"✅ {name}: {elapsed:.2f}s 就绪 (端口 {port})")
+                if all(value is not None for value in ready.values()):
+                    break
+                if process.poll() is not None:
+                    print(f"⚠️ main.py 已提前退出，返回码 {process.returncode}")
+                    break
+                time.sleep(poll_interval)
+        finally:
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    for name, value in ready.items():
+        if value is None:
+            print(f"❌ {name}: {timeout:.0f}s 内未就绪")
+
+    with open(log_file, "r", encoding="utf-8", errors="replace") as f:
+        imports = summarize_imports(parse_importtime(f.readlines()))
+    return {"mode": "startup", "time_to_ready_s": ready, "imports": imports}
+
+
+def profile_module(module: str) -> Dict[str, Any]:
+    """只分析单个模块的导入耗时"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PROJECT_ROOT), capture_output=True, text=True,
+    )
+    wall = round(time.perf_counter() - start, 3)
+    if result.returncode != 0:
+        tail = result.stderr.strip().splitlines()[-1:] or ["未知错误"]
+        raise RuntimeError(f"导入 {module} 失败: {tail[0]}")
+    imports = summarize_imports(parse_importtime(result.stderr.splitlines()))
+    return {"mode": "module", "module": module, "wall_s": wall, "imports": imports}
+
+
+def load_previous(mode: str, module: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """读取同类型的上一次记录"""
+    if not PROFILE_LOG.exists():
+        return None
+    previous = None
+    with open(PROFILE_LOG, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("mode") == mode and record.get("module") == module:
+                previous = record
+    return previous
+
+
+def save_record(record: Dict[str, Any]):
+    """追加写入分析记录"""
+    PROFILE_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(PROFILE_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def compare(current: Dict[str, Any], previous: Optional[Dict[str, Any]], tolerance: float) -> List[str]:
+    """与上一次记录对比，返回超出容差的回退项"""
+    if not previous:
+        return []
+    regressions = []
+
+    def check(label: str, now: Optional[float], before: Optional[float]):
+        if now is None or before is None or before <= 0:
+            return
+        if now > before * (1 + tolerance):
+            regressions.append(f"{label}: {before} -> {now} (+{(now / before - 1) * 100:.0f}%)")
+
+    check("导入总耗时(ms)", current["imports"]["total_import_ms"], previous["imports"].get("total_import_ms"))
+    if current["mode"] == "startup":
+        for name, value in current["time_to_ready_s"].items():
+            check(f"{name}就绪耗时(s)", value, previous.get("time_to_ready_s", {}).get(name))
+    else:
+        check("导入墙钟耗时(s)", current["wall_s"], previous.get("wall_s"))
+    return regressions
+
+
+def print_report(record: Dict[str, Any]):
+    imports = record["imports"]
+    print("=" * 50)
+    print(f"导入模块数: {imports['module_count']}，导入总耗时: {imports['total_import_ms']} ms")
+    print("累计耗时最高的模块:")
+    for item in imports["slowest"]:
+        print(f"   {item['cumulative_ms']:>9.1f} ms  (自身 {item['self_ms']:.1f} ms)  {item['module']}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NagaAgent 启动性能分析工具")
+    parser.add_argument("--module", help="只分析指定模块的导入耗时")
+    parser.add_argument("--timeout", type=float, default=120.0, help="等待服务就绪的超时时间（秒）")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="判定回退的容差比例")
+    parser.add_argument("--no-save", action="store_true", help="不写入历史记录")
+    args = parser.parse_args()
+
+    try:
+        record = profile_module(args.module) if args.module else profile_startup(timeout=args.timeout)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    record.update({
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "executable": sys.executable,
+    })
+    print_report(record)
+
+    regressions = compare(record, load_previous(record["mode"], record.get("module")), args.tolerance)
+    if not args.no_save:
+        save_record(record)
+
+    if regressions:
+        print("⚠️ 与上一次记录相比出现回退:")
+        for item in regressions:
+            print(f"   {item}")
+        sys.exit(1)
+    print("✅ 未发现启动回退")
@@ -9,20 +9,69 @@
 import os
 import sys
 import subprocess
-import importlib
+import importlib.util
+import hashlib
 import platform
 import json
+import site
 import socket
-import psutil
 import shutil
 import urllib.request
 import zipfile
 import tempfile
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from datetime import datetime
-from nagaagent_core.vendors.charset_normalizer import from_path
-from nagaagent_core.vendors import json5  # 支持带注释的JSON解析
+
+# psutil、charset_normalizer、json5 在首次使用时才导入，避免拖慢启动
+
+# 包名与导入名不一致的依赖
+MODULE_NAME_MAP = {
+    "opencv_python": "cv2",
+    "python_docx": "docx",
+}
+
+# 环境指纹涉及的锁文件
+FINGERPRINT_FILES = ("uv.lock", "requirements.txt", "pyproject.toml")
+
+ENV_CACHE_VERSION = 1
+
+
+def probe_module(module_name: str) -> bool:
+    """只查找模块规格而不执行导入，判断依赖是否已安装"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load_config_data(config_file: Path) -> Tuple[Dict[str, Any], str]:
+    """读取config.json（自动检测编码，支持注释），返回(配置, 编码)"""
+    from nagaagent_core.vendors.charset_normalizer import from_path
+    from nagaagent_core.vendors import json5  # 支持带注释的JSON解析
+
+    detected_encoding = 'utf-8'  # 默认编码
+    charset_results = from_path(str(config_file))
+    if charset_results:
+        best_match = charset_results.best()
+        if best_match:
+            detected_encoding = best_match.encoding
+
+    with open(config_file, 'r', encoding=detected_encoding) as f:
+        content = f.read()
+    try:
+        # 首先尝试使用json5解析（支持注释）
+        config_data = json5.loads(content)
+    except Exception:
+        # 如果json5解析失败，回退到标准JSON（移除注释行）
+        cleaned_lines = []
+        for line in content.split('\n'):
+            if '#' in line:
+                line = line.split('#')[0].rstrip()
+            if line.strip():  # 只保留非空行
+                cleaned_lines.append(line)
+        config_data = json.loads('\n'.join(cleaned_lines))
+    return config_data, detected_encoding
 
 class SystemChecker:
     """系统环境检测器"""
@@ -33,7 +82,9 @@ class SystemChecker:
         self.requirements_file = self.project_root / "requirements.txt"
         self.config_file = self.project_root / "config.json"
         self.pyproject_file = self.project_root / "pyproject.toml"
+        self.env_cache_file = self.project_root / "logs" / "env_check_cache.json"
         self.results = {}
+        self.dependency_status: Dict[str, bool] = {}
 
         # 需要检测的端口 - 从config读取
         from system.config import get_all_server_ports
@@ -194,26 +245,26 @@ class SystemChecker:
 
         return True
     
+    def _probe_dependency(self, dep: str) -> bool:
+        """探测依赖是否存在（不导入），结果记录到 dependency_status"""
+        module_name = MODULE_NAME_MAP.get(dep, dep)
+        if module_name == "nagaagent_core" or module_name.startswith("nagaagent_core."):
+            # 本地包可能尚未加入sys.path，按仓库目录补充查找
+            local_pkg = self.project_root / "nagaagent-core"
+            if local_pkg.exists() and str(local_pkg) not in sys.path:
+                sys.path.insert(0, str(local_pkg))
+        installed = probe_module(module_name)
+        self.dependency_status[dep] = installed
+        return installed
+
     def check_core_dependencies(self) -> bool:
         """检测核心依赖包"""
         missing_deps = []
 
         for dep in self.core_dependencies:
-            # 特殊处理某些包名
-            module_name = dep
-            if dep == "nagaagent_core":
-                module_name = "nagaagent_core"
-            elif dep == "opencv_python":
-                module_name = "cv2"
-            elif dep == "pydantic":
-                module_name = "pydantic"
-            elif dep == "edge_tts":
-                module_name = "edge_tts"
-
-            try:
-                importlib.import_module(module_name)
+            if self._probe_dependency(dep):
                 print(f"   [OK] {dep}")
-            except ImportError:
+            else:
                 print(f"   [ERROR] {dep}: 未安装")
                 missing_deps.append(dep)
 
@@ -229,23 +280,9 @@ class SystemChecker:
         missing_optional = []
 
         for dep, desc in self.optional_dependencies:
-            # 特殊处理某些包名
-            module_name = dep
-            if dep == "opencv_python":
-                module_name = "cv2"
-            elif dep == "edge_tts":
-                module_name = "edge_tts"
-            elif dep == "live2d":
-                module_name = "live2d"
-            elif dep == "bilibili_api":
-                module_name = "bilibili_api"
-            elif dep == "python_docx":
-                module_name = "docx"
-
-            try:
-                importlib.import_module(module_name)
+            if self._probe_dependency(dep):
                 print(f"   [OK] {dep} ({desc})")
-            except ImportError:
+            else:
                 print(f"   [WARN] {dep} ({desc}): 未安装")
                 missing_optional.append((dep, desc))
 
@@ -345,6 +382,7 @@ class SystemChecker:
         """检测系统资源"""
         try:
             # CPU信息
+            import psutil
             cpu_count = psutil.cpu_count()
             cpu_percent = psutil.cpu_percent(interval=1)
             print(f"   CPU核心数: {cpu_count}")
@@ -386,21 +424,7 @@ class SystemChecker:
         try:
             # 检查配置文件中是否有Neo4j配置
             if self.config_file.exists():
-                # 使用Charset Normalizer自动检测编码
-                charset_results = from_path(str(self.config_file))
-                if charset_results:
-                    best_match = charset_results.best()
-                    if best_match:
-                        detected_encoding = best_match.encoding
-                        # 使用检测到的编码直接打开文件，然后使用JSON读取
-                        with open(self.config_file, 'r', encoding=detected_encoding) as f:
-                            config = json.load(f)
-                    else:
-                        with open(self.config_file, 'r', encoding='utf-8') as f:
-                            config = json.load(f)
-                else:
-                    with open(self.config_file, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
+                config, _ = load_config_data(self.config_file)
 
                 neo4j_config = config.get('grag', {})
                 if neo4j_config.get('enabled', False):
@@ -650,6 +674,7 @@ class SystemChecker:
 
         # 添加系统资源信息
         try:
+            import psutil
             memory = psutil.virtual_memory()
             info["总内存"] = f"{memory.total / (1024**3):.1f} GB"
             info["CPU核心数"] = str(psutil.cpu_count())
@@ -737,205 +762,98 @@ class SystemChecker:
             print("   重新克隆项目可能解决问题")
             print()
 
-    def is_check_passed(self) -> bool:
-        """检查是否已经通过过系统检测"""
-        if not self.config_file.exists():
-            return False
+    def compute_env_fingerprint(self) -> str:
+        """计算环境指纹：解释器版本 + 锁文件 + site-packages 目录的修改时间与大小
+
+        安装/卸载依赖会改变site-packages目录的修改时间，修改依赖声明会改变锁文件，
+        两者都不变时沿用上一次的检测结果。
+        """
+        parts = [sys.version, platform.platform()]
+        for name in FINGERPRINT_FILES:
+            path = self.project_root / name
+            try:
+                stat = path.stat()
+                parts.append(f"{name}:{stat.st_mtime_ns}:{stat.st_size}")
+            except OSError:
+                parts.append(f"{name}:missing")
+
+        site_dirs = list(getattr(site, "getsitepackages", lambda: [])())
+        user_site = getattr(site, "getusersitepackages", lambda: None)()
+        if user_site:
+            site_dirs.append(user_site)
+        for directory in sorted(set(site_dirs)):
+            try:
+                parts.append(f"{directory}:{os.stat(directory).st_mtime_ns}")
+            except OSError:
+                continue
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
 
+    def _load_env_cache(self) -> Dict[str, Any]:
+        """读取环境检测缓存（按解释器路径分条目）"""
         try:
-            # 使用Charset Normalizer自动检测编码
-            charset_results = from_path(str(self.config_file))
-            if charset_results:
-                best_match = charset_results.best()
-                if best_match:
-                    # 使用检测到的编码直接打开文件
-                    detected_encoding = best_match.encoding
-                    with open(self.config_file, 'r', encoding=detected_encoding) as f:
-                        try:
-                            # 首先尝试使用json5解析（支持注释）
-                            config_data = json5.load(f)
-                        except Exception as json5_error:
-                            # 如果json5解析失败，回退到标准JSON（移除注释）
-                            f.seek(0)
-                            content = f.read()
-                            # 移除注释行
-                            lines = content.split('\n')
-                            cleaned_lines = []
-                            for line in lines:
-                                if '#' in line:
-                                    line = line.split('#')[0].rstrip()
-                                if line.strip():  # 只保留非空行
-                                    cleaned_lines.append(line)
-                            cleaned_content = '\n'.join(cleaned_lines)
-                            config_data = json.loads(cleaned_content)
-                else:
-                    with open(self.config_file, 'r', encoding='utf-8') as f:
-                        try:
-                            config_data = json5.load(f)
-                        except Exception as json5_error:
-                            f.seek(0)
-                            content = f.read()
-                            lines = content.split('\n')
-                            cleaned_lines = []
-                            for line in lines:
-                                if '#' in line:
-                                    line = line.split('#')[0].rstrip()
-                                if line.strip():
-                                    cleaned_lines.append(line)
-                            cleaned_content = '\n'.join(cleaned_lines)
-                            config_data = json.loads(cleaned_content)
-            else:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    try:
-                        config_data = json5.load(f)
-                    except Exception as json5_error:
-                        f.seek(0)
-                        content = f.read()
-                        lines = content.split('\n')
-                        cleaned_lines = []
-                        for line in lines:
-                            if '#' in line:
-                                line = line.split('#')[0].rstrip()
-                            if line.strip():
-                                cleaned_lines.append(line)
-                        cleaned_content = '\n'.join(cleaned_lines)
-                        config_data = json.loads(cleaned_content)
-
-            system_check = config_data.get('system_check', {})
-            return system_check.get('passed', False)
-        except Exception:
-            return False
-    
+            with open(self.env_cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == ENV_CACHE_VERSION:
+                return cache
+        except (OSError, ValueError):
+            pass
+        return {'version': ENV_CACHE_VERSION, 'interpreters': {}}
+
+    def _write_env_cache(self, cache: Dict[str, Any]):
+        self.env_cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.env_cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.env_cache_file)
+
+    def get_cached_result(self) -> Optional[Dict[str, Any]]:
+        """获取当前解释器、当前指纹下的缓存检测结果，指纹变化时返回None"""
+        entry = self._load_env_cache()['interpreters'].get(sys.executable)
+        if not entry or entry.get('fingerprint') != self.compute_env_fingerprint():
+            return None
+        return entry
+
+    def is_check_passed(self) -> bool:
+        """检查当前环境是否已经通过过系统检测（环境指纹未变化）"""
+        entry = self.get_cached_result()
+        return bool(entry and entry.get('passed', False))
+
     def save_check_status(self, passed: bool):
-        """保存检测状态到config.json"""
+        """保存检测状态与依赖探测结果到环境缓存"""
         try:
-            # 自动检测文件编码
-            detected_encoding = 'utf-8'  # 默认编码
-            if self.config_file.exists():
-                charset_results = from_path(str(self.config_file))
-                if charset_results:
-                    best_match = charset_results.best()
-                    if best_match:
-                        detected_encoding = best_match.encoding
-                        print(f"检测到配置文件编码: {detected_encoding}")
-
-            # 读取现有配置，使用检测到的编码直接打开文件
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding=detected_encoding) as f:
-                    try:
-                        # 首先尝试使用json5解析（支持注释）
-                        config_data = json5.load(f)
-                    except Exception as json5_error:
-                        # 如果json5解析失败，回退到标准JSON（移除注释）
-                        f.seek(0)
-                        content = f.read()
-                        # 移除注释行
-                        lines = content.split('\n')
-                        cleaned_lines = []
-                        for line in lines:
-                            if '#' in line:
-                                line = line.split('#')[0].rstrip()
-                            if line.strip():  # 只保留非空行
-                                cleaned_lines.append(line)
-                        cleaned_content = '\n'.join(cleaned_lines)
-                        config_data = json.loads(cleaned_content)
-            else:
-                config_data = {}
-
-            # 更新system_check配置
-            config_data['system_check'] = {
+            cache = self._load_env_cache()
+            cache['interpreters'][sys.executable] = {
                 'passed': passed,
+                'fingerprint': self.compute_env_fingerprint(),
                 'timestamp': datetime.now().isoformat(),
                 'python_version': f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
                 'project_path': str(self.project_root),
-                'system': platform.system()
+                'system': platform.system(),
+                'dependencies': self.dependency_status,
             }
-
-            # 保存配置，使用检测到的编码
-            with open(self.config_file, 'w', encoding=detected_encoding) as f:
-                json.dump(config_data, f, ensure_ascii=False, indent=2)
+            self._write_env_cache(cache)
         except Exception as e:
             print(f"⚠️ 保存检测状态失败: {e}")
-    
+
     def should_skip_check(self) -> bool:
         """判断是否应该跳过检测"""
         return self.is_check_passed()
-    
+
     def reset_check_status(self):
         """重置检测状态，强制下次启动时重新检测"""
         try:
-            # 读取现有配置
+            if self.env_cache_file.exists():
+                self.env_cache_file.unlink()
+
+            # 清理旧版本写入config.json的检测状态
             if self.config_file.exists():
-                # 使用Charset Normalizer自动检测编码
-                charset_results = from_path(str(self.config_file))
-                detected_encoding = 'utf-8'  # 默认编码
-                if charset_results:
-                    best_match = charset_results.best()
-                    if best_match:
-                        # 使用检测到的编码直接打开文件
-                        detected_encoding = best_match.encoding
-                        with open(self.config_file, 'r', encoding=detected_encoding) as f:
-                            try:
-                                # 首先尝试使用json5解析（支持注释）
-                                config_data = json5.load(f)
-                            except Exception as json5_error:
-                                # 如果json5解析失败，回退到标准JSON（移除注释）
-                                f.seek(0)
-                                content = f.read()
-                                # 移除注释行
-                                lines = content.split('\n')
-                                cleaned_lines = []
-                                for line in lines:
-                                    if '#' in line:
-                                        line = line.split('#')[0].rstrip()
-                                    if line.strip():  # 只保留非空行
-                                        cleaned_lines.append(line)
-                                cleaned_content = '\n'.join(cleaned_lines)
-                                config_data = json.loads(cleaned_content)
-                    else:
-                        with open(self.config_file, 'r', encoding='utf-8') as f:
-                            try:
-                                config_data = json5.load(f)
-                            except Exception as json5_error:
-                                f.seek(0)
-                                content = f.read()
-                                lines = content.split('\n')
-                                cleaned_lines = []
-                                for line in lines:
-                                    if '#' in line:
-                                        line = line.split('#')[0].rstrip()
-                                    if line.strip():
-                                        cleaned_lines.append(line)
-                                cleaned_content = '\n'.join(cleaned_lines)
-                                config_data = json.loads(cleaned_content)
-                else:
-                    with open(self.config_file, 'r', encoding='utf-8') as f:
-                        try:
-                            config_data = json5.load(f)
-                        except Exception as json5_error:
-                            f.seek(0)
-                            content = f.read()
-                            lines = content.split('\n')
-                            cleaned_lines = []
-                            for line in lines:
-                                if '#' in line:
-                                    line = line.split('#')[0].rstrip()
-                                if line.strip():
-                                    cleaned_lines.append(line)
-                            cleaned_content = '\n'.join(cleaned_lines)
-                            config_data = json.loads(cleaned_content)
-
-                # 删除system_check配置
+                config_data, detected_encoding = load_config_data(self.config_file)
                 if 'system_check' in config_data:
                     del config_data['system_check']
+                    with open(self.config_file, 'w', encoding=detected_encoding) as f:
+                        json.dump(config_data, f, ensure_ascii=False, indent=2)
 
-                # 保存配置，使用检测到的编码
-                with open(self.config_file, 'w', encoding=detected_encoding) as f:
-                    json.dump(config_data, f, ensure_ascii=False, indent=2)
-
-                print("✅ 检测状态已重置，下次启动时将重新检测")
-            else:
-                print("⚠️ 配置文件不存在")
+            print("✅ 检测状态已重置，下次启动时将重新检测")
         except Exception as e:
             print(f"⚠️ 重置检测状态失败: {e}")
 
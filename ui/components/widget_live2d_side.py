@@ -64,12 +64,17 @@ class Live2DSideWidget(QWidget):
                     initial_scale = transform.get('scale', live2d_config.get('model', {}).get('scale_factor', 1.0))
                     initial_offset_x = transform.get('offset_x', 0.0)
                     initial_offset_y = transform.get('offset_y', 0.0)
+                    # 帧率调度设置（满帧率/空闲帧率/降帧延迟/是否自适应），缺省时用Widget默认值
+                    performance = live2d_config.get('performance', {})
+                    frame_options = {key: performance[key] for key in
+                                     ('target_fps', 'idle_fps', 'idle_delay', 'adaptive_fps') if key in performance}
             except:
                 initial_scale = getattr(config.live2d, 'scale_factor', 1.0)
                 initial_offset_x = 0.0
                 initial_offset_y = 0.0
+                frame_options = {}
 
-            self.live2d_widget = Live2DWidget(self, scale_factor=initial_scale)
+            self.live2d_widget = Live2DWidget(self, scale_factor=initial_scale, **frame_options)
             self.live2d_widget.setStyleSheet('background: transparent; border: none;')
 
             # 固定的默认值（用于重置功能，不随配置改变）
@@ -8,6 +8,7 @@ Live2D集成模块
 from .renderer import Live2DRenderer
 from .animator import Live2DAnimator, create_animator_from_config
 from .widget import Live2DWidget, create_widget_from_config
+from .frame_scheduler import AdaptiveFrameScheduler, FrameState
 from .config_manager import Live2DConfigManager, get_config, reload_config
 
 __all__ = [
@@ -16,6 +17,8 @@ __all__ = [
     'create_animator_from_config',
     'Live2DWidget',
     'create_widget_from_config',
+    'AdaptiveFrameScheduler',
+    'FrameState',
     'Live2DConfigManager',
     'get_config',
     'reload_config'
@@ -73,6 +73,10 @@ class EyeTrackingAnimator:
             "ParamEyeBallY": self.current_y * 0.5
         }
 
+    def is_settled(self, epsilon: float = 0.001) -> bool:
+        """眼球是否已到达目标位置"""
+        return abs(self.target_x - self.current_x) < epsilon and abs(self.target_y - self.current_y) < epsilon
+
 
 class BreathAnimator:
     """呼吸动画器"""
@@ -190,6 +194,18 @@ class LipSyncAnimator:
         self.target_mouth_open = 0.0
         logger.debug("嘴部同步：停止说话")
     
+    def is_settled(self, epsilon: float = 0.001) -> bool:
+        """嘴部与表情参数是否已全部过渡到目标值且未在说话"""
+        if self.is_speaking:
+            return False
+        return (
+            abs(self.target_mouth_open - self.current_mouth_open) < epsilon
+            and abs(self.target_mouth_form - self.current_mouth_form) < epsilon
+            and abs(self.target_mouth_smile - self.current_mouth_smile) < epsilon
+            and abs(self.target_eye_brow - self.current_eye_brow) < epsilon
+            and abs(self.target_eye_wide - self.current_eye_wide) < epsilon
+        )
+
     def update(self) -> Dict[str, float]:
         """更新嘴部和表情动画"""
         # 平滑过渡到目标值（张开度）
@@ -296,6 +312,14 @@ class Live2DAnimator:
         except Exception as e:
             logger.error(f"动画更新失败: {e}")
 
+    def is_animating(self) -> bool:
+        """是否有需要满帧率渲染的动画（说话、口型同步、眼球/表情仍在过渡）
+
+        眨眼和呼吸属于常驻动画，不计入，空闲低帧率下仍会继续更新
+        """
+        return not (self.eye_tracking.is_settled(self._param_threshold)
+                    and self.lip_sync.is_settled(self._param_threshold))
+
     def set_emotion(self, emotion: str, intensity: float = 1.0):
         """设置情绪"""
         self.emotion.set_emotion(emotion, intensity)
@@ -35,6 +35,8 @@ class PerformanceConfig:
     adaptive_fps: bool = True
     min_fps: int = 30
     max_fps: int = 144
+    idle_fps: int = 10  # 空闲（无交互/语音）时的帧率
+    idle_delay: float = 2.0  # 无活动多久后降到空闲帧率（秒）
     enable_canvas: bool = True
     canvas_opacity: float = 1.0
 
@@ -437,6 +439,7 @@ class Live2DConfigManager:
             if self.performance:
                 assert 1 <= self.performance.target_fps <= 240, "target_fps必须在1-240之间"
                 assert self.performance.min_fps <= self.performance.target_fps <= self.performance.max_fps, "FPS范围设置错误"
+                assert 1 <= self.performance.idle_fps <= self.performance.target_fps, "idle_fps必须在1-target_fps之间"
                 assert 0.0 <= self.performance.canvas_opacity <= 1.0, "canvas_opacity必须在0-1之间"
 
             # 验证动画器权重
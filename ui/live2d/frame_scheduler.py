@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live2D自适应帧率调度器
+根据动画活跃度和窗口可见性决定渲染间隔：
+- 活跃（交互、说话、口型同步、参数仍在过渡）时使用满帧率
+- 空闲一段时间后降到低帧率，只维持呼吸/眨眼
+- 窗口被遮挡或最小化时暂停渲染
+不依赖Qt，可在无界面环境下用虚拟时钟驱动
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger("live2d.frame_scheduler")
+
+
+class FrameState:
+    """调度状态"""
+    ACTIVE = "active"
+    IDLE = "idle"
+    SUSPENDED = "suspended"
+
+
+class AdaptiveFrameScheduler:
+    """自适应帧率调度器"""
+
+    def __init__(self, target_fps: int = 60, idle_fps: int = 10, idle_delay: float = 2.0,
+                 suspend_poll_interval: float = 0.5, adaptive: bool = True,
+                 stats_window: int = 120, clock: Callable[[], float] = time.perf_counter):
+        """
+        初始化调度器
+
+        参数:
+            target_fps: 活跃状态帧率
+            idle_fps: 空闲状态帧率
+            idle_delay: 最后一次活跃后多久进入空闲（秒）
+            suspend_poll_interval: 暂停时检查可见性的间隔（秒）
+            adaptive: False时始终使用满帧率（仍会在不可见时暂停）
+            stats_window: 帧时间统计窗口大小
+            clock: 时钟函数，测试时可替换为虚拟时钟
+        """
+        self.target_fps = max(1, target_fps)
+        self.idle_fps = max(1, min(idle_fps, self.target_fps))
+        self.idle_delay = max(0.0, idle_delay)
+        self.suspend_poll_interval = suspend_poll_interval
+        self.adaptive = adaptive
+        self._clock = clock
+
+        self.state = FrameState.ACTIVE
+        self._suspended = False
+        self._last_activity = clock()
+        self._hold_until = 0.0
+
+        # 帧统计
+        self._frame_stamps: deque = deque(maxlen=stats_window)
+        self._frame_times: deque = deque(maxlen=stats_window)
+        self.total_frames = 0
+
+    # ---------- 状态输入 ----------
+
+    def notify_activity(self, hold: float = 0.0):
+        """通知有交互/音频等活动，立即恢复满帧率
+
+        参数:
+            hold: 额外保持满帧率的时长（秒），用于动作/表情播放
+        """
+        now = self._clock()
+        self._last_activity = now
+        if hold > 0:
+            self._hold_until = max(self._hold_until, now + hold)
+        if self.state == FrameState.IDLE:
+            self.state = FrameState.ACTIVE
+            logger.debug("Live2D渲染恢复满帧率")
+
+    def set_suspended(self, suspended: bool):
+        """设置是否暂停（窗口遮挡/最小化）"""
+        if suspended == self._suspended:
+            return
+        self._suspended = suspended
+        if suspended:
+            self.state = FrameState.SUSPENDED
+            logger.debug("Live2D渲染已暂停")
+        else:
+            # 恢复时按活跃处理，避免第一帧停留在旧画面
+            self.state = FrameState.ACTIVE
+            self._last_activity = self._clock()
+            self._frame_stamps.clear()
+            logger.debug("Live2D渲染已恢复")
+
+    @property
+    def suspended(self) -> bool:
+        return self._suspended
+
+    # ---------- 调度 ----------
+
+    def update_state(self, animating: bool) -> str:
+        """根据动画器是否仍有待过渡的参数更新状态"""
+        if self._suspended:
+            self.state = FrameState.SUSPENDED
+            return self.state
+
+        now = self._clock()
+        if animating:
+            self._last_activity = now
+
+        if not self.adaptive or now < self._hold_until or now - self._last_activity < self.idle_delay:
+            self.state = FrameState.ACTIVE
+        else:
+            self.state = FrameState.IDLE
+        return self.state
+
+    def current_interval(self) -> int:
+        """当前状态对应的定时器间隔（毫秒）"""
+        if self.state == FrameState.SUSPENDED:
+            return int(self.suspend_poll_interval * 1000)
+        fps = self.target_fps if self.state == FrameState.ACTIVE else self.idle_fps
+        return max(1, int(1000 / fps))
+
+    def should_render(self) -> bool:
+        """当前是否需要渲染"""
+        return self.state != FrameState.SUSPENDED
+
+    # ---------- 统计 ----------
+
+    def record_frame(self, frame_time: float):
+        """记录一帧，frame_time为本帧耗时（秒）"""
+        self._frame_stamps.append(self._clock())
+        self._frame_times.append(frame_time)
+        self.total_frames += 1
+
+    def get_current_fps(self) -> float:
+        """按统计窗口内的帧时间戳估算实际帧率"""
+        if len(self._frame_stamps) < 2:
+            return 0.0
+        span = self._frame_stamps[-1] - self._frame_stamps[0]
+        if span <= 0:
+            return 0.0
+        return (len(self._frame_stamps) - 1) / span
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取帧率与帧耗时统计"""
+        frame_times = list(self._frame_times)
+        if frame_times:
+            avg_ms = sum(frame_times) / len(frame_times) * 1000
+            max_ms = max(frame_times) * 1000
+        else:
+            avg_ms = max_ms = 0.0
+        return {
+            "state": self.state,
+            "current_fps": round(self.get_current_fps(), 2),
+            "scheduled_fps": 0 if self.state == FrameState.SUSPENDED else round(1000 / self.current_interval(), 2),
+            "target_fps": self.target_fps,
+            "idle_fps": self.idle_fps,
+            "avg_frame_ms": round(avg_ms, 3),
+            "max_frame_ms": round(max_ms, 3),
+            "total_frames": self.total_frames,
+        }
+
+
+def simulate_schedule(script: List[Tuple[str, float]], target_fps: int = 60, idle_fps: int = 10,
+                      idle_delay: float = 2.0) -> Dict[str, int]:
+    """离屏模拟：按脚本驱动调度器并统计各阶段的渲染次数
+
+    参数:
+        script: [(阶段, 时长秒), ...]，阶段为 idle / talk / hidden
+    返回:
+        {阶段序号_阶段: 渲染次数}
+    """
+    now = [0.0]
+    scheduler = AdaptiveFrameScheduler(target_fps=target_fps, idle_fps=idle_fps,
+                                       idle_delay=idle_delay, clock=lambda: now[0])
+    counts: Dict[str, int] = {}
+    for index, (phase, duration) in enumerate(script):
+        key = f"{index}_{phase}"
+        counts[key] = 0
+        scheduler.set_suspended(phase == "hidden")
+        end = now[0] + duration
+        while now[0] < end:
+            talking = phase == "talk"
+            if talking:
+                scheduler.notify_activity()
+            scheduler.update_state(animating=talking)
+            if scheduler.should_render():
+                scheduler.record_frame(0.0)
+                counts[key] += 1
+            now[0] += scheduler.current_interval() / 1000
+    return counts
+
+
+if __name__ == "__main__":
+    result = simulate_schedule([("idle", 10), ("talk", 5), ("idle", 10), ("hidden", 10)])
+    for phase, frames in result.items():
+        print(f"{phase}: {frames} 帧")
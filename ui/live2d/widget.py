@@ -5,6 +5,7 @@ Live2D Widget（精简版）
 基于QOpenGLWidget的Live2D显示组件
 """
 
+import time
 import logging
 from typing import Optional, Callable
 from nagaagent_core.vendors.PyQt5.QtWidgets import QOpenGLWidget
@@ -13,6 +14,7 @@ from nagaagent_core.vendors.PyQt5.QtGui import QMouseEvent
 
 from .renderer import Live2DRenderer, RendererState
 from .animator import Live2DAnimator
+from .frame_scheduler import AdaptiveFrameScheduler
 from .config_manager import get_config
 
 logger = logging.getLogger("live2d.widget")
@@ -26,7 +28,11 @@ class Live2DWidget(QOpenGLWidget):
     error_occurred = pyqtSignal(str)
     gl_initialized = pyqtSignal(bool)
 
-    def __init__(self, parent=None, target_fps: int = 60, scale_factor: float = 1.0):
+    # 触发动作/表情后保持满帧率的时长（秒）
+    MOTION_HOLD_SECONDS = 3.0
+
+    def __init__(self, parent=None, target_fps: int = 60, scale_factor: float = 1.0,
+                 idle_fps: int = 10, idle_delay: float = 2.0, adaptive_fps: bool = True):
         """
         初始化Live2D Widget
 
@@ -34,6 +40,9 @@ class Live2DWidget(QOpenGLWidget):
             parent: 父Widget
             target_fps: 目标帧率
             scale_factor: 模型缩放因子
+            idle_fps: 空闲时的帧率
+            idle_delay: 无活动多久后降到空闲帧率（秒）
+            adaptive_fps: 是否启用自适应帧率
         """
         super().__init__(parent)
 
@@ -45,8 +54,14 @@ class Live2DWidget(QOpenGLWidget):
         self.renderer = Live2DRenderer(scale_factor=scale_factor)
         self.animator: Optional[Live2DAnimator] = None
 
-        # 定时器
+        # 定时器与自适应帧率调度
         self.render_timer: Optional[QTimer] = None
+        self.frame_scheduler = AdaptiveFrameScheduler(
+            target_fps=self.target_fps,
+            idle_fps=idle_fps,
+            idle_delay=idle_delay,
+            adaptive=adaptive_fps
+        )
 
         # 延迟加载标志
         self._pending_load_model: Optional[str] = None
@@ -163,9 +178,11 @@ class Live2DWidget(QOpenGLWidget):
         # 正常渲染
         if self.renderer and self.renderer.has_model():
             try:
+                frame_start = time.perf_counter()
                 self.renderer.update()
                 # 传递偏移量给渲染器
                 self.renderer.draw(bg_alpha, self.model_offset_x, self.model_offset_y)
+                self.frame_scheduler.record_frame(time.perf_counter() - frame_start)
             except Exception as e:
                 logger.error(f"绘制失败: {e}")
 
@@ -183,8 +200,35 @@ class Live2DWidget(QOpenGLWidget):
             self.render_timer = QTimer(self)
             self.render_timer.timeout.connect(self._update_frame)
 
-        interval = int(1000 / self.target_fps)
-        self.render_timer.start(interval)
+        self.render_timer.start(self.frame_scheduler.current_interval())
+
+    def _apply_timer_interval(self):
+        """按调度器状态调整定时器间隔"""
+        if not self.render_timer or not self.render_timer.isActive():
+            return
+        interval = self.frame_scheduler.current_interval()
+        if self.render_timer.interval() != interval:
+            self.render_timer.setInterval(interval)
+
+    def _notify_activity(self, hold: float = 0.0):
+        """交互/音频活动，立即恢复满帧率"""
+        self.frame_scheduler.notify_activity(hold)
+        self.frame_scheduler.update_state(animating=True)
+        self._apply_timer_interval()
+
+    def _is_occluded(self) -> bool:
+        """窗口是否不可见（隐藏、最小化或未暴露）"""
+        if not self.isVisible():
+            return True
+        window = self.window()
+        if window.isMinimized():
+            return True
+        handle = window.windowHandle()
+        return handle is not None and not handle.isExposed()
+
+    def get_frame_stats(self) -> dict:
+        """获取当前帧率和帧耗时统计"""
+        return self.frame_scheduler.get_stats()
 
     def _update_frame(self):
         """更新帧 - 带错误恢复机制"""
@@ -192,6 +236,14 @@ class Live2DWidget(QOpenGLWidget):
             return
 
         try:
+            # 自适应调度：不可见时暂停，空闲时降帧
+            self.frame_scheduler.set_suspended(self._is_occluded())
+            animating = self.animator.is_animating() if self.animator else False
+            self.frame_scheduler.update_state(animating)
+            self._apply_timer_interval()
+            if not self.frame_scheduler.should_render():
+                return
+
             if self.animator:
                 self.animator.update()
             self.update()
@@ -253,11 +305,13 @@ class Live2DWidget(QOpenGLWidget):
         """设置情绪"""
         if self.animator:
             self.animator.set_emotion(emotion, intensity)
+            self._notify_activity()
 
     def set_eye_target(self, x: float, y: float):
         """设置眼球跟踪目标"""
         if self.animator:
             self.animator.set_eye_target(x, y)
+            self._notify_activity()
     
     @pyqtSlot(float)
     def set_audio_volume(self, volume: float):
@@ -268,6 +322,7 @@ class Live2DWidget(QOpenGLWidget):
         """
         if self.animator:
             self.animator.set_audio_volume(volume)
+            self._notify_activity()
 
     @pyqtSlot(float)
     def set_mouth_form(self, form: float):
@@ -281,18 +336,21 @@ class Live2DWidget(QOpenGLWidget):
         """
         if self.animator:
             self.animator.set_mouth_form(form)
+            self._notify_activity()
 
     @pyqtSlot()
     def start_speaking(self):
         """开始说话（启用嘴部动画）"""
         if self.animator:
             self.animator.start_speaking()
+            self._notify_activity()
 
     @pyqtSlot()
     def stop_speaking(self):
         """停止说话（关闭嘴部动画）"""
         if self.animator:
             self.animator.stop_speaking()
+            self._notify_activity()
 
     @pyqtSlot(float)
     def set_mouth_smile(self, smile: float):
@@ -303,6 +361,7 @@ class Live2DWidget(QOpenGLWidget):
         """
         if self.animator:
             self.animator.set_mouth_smile(smile)
+            self._notify_activity()
 
     @pyqtSlot(float)
     def set_eye_brow(self, position: float):
@@ -313,6 +372,7 @@ class Live2DWidget(QOpenGLWidget):
         """
         if self.animator:
             self.animator.set_eye_brow(position)
+            self._notify_activity()
 
     @pyqtSlot(float)
     def set_eye_wide(self, wide: float):
@@ -323,22 +383,26 @@ class Live2DWidget(QOpenGLWidget):
         """
         if self.animator:
             self.animator.set_eye_wide(wide)
+            self._notify_activity()
 
     def trigger_motion(self, group: str, index: int = 0, priority: int = 3):
         """触发动作"""
         if self.renderer:
             self.renderer.trigger_motion(group, index, priority)
+            self._notify_activity(self.MOTION_HOLD_SECONDS)
 
     def trigger_expression(self, expression_id: str):
         """触发表情"""
         if self.renderer:
             self.renderer.trigger_expression(expression_id)
+            self._notify_activity(self.MOTION_HOLD_SECONDS)
 
     def set_scale_factor(self, scale_factor: float):
         """设置模型缩放因子"""
         self.scale_factor = max(0.5, min(3.0, scale_factor))
         if self.renderer:
             self.renderer.set_scale_factor(self.scale_factor)
+            self._notify_activity()
             self.update()
 
     def set_edit_mode(self, enabled: bool):
@@ -373,6 +437,19 @@ class Live2DWidget(QOpenGLWidget):
         except Exception as e:
             logger.error(f"资源清理失败: {e}")
 
+    # 可见性事件：隐藏时暂停渲染，显示时立即恢复
+    def showEvent(self, event):
+        """显示事件"""
+        self.frame_scheduler.set_suspended(False)
+        self._apply_timer_interval()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """隐藏事件"""
+        self.frame_scheduler.set_suspended(True)
+        self._apply_timer_interval()
+        super().hideEvent(event)
+
     # 鼠标事件处理
     def mousePressEvent(self, event: QMouseEvent):
         """鼠标点击事件"""
@@ -407,6 +484,7 @@ class Live2DWidget(QOpenGLWidget):
         # 将像素偏移转换为归一化坐标偏移
         self.model_offset_x = self._drag_start_offset_x + (delta_x / self.width()) * self._drag_sensitivity
         self.model_offset_y = self._drag_start_offset_y - (delta_y / self.height()) * self._drag_sensitivity
+        self._notify_activity()
         self.update()
 
     def mouseMoveEvent(self, event: QMouseEvent):
@@ -441,9 +519,15 @@ def create_widget_from_config(parent=None, config=None):
     # 基本配置
     target_fps = 60
     scale_factor = 1.0
+    idle_fps = 10
+    idle_delay = 2.0
+    adaptive_fps = True
 
     if config and config.performance:
         target_fps = getattr(config.performance, 'target_fps', 60)
+        idle_fps = getattr(config.performance, 'idle_fps', 10)
+        idle_delay = getattr(config.performance, 'idle_delay', 2.0)
+        adaptive_fps = getattr(config.performance, 'adaptive_fps', True)
 
     if config and config.model:
         scale_factor = getattr(config.model, 'scale_factor', 1.0)
@@ -451,7 +535,10 @@ def create_widget_from_config(parent=None, config=None):
     widget = Live2DWidget(
         parent=parent,
         target_fps=target_fps,
-        scale_factor=scale_factor
+        scale_factor=scale_factor,
+        idle_fps=idle_fps,
+        idle_delay=idle_delay,
+        adaptive_fps=adaptive_fps
     )
 
     logger.debug(f"从配置创建Widget，FPS: {target_fps}, 缩放: {scale_factor}")
@@ -138,7 +138,12 @@ class UnifiedVoiceManager(QObject):
                     'output_sample_rate': config.voice_realtime.output_sample_rate,
                     'chunk_size_ms': config.voice_realtime.chunk_size_ms,
                     'vad_threshold': config.voice_realtime.vad_threshold,
-                    'echo_suppression': config.voice_realtime.echo_suppression
+                    'echo_suppression': config.voice_realtime.echo_suppression,
+                    'vad_gate': config.voice_realtime.vad_gate,
+                    'vad_hangover_ms': config.voice_realtime.vad_hangover_ms,
+                    'vad_preroll_ms': config.voice_realtime.vad_preroll_ms,
+                    'vad_keepalive_ms': config.voice_realtime.vad_keepalive_ms,
+                    'vad_use_model': config.voice_realtime.vad_use_model
                 }
 
             success = self.voice_integration.start_voice(config_params)
@@ -10,6 +10,7 @@ import logging
 from typing import Optional
 
 from ..core.base_client import BaseVoiceClient
+from ..core.vad_gate import vad_options_from_kwargs
 
 logger = logging.getLogger(__name__)
 
@@ -47,9 +48,11 @@ class OpenAIVoiceClientAdapter(BaseVoiceClient):
 
         self.model = model or self.DEFAULT_MODEL
         self.voice = voice or self.DEFAULT_VOICE
+        # VAD门选项，底层客户端创建AudioManager时传入 vad_options
+        self.vad_options = vad_options_from_kwargs(kwargs)
 
         # TODO: 创建底层OpenAI客户端
-        # self._client = OpenAIRealtimeClient(...)
+        # self._client = OpenAIRealtimeClient(..., vad_options=self.vad_options)
 
         logger.info(f"OpenAIVoiceClientAdapter initialized: model={self.model}, voice={self.voice}")
         logger.warning("OpenAI adapter is a stub implementation. Please implement the actual client.")
@@ -6,7 +6,6 @@
 基于模块化设计，彻底解决自问自答问题
 """
 
-import base64
 import time
 import logging
 from typing import Optional, Callable, Dict, Any
@@ -41,7 +40,8 @@ class QwenVoiceClientRefactored:
         model: str = 'qwen3-omni-flash-realtime',
         voice: str = 'Cherry',
         debug: bool = False,
-        use_voice_prompt: bool = True  # 添加是否使用语音专用提示词的参数
+        use_voice_prompt: bool = True,  # 添加是否使用语音专用提示词的参数
+        vad_options: Optional[Dict[str, Any]] = None
     ):
         """
         初始化客户端
@@ -51,6 +51,7 @@ class QwenVoiceClientRefactored:
             model: 模型名称
             voice: 语音角色
             debug: 是否启用调试模式
+            vad_options: 本地VAD门选项（vad_gate/vad_threshold/vad_hangover_ms/vad_preroll_ms/vad_keepalive_ms/vad_use_model）
         """
         self.api_key = api_key
         self.model = model
@@ -67,7 +68,8 @@ class QwenVoiceClientRefactored:
             output_sample_rate=24000,
             chunk_size_ms=20,  # 🔧 关键修复：改为20ms（480样本，50FPS），接近EdgeTTS的400样本，RMS能量计算更准确
             vad_threshold=0.02,  # 提高阈值，减少误触发
-            echo_suppression=True
+            echo_suppression=True,
+            vad_options=vad_options
         )
 
         # 🔧 首次播放优化：暂时不启用延迟
@@ -181,7 +183,8 @@ class QwenVoiceClientRefactored:
         设置组件间的回调连接
         """
         # 音频管理器回调
-        self.audio_manager.on_audio_input = self._on_audio_input
+        self.audio_manager.send_gate = self._can_send_audio
+        self.audio_manager.on_audio_encoded = self._on_audio_encoded
         self.audio_manager.on_playback_started = self._on_playback_started
         self.audio_manager.on_playback_ended = self._on_playback_ended
         # 口型同步现在由AudioManager内部直接处理（模仿EdgeTTS）
@@ -200,24 +203,29 @@ class QwenVoiceClientRefactored:
             lambda: logger.info("进入冷却期，防止误识别")
         )
 
-    def _on_audio_input(self, audio_data: bytes):
+    def _can_send_audio(self) -> bool:
         """
-        处理音频输入
+        判断当前是否发送麦克风音频（在编码之前由发送线程调用）
         """
         # 在AI说话期间，不发送音频数据到服务器（避免误触发）
         if self.state_manager.current_state == ConversationState.AI_SPEAKING:
             logger.debug("AI说话期间，不发送音频数据")
-            return
+            return False
 
         # 检查状态是否允许发送
         if not self.state_manager.can_accept_user_input():
             logger.debug("状态不允许发送音频")
-            return
+            return False
 
+        return self.conversation is not None
+
+    def _on_audio_encoded(self, audio_b64: str):
+        """
+        发送音频（AudioManager发送线程上已完成Base64编码）
+        """
         # 发送到服务器
         if self.conversation:
             try:
-                audio_b64 = base64.b64encode(audio_data).decode('ascii')
                 self.conversation.append_audio(audio_b64)
                 self.stats['messages_sent'] += 1
             except Exception as e:
@@ -615,32 +623,17 @@ class QwenVoiceClientRefactored:
             if hasattr(self, 'audio_manager') and self.audio_manager:
                 logger.debug("强制清理音频缓冲区...")
 
-                # 先停止播放并彻底清理所有队列
+                # 先停止播放并彻底清理所有缓冲区
                 self.audio_manager.is_playing = False
                 self.audio_manager.is_recording = False
                 self.audio_manager.force_mute = True
 
-                # 清空所有音频队列
-                while not self.audio_manager.b64_output_queue.empty():
-                    try:
-                        self.audio_manager.b64_output_queue.get_nowait()
-                    except:
-                        pass
-
-                while not self.audio_manager.output_queue.empty():
-                    try:
-                        self.audio_manager.output_queue.get_nowait()
-                    except:
-                        pass
-
-                while not self.audio_manager.input_queue.empty():
-                    try:
-                        self.audio_manager.input_queue.get_nowait()
-                    except:
-                        pass
+                # 重置采集与播放缓冲区指针
+                self.audio_manager.reset_buffers()
 
                 # 清理回调函数，防止残留事件
-                self.audio_manager.on_audio_input = None
+                self.audio_manager.send_gate = None
+                self.audio_manager.on_audio_encoded = None
                 self.audio_manager.on_playback_started = None
                 self.audio_manager.on_playback_ended = None
 
@@ -730,14 +723,7 @@ class QwenVoiceClientRefactored:
             logger.info("用户手动打断AI说话")
             self.manual_interrupt_flag = True
 
-            # 清空Base64队列，防止新的音频数据进入
-            while not self.audio_manager.b64_output_queue.empty():
-                try:
-                    self.audio_manager.b64_output_queue.get_nowait()
-                except:
-                    pass
-
-            # 调用音频管理器的打断方法
+            # 调用音频管理器的打断方法（重置播放缓冲区指针）
             if self.audio_manager:
                 self.audio_manager.interrupt_playback()
 
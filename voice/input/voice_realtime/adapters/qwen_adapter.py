@@ -10,6 +10,7 @@ import logging
 from typing import Optional
 
 from ..core.base_client import BaseVoiceClient
+from ..core.vad_gate import vad_options_from_kwargs
 from .qwen.client import QwenVoiceClientRefactored
 
 logger = logging.getLogger(__name__)
@@ -55,7 +56,8 @@ class QwenVoiceClientAdapter(BaseVoiceClient):
             model=self.model,
             voice=self.voice,
             debug=self.debug,
-            use_voice_prompt=self.use_voice_prompt  # 传递语音提示词设置
+            use_voice_prompt=self.use_voice_prompt,  # 传递语音提示词设置
+            vad_options=vad_options_from_kwargs(kwargs)
         )
 
         # 桥接回调
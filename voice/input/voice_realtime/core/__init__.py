@@ -8,12 +8,16 @@
 
 from .base_client import BaseVoiceClient
 from .audio_manager import AudioManager
+from .audio_ring import PCMRingBuffer
+from .vad_gate import VADGate
 from .state_manager import StateManager, ConversationState
 from .voice_client_factory import VoiceClientFactory, get_voice_client, reset_global_clients
 
 __all__ = [
     'BaseVoiceClient',
     'AudioManager',
+    'PCMRingBuffer',
+    'VADGate',
     'StateManager',
     'ConversationState',
     'VoiceClientFactory',
@@ -6,17 +6,18 @@
 处理音频输入输出、录音、播放等功能
 """
 
-import queue
 import threading
 import time
 import base64
 import logging
 from typing import Optional, Callable
-from contextlib import suppress
 from collections import deque
 
 import numpy as np
 
+from .audio_ring import PCMRingBuffer
+from .vad_gate import VADGate
+
 # 尝试导入pyaudio，如果失败则提供友好提示
 try:
     import pyaudio
@@ -40,7 +41,12 @@ class AudioManager:
         output_sample_rate: int = 24000,
         chunk_size_ms: int = 20,  # 优化：降低到20ms以提高口型同步更新率（50FPS，接近60FPS目标）
         vad_threshold: float = 0.02,
-        echo_suppression: bool = True
+        echo_suppression: bool = True,
+        input_buffer_seconds: float = 5.0,
+        output_buffer_seconds: float = 60.0,
+        input_stream=None,
+        output_stream=None,
+        vad_options: Optional[dict] = None
     ):
         """
         初始化音频管理器
@@ -51,8 +57,12 @@ class AudioManager:
             chunk_size_ms: 音频块大小（毫秒）- 20ms提供50FPS更新率，接近Live2D 60FPS口型同步目标
             vad_threshold: 静音检测阈值（0-1）
             echo_suppression: 是否启用回声抑制
+            input_buffer_seconds: 采集环形缓冲区容量（秒），写满时丢弃新帧
+            output_buffer_seconds: 播放环形缓冲区初始容量（秒），AI音频通常快于实时到达，写满时扩容不丢帧
+            input_stream/output_stream: 外部提供的音频流（需实现read/write），用于离线测试，此时不依赖PyAudio
+            vad_options: VAD门选项（见 vad_gate.VAD_OPTION_KEYS），vad_gate=False 时退回整段静音超过2秒才跳过
         """
-        if not PYAUDIO_AVAILABLE:
+        if not PYAUDIO_AVAILABLE and (input_stream is None or output_stream is None):
             raise ImportError(
                 "PyAudio is not installed. Please install it with: "
                 "pip install pyaudio"
@@ -70,13 +80,23 @@ class AudioManager:
 
         # PyAudio实例
         self.pya = None
-        self.input_stream = None
-        self.output_stream = None
-
-        # 队列
-        self.input_queue = queue.Queue()
-        self.output_queue = queue.Queue()
-        self.b64_output_queue = queue.Queue()
+        self.input_stream = input_stream
+        self.output_stream = output_stream
+        self._external_streams = input_stream is not None and output_stream is not None
+
+        # 环形缓冲区：预分配固定帧长的PCM，采集→发送、接收→播放之间只传指针
+        # 采集端写满时丢弃新帧（不能阻塞声卡回调）；播放端扩容，长回复不丢音频，
+        # 也不阻塞接收线程（阻塞会连带延误打断等事件）
+        self.input_ring = PCMRingBuffer(
+            self.input_chunk_size, int(input_buffer_seconds * 1000 / chunk_size_ms), name="input")
+        self.output_ring = PCMRingBuffer(
+            self.output_chunk_size, int(output_buffer_seconds * 1000 / chunk_size_ms), name="output",
+            grow_when_full=True)
+        # VAD门：只上行语音段、前导/拖尾和保活帧
+        self.vad_gate = VADGate.from_options(
+            input_sample_rate, chunk_size_ms, {'vad_threshold': vad_threshold, **(vad_options or {})})
+        self.send_batch_frames = 5  # 发送线程积压时单次最多合并的帧数
+        self.play_batch_frames = 5  # 播放线程单次写入声卡的最大帧数（100ms，打断响应不超过一批）
 
         # 状态控制
         self.is_running = False
@@ -109,7 +129,7 @@ class AudioManager:
 
         # 线程
         self.input_thread = None
-        self.output_decoder_thread = None
+        self.sender_thread = None
         self.output_player_thread = None
 
         # 初始化高级口型同步引擎（提前初始化，避免首次播放时阻塞）
@@ -136,7 +156,9 @@ class AudioManager:
             logger.error(f"初始化口型同步引擎失败: {e}")
 
         # 回调函数
-        self.on_audio_input: Optional[Callable[[bytes], None]] = None
+        self.on_audio_encoded: Optional[Callable[[str], None]] = None  # 发送线程上Base64编码一次后回调
+        self.on_audio_input: Optional[Callable[[bytes], None]] = None  # 兼容：未设置on_audio_encoded时回调原始PCM
+        self.send_gate: Optional[Callable[[], bool]] = None  # 返回False时丢弃待发送帧，不做编码
         self.on_playback_started: Optional[Callable[[], None]] = None
         self.on_playback_ended: Optional[Callable[[], None]] = None
 
@@ -145,7 +167,9 @@ class AudioManager:
             'input_chunks': 0,
             'output_chunks': 0,
             'silence_chunks': 0,
-            'muted_chunks': 0
+            'muted_chunks': 0,
+            'sent_frames': 0,
+            'gated_frames': 0
         }
 
         logger.info(f"AudioManager initialized: input={input_sample_rate}Hz, "
@@ -158,6 +182,9 @@ class AudioManager:
         返回:
             bool: 是否成功初始化
         """
+        if self._external_streams:
+            return True
+
         try:
             # 创建PyAudio实例
             self.pya = pyaudio.PyAudio()
@@ -207,13 +234,13 @@ class AudioManager:
         )
         self.input_thread.start()
 
-        # 启动输出解码线程
-        self.output_decoder_thread = threading.Thread(
-            target=self._output_decoder_loop,
+        # 启动发送线程（编码并交给网络层）
+        self.sender_thread = threading.Thread(
+            target=self._sender_loop,
             daemon=True,
-            name="AudioDecoder"
+            name="AudioSender"
         )
-        self.output_decoder_thread.start()
+        self.sender_thread.start()
 
         # 启动输出播放线程
         self.output_player_thread = threading.Thread(
@@ -242,11 +269,11 @@ class AudioManager:
         self.ai_response_done = False
         self.empty_queue_count = 0
 
-        # 清空队列
-        self._clear_all_queues()
+        # 清空缓冲区
+        self.reset_buffers()
 
         # 等待线程结束
-        for thread in [self.input_thread, self.output_decoder_thread, self.output_player_thread]:
+        for thread in [self.input_thread, self.sender_thread, self.output_player_thread]:
             if thread and thread.is_alive():
                 thread.join(timeout=1.0)
 
@@ -282,12 +309,12 @@ class AudioManager:
                 pass
             self.pya = None
 
-    def _clear_all_queues(self):
-        """清空所有队列"""
-        for q in [self.input_queue, self.output_queue, self.b64_output_queue]:
-            while not q.empty():
-                with suppress(queue.Empty):
-                    q.get_nowait()
+    def reset_buffers(self):
+        """丢弃采集与播放缓冲区中的全部音频（只重置读写指针）"""
+        self.input_ring.reset()
+        self.output_ring.reset()
+        if self.vad_gate:
+            self.vad_gate.reset()
 
     def _input_loop(self):
         """输入音频循环"""
@@ -311,6 +338,17 @@ class AudioManager:
                 # 检查是否应该静音
                 if self.force_mute or not self.is_recording:
                     self.stats['muted_chunks'] += 1
+                    if self.vad_gate:
+                        self.vad_gate.reset()
+                    continue
+
+                # VAD门：只写入语音段（开门时连同前导缓冲）与保活帧
+                if self.vad_gate:
+                    frames = self.vad_gate.process(audio_data)
+                    if not frames:
+                        self.stats['silence_chunks'] += 1
+                    for frame in frames:
+                        self.input_ring.write(frame)
                     continue
 
                 # 静音检测
@@ -322,41 +360,66 @@ class AudioManager:
                 else:
                     silence_duration = 0
 
-                # 添加到队列
-                self.input_queue.put(audio_data)
-
-                # 触发回调
-                if self.on_audio_input:
-                    self.on_audio_input(audio_data)
+                # 写入采集缓冲区，由发送线程编码发送
+                self.input_ring.write(audio_data)
 
             except Exception as e:
                 if self.is_running:
                     logger.error(f"Input loop error: {e}")
                 time.sleep(0.1)
 
-    def _output_decoder_loop(self):
-        """输出音频解码循环"""
+    def _sender_loop(self):
+        """发送循环：从采集缓冲区取帧，Base64编码一次后交给网络层"""
         while self.is_running:
             try:
-                # 从Base64队列获取数据
-                audio_b64 = self.b64_output_queue.get(timeout=0.1)
+                frames = self.input_ring.peek(self.send_batch_frames, timeout=0.1)
+                if frames is None:
+                    continue
 
-                if audio_b64:
-                    # 解码Base64
-                    try:
-                        audio_bytes = base64.b64decode(audio_b64)
-                        # 添加到播放队列
-                        self.output_queue.put(audio_bytes)
-                    except Exception as e:
-                        logger.error(f"Failed to decode audio: {e}")
+                if self.send_gate and not self.send_gate():
+                    self.stats['gated_frames'] += len(frames)
+                elif self.on_audio_encoded:
+                    self.on_audio_encoded(base64.b64encode(frames).decode('ascii'))
+                    self.stats['sent_frames'] += len(frames)
+                elif self.on_audio_input:
+                    self.on_audio_input(frames.tobytes())
+                    self.stats['sent_frames'] += len(frames)
+
+                self.input_ring.release()
 
-            except queue.Empty:
-                continue
             except Exception as e:
                 if self.is_running:
-                    logger.error(f"Decoder loop error: {e}")
+                    logger.error(f"Sender loop error: {e}")
+                self.input_ring.release()
                 time.sleep(0.1)
 
+    def _play_frames(self, frames: np.ndarray):
+        """播放若干帧（阻塞到写入声卡完成）并登记到口型同步缓冲区"""
+        with self.buffer_lock:
+            # 登记的是环形缓冲区中的帧视图；播放缓冲区容量远大于口型窗口，已播放的帧不会很快被覆盖
+            for frame in frames:
+                self.lip_sync_buffer.append(frame)
+            self.chunk_counter += len(frames)
+
+        # 在第一次播放时记录开始时间
+        if self.playback_start_time is None:
+            self.playback_start_time = time.time()
+
+        if self.output_stream:
+            self.output_stream.write(frames.data.cast('B'))
+        self.stats['output_chunks'] += len(frames)
+
+    def _drain_output_ring(self) -> int:
+        """播放缓冲区中剩余的全部帧，返回帧数"""
+        played = 0
+        while True:
+            frames = self.output_ring.peek(self.play_batch_frames)
+            if frames is None:
+                return played
+            self._play_frames(frames)
+            self.output_ring.release()
+            played += len(frames)
+
     def _output_player_loop(self):
         """输出音频播放循环"""
         was_playing = False
@@ -364,12 +427,10 @@ class AudioManager:
 
         while self.is_running:
             try:
-                # 从播放队列获取数据
-                audio_chunk = None
-                with suppress(queue.Empty):
-                    audio_chunk = self.output_queue.get(timeout=0.1)
+                # 从播放缓冲区取帧（视图，不拷贝）
+                frames = self.output_ring.peek(self.play_batch_frames, timeout=0.1)
 
-                if audio_chunk:
+                if frames is not None:
                     # 重置连续空计数
                     consecutive_empty = 0
 
@@ -388,32 +449,9 @@ class AudioManager:
                             self.on_playback_started()
                         logger.debug("Started audio playback")
 
-                    # 播放音频
-                    if self.output_stream:
-                        # 🔧 关键修复：将大的audio_chunk切分成output_chunk_size的小块
-                        # 原因：从队列接收的audio_chunk可能很大（如320ms），需要切分成20ms小块
-
-                        # 切分音频块
-                        audio_array = np.frombuffer(audio_chunk, dtype=np.int16)
-                        num_small_chunks = (len(audio_array) + self.output_chunk_size - 1) // self.output_chunk_size
-
-                        for i in range(num_small_chunks):
-                            start_idx = i * self.output_chunk_size
-                            end_idx = min((i + 1) * self.output_chunk_size, len(audio_array))
-                            small_chunk = audio_array[start_idx:end_idx].tobytes()
-
-                            # 将小块加入滑动窗口缓冲区
-                            with self.buffer_lock:
-                                self.lip_sync_buffer.append(small_chunk)
-                                self.chunk_counter += 1
-
-                        # 在第一次播放时记录开始时间
-                        if self.playback_start_time is None:
-                            self.playback_start_time = time.time()
-
-                        # 播放音频块（阻塞，直到播放完成）
-                        self.output_stream.write(audio_chunk)
-                        self.stats['output_chunks'] += 1
+                    # 播放音频（写入期间被打断时 release 不再移动读指针）
+                    self._play_frames(frames)
+                    self.output_ring.release()
 
                 else:
                     # 队列为空，检查是否结束播放
@@ -426,14 +464,10 @@ class AudioManager:
 
                         # 如果AI已完成且连续空队列达到阈值
                         if self.ai_response_done:
-                            # 检查两个队列是否都真正为空
-                            b64_empty = self.b64_output_queue.empty()
-                            output_empty = self.output_queue.empty()
-
-                            # 只有当两个队列都空且连续空闲时才结束
-                            if b64_empty and output_empty and consecutive_empty > 7:
+                            # 只有当播放缓冲区为空且连续空闲时才结束
+                            if self.output_ring.is_empty() and consecutive_empty > 7:
                                 should_end = True
-                                logger.info("AI response complete, both queues empty, ending after 0.7s")
+                                logger.info("AI response complete, output buffer empty, ending after 0.7s")
                             elif consecutive_empty > 15:
                                 # 增加一个更长的安全阈值
                                 should_end = True
@@ -442,15 +476,8 @@ class AudioManager:
                         # 防止永久等待的强制结束
                         if self.empty_queue_count > 30:
                             # 强制结束前，尝试播放剩余数据
-                            remaining_chunks = 0
-                            while not self.output_queue.empty():
-                                try:
-                                    chunk = self.output_queue.get_nowait()
-                                    if self.output_stream and chunk:
-                                        self.output_stream.write(chunk)
-                                        remaining_chunks += 1
-                                except:
-                                    break
+                            self.output_ring.flush_partial()
+                            remaining_chunks = self._drain_output_ring()
 
                             if remaining_chunks > 0:
                                 logger.info(f"Flushed {remaining_chunks} remaining chunks before forcing end")
@@ -463,15 +490,7 @@ class AudioManager:
                             self._stop_lip_sync_thread()
 
                             # 最后的清理，确保没有残留数据
-                            final_chunks = 0
-                            while not self.output_queue.empty():
-                                try:
-                                    chunk = self.output_queue.get_nowait()
-                                    if self.output_stream and chunk:
-                                        self.output_stream.write(chunk)
-                                        final_chunks += 1
-                                except:
-                                    break
+                            final_chunks = self._drain_output_ring()
 
                             if final_chunks > 0:
                                 logger.debug(f"Played {final_chunks} final chunks before ending")
@@ -499,6 +518,7 @@ class AudioManager:
 
             except Exception as e:
                 logger.error(f"Player loop error: {e}")
+                self.output_ring.release()
                 time.sleep(0.1)
 
     def _lip_sync_update_loop(self):
@@ -538,7 +558,7 @@ class AudioManager:
                 # 从缓冲区提取音频块
                 audio_chunk = self._extract_audio_from_buffer(target_sample_pos)
 
-                if audio_chunk:
+                if audio_chunk is not None:
                     try:
                         # 调用引擎更新Live2D
                         self._update_live2d_with_advanced_engine(audio_chunk)
@@ -558,8 +578,8 @@ class AudioManager:
 
         logger.info("口型同步更新线程结束")
 
-    def _extract_audio_from_buffer(self, target_sample_pos: int) -> Optional[bytes]:
-        """从滑动窗口缓冲区提取音频块（基于时间戳）"""
+    def _extract_audio_from_buffer(self, target_sample_pos: int) -> Optional[np.ndarray]:
+        """从滑动窗口缓冲区提取音频块（基于时间戳），返回单帧PCM视图"""
         try:
             with self.buffer_lock:
                 if not self.lip_sync_buffer:
@@ -664,6 +684,12 @@ class AudioManager:
         except:
             return False
 
+    def set_vad_threshold(self, threshold: float):
+        """设置静音检测阈值（0-1）"""
+        self.vad_threshold = threshold
+        if self.vad_gate:
+            self.vad_gate.energy_threshold = threshold
+
     def start_recording(self):
         """开始录音"""
         self.is_recording = True
@@ -675,32 +701,27 @@ class AudioManager:
         logger.info("Recording stopped")
 
     def add_output_audio(self, audio_b64: str):
-        """添加要播放的音频（Base64格式）"""
+        """添加要播放的音频（Base64格式），直接解码进播放缓冲区"""
         self.ai_response_done = False
         self.empty_queue_count = 0
-        self.b64_output_queue.put(audio_b64)
+        try:
+            self.output_ring.write(base64.b64decode(audio_b64))
+        except Exception as e:
+            logger.error(f"Failed to decode audio: {e}")
 
     def mark_response_done(self):
         """标记AI响应已完成"""
         logger.info("AI response marked as done")
+        # 不足一帧的尾音补零后入环，保证完整播放
+        self.output_ring.flush_partial()
         self.ai_response_done = True
 
     def clear_output_buffer(self):
         """清空输出缓冲区（更彻底的清理）"""
-        cleared_b64 = 0
-        cleared_output = 0
-
-        # 清空Base64队列
-        while not self.b64_output_queue.empty():
-            with suppress(queue.Empty):
-                self.b64_output_queue.get_nowait()
-                cleared_b64 += 1
+        cleared_output = len(self.output_ring)
 
-        # 清空输出队列
-        while not self.output_queue.empty():
-            with suppress(queue.Empty):
-                self.output_queue.get_nowait()
-                cleared_output += 1
+        # 重置播放缓冲区指针
+        self.output_ring.reset()
 
         # 清空口型同步缓冲区
         with self.buffer_lock:
@@ -712,8 +733,8 @@ class AudioManager:
         self.ai_response_done = False
         self.empty_queue_count = 0
 
-        if cleared_b64 > 0 or cleared_output > 0:
-            logger.info(f"Output buffers cleared: b64={cleared_b64}, output={cleared_output}")
+        if cleared_output > 0:
+            logger.info(f"Output buffers cleared: frames={cleared_output}")
         else:
             logger.debug("Output buffers were already empty")
 
@@ -729,8 +750,8 @@ class AudioManager:
         self.empty_queue_count = 0
         self.clear_output_buffer()
 
-        # 重置音频流
-        if self.output_stream:
+        # 重置音频流（丢弃声卡中已写入的音频；外部提供的流不重建）
+        if self.output_stream and self.pya:
             try:
                 if self.output_stream.is_active():
                     self.output_stream.stop_stream()
@@ -762,7 +783,10 @@ class AudioManager:
             'is_running': self.is_running,
             'is_recording': self.is_recording,
             'is_playing': self.is_playing,
-            'stats': self.stats.copy()
+            'stats': self.stats.copy(),
+            'input_buffer': self.input_ring.get_stats(),
+            'vad': self.vad_gate.get_stats() if self.vad_gate else None,
+            'output_buffer': self.output_ring.get_stats()
         }
 
     def _get_live2d_widget(self):
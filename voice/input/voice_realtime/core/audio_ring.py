@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PCM帧环形缓冲区
+预分配固定大小的int16帧，在采集、网络发送、播放各阶段之间传递音频：
+- 写入方把任意长度的PCM切成固定帧拷入预分配数组（每个样本只拷贝一次）
+- 写满时默认丢弃新帧（采集端，宁丢不堵）；grow_when_full=True 时按倍数扩容，不丢帧（播放端）
+- 读取方通过 peek() 拿到连续帧的只读视图（不拷贝），用完后 release()
+- reset() 只重置读写指针（扩容过的环恢复初始容量），用于打断/断开时瞬间丢弃全部缓冲
+单生产者/单消费者使用，内部用一把锁保护指针。
+"""
+
+import threading
+from typing import Optional, Union
+
+import numpy as np
+
+
+class PCMRingBuffer:
+    """
+    固定帧长的PCM环形缓冲区
+
+    参数:
+        frame_samples: 每帧样本数（如 16kHz×20ms = 320）
+        capacity_frames: 可容纳的帧数（grow_when_full 时为初始容量，reset() 后恢复）
+        name: 名称（日志/统计用）
+        grow_when_full: 写满时是否扩容；否则丢弃新帧并计入 dropped_frames
+    """
+
+    def __init__(self, frame_samples: int, capacity_frames: int, name: str = "pcm",
+                 grow_when_full: bool = False):
+        self.frame_samples = int(frame_samples)
+        self.capacity = int(capacity_frames)
+        self.initial_capacity = self.capacity
+        self.name = name
+        self.grow_when_full = grow_when_full
+        self._frames = np.zeros((self.capacity, self.frame_samples), dtype=np.int16)
+        # 不足一帧的尾部样本，攒满一帧再入环
+        self._partial = np.zeros(self.frame_samples, dtype=np.int16)
+        self._partial_len = 0
+        # 读写位置为累计帧序号，槽位 = 序号 % 容量
+        self._read_seq = 0
+        self._write_seq = 0
+        self._peeked = 0
+        self._generation = 0
+        self._cond = threading.Condition(threading.Lock())
+        self.dropped_frames = 0
+        self.written_frames = 0
+        self.grow_count = 0
+
+    # ---------- 写入 ----------
+
+    def write(self, data: Union[bytes, bytearray, memoryview, np.ndarray]) -> int:
+        """写入PCM（int16），返回入环的完整帧数；缓冲区满时扩容或丢弃新帧并计数"""
+        samples = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.int16)
+        written = 0
+        with self._cond:
+            offset = 0
+            total = len(samples)
+            # 先补齐上次剩下的半帧
+            if self._partial_len:
+                take = min(self.frame_samples - self._partial_len, total)
+                self._partial[self._partial_len:self._partial_len + take] = samples[:take]
+                self._partial_len += take
+                offset = take
+                if self._partial_len == self.frame_samples:
+                    written += self._push_frames(self._partial[np.newaxis, :])
+                    self._partial_len = 0
+            whole = (total - offset) // self.frame_samples
+            if whole:
+                block = samples[offset:offset + whole * self.frame_samples].reshape(whole, self.frame_samples)
+                written += self._push_frames(block)
+                offset += whole * self.frame_samples
+            rest = total - offset
+            if rest:
+                self._partial[:rest] = samples[offset:]
+                self._partial_len = rest
+            if written:
+                self._cond.notify_all()
+        return written
+
+    def _push_frames(self, block: np.ndarray) -> int:
+        """把若干整帧拷入环中（调用方持有锁）"""
+        free = self.capacity - (self._write_seq - self._read_seq)
+        if len(block) > free and self.grow_when_full:
+            self._resize(max(self.capacity * 2, self._write_seq - self._read_seq + len(block)))
+            free = self.capacity - (self._write_seq - self._read_seq)
+        count = min(len(block), free)
+        if count < len(block):
+            self.dropped_frames += len(block) - count
+        start = self._write_seq % self.capacity
+        first = min(count, self.capacity - start)
+        self._frames[start:start + first] = block[:first]
+        if count > first:
+            self._frames[:count - first] = block[first:count]
+        self._write_seq += count
+        self.written_frames += count
+        return count
+
+    def _resize(self, capacity: int):
+        """换用新容量的数组，未读帧按序号搬到新槽位（调用方持有锁）
+
+        旧数组不再写入，读取方手中 peek() 得到的视图仍然有效
+        """
+        frames = np.zeros((capacity, self.frame_samples), dtype=np.int16)
+        seqs = np.arange(self._read_seq, self._write_seq)
+        frames[seqs % capacity] = self._frames[seqs % self.capacity]
+        if capacity > self.capacity:
+            self.grow_count += 1
+        self._frames = frames
+        self.capacity = capacity
+
+    def flush_partial(self) -> int:
+        """把不足一帧的尾部补零后入环（一段音频结束时调用）"""
+        with self._cond:
+            if not self._partial_len:
+                return 0
+            self._partial[self._partial_len:] = 0
+            self._partial_len = 0
+            written = self._push_frames(self._partial[np.newaxis, :])
+            if written:
+                self._cond.notify_all()
+            return written
+
+    # ---------- 读取 ----------
+
+    def peek(self, max_frames: int = 1, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        返回最多 max_frames 个连续帧的视图（形状 [n, frame_samples]），没有数据时等待 timeout 秒。
+        视图在 release() 之前不会被写入方覆盖；跨越环尾时只返回到环尾为止的部分。
+        """
+        with self._cond:
+            if self._write_seq == self._read_seq and timeout:
+                self._cond.wait(timeout)
+            available = self._write_seq - self._read_seq
+            if available <= 0:
+                return None
+            start = self._read_seq % self.capacity
+            count = min(max_frames, available, self.capacity - start)
+            self._peeked = count
+            view = self._frames[start:start + count]
+            view.flags.writeable = False
+            return view
+
+    def release(self, frames: Optional[int] = None):
+        """释放 peek() 得到的帧；期间发生过 reset() 时 peek 的帧已作废，不再移动读指针"""
+        with self._cond:
+            count = self._peeked if frames is None else min(frames, self._peeked)
+            self._read_seq += count
+            self._peeked = 0
+
+    @property
+    def generation(self) -> int:
+        """reset() 次数，消费者可据此判断手中的视图是否已被打断作废"""
+        return self._generation
+
+    def reset(self):
+        """丢弃全部缓冲（只移动指针，不清零数据）"""
+        with self._cond:
+            self._read_seq = self._write_seq
+            self._partial_len = 0
+            self._peeked = 0
+            self._generation += 1
+            if self.capacity != self.initial_capacity:
+                # 扩容只为容纳一次长回复，清空后归还内存
+                self._resize(self.initial_capacity)
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return self._write_seq - self._read_seq
+
+    def is_empty(self) -> bool:
+        return self._write_seq == self._read_seq and not self._partial_len
+
+    def get_stats(self) -> dict:
+        return {
+            'name': self.name,
+            'buffered_frames': len(self),
+            'capacity_frames': self.capacity,
+            'written_frames': self.written_frames,
+            'dropped_frames': self.dropped_frames,
+            'grow_count': self.grow_count,
+            'resets': self._generation,
+        }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地语音活动检测门（VAD Gate）
+在采集线程上逐帧判断是否为语音，只把语音段（含前导缓冲和拖尾）和周期性保活帧送往上行：
+- 判决：短时能量 + 过零率（清辅音能量低但过零率高），噪声底自适应；
+  安装了 webrtcvad 时可改用其小模型判决
+- 起始：连续 onset_frames 帧判为语音才开门，开门时补发前导缓冲（pre-roll），不丢字头
+- 拖尾（hangover）：最后一帧语音之后继续发送一段时间，覆盖句间停顿和服务端VAD的断句静音
+- 保活：关门期间每隔 keepalive_ms 放行一帧，保持会话活跃
+"""
+
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 可选的WebRTC VAD模型
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+    webrtcvad = None
+
+logger = logging.getLogger(__name__)
+
+# 客户端/适配器透传给 AudioManager 的VAD参数名
+VAD_OPTION_KEYS = (
+    'vad_gate', 'vad_threshold', 'vad_hangover_ms', 'vad_preroll_ms', 'vad_keepalive_ms', 'vad_use_model'
+)
+
+
+def vad_options_from_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """从客户端参数中挑出VAD相关的选项"""
+    return {key: kwargs[key] for key in VAD_OPTION_KEYS if key in kwargs}
+
+
+class VADGate:
+    """
+    语音活动检测门
+
+    参数:
+        sample_rate: 采样率（Hz）
+        frame_ms: 帧长（毫秒），使用模型时须为10/20/30
+        energy_threshold: 归一化RMS能量阈值（0-1）
+        zcr_threshold: 清辅音判定的过零率下限（0-1）
+        hangover_ms: 语音结束后继续发送的时长
+        preroll_ms: 开门时补发的前导音频时长
+        keepalive_ms: 关门期间保活帧间隔，0表示不发送
+        onset_frames: 连续多少帧语音才开门（抑制单帧噪声）
+        use_model: 是否使用 webrtcvad 模型判决（不可用时退回能量+过零率）
+        model_mode: webrtcvad 激进程度（0-3）
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        energy_threshold: float = 0.02,
+        zcr_threshold: float = 0.25,
+        hangover_ms: int = 1000,
+        preroll_ms: int = 300,
+        keepalive_ms: int = 5000,
+        onset_frames: int = 2,
+        use_model: bool = False,
+        model_mode: int = 2
+    ):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.onset_frames = max(1, int(onset_frames))
+        self.hangover_frames = max(0, int(hangover_ms / frame_ms))
+        self.keepalive_frames = int(keepalive_ms / frame_ms) if keepalive_ms > 0 else 0
+        # 前导缓冲需容纳确认开门所用的帧
+        self._preroll = deque(maxlen=max(0, int(preroll_ms / frame_ms)) + self.onset_frames)
+
+        self._model = None
+        if use_model:
+            if WEBRTCVAD_AVAILABLE:
+                self._model = webrtcvad.Vad(model_mode)
+            else:
+                logger.warning("webrtcvad 未安装，VAD使用能量+过零率判决")
+
+        # 噪声底（归一化RMS），关门期间的非语音帧慢速更新
+        self.noise_floor = 0.0
+        self.noise_ratio = 3.0
+
+        self.is_open = False
+        self._speech_run = 0
+        self._hangover_left = 0
+        self._since_forward = 0
+
+        self.stats = {
+            'frames_in': 0,
+            'speech_frames': 0,
+            'frames_forwarded': 0,
+            'keepalive_frames': 0,
+            'segments': 0
+        }
+
+    @classmethod
+    def from_options(cls, sample_rate: int, frame_ms: int, options: Dict[str, Any]) -> Optional["VADGate"]:
+        """按客户端透传的选项创建，vad_gate 为 False 时返回 None"""
+        if not options.get('vad_gate', True):
+            return None
+        return cls(
+            sample_rate=sample_rate,
+            frame_ms=frame_ms,
+            energy_threshold=options.get('vad_threshold', 0.02),
+            hangover_ms=options.get('vad_hangover_ms', 1000),
+            preroll_ms=options.get('vad_preroll_ms', 300),
+            keepalive_ms=options.get('vad_keepalive_ms', 5000),
+            use_model=options.get('vad_use_model', False)
+        )
+
+    def is_speech(self, frame: bytes) -> bool:
+        """判断单帧是否为语音"""
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        if not len(samples):
+            return False
+        energy = float(np.sqrt(np.mean(samples * samples))) / 32768.0
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+
+        if self._model is not None:
+            # 模型判决，能量过低的帧直接视为静音
+            speech = energy >= threshold * 0.5 and self._model.is_speech(bytes(frame), self.sample_rate)
+        elif energy >= threshold:
+            speech = True
+        elif energy >= threshold * 0.5:
+            # 清辅音（s/sh/f）：能量偏低但过零率高
+            zcr = np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1])) / len(samples)
+            speech = zcr >= self.zcr_threshold
+        else:
+            speech = False
+
+        if not speech and not self.is_open:
+            self.noise_floor = energy if self.noise_floor == 0.0 else 0.95 * self.noise_floor + 0.05 * energy
+        return speech
+
+    def process(self, frame: bytes) -> List[bytes]:
+        """输入一帧，返回应发送的帧（开门瞬间包含前导缓冲）"""
+        self.stats['frames_in'] += 1
+        speech = self.is_speech(frame)
+        if speech:
+            self.stats['speech_frames'] += 1
+
+        if self.is_open:
+            if speech:
+                self._hangover_left = self.hangover_frames
+            elif self._hangover_left > 0:
+                self._hangover_left -= 1
+            else:
+                self.is_open = False
+                self._speech_run = 0
+                self._since_forward = 0
+                self._preroll.append(frame)
+                return []
+            return self._forward([frame])
+
+        self._preroll.append(frame)
+        self._speech_run = self._speech_run + 1 if speech else 0
+        if self._speech_run >= self.onset_frames:
+            self.is_open = True
+            self._hangover_left = self.hangover_frames
+            self.stats['segments'] += 1
+            frames = list(self._preroll)
+            self._preroll.clear()
+            return self._forward(frames)
+
+        self._since_forward += 1
+        if self.keepalive_frames and self._since_forward >= self.keepalive_frames:
+            # 保活帧已发出，前导缓冲从它之后重新累积，保证上行音频不重复
+            self.stats['keepalive_frames'] += 1
+            self._preroll.clear()
+            return self._forward([frame])
+        return []
+
+    def _forward(self, frames: List[bytes]) -> List[bytes]:
+        self._since_forward = 0
+        self.stats['frames_forwarded'] += len(frames)
+        return frames
+
+    def reset(self):
+        """丢弃前导缓冲并关门（麦克风静音、打断或断开时调用）"""
+        self.is_open = False
+        self._speech_run = 0
+        self._hangover_left = 0
+        self._since_forward = 0
+        self._preroll.clear()
+
+    def get_stats(self) -> dict:
+        stats = self.stats.copy()
+        stats['is_open'] = self.is_open
+        stats['noise_floor'] = self.noise_floor
+        stats['model'] = self._model is not None
+        return stats
@@ -23,6 +23,7 @@ from queue import Queue, Empty
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from system.config import config, AI_NAME
+from system.metrics import TTS_QUEUE_DEPTH, TTS_QUEUE_LAG
 
 logger = logging.getLogger("VoiceIntegration")
 
@@ -50,8 +51,9 @@ class VoiceIntegration:
         # 流式处理状态
         self.text_buffer = ""  # 文本缓冲区
         self.is_processing = False  # 是否正在处理
-        self.sentence_queue = Queue()  # 句子队列
+        self.sentence_queue = Queue()  # 句子队列，元素为(句子, 入队时间)
         self.audio_queue = Queue()  # 音频队列
+        TTS_QUEUE_DEPTH.set_function(self.sentence_queue.qsize)
         
         # 播放状态控制
         self.is_playing = False
@@ -163,7 +165,7 @@ class VoiceIntegration:
                 # 检查句子是否有效
                 if sentence.strip():
                     # 加入句子队列
-                    self.sentence_queue.put(sentence)
+                    self.sentence_queue.put((sentence, time.monotonic()))
                     logger.info(f"加入句子队列: {sentence[:50]}...")
                     
                     # 音频处理线程始终在运行，无需检查启动状态
@@ -207,7 +209,8 @@ class VoiceIntegration:
             while True:
                 try:
                     # 从句子队列获取句子，增加超时时间
-                    sentence = self.sentence_queue.get(timeout=10)
+                    sentence, queued_at = self.sentence_queue.get(timeout=10)
+                    TTS_QUEUE_LAG.observe(time.monotonic() - queued_at)
                         
                     # 设置处理状态
                     self.is_processing = True
@@ -540,7 +543,7 @@ class VoiceIntegration:
             # 将剩余文本作为最后一个句子处理
             remaining_text = self.text_buffer.strip()
             if remaining_text:
-                self.sentence_queue.put(remaining_text)
+                self.sentence_queue.put((remaining_text, time.monotonic()))
                 logger.debug(f"处理剩余文本: {remaining_text[:50]}...")
         
         # 不再发送完成信号，因为线程是持续运行的